@@ -1,10 +1,27 @@
 import re
-from typing import List, Dict, Any, Tuple, Optional
-import tiktoken
+from bisect import bisect_left
+from itertools import accumulate
+from typing import List, Dict, Any, Tuple, Optional, Iterator
+import numpy as np
 from app.chunking.models import DocumentChunk
+from app.chunking.records import ChunkRecord, DocumentContext
 from app.utils.logging import log_step, Timer
 
 
+# Heading patterns, compiled once and applied to one line at a time.
+# Markdown headings ("## Title") - level is the number of hashes
+_MARKDOWN_HEADING = re.compile(r"(#{1,6})\s+(.+)$")
+# HTML headings ("<h2>Title</h2>") - level comes from the tag
+_HTML_HEADING = re.compile(r"<h([1-6])[^>]*>(.+?)</h\1>")
+# Numbered headings ("1.2 Section Title") - level is the depth of the numbering
+_NUMBERED_HEADING = re.compile(r"((?:\d+\.)+\d*)\s+(.+)$")
+# Underline for the previous line ("=====" is level 1, "-----" is level 2)
+_UNDERLINE = re.compile(r"(=|-)\1{2,}\s*$")
+
+# Byte length of every token, per tokenizer name (see DocumentChunker._token_byte_lengths)
+_TOKEN_BYTE_LENGTHS: Dict[str, np.ndarray] = {}
+
+
 class DocumentChunker:
     """
     Handles document chunking strategies.
@@ -19,96 +36,271 @@ class DocumentChunker:
     ):
         self.default_chunk_size = default_chunk_size
         self.default_chunk_overlap = default_chunk_overlap
-        self.tokenizer = tiktoken.get_encoding(tokenizer_name)
+        self.tokenizer_name = tokenizer_name
+        self._tokenizer = None
         
-        # Regular expressions for heading detection
+        # Strategy used by the most recent chunking call (for logging)
+        self.last_strategy = None
+        
+        # Regular expressions for heading detection (see module-level patterns)
         self.heading_patterns = [
-            # Markdown headings
-            r"^#{1,6}\s+(.+)$",
-            # HTML headings
-            r"<h[1-6][^>]*>(.+?)</h[1-6]>",
-            # Common heading patterns (e.g., "1.2 Section Title")
-            r"^(?:\d+\.)+\d*\s+(.+)$",
-            # Underlined headings (===== or -----)
-            r"^(.+)\n[=\-]{3,}$"
+            _MARKDOWN_HEADING.pattern,
+            _HTML_HEADING.pattern,
+            _NUMBERED_HEADING.pattern,
+            _UNDERLINE.pattern
         ]
     
+    @property
+    def tokenizer(self):
+        """Tokenizer, loaded on first use so that creating a chunker does not load tiktoken."""
+        if self._tokenizer is None:
+            import tiktoken
+            self._tokenizer = tiktoken.get_encoding(self.tokenizer_name)
+        return self._tokenizer
+    
     def chunk_document(
         self,
         text: str,
         metadata: Dict[str, Any],
         use_headings: bool = True,
-        is_ocr: bool = False
+        is_ocr: bool = False,
+        context: Optional[DocumentContext] = None
     ) -> List[DocumentChunk]:
         """
         Chunk a document using the appropriate strategy.
         
         Args:
             text: Document text to chunk
-            metadata: Document metadata
+            metadata: Document (or page) metadata
             use_headings: Whether to use heading-based chunking (if available)
             is_ocr: Whether the text is from OCR
-            
+            context: Shared document context (built from metadata if not provided)
+        
         Returns:
             List of document chunks
         """
         with Timer("Document Chunking"):
-            log_step("Chunking", f"Chunking document {metadata.get('source_document_name', 'unknown')}")
-            
-            # For OCR text, use token-based chunking
-            if is_ocr:
-                chunks = self._token_based_chunking(text, metadata)
-                log_step("Chunking", f"Created {len(chunks)} chunks using token-based chunking for OCR text")
-                return chunks
-            
-            # Try heading-based chunking first if enabled for non-OCR text
-            elif use_headings:
-                chunks = self._heading_based_chunking(text, metadata)
-                if chunks:
-                    log_step("Chunking", f"Created {len(chunks)} chunks using heading-based chunking")
-                    return chunks
-                log_step("Chunking", "No clear headings found, falling back to token-based chunking")
-            
-            # Fall back to token-based chunking
-            chunks = self._token_based_chunking(text, metadata)
-            log_step("Chunking", f"Created {len(chunks)} chunks using token-based chunking")
+            document_name = context.document_name if context else metadata.get('source_document_name', 'unknown')
+            log_step("Chunking", f"Chunking document {document_name}")
+            
+            chunks = list(self.iter_chunks(text, metadata, use_headings=use_headings, is_ocr=is_ocr, context=context))
+            log_step("Chunking", f"Created {len(chunks)} chunks using {self.last_strategy} chunking")
             return chunks
     
-    def _heading_based_chunking(self, text: str, metadata: Dict[str, Any]) -> List[DocumentChunk]:
+    def iter_chunks(
+        self,
+        text: str,
+        metadata: Dict[str, Any],
+        use_headings: bool = True,
+        is_ocr: bool = False,
+        context: Optional[DocumentContext] = None
+    ) -> Iterator[DocumentChunk]:
         """
-        Chunk a document based on headings.
+        Lazily chunk a document, yielding chunks as they are produced.
+        
+        Uses the same strategy selection as chunk_document; the strategy used is
+        recorded in `last_strategy`.
         
         Args:
             text: Document text to chunk
-            metadata: Document metadata
+            metadata: Document (or page) metadata
+            use_headings: Whether to use heading-based chunking (if available)
+            is_ocr: Whether the text is from OCR
+            context: Shared document context (built from metadata if not provided)
+        
+        Yields:
+            Document chunks in document order
+        """
+        for record in self.iter_records(text, metadata, use_headings=use_headings, is_ocr=is_ocr, context=context):
+            yield record.to_model()
+    
+    def iter_records(
+        self,
+        text: str,
+        metadata: Dict[str, Any],
+        use_headings: bool = True,
+        is_ocr: bool = False,
+        context: Optional[DocumentContext] = None
+    ) -> Iterator[ChunkRecord]:
+        """
+        Lazily chunk a document into lightweight chunk records.
+        
+        Used on the ingest path; records share `metadata` and `context` instead of
+        copying them, and are only turned into DocumentChunk models via to_model().
+        
+        Args:
+            text: Document text to chunk
+            metadata: Page metadata (or document metadata without a context), shared by all records
+            use_headings: Whether to use heading-based chunking (if available)
+            is_ocr: Whether the text is from OCR
+            context: Shared document context (built from metadata if not provided)
+            
+        Yields:
+            Chunk records in document order
+        """
+        if context is None:
+            context = DocumentContext.from_metadata(metadata)
+        
+        # For OCR text, use token-based chunking
+        if is_ocr:
+            self.last_strategy = "token-based"
+            yield from self._iter_token_chunks(text, metadata, context)
+            return
+        
+        # Try heading-based chunking first if enabled for non-OCR text
+        if use_headings:
+            text_lines = text.split("\n")
+            headings = self._scan_headings(text_lines)
+            
+            # Need at least 3 headings to use this method
+            if len(headings) >= 3:
+                self.last_strategy = "heading-based"
+                yield from self._iter_heading_chunks(text, metadata, context, text_lines, headings)
+                return
+            log_step("Chunking", "No clear headings found, falling back to token-based chunking")
+        
+        # Fall back to token-based chunking
+        self.last_strategy = "token-based"
+        yield from self._iter_token_chunks(text, metadata, context)
+    
+    def _scan_headings(self, text_lines: List[str]) -> List[Dict[str, Any]]:
+        """
+        Find headings in a single pass over the document lines.
+        
+        Args:
+            text_lines: Document text split into lines
             
         Returns:
-            List of document chunks (empty if no headings found)
+            List of headings with their text, line index and level
         """
-        # Extract headings and their positions
         headings = []
-        text_lines = text.split("\n")
+        previous_line = ""
+        previous_is_heading = False
         
-        # Check each line for heading patterns
         for i, line in enumerate(text_lines):
-            for pattern in self.heading_patterns:
-                match = re.search(pattern, line)
-                if match:
-                    heading_text = match.group(1).strip()
-                    heading_level = len(pattern.split(r"#")[0]) if "#" in pattern else 1
-                    headings.append({
-                        "text": heading_text,
-                        "line": i,
-                        "level": heading_level
-                    })
-                    break
-        
-        # If not enough headings found, return empty list (fallback will be used)
-        if len(headings) < 3:  # Need at least 3 headings to use this method
-            return []
+            heading = None
+            stripped = line.strip()
+            
+            if stripped:
+                first_char = stripped[0]
+                
+                # Cheap first-character checks decide which pattern can apply
+                if first_char == "#":
+                    match = _MARKDOWN_HEADING.match(stripped)
+                    if match:
+                        heading = (match.group(2), len(match.group(1)))
+                elif first_char.isdigit():
+                    match = _NUMBERED_HEADING.match(stripped)
+                    if match:
+                        heading = (match.group(2), len(match.group(1).rstrip(".").split(".")))
+                elif (first_char == "=" or first_char == "-") and previous_line and not previous_is_heading:
+                    # An underline turns the previous line into a heading
+                    match = _UNDERLINE.match(stripped)
+                    if match:
+                        headings.append({
+                            "text": previous_line,
+                            "line": i - 1,
+                            "level": 1 if match.group(1) == "=" else 2
+                        })
+                        previous_line = ""
+                        previous_is_heading = True
+                        continue
+                
+                if heading is None and "<h" in line:
+                    match = _HTML_HEADING.search(line)
+                    if match:
+                        heading = (match.group(2), int(match.group(1)))
+            
+            if heading is not None:
+                headings.append({
+                    "text": heading[0].strip(),
+                    "line": i,
+                    "level": heading[1]
+                })
+            
+            previous_line = stripped
+            previous_is_heading = heading is not None
+        
+        return headings
+    
+    def _token_byte_lengths(self) -> np.ndarray:
+        """
+        Get the UTF-8 byte length of every token in the vocabulary.
+        
+        Returns:
+            Array indexed by token ID (built once per tokenizer)
+        """
+        lengths = _TOKEN_BYTE_LENGTHS.get(self.tokenizer.name)
+        if lengths is None:
+            lengths = np.zeros(self.tokenizer.n_vocab, dtype=np.int64)
+            for token in range(self.tokenizer.n_vocab):
+                try:
+                    lengths[token] = len(self.tokenizer.decode_single_token_bytes(token))
+                except KeyError:
+                    # Unused IDs in the vocabulary
+                    pass
+            _TOKEN_BYTE_LENGTHS[self.tokenizer.name] = lengths
+        return lengths
+    
+    def _token_char_offsets(self, text: str, tokens: List[int]) -> List[int]:
+        """
+        Compute the character offset at which each token starts.
+        
+        Args:
+            text: Text the tokens were encoded from
+            tokens: Token IDs for the text
+            
+        Returns:
+            List of len(tokens) + 1 character offsets (the last one is len(text))
+        """
+        # Byte offsets from a per-token length table (no per-token bytes objects)
+        byte_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum(self._token_byte_lengths()[np.asarray(tokens, dtype=np.int64)], out=byte_offsets[1:])
+        
+        # For ASCII text byte offsets are character offsets
+        if text.isascii():
+            return byte_offsets.tolist()
+        
+        # Otherwise map byte offsets to characters by counting UTF-8 lead bytes.
+        # A token starting inside a multi-byte character is assigned to that
+        # character, matching tiktoken's decode_with_offsets.
+        data = np.frombuffer(text.encode("utf-8", errors="surrogatepass"), dtype=np.uint8)
+        is_continuation = np.zeros(len(data) + 1, dtype=np.int64)
+        is_continuation[:-1] = (data & 0xC0) == 0x80
+        char_index = np.zeros(len(data) + 1, dtype=np.int64)
+        np.cumsum(1 - is_continuation[:-1], out=char_index[1:])
+        positions = np.minimum(byte_offsets, len(data))
+        return (char_index[positions] - is_continuation[positions]).tolist()
+    
+    def _iter_heading_chunks(
+        self,
+        text: str,
+        metadata: Dict[str, Any],
+        context: DocumentContext,
+        text_lines: List[str],
+        headings: List[Dict[str, Any]]
+    ) -> Iterator[ChunkRecord]:
+        """
+        Chunk a document based on headings.
+        
+        Args:
+            text: Document text to chunk
+            metadata: Document metadata
+            context: Shared document context
+            text_lines: Document text split into lines
+            headings: Headings found by _scan_headings
+            
+        Yields:
+            Document chunks, one per section (oversized sections are split by tokens)
+        """
+        # Character offset of the start of every line
+        line_offsets = [0]
+        line_offsets.extend(accumulate(len(line) + 1 for line in text_lines))
+        
+        # Tokenize the whole document once; section sizes are looked up from token offsets
+        token_offsets = self._token_char_offsets(text, self.tokenizer.encode_ordinary(text))
         
         # Create chunks based on heading sections
-        chunks = []
         heading_path = []
         
         for i in range(len(headings)):
@@ -127,74 +319,102 @@ class DocumentChunker:
             section_text = "\n".join(text_lines[start_line:end_line])
             
             # Check if section is too large
-            tokens = self.tokenizer.encode(section_text)
-            if len(tokens) > self.default_chunk_size * 1.5:
-                # If section is too large, use token-based chunking for this section
-                section_chunks = self._token_based_chunking(section_text, metadata)
+            section_start = line_offsets[start_line]
+            section_end = section_start + len(section_text)
+            token_count = bisect_left(token_offsets, section_end) - bisect_left(token_offsets, section_start)
+            if token_count > self.default_chunk_size * 1.5:
+                # If section is too large, use token-based chunking for this section,
+                # reusing the document-level token offsets
+                section_chunks = self._iter_token_chunks(
+                    text,
+                    metadata,
+                    context,
+                    token_offsets=token_offsets,
+                    start_char=section_start,
+                    end_char=section_end
+                )
                 
                 # Add heading information to each chunk
                 for chunk in section_chunks:
                     chunk.heading_path = [h["text"] for h in heading_path]
                     chunk.heading_level = current_heading["level"]
-                
-                chunks.extend(section_chunks)
+                    yield chunk
             else:
                 # Create a chunk for this section
-                chunk = DocumentChunk(
+                chunk = ChunkRecord(
                     text=section_text,
                     metadata=metadata,
-                    source_document_id=metadata.get("source_document_id", ""),
-                    source_document_name=metadata.get("source_document_name", ""),
-                    source_document_type=metadata.get("source_document_type", ""),
+                    context=context,
                     page_number=metadata.get("page_number"),
+                    start_index=section_start,
+                    end_index=section_end,
                     heading_path=[h["text"] for h in heading_path],
                     heading_level=current_heading["level"],
-                    is_ocr=metadata.get("is_ocr", False),
-                    created_by=metadata.get("created_by")
+                    is_ocr=metadata.get("is_ocr", False)
                 )
-                chunks.append(chunk)
-        
-        return chunks
+                yield chunk
     
-    def _token_based_chunking(self, text: str, metadata: Dict[str, Any]) -> List[DocumentChunk]:
+    def _iter_token_chunks(
+        self,
+        text: str,
+        metadata: Dict[str, Any],
+        context: DocumentContext,
+        token_offsets: Optional[List[int]] = None,
+        start_char: int = 0,
+        end_char: Optional[int] = None
+    ) -> Iterator[ChunkRecord]:
         """
         Chunk a document based on token count.
         
+        Windows are sliced directly from the original text using token-to-character
+        offsets, so no tokens are decoded and chunk text matches the source exactly.
+        start_index/end_index on each chunk are character offsets into `text`.
+        
         Args:
             text: Document text to chunk
             metadata: Document metadata
+            context: Shared document context
+            token_offsets: Precomputed token start offsets for `text` (encoded if not provided)
+            start_char: Start of the span of `text` to chunk
+            end_char: End of the span of `text` to chunk (defaults to the end of the text)
             
-        Returns:
-            List of document chunks
+        Yields:
+            Document chunks in text order
         """
-        tokens = self.tokenizer.encode(text)
-        chunks = []
+        if end_char is None:
+            end_char = len(text)
+        
+        # Compute token-to-character offsets once for the whole text
+        if token_offsets is None:
+            token_offsets = self._token_char_offsets(text, self.tokenizer.encode_ordinary(text))
+        
+        # Token index range covering the requested span
+        first_token = bisect_left(token_offsets, start_char)
+        last_token = max(first_token, bisect_left(token_offsets, end_char))
         
         # Split text into manageable chunks
-        for i in range(0, len(tokens), self.default_chunk_size - self.default_chunk_overlap):
-            # Get chunk tokens
-            chunk_tokens = tokens[i:i + self.default_chunk_size]
+        for i in range(first_token, last_token, self.default_chunk_size - self.default_chunk_overlap):
+            # Character span of the token window
+            window_end = min(i + self.default_chunk_size, last_token)
+            chunk_start = start_char if i == first_token else token_offsets[i]
+            chunk_end = end_char if window_end == last_token else token_offsets[window_end]
             
-            # Convert tokens back to text
-            chunk_text = self.tokenizer.decode(chunk_tokens)
+            # Slice the original text (no decode round-trip)
+            chunk_text = text[chunk_start:chunk_end]
             
             # Create chunk
-            chunk = DocumentChunk(
+            chunk = ChunkRecord(
                 text=chunk_text,
                 metadata=metadata,
-                source_document_id=metadata.get("source_document_id", ""),
-                source_document_name=metadata.get("source_document_name", ""),
-                source_document_type=metadata.get("source_document_type", ""),
+                context=context,
                 page_number=metadata.get("page_number"),
-                start_index=i,
-                end_index=i + len(chunk_tokens),
-                is_ocr=metadata.get("is_ocr", False),
-                created_by=metadata.get("created_by")
+                start_index=chunk_start,
+                end_index=chunk_end,
+                is_ocr=metadata.get("is_ocr", False)
             )
-            chunks.append(chunk)
+            yield chunk
             
             # Stop if we've reached the end of the text
-            if i + self.default_chunk_size >= len(tokens):
+            if window_end >= last_token:
                 break
-        
-        return chunks
\ No newline at end of file
+        
\ No newline at end of file
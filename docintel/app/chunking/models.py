@@ -16,11 +16,14 @@ class DocumentChunk(BaseModel):
     source_document_name: str
     source_document_type: str
     
-    # Chunk location information
+    # Chunk location information (start/end are character offsets into the page text)
     page_number: Optional[int] = None
     start_index: Optional[int] = None
     end_index: Optional[int] = None
     
+    # Position of the chunk among the stored chunks of its document
+    chunk_ordinal: Optional[int] = None
+    
     # OCR-specific information (for complex documents)
     is_ocr: bool = False
     bounding_box: Optional[Dict[str, float]] = None
@@ -0,0 +1,202 @@
+import uuid
+from collections import ChainMap
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Mapping
+
+from app.chunking.models import DocumentChunk
+
+
+class DocumentContext:
+    """
+    Document-level fields shared by every chunk record of one document.
+    
+    Built once per document instead of being copied into each page or chunk;
+    `metadata` holds the document metadata (see BaseDocumentParser.prepare_metadata).
+    """
+    
+    __slots__ = ("document_id", "document_name", "document_type", "created_by", "created_at", "metadata")
+    
+    def __init__(
+        self,
+        document_id: str,
+        document_name: str,
+        document_type: str,
+        created_by: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.document_id = document_id
+        self.document_name = document_name
+        self.document_type = document_type
+        self.created_by = created_by
+        self.created_at = created_at or datetime.now()
+        self.metadata = metadata if metadata is not None else {}
+    
+    @classmethod
+    def from_metadata(cls, metadata: Dict[str, Any]) -> "DocumentContext":
+        """
+        Build a context from parser metadata (see BaseDocumentParser.prepare_metadata).
+        
+        Args:
+            metadata: Document metadata
+        
+        Returns:
+            DocumentContext for the document
+        """
+        return cls(
+            document_id=metadata.get("source_document_id", ""),
+            document_name=metadata.get("source_document_name", ""),
+            document_type=metadata.get("source_document_type", ""),
+            created_by=metadata.get("created_by"),
+            metadata=metadata
+        )
+
+
+class ChunkRecord:
+    """
+    Compact internal representation of a chunk, used on the ingest path.
+    
+    Exposes the same attributes as DocumentChunk, so the embedder and storage
+    accept either. `metadata` holds only the page's own fields and is shared by
+    all records of the page; document fields come from the shared DocumentContext
+    (`all_metadata` combines both without copying). Call to_model() to
+    materialize a DocumentChunk at the API boundary.
+    """
+    
+    __slots__ = (
+        "chunk_id",
+        "text",
+        "metadata",
+        "context",
+        "page_number",
+        "start_index",
+        "end_index",
+        "chunk_ordinal",
+        "is_ocr",
+        "heading_path",
+        "heading_level",
+        "bounding_box",
+        "simhash"
+    )
+    
+    def __init__(
+        self,
+        text: str,
+        metadata: Dict[str, Any],
+        context: DocumentContext,
+        page_number: Optional[int] = None,
+        start_index: Optional[int] = None,
+        end_index: Optional[int] = None,
+        is_ocr: bool = False,
+        heading_path: Optional[List[str]] = None,
+        heading_level: Optional[int] = None,
+        bounding_box: Optional[Dict[str, float]] = None,
+        chunk_id: Optional[str] = None,
+        chunk_ordinal: Optional[int] = None
+    ):
+        self.chunk_id = chunk_id or str(uuid.uuid4())
+        self.text = text
+        self.metadata = metadata
+        self.context = context
+        self.page_number = page_number
+        self.start_index = start_index
+        self.end_index = end_index
+        self.chunk_ordinal = chunk_ordinal
+        self.is_ocr = is_ocr
+        self.heading_path = heading_path if heading_path is not None else []
+        self.heading_level = heading_level
+        self.bounding_box = bounding_box
+        
+        # Near-duplicate fingerprint, set during deduplication
+        self.simhash: Optional[int] = None
+    
+    @property
+    def source_document_id(self) -> str:
+        return self.context.document_id
+    
+    @property
+    def source_document_name(self) -> str:
+        return self.context.document_name
+    
+    @property
+    def source_document_type(self) -> str:
+        return self.context.document_type
+    
+    @property
+    def created_by(self) -> Optional[str]:
+        return self.context.created_by
+    
+    @property
+    def created_at(self) -> datetime:
+        return self.context.created_at
+    
+    @property
+    def updated_at(self) -> datetime:
+        return self.context.created_at
+    
+    @property
+    def all_metadata(self) -> Mapping[str, Any]:
+        """Page fields layered over the document metadata (a view, not a copy)."""
+        return ChainMap(self.metadata, self.context.metadata)
+    
+    def to_model(self) -> DocumentChunk:
+        """
+        Materialize this record as a validated DocumentChunk.
+        
+        Returns:
+            DocumentChunk with the same fields
+        """
+        return DocumentChunk(
+            chunk_id=self.chunk_id,
+            text=self.text,
+            metadata=dict(self.all_metadata),
+            source_document_id=self.context.document_id,
+            source_document_name=self.context.document_name,
+            source_document_type=self.context.document_type,
+            page_number=self.page_number,
+            start_index=self.start_index,
+            end_index=self.end_index,
+            chunk_ordinal=self.chunk_ordinal,
+            is_ocr=self.is_ocr,
+            bounding_box=self.bounding_box,
+            heading_path=self.heading_path,
+            heading_level=self.heading_level,
+            created_at=self.context.created_at,
+            updated_at=self.context.created_at,
+            created_by=self.context.created_by
+        )
+    
+    @classmethod
+    def from_model(cls, chunk: DocumentChunk, context: Optional[DocumentContext] = None) -> "ChunkRecord":
+        """
+        Wrap an existing DocumentChunk as a record.
+        
+        Args:
+            chunk: Document chunk
+            context: Shared document context (built from the chunk if not provided)
+        
+        Returns:
+            ChunkRecord with the same fields
+        """
+        if context is None:
+            context = DocumentContext(
+                document_id=chunk.source_document_id,
+                document_name=chunk.source_document_name,
+                document_type=chunk.source_document_type,
+                created_by=chunk.created_by,
+                created_at=chunk.created_at
+            )
+        return cls(
+            text=chunk.text,
+            metadata=chunk.metadata,
+            context=context,
+            page_number=chunk.page_number,
+            start_index=chunk.start_index,
+            end_index=chunk.end_index,
+            is_ocr=chunk.is_ocr,
+            heading_path=chunk.heading_path,
+            heading_level=chunk.heading_level,
+            bounding_box=chunk.bounding_box,
+            chunk_id=chunk.chunk_id,
+            chunk_ordinal=chunk.chunk_ordinal
+        )
@@ -18,7 +18,7 @@ from app.parsers.pptx_parser import PPTXParser
 from app.parsers.excel_parser import ExcelParser
 from app.chunking.chunker import DocumentChunker
 from app.embeddings.embedder import AzureOpenAIEmbedder
-from app.storage.qdrant_db import QdrantDBStorage
+from app.storage.factory import create_storage
 
 
 # Define OAuth 2.0 scopes
@@ -49,7 +49,7 @@ MIME_TYPE_MAP = {
 # Initialize components
 chunker = DocumentChunker()
 embedder = AzureOpenAIEmbedder()
-qdrant_db = QdrantDBStorage()
+storage = create_storage()
 
 class GoogleDriveClient:
     """Client for interacting with Google Drive API."""
@@ -365,7 +365,7 @@ class GoogleDriveClient:
                 embeddings = embedder.generate_embeddings(processed_doc.chunks)
                 
                 # Store document and embeddings
-                document_id = qdrant_db.store_document(processed_doc, embeddings)
+                document_id = storage.store_document(processed_doc, embeddings)
                 
                 return {
                     "status": "success",
@@ -3,11 +3,10 @@ import logging
 import asyncio
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict, Any, Optional
-from openai import AzureOpenAI
-import httpx
+from typing import List, Dict, Any, Optional, Union, Tuple, AsyncIterator
 from tenacity import retry, wait_random_exponential, stop_after_attempt, retry_if_exception_type
 from app.chunking.models import DocumentChunk
+from app.chunking.records import ChunkRecord
 from app.utils.logging import log_step, Timer
 
 
@@ -31,6 +30,10 @@ async def get_embeddings_async(texts: List[str], deployment_name: str = "text-em
         endpoint = os.getenv("ENDPOINT_URL", "https://eyvoicecentralus.openai.azure.com/")
         api_version = os.getenv("AZURE_API_VERSION", "2024-05-01-preview")
         
+        # Imported here so that importing the embedder does not load the OpenAI SDK
+        import httpx
+        from openai import AzureOpenAI
+        
         # Initialize Azure OpenAI client with custom http_client to avoid proxies issue
         http_client = httpx.Client()
         client = AzureOpenAI(
@@ -102,6 +105,10 @@ def get_embeddings(texts: List[str], deployment_name: str = "text-embedding-ada-
         endpoint = os.getenv("ENDPOINT_URL", "https://eyvoicecentralus.openai.azure.com/")
         api_version = os.getenv("AZURE_API_VERSION", "2024-05-01-preview")
         
+        # Imported here so that importing the embedder does not load the OpenAI SDK
+        import httpx
+        from openai import AzureOpenAI
+        
         # Initialize Azure OpenAI client with custom http_client to avoid proxies issue
         http_client = httpx.Client()
         client = AzureOpenAI(
@@ -140,12 +147,12 @@ class AzureOpenAIEmbedder:
     def __init__(self, deployment_name: str = "text-embedding-ada-002"):
         self.deployment_name = deployment_name
 
-    async def generate_embeddings_async(self, chunks: List[DocumentChunk]) -> Dict[str, List[float]]:
+    async def generate_embeddings_async(self, chunks: List[Union[DocumentChunk, ChunkRecord]]) -> Dict[str, List[float]]:
         """
         Generate embeddings for a list of document chunks asynchronously.
 
         Args:
-            chunks: List of document chunks
+            chunks: List of document chunks (or chunk records)
 
         Returns:
             Dictionary mapping chunk IDs to embeddings
@@ -176,12 +183,48 @@ class AzureOpenAIEmbedder:
             log_step("Embedding Error", f"Error generating embeddings asynchronously: {str(e)}")
             return embeddings
 
-    def generate_embeddings(self, chunks: List[DocumentChunk]) -> Dict[str, List[float]]:
+    async def iter_embeddings_async(
+        self,
+        chunks: List[Union[DocumentChunk, ChunkRecord]],
+        batch_size: int = 100
+    ) -> AsyncIterator[Tuple[Union[DocumentChunk, ChunkRecord], List[float]]]:
+        """
+        Generate embeddings batch by batch, yielding each chunk with its embedding.
+
+        The next batch is requested while the current one is being consumed, so
+        a consumer storing the chunks overlaps with embedding generation (see
+        QdrantDBStorage.store_document_stream).
+
+        Args:
+            chunks: List of document chunks (or chunk records)
+            batch_size: Number of chunks per embedding request
+
+        Yields:
+            Tuples of (chunk, embedding); chunks whose embedding failed are skipped
+        """
+        batches = [chunks[i:i + batch_size] for i in range(0, len(chunks), batch_size)]
+        if not batches:
+            return
+
+        pending = asyncio.ensure_future(self.generate_embeddings_async(batches[0]))
+        try:
+            for index, batch in enumerate(batches):
+                embeddings = await pending
+                if index + 1 < len(batches):
+                    pending = asyncio.ensure_future(self.generate_embeddings_async(batches[index + 1]))
+
+                for chunk in batch:
+                    if chunk.chunk_id in embeddings:
+                        yield chunk, embeddings[chunk.chunk_id]
+        finally:
+            pending.cancel()
+
+    def generate_embeddings(self, chunks: List[Union[DocumentChunk, ChunkRecord]]) -> Dict[str, List[float]]:
         """
         Generate embeddings for a list of document chunks.
 
         Args:
-            chunks: List of document chunks
+            chunks: List of document chunks (or chunk records)
 
         Returns:
             Dictionary mapping chunk IDs to embeddings
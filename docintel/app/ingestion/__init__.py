@@ -0,0 +1,6 @@
+# Ingestion Package
+"""
+Pipelined document ingestion (parse, embed and store concurrently).
+"""
+
+from app.ingestion.pipeline import ingest_document
@@ -0,0 +1,170 @@
+from typing import Dict, List, Any, Optional
+
+from app.chunking.records import ChunkRecord
+from app.utils.simhash import simhash, hamming_distance, band_keys, DEFAULT_BANDS
+from app.utils.logging import log_step
+
+
+# Fingerprints within this many differing bits (of 64) are treated as duplicates
+DEFAULT_MAX_DISTANCE = 3
+
+
+class NearDuplicateIndex:
+    """In-memory SimHash index, bucketed by LSH bands."""
+    
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE, bands: int = DEFAULT_BANDS):
+        if max_distance >= bands:
+            raise ValueError("max_distance must be smaller than the number of bands")
+        
+        self.max_distance = max_distance
+        self.bands = bands
+        self.fingerprints: Dict[Any, int] = {}
+        self.buckets: Dict[str, List[Any]] = {}
+    
+    def find(self, fingerprint: int) -> Optional[Any]:
+        """
+        Find an indexed key whose fingerprint is within max_distance.
+        
+        Args:
+            fingerprint: Fingerprint to look up
+        
+        Returns:
+            Key of the first near-duplicate found, or None
+        """
+        for band_key in band_keys(fingerprint, self.bands):
+            for key in self.buckets.get(band_key, ()):
+                if hamming_distance(self.fingerprints[key], fingerprint) <= self.max_distance:
+                    return key
+        return None
+    
+    def add(self, key: Any, fingerprint: int):
+        """
+        Add a fingerprint to the index.
+        
+        Args:
+            key: Identifier returned by find() for this fingerprint
+            fingerprint: Fingerprint to index
+        """
+        self.fingerprints[key] = fingerprint
+        for band_key in band_keys(fingerprint, self.bands):
+            self.buckets.setdefault(band_key, []).append(key)
+
+
+class ChunkDeduplicator:
+    """
+    Drops near-duplicate chunk records before they are embedded.
+    
+    The first occurrence of a chunk is kept; later near-duplicates are dropped and
+    their page is added to the kept chunk's provenance. With a storage backend,
+    chunks already stored for other documents in the collection are also matched
+    (those documents then own the shared content).
+    """
+    
+    def __init__(
+        self,
+        storage: Optional[Any] = None,
+        document_id: Optional[str] = None,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        bands: int = DEFAULT_BANDS
+    ):
+        """
+        Initialize the deduplicator.
+        
+        Args:
+            storage: Storage to search for duplicates across the collection (optional)
+            document_id: ID of the document being ingested (excluded from collection lookups)
+            max_distance: Maximum differing fingerprint bits for a duplicate
+            bands: Number of LSH bands
+        """
+        self.storage = storage
+        self.document_id = document_id
+        self.bands = bands
+        self.index = NearDuplicateIndex(max_distance, bands)
+        self.stored_index = NearDuplicateIndex(max_distance, bands)
+        
+        # Sources of every kept chunk, keyed by chunk ID (in this document) or point ID (stored)
+        self.provenance: Dict[str, List[Dict[str, Any]]] = {}
+        
+        self.total_count = 0
+        self.duplicate_count = 0
+    
+    @property
+    def dedup_ratio(self) -> float:
+        """Fraction of chunks dropped as duplicates."""
+        return self.duplicate_count / self.total_count if self.total_count else 0.0
+    
+    def filter(self, records: List[ChunkRecord]) -> List[ChunkRecord]:
+        """
+        Fingerprint a batch of records and drop near-duplicates.
+        
+        Kept records get their `simhash` set so it is stored with the chunk.
+        
+        Args:
+            records: Chunk records in document order
+        
+        Returns:
+            Records that are not near-duplicates of an earlier chunk
+        """
+        fingerprints = [simhash(record.text) for record in records]
+        
+        if self.storage is not None:
+            self._load_stored_matches([fp for fp in fingerprints if fp is not None])
+        
+        unique = []
+        for record, fingerprint in zip(records, fingerprints):
+            self.total_count += 1
+            record.simhash = fingerprint
+            
+            # Too short to fingerprint reliably; always keep
+            if fingerprint is None:
+                unique.append(record)
+                continue
+            
+            source = {"source_document_id": record.source_document_id, "page_number": record.page_number}
+            
+            match = self.index.find(fingerprint)
+            if match is None:
+                match = self.stored_index.find(fingerprint)
+            
+            if match is not None:
+                self.duplicate_count += 1
+                self.provenance.setdefault(match, []).append(source)
+                continue
+            
+            self.index.add(record.chunk_id, fingerprint)
+            self.provenance[record.chunk_id] = [source]
+            unique.append(record)
+        
+        return unique
+    
+    def _load_stored_matches(self, fingerprints: List[int]):
+        """Add stored chunks sharing an LSH band with any of the fingerprints to the stored index."""
+        if not fingerprints:
+            return
+        
+        # Stored chunks are indexed with the default band layout (see QdrantDBStorage.store_chunks)
+        keys = sorted({key for fp in fingerprints for key in band_keys(fp)})
+        for point_id, fingerprint in self.storage.find_chunks_by_simhash_bands(keys, exclude_document_id=self.document_id):
+            if point_id not in self.stored_index.fingerprints:
+                self.stored_index.add(point_id, fingerprint)
+    
+    def provenance_updates(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Provenance to record on stored chunks that absorbed duplicates.
+        
+        Returns:
+            Mapping of chunk/point ID to the sources of its duplicates (including itself
+            for chunks of this document)
+        """
+        return {
+            key: sources for key, sources in self.provenance.items()
+            if len(sources) > 1 or key in self.stored_index.fingerprints
+        }
+    
+    def log_summary(self, filename: str):
+        """Log how many chunks were dropped."""
+        log_step(
+            "Deduplication",
+            f"{filename}: dropped {self.duplicate_count} of {self.total_count} chunks "
+            f"as near-duplicates (dedup ratio {self.dedup_ratio:.1%})"
+        )
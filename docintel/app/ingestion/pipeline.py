@@ -0,0 +1,283 @@
+import os
+import asyncio
+import threading
+from functools import partial
+from typing import Dict, List, Any, Optional
+
+from app.chunking.models import ProcessedDocument
+from app.chunking.records import ChunkRecord
+from app.embeddings.embedder import AzureOpenAIEmbedder
+from app.ingestion.dedup import ChunkDeduplicator
+from app.ingestion.versioning import ChunkVersioner
+from app.parsers.base_parser import BaseDocumentParser
+from app.storage.base import DocumentStorage
+from app.utils.logging import log_step, Timer
+
+# Chunks per embedding request / Qdrant upsert (matches the embedder's batch size)
+DEFAULT_BATCH_SIZE = 100
+
+# Batches that may wait for embedding before the parser is paused
+DEFAULT_MAX_PENDING_BATCHES = 4
+
+# Batches embedded and stored at the same time
+DEFAULT_MAX_CONCURRENT_BATCHES = 2
+
+# Drop near-duplicate chunks within a document before embedding
+DEDUP_NEAR_DUPLICATES = os.getenv("DEDUP_NEAR_DUPLICATES", "true").lower() == "true"
+
+# Also drop chunks that near-duplicate chunks of other documents in the user's collection
+DEDUP_ACROSS_COLLECTION = os.getenv("DEDUP_ACROSS_COLLECTION", "false").lower() == "true"
+
+# Marks the end of the chunk stream on the queue
+_END_OF_STREAM = None
+
+
+async def ingest_document(
+    parser: BaseDocumentParser,
+    storage: DocumentStorage,
+    embedder: AzureOpenAIEmbedder,
+    file_path: str,
+    filename: str,
+    metadata: Optional[Dict[str, Any]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_pending_batches: int = DEFAULT_MAX_PENDING_BATCHES,
+    max_concurrent_batches: int = DEFAULT_MAX_CONCURRENT_BATCHES,
+    deduplicate: bool = DEDUP_NEAR_DUPLICATES,
+    dedup_across_collection: bool = DEDUP_ACROSS_COLLECTION,
+    replace_existing: bool = False
+) -> ProcessedDocument:
+    """
+    Parse, embed and store a document with the three stages overlapping.
+    
+    The parser runs in a worker thread and hands batches of chunk records to a bounded
+    queue; embedding and Qdrant upserts for earlier batches run while later pages
+    are still being parsed. When the queue is full the parser waits, so memory
+    stays bounded by the number of pending batches rather than the document size.
+    Document metadata is stored once all chunks have been written.
+    
+    Near-duplicate chunks (repeated headers/footers, overlapping windows) are
+    dropped before embedding; the kept chunk records every page it stands for.
+    
+    Chunk IDs are derived from the chunk text. With replace_existing, the parser's
+    document ID is that of a previously stored version: only new chunks are
+    embedded, moved chunks get their payload updated and chunks that no longer
+    occur are deleted. The previous version is only changed once every new
+    chunk is stored, so the moved records are held until then.
+    
+    If parsing or storing fails, the chunks this run stored are deleted again
+    (see discard_ingested_chunks) before the error is raised. A failure while
+    the previous version is being updated can still leave it partly updated.
+    
+    Args:
+        parser: Parser for the document's file type
+        storage: User's storage (any backend)
+        embedder: Embedder used for chunk vectors
+        file_path: Path to the document file
+        filename: Original filename
+        metadata: Additional metadata
+        batch_size: Number of chunks per embedding/upsert batch
+        max_pending_batches: Maximum number of parsed batches waiting to be embedded
+        max_concurrent_batches: Maximum number of batches embedded/stored at once
+        deduplicate: Whether to drop near-duplicate chunks
+        dedup_across_collection: Whether to also match chunks of other documents in the collection
+        replace_existing: Whether the document replaces a stored version with the same document ID
+        
+    Returns:
+        ProcessedDocument summary (without chunks) for the stored document
+    """
+    with Timer(f"Pipelined Ingestion {filename}"):
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_batches)
+        
+        # Set when a batch fails, so the parser stops early
+        failed = threading.Event()
+        
+        # Path recorded on every chunk and on the document record
+        stored_file_path: Optional[str] = (metadata or {}).get("file_path") or file_path
+        
+        # Chunks stored for the previous version of the document, if any
+        stored_locations = None
+        if replace_existing:
+            stored_locations = await loop.run_in_executor(None, storage.get_chunk_locations, parser.document_id)
+            log_step("Ingestion", f"Re-ingesting {filename}: {len(stored_locations)} chunks stored for previous version")
+        versioner = ChunkVersioner(parser.document_id, stored_locations)
+        
+        deduplicator = None
+        if deduplicate:
+            deduplicator = ChunkDeduplicator(
+                storage=storage if dedup_across_collection else None,
+                document_id=parser.document_id
+            )
+        
+        kept_count = 0
+        ocr_chunk_count = 0
+        
+        # Chunks embedded by this run (removed again if ingestion fails) and
+        # chunks of the previous version whose location changed
+        embedded_ids: List[str] = []
+        moved_records: List[ChunkRecord] = []
+        
+        def put_batch(batch: List[ChunkRecord]) -> None:
+            """Deduplicate and diff a batch, putting chunks that need embedding on the queue."""
+            nonlocal kept_count, ocr_chunk_count
+            versioner.assign_ids(batch)
+            if deduplicator:
+                batch = deduplicator.filter(batch)
+            
+            # Number kept chunks in document order (used for citation context lookups)
+            for record in batch:
+                record.chunk_ordinal = kept_count
+                kept_count += 1
+            ocr_chunk_count += sum(1 for record in batch if record.is_ocr)
+            
+            batch, moved = versioner.split(batch)
+            moved_records.extend(moved)
+            if batch:
+                embedded_ids.extend(record.chunk_id for record in batch)
+                asyncio.run_coroutine_threadsafe(queue.put(batch), loop).result()
+        
+        def produce() -> None:
+            """Run the parser, putting chunk batches on the queue."""
+            batch: List[ChunkRecord] = []
+            try:
+                for chunk in parser.iter_records(file_path, filename, metadata):
+                    if failed.is_set():
+                        return
+                    batch.append(chunk)
+                    if len(batch) >= batch_size:
+                        put_batch(batch)
+                        batch = []
+                if batch and not failed.is_set():
+                    put_batch(batch)
+            finally:
+                # Always release the consumers, even if parsing failed
+                for _ in range(max_concurrent_batches):
+                    asyncio.run_coroutine_threadsafe(queue.put(_END_OF_STREAM), loop).result()
+        
+        stored_count = 0
+        errors: List[Exception] = []
+        
+        async def consume() -> None:
+            """Embed and store batches until the end of the stream."""
+            nonlocal stored_count
+            while True:
+                batch = await queue.get()
+                if batch is _END_OF_STREAM:
+                    return
+                
+                if failed.is_set():
+                    # Keep draining so the parser is never blocked on a full queue
+                    continue
+                
+                try:
+                    embeddings = await embedder.generate_embeddings_async(batch)
+                    # Upserts are not awaited per batch; one barrier below covers them all
+                    batch_stored, _ = await loop.run_in_executor(
+                        None, partial(storage.store_chunks, batch, embeddings, stored_file_path, wait=False)
+                    )
+                except Exception as e:
+                    # Record the error; this consumer keeps draining until the end of the stream
+                    log_step("Ingestion", f"Error storing batch for {filename}: {str(e)}", level="error")
+                    errors.append(e)
+                    failed.set()
+                    continue
+                stored_count += batch_stored
+                log_step("Ingestion", f"Stored batch of {batch_stored} chunks ({stored_count} so far) for {filename}")
+        
+        try:
+            consumers = [asyncio.create_task(consume()) for _ in range(max_concurrent_batches)]
+            try:
+                await loop.run_in_executor(None, produce)
+            finally:
+                # Let in-flight batches finish before reporting any parser error
+                await asyncio.gather(*consumers)
+            
+            if errors:
+                raise errors[0]
+            
+            # Make every stored chunk visible before chunks are removed or the document is listed
+            await loop.run_in_executor(None, storage.wait_for_writes)
+            
+            summary = parser.document_summary
+            if summary is None:
+                raise ValueError(f"Parser produced no document summary for {filename}")
+            
+            extra_metadata = {}
+            if deduplicator:
+                deduplicator.log_summary(filename)
+                await loop.run_in_executor(None, storage.add_chunk_provenance, deduplicator.provenance_updates())
+                extra_metadata["duplicate_chunk_count"] = deduplicator.duplicate_count
+                extra_metadata["dedup_ratio"] = round(deduplicator.dedup_ratio, 4)
+            if (metadata or {}).get("content_hash"):
+                extra_metadata["content_hash"] = metadata["content_hash"]
+            
+            if replace_existing:
+                # Move relocated chunks, drop chunks that are gone from the new version and point the rest at the new file
+                for start in range(0, len(moved_records), batch_size):
+                    await loop.run_in_executor(
+                        None, storage.update_chunk_payloads, moved_records[start:start + batch_size], stored_file_path
+                    )
+                removed_ids = versioner.removed_ids()
+                await loop.run_in_executor(None, storage.delete_chunks, removed_ids)
+                version_fields = {"file_path": stored_file_path}
+                if "content_hash" in extra_metadata:
+                    version_fields["content_hash"] = extra_metadata["content_hash"]
+                await loop.run_in_executor(None, storage.set_document_chunk_fields, parser.document_id, version_fields)
+                log_step(
+                    "Ingestion",
+                    f"Re-ingested {filename}: {versioner.new_count} new, {versioner.moved_count} moved, "
+                    f"{versioner.unchanged_count} unchanged, {len(removed_ids)} removed chunks"
+                )
+            
+            await loop.run_in_executor(
+                None,
+                partial(
+                    storage.store_document_metadata,
+                    summary,
+                    chunk_count=kept_count,
+                    ocr_chunk_count=ocr_chunk_count,
+                    file_path=stored_file_path,
+                    extra_metadata=extra_metadata
+                )
+            )
+        
+        except Exception:
+            await loop.run_in_executor(
+                None, discard_ingested_chunks, storage, parser.document_id, embedded_ids, replace_existing
+            )
+            raise
+        
+        log_step("Ingestion", f"Ingested {filename}: {stored_count} of {kept_count} chunks embedded and stored")
+        return summary
+
+
+def discard_ingested_chunks(
+    storage: DocumentStorage,
+    document_id: str,
+    embedded_ids: List[str],
+    replace_existing: bool
+):
+    """
+    Delete the chunks a failed ingestion run stored.
+    
+    A new document has no other chunks, so all chunks of its document ID go;
+    a re-ingested document keeps its previous version and loses only the
+    chunks this run embedded. Errors are logged, so the ingestion error is the
+    one raised.
+    
+    Args:
+        storage: User's storage
+        document_id: ID of the document being ingested
+        embedded_ids: IDs of the chunks the run embedded
+        replace_existing: Whether the run replaced a stored version
+    """
+    try:
+        # Pending upserts must land before they can be deleted
+        storage.wait_for_writes()
+        if replace_existing:
+            storage.delete_chunks(embedded_ids)
+        else:
+            storage.delete_document(document_id)
+        log_step("Ingestion", f"Removed {len(embedded_ids)} chunks stored by the failed ingestion of document {document_id}", level="warning")
+    except Exception as e:
+        log_step("Ingestion", f"Could not remove chunks of failed ingestion of document {document_id}: {str(e)}", level="error")
@@ -0,0 +1,104 @@
+import hashlib
+import uuid
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.chunking.records import ChunkRecord
+
+
+# Namespace for deterministic chunk IDs
+CHUNK_ID_NAMESPACE = uuid.UUID("3f1c2a8e-5b7d-4e9a-9c41-2d6f0b8e7a15")
+
+
+def _location(
+    page_number: Optional[int],
+    start_index: Optional[int],
+    end_index: Optional[int],
+    chunk_ordinal: Optional[int]
+) -> Tuple[int, Optional[int], Optional[int], Optional[int]]:
+    """Normalize a chunk location the way it is stored (missing page is -1)."""
+    return (page_number if page_number is not None else -1, start_index, end_index, chunk_ordinal)
+
+
+class ChunkVersioner:
+    """
+    Assigns content-derived chunk IDs and diffs a new version of a document
+    against the chunks already stored for it.
+    
+    A chunk's ID depends only on the document ID, the chunk text and how many
+    times that text occurred earlier in the document, so unchanged chunks of an
+    edited document keep their IDs (and vectors) across uploads.
+    """
+    
+    def __init__(self, document_id: str, stored_locations: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Initialize the versioner.
+        
+        Args:
+            document_id: Stable document ID
+            stored_locations: Locations of the chunks stored for the previous version,
+                keyed by chunk ID (see QdrantDBStorage.get_chunk_locations)
+        """
+        self.document_id = document_id
+        self.stored_locations = stored_locations or {}
+        self.occurrences: Counter = Counter()
+        self.seen_ids = set()
+        
+        self.new_count = 0
+        self.moved_count = 0
+        self.unchanged_count = 0
+    
+    def assign_ids(self, records: List[ChunkRecord]):
+        """
+        Give each record its deterministic chunk ID.
+        
+        Args:
+            records: Chunk records in document order
+        """
+        for record in records:
+            text_hash = hashlib.sha256(record.text.encode("utf-8")).hexdigest()
+            occurrence = self.occurrences[text_hash]
+            self.occurrences[text_hash] += 1
+            record.chunk_id = str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{self.document_id}:{text_hash}:{occurrence}"))
+    
+    def split(self, records: List[ChunkRecord]) -> Tuple[List[ChunkRecord], List[ChunkRecord]]:
+        """
+        Split records into those that need embedding and those already stored.
+        
+        Records already stored at the same location (page, span and position in
+        the document) need no work and are dropped.
+        
+        Args:
+            records: Chunk records with IDs assigned
+        
+        Returns:
+            Tuple of (new records to embed, stored records whose location changed)
+        """
+        new_records = []
+        moved_records = []
+        
+        for record in records:
+            self.seen_ids.add(record.chunk_id)
+            stored = self.stored_locations.get(record.chunk_id)
+            
+            if stored is None:
+                self.new_count += 1
+                new_records.append(record)
+            elif _location(record.page_number, record.start_index, record.end_index, record.chunk_ordinal) != _location(
+                stored.get("page_number"), stored.get("start_index"), stored.get("end_index"), stored.get("chunk_ordinal")
+            ):
+                self.moved_count += 1
+                moved_records.append(record)
+            else:
+                self.unchanged_count += 1
+        
+        return new_records, moved_records
+    
+    def removed_ids(self) -> List[str]:
+        """
+        IDs of stored chunks that do not occur in the new version.
+        
+        Returns:
+            Chunk IDs to delete
+        """
+        return [chunk_id for chunk_id in self.stored_locations if chunk_id not in self.seen_ids]
@@ -1,4 +1,5 @@
 import os
+import asyncio
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -67,6 +68,19 @@ async def user_id_middleware(request: Request, call_next):
     response = await call_next(request)
     return response
 
+# Seconds between passes repairing drift in the document statistics (0 disables them)
+STATS_RECONCILE_INTERVAL = int(os.getenv("STATS_RECONCILE_INTERVAL", "3600"))
+
+async def reconcile_statistics_periodically():
+    """Rebuild the per-user document statistics from the catalog records at an interval"""
+    from app.storage.document_catalog import get_document_catalog
+    while True:
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+        try:
+            await asyncio.to_thread(get_document_catalog().reconcile_statistics)
+        except Exception as e:
+            logger.error(f"Error reconciling document statistics: {str(e)}")
+
 @app.on_event("startup")
 async def startup_event():
     """Log important information on startup"""
@@ -75,6 +89,24 @@ async def startup_event():
     logger.info(f"Frontend URL: {os.getenv('FRONTEND_URL', 'not set')}")
     logger.info(f"Using OpenAI API: {bool(os.getenv('OPENAI_API_KEY'))}")
     logger.info(f"Using Supabase: {bool(os.getenv('SUPABASE_URL') and os.getenv('SUPABASE_KEY'))}")
+    
+    if STATS_RECONCILE_INTERVAL > 0:
+        app.state.stats_reconcile_task = asyncio.create_task(reconcile_statistics_periodically())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close shared clients on shutdown"""
+    if getattr(app.state, "stats_reconcile_task", None):
+        app.state.stats_reconcile_task.cancel()
+    
+    # The Qdrant backend is imported on first use; there is no client to close if it never was
+    async_qdrant_db = sys.modules.get("app.storage.async_qdrant_db")
+    if async_qdrant_db:
+        await async_qdrant_db.close_async_client()
+    
+    # Give queued document file removals a few seconds to finish
+    from app.utils.file_reaper import file_reaper
+    await asyncio.to_thread(file_reaper.wait, 10)
 
 # Import routes
 from app.routes import document_routes, drive_routes, chat_routes
@@ -1,35 +1,57 @@
 # Parsers Package
 """
 Document parsers for different file types (PDF, DOCX, Excel, PPTX).
+
+Parser modules import their file libraries (PyMuPDF, python-docx, pandas,
+python-pptx, PIL) at module level, so they are imported on first use: through
+get_parser, or when a parser class is first looked up on this package.
 """
 
+import importlib
+
 from app.parsers.base_parser import BaseDocumentParser
-from app.parsers.pdf_parser import PDFParser
-from app.parsers.docx_parser import DocxParser
-from app.parsers.excel_parser import ExcelParser
-from app.parsers.pptx_parser import PPTXParser
-from app.parsers.ocr import OCRProcessor
+
+# Parser class exported by this package -> module defining it
+_LAZY_EXPORTS = {
+    "PDFParser": "app.parsers.pdf_parser",
+    "DocxParser": "app.parsers.docx_parser",
+    "ExcelParser": "app.parsers.excel_parser",
+    "PPTXParser": "app.parsers.pptx_parser",
+    "OCRProcessor": "app.parsers.ocr"
+}
+
+# File extension -> parser class
+PARSER_CLASSES = {
+    "pdf": "PDFParser",
+    "docx": "DocxParser",
+    "xlsx": "ExcelParser",
+    "xls": "ExcelParser",
+    "csv": "ExcelParser",
+    "pptx": "PPTXParser"
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Factory function to get appropriate parser based on file extension
-def get_parser(file_extension: str):
+def get_parser(file_extension: str, *args, **kwargs):
     """
     Get appropriate parser for a file type.
     
     Args:
         file_extension: File extension (pdf, docx, xlsx, pptx, etc.)
-        
+        *args: Positional arguments for the parser (e.g. the chunker)
+        **kwargs: Keyword arguments for the parser (e.g. document_id)
+    
     Returns:
         Appropriate parser instance
     """
     file_extension = file_extension.lower().lstrip(".")
     
-    if file_extension == "pdf":
-        return PDFParser()
-    elif file_extension == "docx":
-        return DocxParser()
-    elif file_extension in ["xlsx", "xls", "csv"]:
-        return ExcelParser()
-    elif file_extension == "pptx":
-        return PPTXParser()
-    else:
-        raise ValueError(f"Unsupported file type: {file_extension}")
\ No newline at end of file
+    if file_extension not in PARSER_CLASSES:
+        raise ValueError(f"Unsupported file type: {file_extension}")
+    return __getattr__(PARSER_CLASSES[file_extension])(*args, **kwargs)
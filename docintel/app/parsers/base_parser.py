@@ -1,18 +1,23 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Tuple, Optional, BinaryIO
+from typing import Dict, List, Any, Tuple, Optional, BinaryIO, Iterator
 import os
 import uuid
 from datetime import datetime
 
 from app.chunking.models import DocumentChunk, ProcessedDocument
+from app.chunking.records import ChunkRecord
 from app.utils.logging import log_step, Timer
 
 
 class BaseDocumentParser(ABC):
     """Base class for all document parsers."""
     
-    def __init__(self):
-        self.document_id = str(uuid.uuid4())
+    def __init__(self, document_id: Optional[str] = None):
+        # Reuse an existing document ID when re-ingesting a new version of a document
+        self.document_id = document_id or str(uuid.uuid4())
+        
+        # Summary of the last document parsed with iter_records (chunks not retained)
+        self.document_summary: Optional[ProcessedDocument] = None
     
     @abstractmethod
     def parse(
@@ -54,6 +59,63 @@ class BaseDocumentParser(ABC):
         """
         pass
     
+    def iter_records(
+        self,
+        file_path: str,
+        filename: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Iterator[ChunkRecord]:
+        """
+        Parse a document file, yielding chunk records as they become available.
+        
+        Once the iterator is exhausted, `document_summary` holds the ProcessedDocument
+        for the file with an empty chunk list and the real total_chunks.
+        
+        Parsers that can extract text incrementally override this; the default
+        parses the whole file first.
+        
+        Args:
+            file_path: Path to the document file
+            filename: Original filename
+            metadata: Additional metadata
+            
+        Yields:
+            Chunk records in document order
+        """
+        processed_doc = self.parse(file_path, filename, metadata)
+        self.document_summary = self._summarize(processed_doc, processed_doc.total_chunks)
+        
+        # Records of one document share a single context
+        context = None
+        for chunk in processed_doc.chunks:
+            record = ChunkRecord.from_model(chunk, context)
+            context = record.context
+            yield record
+    
+    def _summarize(self, document: ProcessedDocument, total_chunks: int) -> ProcessedDocument:
+        """
+        Build a chunk-less copy of a processed document.
+        
+        Args:
+            document: Processed document
+            total_chunks: Number of chunks produced for the document
+            
+        Returns:
+            ProcessedDocument with an empty chunk list
+        """
+        return ProcessedDocument(
+            document_id=document.document_id,
+            filename=document.filename,
+            file_type=document.file_type,
+            file_size=document.file_size,
+            total_pages=document.total_pages,
+            total_chunks=total_chunks,
+            chunks=[],
+            processing_time=document.processing_time,
+            is_complex=document.is_complex,
+            created_at=document.created_at
+        )
+    
     def is_complex_document(self, content: str) -> bool:
         """
         Determine if a document is complex (requires OCR).
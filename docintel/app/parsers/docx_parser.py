@@ -1,12 +1,14 @@
 import os
 import time
-from typing import Dict, List, Any, Optional, BinaryIO, Tuple
+from itertools import chain
+from typing import Dict, List, Any, Optional, BinaryIO, Tuple, Iterator
 import docx
 from io import BytesIO
 
 from app.parsers.base_parser import BaseDocumentParser
 from app.parsers.ocr import OCRProcessor
 from app.chunking.models import ProcessedDocument
+from app.chunking.records import ChunkRecord, DocumentContext
 from app.chunking.chunker import DocumentChunker
 from app.utils.logging import log_step, Timer
 
@@ -14,14 +16,15 @@ from app.utils.logging import log_step, Timer
 class DocxParser(BaseDocumentParser):
     """Parser for DOCX documents."""
     
-    def __init__(self, chunker: Optional[DocumentChunker] = None):
+    def __init__(self, chunker: Optional[DocumentChunker] = None, document_id: Optional[str] = None):
         """
         Initialize DOCX parser.
         
         Args:
             chunker: Document chunker instance (optional)
+            document_id: ID to assign to the parsed document (optional, new ID if not given)
         """
-        super().__init__()
+        super().__init__(document_id)
         self.chunker = chunker or DocumentChunker()
         self.ocr_processor = OCRProcessor()
     
@@ -54,6 +57,7 @@ class DocxParser(BaseDocumentParser):
             
             # Prepare metadata
             doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
             
             # Check if force_ocr is set in metadata
             force_ocr = metadata.get("force_ocr", False) if metadata else False
@@ -135,10 +139,8 @@ class DocxParser(BaseDocumentParser):
                     if not section_text:
                         continue
                     
-                    # Add section info to metadata
-                    section_metadata = doc_metadata.copy()
-                    section_metadata["section_id"] = section_id
-                    section_metadata["is_ocr"] = is_ocr
+                    # Section fields only; document fields come from the shared context
+                    section_metadata = {"section_id": section_id, "is_ocr": is_ocr}
                     if section_heading:
                         section_metadata["section_heading"] = section_heading
                     
@@ -147,7 +149,8 @@ class DocxParser(BaseDocumentParser):
                         section_text,
                         section_metadata,
                         use_headings=True,
-                        is_ocr=is_ocr
+                        is_ocr=is_ocr,
+                        context=context
                     )
                     
                     all_chunks.extend(section_chunks)
@@ -202,6 +205,7 @@ class DocxParser(BaseDocumentParser):
             
             # Prepare metadata
             doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
             
             # Check if force_ocr is set in metadata
             force_ocr = metadata.get("force_ocr", False) if metadata else False
@@ -289,10 +293,8 @@ class DocxParser(BaseDocumentParser):
                     if not section_text:
                         continue
                     
-                    # Add section info to metadata
-                    section_metadata = doc_metadata.copy()
-                    section_metadata["section_id"] = section_id
-                    section_metadata["is_ocr"] = is_ocr
+                    # Section fields only; document fields come from the shared context
+                    section_metadata = {"section_id": section_id, "is_ocr": is_ocr}
                     if section_heading:
                         section_metadata["section_heading"] = section_heading
                     
@@ -301,7 +303,8 @@ class DocxParser(BaseDocumentParser):
                         section_text,
                         section_metadata,
                         use_headings=True,
-                        is_ocr=is_ocr
+                        is_ocr=is_ocr,
+                        context=context
                     )
                     
                     all_chunks.extend(section_chunks)
@@ -329,6 +332,174 @@ class DocxParser(BaseDocumentParser):
                 log_step("DOCX Parsing", f"Error parsing DOCX stream: {str(e)}", level="error")
                 raise
     
+    def iter_records(
+        self,
+        file_path: str,
+        filename: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Iterator[ChunkRecord]:
+        """
+        Parse a DOCX file section by section, yielding chunk records as each section is chunked.
+        
+        Sections are split at headings as in parse(), but each one is chunked and
+        handed on as soon as it is read. Documents without enough text go through
+        OCR as a whole, as in parse(), and are then chunked per OCR'd page.
+        
+        Args:
+            file_path: Path to the DOCX file
+            filename: Original filename (uses basename of file_path if not provided)
+            metadata: Additional metadata
+        
+        Yields:
+            Chunk records in section order
+        """
+        with Timer("DOCX Streaming Parsing"):
+            # Get filename if not provided
+            if not filename:
+                filename = os.path.basename(file_path)
+            
+            log_step("DOCX Parsing", f"Streaming DOCX file: {filename}")
+            
+            # Check if force_ocr is set in metadata
+            force_ocr = metadata.get("force_ocr", False) if metadata else False
+            
+            file_size = os.path.getsize(file_path)
+            doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
+            start_time = time.time()
+            chunk_count = 0
+            section_count = 0
+            
+            sections = None
+            if force_ocr:
+                log_step("DOCX Parsing", "Force OCR is enabled, skipping normal text extraction")
+            else:
+                sections = self._iter_text_sections(file_path)
+            
+            # Use OCR if needed (either forced or complex document)
+            is_complex = sections is None
+            if is_complex:
+                log_step("DOCX Parsing", "Using OCR for DOCX processing")
+                sections = self._ocr_sections(file_path)
+            
+            for section_id, section_heading, section_text, is_ocr in sections:
+                section_count += 1
+                
+                # Section fields only; document fields come from the shared context
+                section_metadata = {"section_id": section_id, "is_ocr": is_ocr}
+                if section_heading:
+                    section_metadata["section_heading"] = section_heading
+                
+                # Chunk the section and hand chunks on immediately
+                for record in self.chunker.iter_records(section_text, section_metadata, use_headings=True, is_ocr=is_ocr, context=context):
+                    chunk_count += 1
+                    yield record
+            
+            self.document_summary = ProcessedDocument(
+                document_id=self.document_id,
+                filename=filename,
+                file_type="docx",
+                file_size=file_size,
+                total_pages=section_count,
+                total_chunks=chunk_count,
+                chunks=[],
+                processing_time=time.time() - start_time,
+                is_complex=is_complex
+            )
+            
+            log_step("DOCX Parsing", f"Completed streaming DOCX with {section_count} sections and {chunk_count} chunks")
+    
+    def _iter_text_sections(self, file_path: str) -> Optional[Iterator[Tuple[str, str, str, bool]]]:
+        """
+        Open a DOCX file for streaming its sections, unless it needs OCR.
+        
+        A document with less than 100 characters of text needs OCR (as in
+        _extract_text_from_docx), so sections are read ahead only until that much
+        text has been seen; the rest are read as the returned iterator is consumed.
+        
+        Args:
+            file_path: Path to the DOCX file
+        
+        Returns:
+            Iterator of (section ID, heading, text, is OCR) tuples, or None if the document needs OCR
+        """
+        try:
+            sections = self._iter_docx_sections(docx.Document(file_path))
+            
+            read_ahead = []
+            text_length = 0
+            for section_id, heading, text in sections:
+                read_ahead.append((section_id, heading, text, False))
+                text_length += len(text)
+                if text_length >= 100:
+                    return chain(read_ahead, ((section_id, heading, text, False) for section_id, heading, text in sections))
+            return None
+        
+        except Exception as e:
+            log_step("DOCX Parsing", f"Error in simple DOCX parsing: {str(e)}", level="warning")
+            return None
+    
+    def _iter_docx_sections(self, doc: "docx.document.Document") -> Iterator[Tuple[str, str, str]]:
+        """
+        Split a DOCX document into sections at its headings (as _extract_text_from_docx does).
+        
+        Args:
+            doc: Open DOCX document
+        
+        Yields:
+            Tuples of (section ID, section heading, section text)
+        """
+        current_heading = "Document"
+        current_section_id = "section_1"
+        section_count = 0
+        section_text = []
+        
+        for para in doc.paragraphs:
+            # Extract paragraph style and text
+            style_name = para.style.name if para.style else ""
+            text = para.text.strip()
+            
+            # A heading closes the current section
+            if "Heading" in style_name or style_name in ["Title", "Subtitle"]:
+                if section_text:
+                    section_count += 1
+                    yield current_section_id, current_heading, "\n".join(section_text)
+                    section_text = []
+                
+                current_heading = text
+                current_section_id = f"section_{section_count + 1}"
+            
+            if text:
+                section_text.append(text)
+        
+        # The last section
+        if section_text:
+            yield current_section_id, current_heading, "\n".join(section_text)
+    
+    def _ocr_sections(self, file_path: str) -> List[Tuple[str, str, str, bool]]:
+        """
+        OCR a DOCX file, one section per OCR'd page.
+        
+        Args:
+            file_path: Path to the DOCX file
+        
+        Returns:
+            List of (section ID, heading, text, is OCR) tuples
+        """
+        ocr_results = self.ocr_processor.process_file(file_path, "docx")
+        
+        # If OCR failed to extract any text, try one more time with higher quality
+        if not any(result and result.get("text") for result in ocr_results or []):
+            log_step("DOCX Parsing", "OCR failed, retrying with higher quality settings", level="warning")
+            self.ocr_processor = OCRProcessor(max_workers=2)  # Reduce workers but increase quality
+            ocr_results = self.ocr_processor.process_file(file_path, "docx")
+        
+        return [
+            (f"section_{result['page_number']}", f"Section {result['page_number']}", result["text"], True)
+            for result in ocr_results or []
+            if result and result.get("text")
+        ]
+    
     def _extract_text_from_docx(self, file_path: str) -> Tuple[Dict[str, Dict[str, Any]], bool]:
         """
         Extract text from DOCX using python-docx.
@@ -2,11 +2,12 @@ import os
 import time
 import pandas as pd
 import openpyxl
-from typing import Dict, List, Any, Optional, BinaryIO, Tuple
+from typing import Dict, List, Any, Optional, BinaryIO, Tuple, Iterator
 from io import BytesIO
 
 from app.parsers.base_parser import BaseDocumentParser
 from app.chunking.models import ProcessedDocument
+from app.chunking.records import ChunkRecord, DocumentContext
 from app.chunking.chunker import DocumentChunker
 from app.utils.logging import log_step, Timer
 
@@ -14,14 +15,15 @@ from app.utils.logging import log_step, Timer
 class ExcelParser(BaseDocumentParser):
     """Parser for Excel and CSV documents."""
     
-    def __init__(self, chunker: Optional[DocumentChunker] = None):
+    def __init__(self, chunker: Optional[DocumentChunker] = None, document_id: Optional[str] = None):
         """
         Initialize Excel parser.
         
         Args:
             chunker: Document chunker instance (optional)
+            document_id: ID to assign to the parsed document (optional, new ID if not given)
         """
-        super().__init__()
+        super().__init__(document_id)
         self.chunker = chunker or DocumentChunker()
     
     def parse(
@@ -53,6 +55,7 @@ class ExcelParser(BaseDocumentParser):
             
             # Prepare metadata
             doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
             
             # Start timer for processing
             start_time = time.time()
@@ -89,16 +92,16 @@ class ExcelParser(BaseDocumentParser):
                     if not sheet_text:
                         continue
                     
-                    # Add sheet info to metadata
-                    sheet_metadata = doc_metadata.copy()
-                    sheet_metadata["sheet_name"] = sheet_name
+                    # Sheet fields only; document fields come from the shared context
+                    sheet_metadata = {"sheet_name": sheet_name}
                     
                     # Chunk the sheet
                     sheet_chunks = self.chunker.chunk_document(
                         sheet_text,
                         sheet_metadata,
                         use_headings=False,  # Excel sheets don't typically have headings in the text
-                        is_ocr=False
+                        is_ocr=False,
+                        context=context
                     )
                     
                     all_chunks.extend(sheet_chunks)
@@ -150,6 +153,7 @@ class ExcelParser(BaseDocumentParser):
             
             # Prepare metadata
             doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
             
             # Start timer for processing
             start_time = time.time()
@@ -190,16 +194,16 @@ class ExcelParser(BaseDocumentParser):
                     if not sheet_text:
                         continue
                     
-                    # Add sheet info to metadata
-                    sheet_metadata = doc_metadata.copy()
-                    sheet_metadata["sheet_name"] = sheet_name
+                    # Sheet fields only; document fields come from the shared context
+                    sheet_metadata = {"sheet_name": sheet_name}
                     
                     # Chunk the sheet
                     sheet_chunks = self.chunker.chunk_document(
                         sheet_text,
                         sheet_metadata,
                         use_headings=False,  # Excel sheets don't typically have headings in the text
-                        is_ocr=False
+                        is_ocr=False,
+                        context=context
                     )
                     
                     all_chunks.extend(sheet_chunks)
@@ -224,6 +228,119 @@ class ExcelParser(BaseDocumentParser):
                 log_step("Excel Parsing", f"Error parsing Excel/CSV stream: {str(e)}", level="error")
                 raise
     
+    def iter_records(
+        self,
+        file_path: str,
+        filename: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Iterator[ChunkRecord]:
+        """
+        Parse an Excel/CSV file sheet by sheet, yielding chunk records as each sheet is chunked.
+        
+        The workbook is opened once and only one sheet is held in memory at a
+        time; each sheet's chunks are handed on before the next sheet is read.
+        
+        Args:
+            file_path: Path to the Excel/CSV file
+            filename: Original filename (uses basename of file_path if not provided)
+            metadata: Additional metadata
+        
+        Yields:
+            Chunk records in sheet order
+        """
+        with Timer("Excel Streaming Parsing"):
+            # Get filename if not provided
+            if not filename:
+                filename = os.path.basename(file_path)
+            
+            log_step("Excel Parsing", f"Streaming Excel/CSV file: {filename}")
+            
+            file_size = os.path.getsize(file_path)
+            doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
+            start_time = time.time()
+            chunk_count = 0
+            sheet_count = 0
+            
+            # Extract text based on file extension
+            file_ext = os.path.splitext(filename)[1].lower().lstrip(".")
+            if file_ext == "csv":
+                sheets = self._extract_text_from_csv(file_path).items()
+            else:  # xlsx, xls
+                sheets = self._iter_excel_sheets(file_path)
+            
+            for sheet_name, sheet_text in sheets:
+                sheet_count += 1
+                
+                # Skip empty sheets
+                if not sheet_text:
+                    continue
+                
+                # Sheet fields only; document fields come from the shared context
+                sheet_metadata = {"sheet_name": sheet_name}
+                
+                # Chunk the sheet and hand chunks on immediately
+                for record in self.chunker.iter_records(sheet_text, sheet_metadata, use_headings=False, is_ocr=False, context=context):
+                    chunk_count += 1
+                    yield record
+            
+            self.document_summary = ProcessedDocument(
+                document_id=self.document_id,
+                filename=filename,
+                file_type=file_ext,
+                file_size=file_size,
+                total_pages=sheet_count,
+                total_chunks=chunk_count,
+                chunks=[],
+                processing_time=time.time() - start_time,
+                is_complex=False
+            )
+            
+            log_step("Excel Parsing", f"Completed streaming Excel/CSV with {sheet_count} sheets and {chunk_count} chunks")
+    
+    def _iter_excel_sheets(self, file_path: str) -> Iterator[Tuple[str, str]]:
+        """
+        Extract text from Excel one sheet at a time.
+        
+        Unlike _extract_text_from_excel, which re-reads the file for every sheet,
+        the workbook is opened once and each sheet is read as it is reached.
+        
+        Args:
+            file_path: Path to the Excel file
+        
+        Yields:
+            Tuples of (sheet name, extracted text)
+        """
+        try:
+            with pd.ExcelFile(file_path) as excel:
+                for sheet_name in excel.sheet_names:
+                    df = excel.parse(sheet_name)
+                    yield sheet_name, self._sheet_text(sheet_name, df)
+        
+        except Exception as e:
+            log_step("Excel Parsing", f"Error extracting text from Excel: {str(e)}", level="error")
+    
+    def _sheet_text(self, sheet_name: str, df: pd.DataFrame) -> str:
+        """
+        Render a sheet as text, laid out as in _extract_text_from_excel.
+        
+        Args:
+            sheet_name: Sheet name
+            df: Sheet contents
+        
+        Returns:
+            Sheet statistics followed by the sheet's rows
+        """
+        # Include basic stats
+        stats = f"""
+                Sheet: {sheet_name}
+                Total Rows: {len(df)}
+                Total Columns: {len(df.columns)}
+                Column Names: {', '.join(df.columns.tolist())}
+                """
+        
+        return stats + "\n\n" + df.to_string(index=False)
+    
     def _extract_text_from_csv(self, file_path: str) -> Dict[str, str]:
         """
         Extract text from CSV using pandas.
@@ -63,7 +63,7 @@ class OCRProcessor:
             with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
                 # Create a dictionary to map futures to their page numbers
                 future_to_page = {
-                    executor.submit(self._process_single_image, image_data, i + 1): i + 1
+                    executor.submit(self.process_image, image_data, i + 1): i + 1
                     for i, image_data in enumerate(images)
                 }
                 
@@ -123,7 +123,7 @@ class OCRProcessor:
                 with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
                     # Create a dictionary to map futures to their page numbers
                     future_to_page = {
-                        executor.submit(self._process_single_image, image_data, i + 1): i + 1
+                        executor.submit(self.process_image, image_data, i + 1): i + 1
                         for i, image_data in enumerate(images)
                     }
                     
@@ -152,7 +152,7 @@ class OCRProcessor:
                 if os.path.exists(temp_file_path):
                     os.remove(temp_file_path)
     
-    def _process_single_image(self, image_data: bytes, page_num: int) -> Optional[str]:
+    def process_image(self, image_data: bytes, page_num: int) -> Optional[str]:
         """
         Process a single image with OCR.
         
@@ -174,6 +174,30 @@ class OCRProcessor:
             log_step("OCR", f"Error in OCR for page/slide {page_num}: {str(e)}", level="error")
             return None
     
+    def render_pdf_page(self, page: "fitz.Page") -> bytes:
+        """
+        Render a PDF page as an image for OCR.
+        
+        Args:
+            page: PyMuPDF page
+        
+        Returns:
+            JPEG image data
+        """
+        # Render page as image with higher resolution for better OCR
+        # Use a zoom factor of 2 for better quality
+        zoom = 2.0
+        mat = fitz.Matrix(zoom, zoom)
+        pix = page.get_pixmap(matrix=mat, alpha=False)
+        
+        # Convert to PIL Image for potential processing
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        
+        # Save to bytes
+        buffer = BytesIO()
+        img.save(buffer, format="JPEG", quality=95)
+        return buffer.getvalue()
+    
     def _extract_images(self, file_path: str, file_type: str) -> List[bytes]:
         """
         Extract images from a file based on its type.
@@ -216,21 +240,7 @@ class OCRProcessor:
             
             # Process each page
             for page_num in range(len(pdf)):
-                page = pdf[page_num]
-                
-                # Render page as image with higher resolution for better OCR
-                # Use a zoom factor of 2 for better quality
-                zoom = 2.0
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                
-                # Convert to PIL Image for potential processing
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                
-                # Save to bytes
-                buffer = BytesIO()
-                img.save(buffer, format="JPEG", quality=95)
-                images.append(buffer.getvalue())
+                images.append(self.render_pdf_page(pdf[page_num]))
                 
             log_step("OCR", f"Extracted {len(images)} images from PDF")
         except Exception as e:
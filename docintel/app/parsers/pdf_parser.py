@@ -1,27 +1,35 @@
 import os
 import time
-from typing import Dict, List, Any, Optional, BinaryIO, Tuple
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, BinaryIO, Tuple, Iterator
 import fitz  # PyMuPDF
 from io import BytesIO
 
 from app.parsers.base_parser import BaseDocumentParser
 from app.parsers.ocr import OCRProcessor
 from app.chunking.models import ProcessedDocument
+from app.chunking.records import ChunkRecord, DocumentContext
 from app.chunking.chunker import DocumentChunker
 from app.utils.logging import log_step, Timer
 
 
+# Pages with less extracted text than this are scanned or image-only and are OCR'd
+OCR_PAGE_MIN_TEXT = 50
+
+
 class PDFParser(BaseDocumentParser):
     """Parser for PDF documents."""
     
-    def __init__(self, chunker: Optional[DocumentChunker] = None):
+    def __init__(self, chunker: Optional[DocumentChunker] = None, document_id: Optional[str] = None):
         """
         Initialize PDF parser.
         
         Args:
             chunker: Document chunker instance (optional)
+            document_id: ID to assign to the parsed document (optional, new ID if not given)
         """
-        super().__init__()
+        super().__init__(document_id)
         self.chunker = chunker or DocumentChunker()
         self.ocr_processor = OCRProcessor()
     
@@ -54,6 +62,7 @@ class PDFParser(BaseDocumentParser):
             
             # Prepare metadata
             doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
             
             # Check if force_ocr is set in metadata
             force_ocr = metadata.get("force_ocr", False) if metadata else False
@@ -132,17 +141,16 @@ class PDFParser(BaseDocumentParser):
                     if not page_text:
                         continue
                     
-                    # Add page number to metadata
-                    page_metadata = doc_metadata.copy()
-                    page_metadata["page_number"] = page_num
-                    page_metadata["is_ocr"] = is_ocr
+                    # Page fields only; document fields come from the shared context
+                    page_metadata = {"page_number": page_num, "is_ocr": is_ocr}
                     
                     # Chunk the page
                     page_chunks = self.chunker.chunk_document(
                         page_text,
                         page_metadata,
                         use_headings=True,
-                        is_ocr=is_ocr
+                        is_ocr=is_ocr,
+                        context=context
                     )
                     
                     all_chunks.extend(page_chunks)
@@ -197,6 +205,7 @@ class PDFParser(BaseDocumentParser):
             
             # Prepare metadata
             doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
             
             # Check if force_ocr is set in metadata
             force_ocr = metadata.get("force_ocr", False) if metadata else False
@@ -281,17 +290,16 @@ class PDFParser(BaseDocumentParser):
                     if not page_text:
                         continue
                     
-                    # Add page number to metadata
-                    page_metadata = doc_metadata.copy()
-                    page_metadata["page_number"] = page_num
-                    page_metadata["is_ocr"] = is_ocr
+                    # Page fields only; document fields come from the shared context
+                    page_metadata = {"page_number": page_num, "is_ocr": is_ocr}
                     
                     # Chunk the page
                     page_chunks = self.chunker.chunk_document(
                         page_text,
                         page_metadata,
                         use_headings=True,
-                        is_ocr=is_ocr
+                        is_ocr=is_ocr,
+                        context=context
                     )
                     
                     all_chunks.extend(page_chunks)
@@ -319,6 +327,143 @@ class PDFParser(BaseDocumentParser):
                 log_step("PDF Parsing", f"Error parsing PDF stream: {str(e)}", level="error")
                 raise
     
+    def iter_records(
+        self,
+        file_path: str,
+        filename: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Iterator[ChunkRecord]:
+        """
+        Parse a PDF file page by page, yielding chunk records as each page is chunked.
+        
+        Each page's text is extracted once. Whether a page needs OCR is decided
+        per page as the document streams, so chunks of text pages flow
+        immediately and only scanned pages (or all pages with force_ocr) go
+        through OCR, a few pages ahead in parallel.
+        
+        Args:
+            file_path: Path to the PDF file
+            filename: Original filename (uses basename of file_path if not provided)
+            metadata: Additional metadata
+            
+        Yields:
+            Chunk records in page order
+        """
+        with Timer("PDF Streaming Parsing"):
+            # Get filename if not provided
+            if not filename:
+                filename = os.path.basename(file_path)
+            
+            log_step("PDF Parsing", f"Streaming PDF file: {filename}")
+            
+            # Check if force_ocr is set in metadata
+            force_ocr = metadata.get("force_ocr", False) if metadata else False
+            
+            file_size = os.path.getsize(file_path)
+            doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
+            start_time = time.time()
+            chunk_count = 0
+            ocr_page_count = 0
+            
+            pdf = fitz.open(file_path)
+            try:
+                total_pages = len(pdf)
+                
+                for page_number, page_text, is_ocr in self._iter_page_texts(pdf, force_ocr):
+                    # Skip empty pages
+                    if not page_text:
+                        continue
+                    ocr_page_count += is_ocr
+                    
+                    # Page fields only; document fields come from the shared context
+                    page_metadata = {"page_number": page_number, "is_ocr": is_ocr}
+                    
+                    # Chunk the page and hand chunks on immediately
+                    for record in self.chunker.iter_records(page_text, page_metadata, use_headings=True, is_ocr=is_ocr, context=context):
+                        chunk_count += 1
+                        yield record
+            finally:
+                pdf.close()
+            
+            self.document_summary = ProcessedDocument(
+                document_id=self.document_id,
+                filename=filename,
+                file_type="pdf",
+                file_size=file_size,
+                total_pages=total_pages,
+                total_chunks=chunk_count,
+                chunks=[],
+                processing_time=time.time() - start_time,
+                is_complex=ocr_page_count > 0
+            )
+            
+            log_step("PDF Parsing", f"Completed streaming PDF with {total_pages} pages ({ocr_page_count} OCR) and {chunk_count} chunks")
+    
+    def _iter_page_texts(self, pdf: "fitz.Document", force_ocr: bool) -> Iterator[Tuple[int, str, bool]]:
+        """
+        Get the text of each page in order, using OCR for pages without a usable text layer.
+        
+        Up to the OCR processor's max_workers pages are read ahead, so OCR of
+        consecutive scanned pages runs in parallel while pages are yielded in order.
+        
+        Args:
+            pdf: Open PDF document
+            force_ocr: Whether to OCR every page
+        
+        Yields:
+            Tuples of (page number, page text, whether the text came from OCR)
+        """
+        pending = deque()
+        executor = None
+        try:
+            for page_index in range(len(pdf)):
+                page = pdf[page_index]
+                page_text = "" if force_ocr else page.get_text()
+                
+                # Pages are rendered here (PyMuPDF is not thread-safe); only the OCR requests run in the pool
+                ocr_future = None
+                if force_ocr or len(page_text) < OCR_PAGE_MIN_TEXT:
+                    if executor is None:
+                        executor = ThreadPoolExecutor(max_workers=self.ocr_processor.max_workers)
+                    ocr_future = executor.submit(self.ocr_processor.process_image, self.ocr_processor.render_pdf_page(page), page_index + 1)
+                pending.append((page_index + 1, page_text, ocr_future))
+                
+                # Hand on pages in order as soon as they are ready, waiting once the read-ahead is full
+                while pending and (
+                    pending[0][2] is None or pending[0][2].done() or len(pending) > self.ocr_processor.max_workers
+                ):
+                    yield self._resolve_page_text(*pending.popleft())
+            
+            while pending:
+                yield self._resolve_page_text(*pending.popleft())
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _resolve_page_text(self, page_number: int, page_text: str, ocr_future: Optional[Future]) -> Tuple[int, str, bool]:
+        """
+        Get the final text of a page, waiting for its OCR if one was started.
+        
+        Args:
+            page_number: Page number
+            page_text: Text extracted from the page's text layer
+            ocr_future: Pending OCR of the page (None if not needed)
+            
+        Returns:
+            Tuple of (page number, page text, whether the text came from OCR)
+        """
+        if ocr_future is None:
+            return page_number, page_text, False
+        
+        ocr_text = ocr_future.result()
+        if ocr_text:
+            return page_number, ocr_text, True
+        
+        # OCR failed: keep whatever the text layer had
+        log_step("PDF Parsing", f"OCR returned no text for page {page_number}, using extracted text", level="warning")
+        return page_number, page_text, False
+    
     def _extract_text_from_pdf(self, file_path: str) -> Tuple[Dict[int, Dict[str, Any]], bool]:
         """
         Extract text from PDF using PyMuPDF.
@@ -1,12 +1,13 @@
 import os
 import time
-from typing import Dict, List, Any, Optional, BinaryIO, Tuple
+from typing import Dict, List, Any, Optional, BinaryIO, Tuple, Iterator
 import pptx
 from io import BytesIO
 
 from app.parsers.base_parser import BaseDocumentParser
 from app.parsers.ocr import OCRProcessor
 from app.chunking.models import ProcessedDocument
+from app.chunking.records import ChunkRecord, DocumentContext
 from app.chunking.chunker import DocumentChunker
 from app.utils.logging import log_step, Timer
 
@@ -14,14 +15,15 @@ from app.utils.logging import log_step, Timer
 class PPTXParser(BaseDocumentParser):
     """Parser for PPTX documents."""
     
-    def __init__(self, chunker: Optional[DocumentChunker] = None):
+    def __init__(self, chunker: Optional[DocumentChunker] = None, document_id: Optional[str] = None):
         """
         Initialize PPTX parser.
         
         Args:
             chunker: Document chunker instance (optional)
+            document_id: ID to assign to the parsed document (optional, new ID if not given)
         """
-        super().__init__()
+        super().__init__(document_id)
         self.chunker = chunker or DocumentChunker()
         self.ocr_processor = OCRProcessor()
     
@@ -54,6 +56,7 @@ class PPTXParser(BaseDocumentParser):
             
             # Prepare metadata
             doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
             
             # Check if force_ocr is set in metadata
             force_ocr = metadata.get("force_ocr", False) if metadata else False
@@ -132,17 +135,16 @@ class PPTXParser(BaseDocumentParser):
                     if not slide_text:
                         continue
                     
-                    # Add slide number to metadata
-                    slide_metadata = doc_metadata.copy()
-                    slide_metadata["slide_number"] = slide_num
-                    slide_metadata["is_ocr"] = is_ocr
+                    # Slide fields only; document fields come from the shared context
+                    slide_metadata = {"slide_number": slide_num, "is_ocr": is_ocr}
                     
                     # Chunk the slide
                     slide_chunks = self.chunker.chunk_document(
                         slide_text,
                         slide_metadata,
                         use_headings=True,
-                        is_ocr=is_ocr
+                        is_ocr=is_ocr,
+                        context=context
                     )
                     
                     all_chunks.extend(slide_chunks)
@@ -197,6 +199,7 @@ class PPTXParser(BaseDocumentParser):
             
             # Prepare metadata
             doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
             
             # Check if force_ocr is set in metadata
             force_ocr = metadata.get("force_ocr", False) if metadata else False
@@ -281,17 +284,16 @@ class PPTXParser(BaseDocumentParser):
                     if not slide_text:
                         continue
                     
-                    # Add slide number to metadata
-                    slide_metadata = doc_metadata.copy()
-                    slide_metadata["slide_number"] = slide_num
-                    slide_metadata["is_ocr"] = is_ocr
+                    # Slide fields only; document fields come from the shared context
+                    slide_metadata = {"slide_number": slide_num, "is_ocr": is_ocr}
                     
                     # Chunk the slide
                     slide_chunks = self.chunker.chunk_document(
                         slide_text,
                         slide_metadata,
                         use_headings=True,
-                        is_ocr=is_ocr
+                        is_ocr=is_ocr,
+                        context=context
                     )
                     
                     all_chunks.extend(slide_chunks)
@@ -319,6 +321,165 @@ class PPTXParser(BaseDocumentParser):
                 log_step("PPTX Parsing", f"Error parsing PPTX stream: {str(e)}", level="error")
                 raise
     
+    def iter_records(
+        self,
+        file_path: str,
+        filename: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Iterator[ChunkRecord]:
+        """
+        Parse a PPTX file slide by slide, yielding chunk records as each slide is chunked.
+        
+        Presentations that need OCR (see _iter_text_slides) go through OCR as a
+        whole, as in parse(); all others have each slide's text extracted,
+        chunked and handed on in turn.
+        
+        Args:
+            file_path: Path to the PPTX file
+            filename: Original filename (uses basename of file_path if not provided)
+            metadata: Additional metadata
+        
+        Yields:
+            Chunk records in slide order
+        """
+        with Timer("PPTX Streaming Parsing"):
+            # Get filename if not provided
+            if not filename:
+                filename = os.path.basename(file_path)
+            
+            log_step("PPTX Parsing", f"Streaming PPTX file: {filename}")
+            
+            # Check if force_ocr is set in metadata
+            force_ocr = metadata.get("force_ocr", False) if metadata else False
+            
+            file_size = os.path.getsize(file_path)
+            doc_metadata = self.prepare_metadata(filename, file_size, metadata)
+            context = DocumentContext.from_metadata(doc_metadata)
+            start_time = time.time()
+            chunk_count = 0
+            total_slides = 0
+            
+            slides = None
+            if force_ocr:
+                log_step("PPTX Parsing", "Force OCR is enabled, skipping normal text extraction")
+            else:
+                slides = self._iter_text_slides(file_path)
+            
+            # Use OCR if needed (either forced or complex document)
+            is_complex = slides is None
+            if is_complex:
+                log_step("PPTX Parsing", "Using OCR for PPTX processing")
+                slides = self._ocr_slides(file_path)
+            
+            for slide_num, slide_text, is_ocr in slides:
+                total_slides = max(total_slides, slide_num)
+                
+                # Skip empty slides
+                if not slide_text:
+                    continue
+                
+                # Slide fields only; document fields come from the shared context
+                slide_metadata = {"slide_number": slide_num, "is_ocr": is_ocr}
+                
+                # Chunk the slide and hand chunks on immediately
+                for record in self.chunker.iter_records(slide_text, slide_metadata, use_headings=True, is_ocr=is_ocr, context=context):
+                    chunk_count += 1
+                    yield record
+            
+            self.document_summary = ProcessedDocument(
+                document_id=self.document_id,
+                filename=filename,
+                file_type="pptx",
+                file_size=file_size,
+                total_pages=total_slides,
+                total_chunks=chunk_count,
+                chunks=[],
+                processing_time=time.time() - start_time,
+                is_complex=is_complex
+            )
+            
+            log_step("PPTX Parsing", f"Completed streaming PPTX with {total_slides} slides and {chunk_count} chunks")
+    
+    def _iter_text_slides(self, file_path: str) -> Optional[Iterator[Tuple[int, str, bool]]]:
+        """
+        Open a PPTX file for streaming its slide texts, unless it needs OCR.
+        
+        As in _extract_text_from_pptx, a presentation needs OCR if any slide has
+        less than 20 characters of text or all slides together less than 100.
+        Slide text lengths are measured up front without keeping the text; each
+        slide's text is extracted again as the returned iterator reaches it.
+        
+        Args:
+            file_path: Path to the PPTX file
+        
+        Returns:
+            Iterator of (slide number, text, is OCR) tuples, or None if the presentation needs OCR
+        """
+        try:
+            presentation = pptx.Presentation(file_path)
+            
+            lengths = [len(self._slide_text(slide)) for slide in presentation.slides]
+            if any(length < 20 for length in lengths) or sum(lengths) < 100:
+                return None
+            
+            return (
+                (slide_num, self._slide_text(slide), False)
+                for slide_num, slide in enumerate(presentation.slides, 1)
+            )
+        
+        except Exception as e:
+            log_step("PPTX Parsing", f"Error in simple PPTX parsing: {str(e)}", level="warning")
+            return None
+    
+    def _slide_text(self, slide: "pptx.slide.Slide") -> str:
+        """
+        Extract the text of a slide (as _extract_text_from_pptx does).
+        
+        Args:
+            slide: Presentation slide
+        
+        Returns:
+            Slide text, title first
+        """
+        slide_text = []
+        
+        # Extract title if available
+        if slide.shapes.title:
+            title_text = slide.shapes.title.text
+            if title_text:
+                slide_text.append(f"# {title_text}")
+        
+        # Extract text from each shape except the title
+        for shape in slide.shapes:
+            if hasattr(shape, "text") and shape.text and shape != slide.shapes.title:
+                slide_text.append(shape.text)
+        
+        return "\n\n".join(slide_text)
+    
+    def _ocr_slides(self, file_path: str) -> List[Tuple[int, str, bool]]:
+        """
+        OCR a PPTX file, one result per slide.
+        
+        Args:
+            file_path: Path to the PPTX file
+        
+        Returns:
+            List of (slide number, text, is OCR) tuples
+        """
+        ocr_results = self.ocr_processor.process_file(file_path, "pptx")
+        
+        # If OCR failed to extract any text, try one more time with higher quality
+        if not any(result and result.get("text") for result in ocr_results or []):
+            log_step("PPTX Parsing", "OCR failed, retrying with higher quality settings", level="warning")
+            self.ocr_processor = OCRProcessor(max_workers=2)  # Reduce workers but increase quality
+            ocr_results = self.ocr_processor.process_file(file_path, "pptx")
+        
+        return [
+            (result["page_number"], result["text"], True)
+            for result in ocr_results or []
+            if result and result.get("text")
+        ]
+    
     def _extract_text_from_pptx(self, file_path: str) -> Tuple[Dict[int, Dict[str, Any]], bool]:
         """
         Extract text from PPTX using python-pptx.
@@ -2,19 +2,13 @@ import os
 import re
 import asyncio
 from typing import List, Dict, Any, Optional
-from openai import AzureOpenAI
-import httpx
 from app.utils.logging import log_step, Timer
+from app.utils.openai_client import get_azure_openai_client
 from concurrent.futures import ThreadPoolExecutor
 
-# Initialize Azure OpenAI client with a custom HTTP client to avoid proxies issue
-http_client = httpx.Client()
-azure_openai_client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_API_VERSION", "2024-05-01-preview"),
-    azure_endpoint=os.getenv("ENDPOINT_URL", "https://eyvoicecentralus.openai.azure.com/"),
-    http_client=http_client
-)
+# Azure OpenAI settings for answer generation (the client is created on first use)
+GENERATION_API_VERSION = os.getenv("AZURE_API_VERSION", "2024-05-01-preview")
+GENERATION_ENDPOINT = os.getenv("ENDPOINT_URL", "https://eyvoicecentralus.openai.azure.com/")
 
 # Configure thread pool for parallel processing
 MAX_WORKERS = 10
@@ -57,7 +51,7 @@ def generate_answer(
         final_prompt = _create_final_prompt(system_prompt, formatted_history, formatted_chunks, query)
         
         # Generate answer using Azure OpenAI
-        response = azure_openai_client.chat.completions.create(
+        response = get_azure_openai_client(GENERATION_API_VERSION, GENERATION_ENDPOINT).chat.completions.create(
             model=os.getenv("DEPLOYMENT_NAME", "gpt-4o-mini"),
             messages=final_prompt,
             temperature=0.5,
@@ -128,7 +122,7 @@ async def generate_answer_async(
         # Generate answer using Azure OpenAI
         response = await loop.run_in_executor(
             thread_pool,
-            lambda: azure_openai_client.chat.completions.create(
+            lambda: get_azure_openai_client(GENERATION_API_VERSION, GENERATION_ENDPOINT).chat.completions.create(
                 model=os.getenv("DEPLOYMENT_NAME", "gpt-4o-mini"),
                 messages=final_prompt,
                 temperature=0.5,
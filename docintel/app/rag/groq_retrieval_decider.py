@@ -1,14 +1,26 @@
 from typing import List, Dict, Any, Optional
 import os
-from app.services.groq_service import GroqService
 from app.models.retrieval_decision import RetrievalDecision
 from app.utils.logging import log_step, Timer
 
-# Initialize Groq service
-groq_service = GroqService(
-    api_key=os.getenv("GROQ_API_KEY"),
-    model=os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
-)
+# Groq service, created on first use (see get_groq_service)
+_groq_service = None
+
+def get_groq_service():
+    """
+    Get the shared Groq service, creating it (and loading the Groq SDK) on first use.
+    
+    Returns:
+        Groq service
+    """
+    global _groq_service
+    if _groq_service is None:
+        from app.services.groq_service import GroqService
+        _groq_service = GroqService(
+            api_key=os.getenv("GROQ_API_KEY"),
+            model=os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+        )
+    return _groq_service
 
 def should_use_retrieval(query: str, chat_history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
     """
@@ -25,7 +37,7 @@ def should_use_retrieval(query: str, chat_history: Optional[List[Dict[str, str]]
         log_step("RAG", f"Analyzing need for retrieval via Groq: {query[:50]}...")
         
         # Get decision from Groq service
-        decision = groq_service.analyze_retrieval_need(query, chat_history)
+        decision = get_groq_service().analyze_retrieval_need(query, chat_history)
         
         # Format response to match existing API
         result = {
@@ -1,13 +1,9 @@
 import os
 from typing import List, Dict, Any, Optional
-from openai import AzureOpenAI
 from app.utils.logging import log_step, Timer
-from app.utils.openai_client import create_azure_openai_client
+from app.utils.openai_client import get_azure_openai_client
 import json
 
-# Initialize Azure OpenAI client
-azure_openai_client = create_azure_openai_client()
-
 def optimize_query(query: str, chat_history: Optional[List[Dict[str, str]]] = None) -> str:
     """
     Optimize a query for better retrieval by expanding it or making it more specific.
@@ -64,7 +60,7 @@ def optimize_query(query: str, chat_history: Optional[List[Dict[str, str]]] = No
         })
         
         # Get the optimized query from Azure OpenAI
-        response = azure_openai_client.chat.completions.create(
+        response = get_azure_openai_client().chat.completions.create(
             model=os.getenv("DEPLOYMENT_NAME", "gpt-4o-mini"),
             messages=messages,
             temperature=0.1,  # Low temperature for more focused results
@@ -168,7 +164,7 @@ def split_query_into_subqueries(query: str, chat_history: Optional[List[Dict[str
         try:
             # First attempt with JSON response format
             log_step("RAG", "Attempting query splitting with JSON response format")
-            response = azure_openai_client.chat.completions.create(
+            response = get_azure_openai_client().chat.completions.create(
                 model=os.getenv("DEPLOYMENT_NAME", "gpt-4o-mini"),
                 messages=messages,
                 temperature=0.2,
@@ -247,7 +243,7 @@ def split_query_into_subqueries(query: str, chat_history: Optional[List[Dict[str
                 
                 fallback_messages.append(fallback_user)
                 
-                response = azure_openai_client.chat.completions.create(
+                response = get_azure_openai_client().chat.completions.create(
                     model=os.getenv("DEPLOYMENT_NAME", "gpt-4o-mini"),
                     messages=fallback_messages,
                     temperature=0.2,
@@ -3,7 +3,8 @@ import asyncio
 from typing import List, Dict, Any, Optional
 import numpy as np
 from app.embeddings.embedder import AzureOpenAIEmbedder
-from app.storage.qdrant_db import QdrantDBStorage
+from app.storage.base import SEARCH_PAYLOAD_FIELDS
+from app.storage.factory import create_storage, create_async_storage
 from app.utils.logging import log_step, Timer
 from fastapi import Request
 import contextvars
@@ -35,10 +36,6 @@ def get_dummy_chunk(text: str) -> Any:
         source_document_type="query"
     )
 
-def get_user_storage(user_id: Optional[str] = None):
-    """Get QdrantDB storage for the specified user."""
-    return QdrantDBStorage(user_id=user_id)
-
 async def retrieve_relevant_chunks_async(
     query: str, 
     filter_criteria: Optional[Dict[str, Any]] = None, 
@@ -74,24 +71,21 @@ async def retrieve_relevant_chunks_async(
             
             query_embedding = list(query_embeddings.values())[0]
             
-            # Get the QdrantDB storage for this user
-            qdrant_db = get_user_storage(user_id)
+            # Get the async storage for this user
+            storage = await create_async_storage(user_id=user_id)
             
             # Retrieve more chunks than needed for diversity
-            # Use a thread to run the synchronous qdrant_db.query_similar
-            loop = asyncio.get_event_loop()
-            results = await loop.run_in_executor(
-                None,
-                lambda: qdrant_db.query_similar(
-                    query_text=query,
-                    embedding=query_embedding,
-                    n_results=top_k * 2,  # Get more results for post-processing
-                    filter_criteria=filter_criteria
-                )
+            results = await storage.query_similar(
+                query_text=query,
+                embedding=query_embedding,
+                n_results=top_k * 2,  # Get more results for post-processing
+                filter_criteria=filter_criteria,
+                fields=SEARCH_PAYLOAD_FIELDS
             )
             
             # Apply post-processing to improve retrieval quality
             # Run post-processing in a separate thread to avoid blocking
+            loop = asyncio.get_event_loop()
             processed_results = await loop.run_in_executor(
                 None,
                 lambda: _post_process_results(query, results, top_k)
@@ -133,15 +127,16 @@ def retrieve_relevant_chunks(
         
         query_embedding = list(query_embeddings.values())[0]
         
-        # Get the QdrantDB storage for this user
-        qdrant_db = get_user_storage(user_id)
+        # Get the configured storage for this user
+        storage = create_storage(user_id=user_id)
         
         # Retrieve more chunks than needed for diversity
-        results = qdrant_db.query_similar(
+        results = storage.query_similar(
             query_text=query,
             embedding=query_embedding,
             n_results=top_k * 2,  # Get more results for post-processing
-            filter_criteria=filter_criteria
+            filter_criteria=filter_criteria,
+            fields=SEARCH_PAYLOAD_FIELDS
         )
         
         # Apply post-processing to improve retrieval quality
@@ -215,19 +210,35 @@ async def retrieve_relevant_chunks_for_multiple_queries(
     with Timer("Retrieve Chunks for Multiple Queries"):
         log_step("RAG", f"Retrieving chunks for {len(queries)} queries...")
         
-        # Create tasks for each query
-        tasks = []
-        for query in queries:
-            task = retrieve_relevant_chunks_async(
-                query=query,
-                filter_criteria=filter_criteria,
-                top_k=top_k,
-                user_id=user_id
-            )
-            tasks.append(task)
+        # Embed all queries in one request
+        dummy_chunks = [get_dummy_chunk(query) for query in queries]
+        query_embeddings = await embedder.generate_embeddings_async(dummy_chunks)
+        embedded = [
+            (query, query_embeddings[chunk.chunk_id])
+            for query, chunk in zip(queries, dummy_chunks)
+            if chunk.chunk_id in query_embeddings
+        ]
+        
+        if not embedded:
+            log_step("RAG", "Failed to generate query embeddings", level="error")
+            return []
         
-        # Run all tasks in parallel
-        results_list = await asyncio.gather(*tasks)
+        # Search for all queries in one batched request, retrieving more chunks than needed for diversity
+        storage = await create_async_storage(user_id=user_id)
+        batch_results = await storage.query_similar_batch(
+            query_texts=[query for query, _ in embedded],
+            embeddings=[embedding for _, embedding in embedded],
+            n_results=top_k * 2,
+            filter_criteria=filter_criteria,
+            fields=SEARCH_PAYLOAD_FIELDS
+        )
+        
+        # Post-process each query's results in a separate thread to avoid blocking
+        loop = asyncio.get_event_loop()
+        results_list = await loop.run_in_executor(
+            None,
+            lambda: [_post_process_results(query, results, top_k) for (query, _), results in zip(embedded, batch_results)]
+        )
         
         # Merge results, removing duplicates
         merged_results = []
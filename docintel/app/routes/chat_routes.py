@@ -9,8 +9,6 @@ from pydantic import BaseModel, Field
 import uuid
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
-from openai import AzureOpenAI
-import httpx
 import sys
 import logging
 import traceback
@@ -25,20 +23,12 @@ from app.rag.query_optimizer import split_query_into_subqueries
 from app.rag.retriever import retrieve_relevant_chunks, retrieve_relevant_chunks_async, retrieve_relevant_chunks_for_multiple_queries
 from app.rag.generator import generate_answer, generate_answer_async, batch_generate_answers
 from app.rag.groq_retrieval_decider import should_use_retrieval
-from app.storage.qdrant_db import QdrantDBStorage
+from app.storage.factory import get_async_user_storage
 from app.utils.logging import log_step, Timer
+from app.utils.openai_client import get_azure_openai_client
 
 router = APIRouter()
 
-# Initialize Azure OpenAI client with custom http_client to avoid proxies issue
-http_client = httpx.Client()
-azure_openai_client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_API_VERSION", "2024-02-15-preview"),
-    azure_endpoint=os.getenv("AZURE_ENDPOINT"),
-    http_client=http_client
-)
-
 # Configure thread pool for parallel processing
 # Using a thread pool with a reasonable number of workers
 # based on the high API limits (20,000 requests per minute)
@@ -53,12 +43,6 @@ chat_messages = {}
 # Queue for processing updates
 session_queues = {}
 
-# Helper function to get Qdrant storage for the current user
-def get_user_storage(request: Request):
-    """Get Qdrant storage for the current user."""
-    user_id = getattr(request.state, "user_id", None)
-    return QdrantDBStorage(user_id=user_id)
-
 # Debug function to count active queues
 def count_active_queues():
     return len(session_queues)
@@ -766,7 +750,7 @@ async def send_message(
             
             # Call OpenAI
             response = await asyncio.to_thread(
-                azure_openai_client.chat.completions.create,
+                get_azure_openai_client().chat.completions.create,
                 model=os.getenv("DEPLOYMENT_NAME", "gpt-4o-mini"),
                 messages=messages,
                 temperature=0.5,
@@ -957,34 +941,18 @@ async def get_citation_source(
     """
     with Timer("Get Citation Source"):
         # Get document details
-        document = get_user_storage(request).get_document(document_id)
+        storage = await get_async_user_storage(request)
+        document = await storage.get_document(document_id)
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        # Get chunk details
-        chunks = get_user_storage(request).get_document_chunks(document_id)
+        # Get the chunk and the chunks around it (adjacent chunks)
+        context_chunks = await storage.get_neighbor_chunks(chunk_id, window=2)
         
-        # Find the specific chunk
-        chunk = next((c for c in chunks if c["chunk_id"] == chunk_id), None)
-        if not chunk:
+        chunk = next((c for c in context_chunks if c["chunk_id"] == chunk_id), None)
+        if not chunk or chunk["metadata"].get("source_document_id") != document_id:
             raise HTTPException(status_code=404, detail="Chunk not found")
         
-        # Get surrounding context (adjacent chunks)
-        context_chunks = []
-        for c in chunks:
-            # Check if chunk is in the same page/section
-            same_page = (
-                c["metadata"].get("page_number") == chunk["metadata"].get("page_number")
-                if "page_number" in chunk["metadata"]
-                else False
-            )
-            
-            if same_page:
-                context_chunks.append(c)
-        
-        # Sort context chunks by position
-        context_chunks.sort(key=lambda c: c["metadata"].get("start_index", 0))
-        
         # Format source information
         return {
             "document": {
@@ -1000,7 +968,7 @@ async def get_citation_source(
                 "metadata": chunk["metadata"]
             },
             "context": {
-                "chunks": context_chunks[:5],  # Limit to 5 chunks for context
+                "chunks": context_chunks,
                 "total_chunks": len(context_chunks)
             }
         }
@@ -6,20 +6,22 @@ import logging
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, UploadFile, File, Form, BackgroundTasks, HTTPException, Depends, Query, Request, Path
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query, Request, Path
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from datetime import datetime
-from collections import Counter
 
-from app.parsers.pdf_parser import PDFParser
-from app.parsers.docx_parser import DocxParser
-from app.parsers.pptx_parser import PPTXParser
-from app.parsers.excel_parser import ExcelParser
+from app.parsers import get_parser
 from app.chunking.chunker import DocumentChunker
 from app.embeddings.embedder import AzureOpenAIEmbedder
-from app.storage.qdrant_db import QdrantDBStorage
+from app.storage.factory import create_async_storage, get_user_storage, get_async_user_storage
+from app.ingestion.pipeline import ingest_document
 from app.utils.logging import log_step, Timer
+from app.utils.file_response import DocumentFileResponse
+from app.utils.page_renderer import PageImageCache, PageRenderer, PAGE_PREWARM_COUNT
+from app.utils.uploads import MultipartUploadReader, UploadSessionStore, parse_form_flag, parse_content_range
+from app.utils.file_reaper import file_reaper
 
 
 router = APIRouter()
@@ -34,24 +36,23 @@ embedder = AzureOpenAIEmbedder()
 MAX_WORKERS = 10
 thread_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
 
+# Document metadata fields needed for list entries
+DOCUMENT_SUMMARY_FIELDS = ["document_id", "filename", "document_type", "chunk_count", "created_at", "ocr_used", "tags"]
 
-# Helper function to get Qdrant storage for the current user
-def get_user_storage(request: Request = None):
-    """Get Qdrant storage for the current user."""
-    user_id = None
-    
-    if request:
-        # Try to get user ID from request state
-        user_id = getattr(request.state, "user_id", None)
-        
-        # If not in state, try to get from headers
-        if not user_id and "X-User-ID" in request.headers:
-            user_id = request.headers["X-User-ID"]
-            
-        if not user_id:
-            logging.warning("User ID not found in request state or headers")
-          
-    return QdrantDBStorage(user_id=user_id)
+# Chunks shown on each side of a cited chunk
+CITATION_CONTEXT_WINDOW = 2
+
+# Maximum number of documents per bulk delete request
+MAX_BULK_DELETE = int(os.getenv("MAX_BULK_DELETE", "1000"))
+
+# Uploaded files are kept under uploads/<user_id>/
+UPLOADS_DIR = os.path.join(os.getcwd(), "uploads")
+
+# Resumable upload sessions (stored next to the uploaded files so finalize is a rename)
+upload_sessions = UploadSessionStore(UPLOADS_DIR)
+
+# Rendered PDF page thumbnails and citation highlights
+page_renderer = PageRenderer(PageImageCache(os.getenv("PAGE_CACHE_DIR", os.path.join(UPLOADS_DIR, ".page_cache"))))
 
 
 # Models
@@ -62,6 +63,16 @@ class DocumentMetadata(BaseModel):
     additional_metadata: Optional[Dict[str, Any]] = Field(default_factory=dict)
 
 
+class UploadSessionRequest(BaseModel):
+    """Request to start a resumable upload."""
+    filename: str
+    size: int
+    metadata: Optional[Dict[str, Any]] = None
+    parallel_processing: bool = True
+    force_ocr: bool = False
+    replaces_document_id: Optional[str] = None
+
+
 class QueryRequest(BaseModel):
     """Request for querying documents."""
     query: str
@@ -75,6 +86,7 @@ class StatisticsResponse(BaseModel):
     document_types: Dict[str, int]
     total_chunks: int
     total_ocr_chunks: int
+    total_bytes: int = 0
     ocr_percentage: float
     avg_chunks_per_document: float
 
@@ -103,26 +115,65 @@ class DocumentDetail(BaseModel):
     chunks: List[Dict[str, Any]] = Field(default_factory=list)
 
 
+class BulkDeleteRequest(BaseModel):
+    """Request to delete many documents."""
+    document_ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_DELETE)
+
+
+def document_cleanup_paths(document_id: str, file_path: Optional[str]) -> List[str]:
+    """
+    Get the paths to remove for a deleted document.
+    
+    Args:
+        document_id: Document ID
+        file_path: Path of the stored file (None if unknown)
+    
+    Returns:
+        The file and the folder of extracted pages or images next to it (common for PDFs and complex documents)
+    """
+    if not file_path:
+        return []
+    return [file_path, os.path.join(os.path.dirname(file_path), document_id)]
+
+
 # Routes
-@router.post("/upload")
-async def upload_document(
-    request: Request,
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    metadata: Optional[str] = Form(None),
-    parallel_processing: bool = Form(True),  # Enable parallel processing by default
-    force_ocr: bool = Form(False)  # Add force_ocr parameter with default False
-):
+# The body is parsed by MultipartUploadReader rather than FastAPI, so its form is described here for the API docs
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "metadata": {"type": "string", "description": "Document metadata as JSON string"},
+                        "parallel_processing": {"type": "boolean", "default": True},
+                        "force_ocr": {"type": "boolean", "default": False},
+                        "replaces_document_id": {"type": "string"}
+                    }
+                }
+            }
+        }
+    }
+}
+
+
+@router.post("/upload", openapi_extra=UPLOAD_FORM_SCHEMA)
+async def upload_document(request: Request, background_tasks: BackgroundTasks):
     """
     Upload and process a document.
     
+    The multipart body holds the file in "file" and the optional fields
+    metadata (JSON string), parallel_processing, force_ocr and
+    replaces_document_id. It is read straight from the request stream, so
+    unsupported or oversized files are rejected before the body is fully
+    received and the file is written to disk only once.
+    
     Args:
         request: Request object with user ID in state
         background_tasks: Background tasks
-        file: Uploaded file
-        metadata: Document metadata as JSON string
-        parallel_processing: Whether to use parallel processing
-        force_ocr: Whether to force OCR processing
     
     Returns:
         Document processing status
@@ -132,84 +183,159 @@ async def upload_document(
         user_id = getattr(request.state, "user_id", None)
         logging.info(f"Uploading document for user: {user_id}")
         
-        # Parse metadata
-        doc_metadata = None
-        if metadata:
-            doc_metadata = json.loads(metadata)
-            
-        # If doc_metadata is None, initialize it
-        if doc_metadata is None:
-            doc_metadata = {}
-            
-        # Add user_id to metadata regardless of source
-        doc_metadata["created_by"] = user_id
-        
-        # Add force_ocr flag to metadata
-        doc_metadata["force_ocr"] = force_ocr
-        
-        # Create uploads directory structure if it doesn't exist
-        uploads_dir = os.path.join(os.getcwd(), "uploads")
-        os.makedirs(uploads_dir, exist_ok=True)
-        
-        # Create a user-specific directory
-        user_dir = os.path.join(uploads_dir, user_id if user_id else "default")
-        os.makedirs(user_dir, exist_ok=True)
-        
-        # Generate a unique filename to avoid collisions
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_filename = f"{timestamp}_{file.filename}"
-        file_path = os.path.join(user_dir, unique_filename)
-        
-        # Save the file permanently
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
-        
-        log_step("Document Upload", f"Saved file to {file_path}")
+        # Stream the file to disk, hashing its contents as it is written
+        upload = await MultipartUploadReader(lambda filename: get_upload_file_path(user_id, filename)).read(request)
+        fields = upload["fields"]
         
-        # Get file extension
-        file_ext = os.path.splitext(file.filename)[1].lower().lstrip(".")
-        
-        # Update metadata with file path
-        doc_metadata["file_path"] = file_path
-        
-        # Process document based on file type
-        if file_ext == "pdf":
-            parser = PDFParser(chunker)
-        elif file_ext == "docx":
-            parser = DocxParser(chunker)
-        elif file_ext == "pptx":
-            parser = PPTXParser(chunker)
-        elif file_ext in ["xlsx", "xls", "csv"]:
-            parser = ExcelParser(chunker)
-        else:
-            os.remove(file_path)
-            raise HTTPException(status_code=400, detail=f"Unsupported file type: {file_ext}")
+        return await schedule_document_processing(
+            request,
+            background_tasks,
+            upload["file_path"],
+            upload["filename"],
+            upload["size"],
+            upload["content_hash"],
+            json.loads(fields["metadata"]) if fields.get("metadata") else None,
+            parse_form_flag(fields.get("parallel_processing"), True),  # Enable parallel processing by default
+            parse_form_flag(fields.get("force_ocr"), False),
+            fields.get("replaces_document_id") or None
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        log_step("Document Upload", f"Error: {str(e)}", level="error")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/uploads")
+async def create_upload_session(request: Request, session_request: UploadSessionRequest):
+    """
+    Start a resumable upload.
+    
+    The client then PUTs byte ranges to /uploads/{upload_id} with a Content-Range
+    header and POSTs /uploads/{upload_id}/complete once all bytes are sent.
+    
+    Args:
+        request: Request object with user ID in state
+        session_request: Filename, total size and processing options
+    
+    Returns:
+        Upload session with its ID and current offset
+    """
+    user_id = getattr(request.state, "user_id", None)
+    return upload_sessions.create(
+        user_id,
+        session_request.filename,
+        session_request.size,
+        {
+            "metadata": session_request.metadata,
+            "parallel_processing": session_request.parallel_processing,
+            "force_ocr": session_request.force_ocr,
+            "replaces_document_id": session_request.replaces_document_id
+        }
+    )
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload_session(request: Request, upload_id: str):
+    """
+    Get the state of a resumable upload, e.g. to find where to resume.
+    
+    Args:
+        request: Request object with user ID in state
+        upload_id: Upload session ID
+    
+    Returns:
+        Upload session including the number of bytes received ("offset")
+    """
+    return upload_sessions.get(getattr(request.state, "user_id", None), upload_id)
+
+
+@router.put("/uploads/{upload_id}")
+async def upload_session_range(request: Request, upload_id: str):
+    """
+    Append a byte range to a resumable upload.
+    
+    The body is the raw bytes described by the Content-Range header
+    ("bytes start-end/total"). Ranges must be sent in order; a range that does
+    not start at the current offset is rejected with 409.
+    
+    Args:
+        request: Request object with user ID in state
+        upload_id: Upload session ID
+    
+    Returns:
+        Number of bytes received so far
+    """
+    start, end, _ = parse_content_range(request.headers.get("content-range"))
+    offset = await upload_sessions.append(
+        getattr(request.state, "user_id", None),
+        upload_id,
+        start,
+        end,
+        request.stream()
+    )
+    return {"upload_id": upload_id, "offset": offset}
+
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload_session(request: Request, background_tasks: BackgroundTasks, upload_id: str):
+    """
+    Finish a resumable upload and start processing the document.
+    
+    Args:
+        request: Request object with user ID in state
+        background_tasks: Background tasks
+        upload_id: Upload session ID
+    
+    Returns:
+        Document processing status (as for /upload)
+    """
+    try:
+        user_id = getattr(request.state, "user_id", None)
+        session = upload_sessions.get(user_id, upload_id)
         
-        # Schedule document processing as background task
-        if parallel_processing:
-            background_tasks.add_task(
-                process_document_parallel,
-                request,
-                file_path,
-                file.filename,
-                doc_metadata
-            )
-        else:
-            background_tasks.add_task(
-                process_document,
-                request,
-                file_path,
-                file.filename,
-                doc_metadata
-            )
+        # Move the assembled file into place (a rename, not a copy)
+        file_path = get_upload_file_path(user_id, session["filename"])
+        session, content_hash = upload_sessions.finalize(user_id, upload_id, file_path)
         
-        return {"status": "processing", "filename": file.filename, "parallel_processing": parallel_processing, "force_ocr": force_ocr}
+        options = session["options"]
+        return await schedule_document_processing(
+            request,
+            background_tasks,
+            file_path,
+            session["filename"],
+            session["size"],
+            content_hash,
+            options.get("metadata"),
+            options.get("parallel_processing", True),
+            options.get("force_ocr", False),
+            options.get("replaces_document_id")
+        )
     
+    except HTTPException:
+        raise
     except Exception as e:
-        log_step("Document Upload", f"Error: {str(e)}", level="error")
+        log_step("Document Upload", f"Error completing upload {upload_id}: {str(e)}", level="error")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.delete("/uploads/{upload_id}")
+async def abort_upload_session(request: Request, upload_id: str):
+    """
+    Cancel a resumable upload and discard the bytes received.
+    
+    Args:
+        request: Request object with user ID in state
+        upload_id: Upload session ID
+    
+    Returns:
+        Status message
+    """
+    upload_sessions.abort(getattr(request.state, "user_id", None), upload_id)
+    return {"status": "aborted", "upload_id": upload_id}
+
+
 @router.post("/query")
 async def query_documents(request: Request, query_request: QueryRequest):
     """
@@ -229,7 +355,7 @@ async def query_documents(request: Request, query_request: QueryRequest):
             logging.info(f"Querying documents for user: {user_id}")
             
             # Generate embedding for query
-            query_embeddings = embedder.generate_embeddings([get_dummy_chunk(query_request.query)])
+            query_embeddings = await embedder.generate_embeddings_async([get_dummy_chunk(query_request.query)])
             
             if not query_embeddings:
                 raise HTTPException(status_code=500, detail="Failed to generate query embedding")
@@ -237,7 +363,8 @@ async def query_documents(request: Request, query_request: QueryRequest):
             query_embedding = list(query_embeddings.values())[0]
             
             # Query user-specific Qdrant
-            results = get_user_storage(request).query_similar(
+            storage = await get_async_user_storage(request)
+            results = await storage.query_similar(
                 query_text=query_request.query,
                 embedding=query_embedding,
                 n_results=query_request.n_results,
@@ -269,64 +396,129 @@ async def delete_document(request: Request, document_id: str):
         logging.info(f"Deleting document {document_id} for user: {user_id}")
         
         # First, check if the document exists for this user
-        document = get_user_storage(request).get_document(document_id)
+        storage = await get_async_user_storage(request)
+        document = await storage.get_document(document_id)
         if not document:
             logging.error(f"Document {document_id} not found for user {user_id}")
             raise HTTPException(status_code=404, detail="Document not found")
         
         # Extract file path from document metadata before deleting from DB
-        file_path = None
-        if document.get("file_path"):
-            file_path = document.get("file_path")
-        elif document.get("metadata", {}).get("file_path"):
-            file_path = document.get("metadata", {}).get("file_path")
+        file_path = document.get("file_path") or document.get("metadata", {}).get("file_path")
         
         # Delete from user-specific Qdrant
-        success = get_user_storage(request).delete_document(document_id)
+        success = await storage.delete_document(document_id)
         
         if success:
-            # Try to delete the file as well if we can find it
-            try:
-                if file_path and os.path.exists(file_path):
-                    os.remove(file_path)
-                    logging.info(f"Deleted document file at {file_path}")
-                    
-                    # If there's a folder containing extracted pages or images for this document,
-                    # delete that too (common for PDFs and complex documents)
-                    file_dir = os.path.dirname(file_path)
-                    doc_folder = os.path.join(file_dir, document_id)
-                    if os.path.exists(doc_folder) and os.path.isdir(doc_folder):
-                        import shutil
-                        shutil.rmtree(doc_folder)
-                        logging.info(f"Deleted document folder at {doc_folder}")
-            except Exception as file_error:
-                # Just log the error but don't fail the entire operation
-                logging.warning(f"Could not delete document file: {str(file_error)}")
-                
-            return {"status": "success", "message": f"Document {document_id} deleted"}
+            # Remove the file and its folder in the background
+            cleanup_job_id = file_reaper.submit(document_cleanup_paths(document_id, file_path), user_id)
+            
+            return {"status": "success", "message": f"Document {document_id} deleted", "cleanup_job_id": cleanup_job_id}
         else:
             raise HTTPException(status_code=500, detail="Failed to delete document")
     
+    except HTTPException:
+        raise
     except Exception as e:
         log_step("Document Delete", f"Error for user {getattr(request.state, 'user_id', 'unknown')}: {str(e)}", level="error")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/bulk-delete")
+async def bulk_delete_documents(request: Request, body: BulkDeleteRequest):
+    """
+    Delete many documents for the current user.
+    
+    The chunks and records of all documents are removed with one delete per
+    collection. Files are removed afterwards by the background file reaper;
+    poll /cleanup/{cleanup_job_id} for its progress.
+    
+    Args:
+        request: Request object with user ID in state
+        body: IDs of the documents to delete
+    
+    Returns:
+        Deleted document IDs, IDs not found for the user and the cleanup job ID
+    """
+    try:
+        user_id = getattr(request.state, "user_id", None)
+        document_ids = list(dict.fromkeys(body.document_ids))
+        logging.info(f"Deleting {len(document_ids)} documents for user: {user_id}")
+        
+        storage = await get_async_user_storage(request)
+        records = await storage.delete_documents(document_ids)
+        deleted_ids = [record["document_id"] for record in records]
+        
+        # The removed records carry the stored file paths
+        paths = []
+        for record in records:
+            file_path = record.get("file_path") or record.get("metadata", {}).get("file_path")
+            paths.extend(document_cleanup_paths(record["document_id"], file_path))
+        
+        deleted = set(deleted_ids)
+        return {
+            "status": "success",
+            "deleted": deleted_ids,
+            "not_found": [document_id for document_id in document_ids if document_id not in deleted],
+            "cleanup_job_id": file_reaper.submit(paths, user_id)
+        }
+    
+    except Exception as e:
+        log_step("Document Delete", f"Bulk delete error for user {getattr(request.state, 'user_id', 'unknown')}: {str(e)}", level="error")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cleanup")
+async def get_cleanup_status(request: Request):
+    """
+    Get the status of the background file reaper for the user's cleanup jobs.
+    
+    Args:
+        request: Request object with user ID in state
+    
+    Returns:
+        The user's queued and running cleanup jobs, paths still to remove and totals since startup
+    """
+    return file_reaper.status(getattr(request.state, "user_id", None))
+
+
+@router.get("/cleanup/{job_id}")
+async def get_cleanup_job(request: Request, job_id: str):
+    """
+    Get the progress of a file cleanup job.
+    
+    Args:
+        request: Request object with user ID in state
+        job_id: Cleanup job ID returned by a delete request
+    
+    Returns:
+        Job status with removed, missing and failed path counts
+    """
+    job = file_reaper.get_job(job_id)
+    if not job or job["user_id"] != getattr(request.state, "user_id", None):
+        raise HTTPException(status_code=404, detail="Cleanup job not found")
+    return job
+
+
 @router.get("/list")
 async def list_documents(
     request: Request,
     document_type: Optional[str] = Query(None, description="Filter by document type (pdf, docx, etc.)"),
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(10, ge=1, le=100, description="Number of documents per page")
+    page: int = Query(1, ge=1, description="Page number (ignored when a cursor is given)"),
+    page_size: int = Query(10, ge=1, le=100, description="Number of documents per page"),
+    cursor: Optional[str] = Query(None, description="Cursor for the next page, as returned by the previous page")
 ):
     """
     List all documents for the current user.
     
+    Pages are read from storage one at a time. Follow `next_cursor` to walk
+    the list; page numbers are still accepted but have to skip earlier pages.
+    
     Args:
         request: Request object with user ID in state
         document_type: Optional filter by document type
         page: Page number (1-indexed)
         page_size: Number of documents per page
+        cursor: Cursor returned for the previous page
     
     Returns:
         List of document summaries for the current user
@@ -340,27 +532,29 @@ async def list_documents(
             # Get unique document IDs and metadata from user-specific Qdrant
             filter_criteria = {}
             if document_type:
-                filter_criteria["source_document_type"] = document_type
-                
-            documents = get_user_storage(request).list_documents(filter_criteria)
+                filter_criteria["document_type"] = document_type
+            
+            storage = await get_async_user_storage(request)
+            
+            # Page numbers start the scroll after the earlier pages (IDs only)
+            past_end = False
+            if cursor is None and page > 1:
+                cursor = await storage.skip_documents((page - 1) * page_size, filter_criteria)
+                past_end = cursor is None
+            
+            documents, next_cursor = [], None
+            if not past_end:
+                documents, next_cursor = await storage.list_documents_page(
+                    filter_criteria, limit=page_size, cursor=cursor, fields=DOCUMENT_SUMMARY_FIELDS
+                )
             
             # Calculate pagination
-            total_documents = len(documents)
+            total_documents = await storage.count_documents(filter_criteria)
             total_pages = (total_documents + page_size - 1) // page_size
             
-            # Apply pagination
-            start_idx = (page - 1) * page_size
-            end_idx = start_idx + page_size
-            paginated_documents = documents[start_idx:end_idx]
-            
             # Convert to DocumentSummary objects
             document_summaries = []
-            for doc in paginated_documents:
-                # Extract tags if available
-                tags = []
-                if "tags" in doc.get("metadata", {}):
-                    tags = doc["metadata"]["tags"]
-                
+            for doc in documents:
                 document_summaries.append(DocumentSummary(
                     document_id=doc["document_id"],
                     filename=doc["filename"],
@@ -368,7 +562,7 @@ async def list_documents(
                     total_chunks=doc["chunk_count"],
                     created_at=doc["created_at"],
                     ocr_used=doc["ocr_used"],
-                    tags=tags
+                    tags=doc.get("tags", [])
                 ))
             
             return {
@@ -377,7 +571,8 @@ async def list_documents(
                     "total": total_documents,
                     "page": page,
                     "page_size": page_size,
-                    "total_pages": total_pages
+                    "total_pages": total_pages,
+                    "next_cursor": next_cursor
                 }
             }
     
@@ -403,25 +598,24 @@ async def get_system_statistics(request: Request):
             user_id = getattr(request.state, "user_id", None)
             logging.info(f"Getting document statistics for user: {user_id}")
             
-            # Get document statistics from user-specific Qdrant
-            documents = get_user_storage(request).list_documents()
-            
-            # Count document types
-            document_types = Counter([doc["document_type"] for doc in documents])
+            # Totals are maintained by the document catalog as documents are stored and deleted
+            storage = await get_async_user_storage(request)
+            statistics = await storage.get_statistics()
             
-            # Count total chunks and OCR chunks
-            total_chunks = sum(doc["chunk_count"] for doc in documents)
-            ocr_chunks = sum(doc.get("ocr_chunk_count", 0) for doc in documents)
+            total_documents = statistics["total_documents"]
+            total_chunks = statistics["total_chunks"]
+            ocr_chunks = statistics["total_ocr_chunks"]
             
             # Calculate average chunks per document and OCR percentage
-            avg_chunks = total_chunks / len(documents) if documents else 0
+            avg_chunks = total_chunks / total_documents if total_documents else 0
             ocr_percentage = (ocr_chunks / total_chunks * 100) if total_chunks > 0 else 0
             
             return StatisticsResponse(
-                total_documents=len(documents),
-                document_types=dict(document_types),
+                total_documents=total_documents,
+                document_types=statistics["document_types"],
                 total_chunks=total_chunks,
                 total_ocr_chunks=ocr_chunks,
+                total_bytes=statistics["total_bytes"],
                 ocr_percentage=ocr_percentage,
                 avg_chunks_per_document=avg_chunks
             )
@@ -455,7 +649,8 @@ async def get_document_details(
             logging.info(f"Retrieving document details for user: {user_id}")
             
             # Get document metadata from user-specific Qdrant
-            document = get_user_storage(request).get_document(document_id)
+            storage = await get_async_user_storage(request)
+            document = await storage.get_document(document_id)
             
             if not document:
                 logging.error(f"Document {document_id} not found for user {user_id}")
@@ -469,7 +664,7 @@ async def get_document_details(
             # Get document chunks if requested
             chunks = []
             if include_chunks:
-                chunks = get_user_storage(request).get_document_chunks(document_id)
+                chunks = await storage.get_document_chunks(document_id)
             
             return DocumentDetail(
                 document_id=document["document_id"],
@@ -508,183 +703,35 @@ async def get_document_file(request: Request, document_id: str, page: int = Quer
         user_id = getattr(request.state, "user_id", None)
         logging.info(f"Retrieving document file for user: {user_id}")
         
-        # Direct file path check - check uploads directory for matching files first
-        uploads_dir = os.path.join(os.getcwd(), "uploads")
-        if not os.path.exists(uploads_dir):
-            # Try relative path if absolute path doesn't exist
-            uploads_dir = os.path.join("docintel", "uploads")
-            if not os.path.exists(uploads_dir):
-                uploads_dir = "uploads"
-        
-        logging.info(f"Searching for files in uploads directory: {uploads_dir}")
-        
-        # Check if user_id directory exists
-        direct_file_path = None
-        if user_id and os.path.exists(os.path.join(uploads_dir, user_id)):
-            user_dir = os.path.join(uploads_dir, user_id)
-            logging.info(f"Checking user directory: {user_dir}")
-            
-            # Look for files with document_id in the name or metadata
-            for filename in os.listdir(user_dir):
-                file_path = os.path.join(user_dir, filename)
-                if document_id in filename or document_id in file_path:
-                    direct_file_path = file_path
-                    logging.info(f"Found file by ID match in filename: {direct_file_path}")
-                    break
-        
-        # If not found in user directory, check all upload directories
-        if not direct_file_path:
-            # List all user directories in uploads
-            user_dirs = [d for d in os.listdir(uploads_dir) 
-                        if os.path.isdir(os.path.join(uploads_dir, d))]
-            
-            for dir_name in user_dirs:
-                user_dir = os.path.join(uploads_dir, dir_name)
-                logging.info(f"Checking directory: {user_dir}")
-                
-                for filename in os.listdir(user_dir):
-                    if document_id in filename:
-                        direct_file_path = os.path.join(user_dir, filename)
-                        logging.info(f"Found file by document ID match: {direct_file_path}")
-                        break
-                
-                if direct_file_path:
-                    break
-        
-        # If we found a direct file path, use it
-        if direct_file_path and os.path.exists(direct_file_path):
-            file_path = direct_file_path
-            file_name = os.path.basename(file_path)
-        else:
-            # Try to get document metadata from Qdrant DB
-            document = None
-            
-            # First try with user-specific storage
-            if user_id:
-                document = get_user_storage(request).get_document(document_id)
-            
-            # If document not found and no user_id, try other user collections
-            if not document:
-                logging.info(f"Document not found with user ID: {user_id}, checking all collections")
-                
-                # Check all user directories to find a match
-                if os.path.exists(uploads_dir):
-                    user_dirs = [d for d in os.listdir(uploads_dir) 
-                                if os.path.isdir(os.path.join(uploads_dir, d))]
-                    
-                    for temp_user_id in user_dirs:
-                        if temp_user_id != user_id:  # Skip the current user as we already checked
-                            logging.info(f"Checking collection for user: {temp_user_id}")
-                            temp_storage = QdrantDBStorage(user_id=temp_user_id)
-                            temp_document = temp_storage.get_document(document_id)
-                            
-                            if temp_document:
-                                document = temp_document
-                                logging.info(f"Found document in collection for user: {temp_user_id}")
-                                break
-            
-            # Get file path from document metadata if found
-            if document:
-                if document.get("file_path"):
-                    file_path = document.get("file_path")
-                    logging.info(f"Found file path in document: {file_path}")
-                elif document.get("metadata", {}).get("file_path"):
-                    file_path = document.get("metadata", {}).get("file_path")
-                    logging.info(f"Found file path in metadata: {file_path}")
-                
-                # Use filename from document if available
-                filename = document.get("filename")
-            else:
-                # Document metadata not found, so fallback to a full recursive search
-                logging.warning(f"Document metadata not found for document: {document_id}")
-                
-                # Fallback to a full recursive search
-                logging.info("Falling back to full recursive search")
-                file_path = None
-                
-                for root, dirs, files in os.walk(uploads_dir):
-                    for current_file in files:
-                        # Check if the document_id is in the filename
-                        if document_id in current_file:
-                            file_path = os.path.join(root, current_file)
-                            logging.info(f"Found file by document ID in recursive search: {file_path}")
-                            break
-                    if file_path and os.path.exists(file_path):
-                        break
-                
-                if not file_path or not os.path.exists(file_path):
-                    # Try searching specifically for PDF, document files etc. as a last resort
-                    for root, dirs, files in os.walk(uploads_dir):
-                        for current_file in files:
-                            # Check common document extensions
-                            if current_file.lower().endswith(('.pdf', '.docx', '.doc', '.xlsx', '.pptx')):
-                                # Just return the first document file found (useful for testing)
-                                file_path = os.path.join(root, current_file)
-                                logging.info(f"Found document file as last resort: {file_path}")
-                                break
-                        if file_path and os.path.exists(file_path):
-                            break
-                
-                if not file_path or not os.path.exists(file_path):
-                    logging.error(f"File not found for document: {document_id} after exhaustive search")
-                    raise HTTPException(status_code=404, detail="File not found")
-                
-                # Get filename from the path
-                filename = os.path.basename(file_path)
-        
-        # If file_path exists but isn't an absolute path, make it one
-        if not os.path.isabs(file_path):
-            file_path = os.path.abspath(file_path)
-        
-        # Final check if file exists
-        if not os.path.exists(file_path):
-            logging.error(f"File not found at path: {file_path}")
-            raise HTTPException(status_code=404, detail="File not found at specified path")
-        
-        # Get file name from path
+        entry = await resolve_document_file(request, document_id)
+        file_path = entry["file_path"]
         file_name = os.path.basename(file_path)
-        
-        # Determine content type based on file extension
         file_extension = os.path.splitext(file_path)[1].lower()
-        content_type = "application/octet-stream"  # Default content type
-        
-        # Map common extensions to content types
-        content_type_map = {
-            ".pdf": "application/pdf",
-            ".doc": "application/msword",
-            ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            ".txt": "text/plain",
-            ".csv": "text/csv",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".png": "image/png"
-        }
-        
-        if file_extension in content_type_map:
-            content_type = content_type_map[file_extension]
+        content_type = entry.get("mime_type") or get_media_type_for_document(file_extension.lstrip("."))
         
         logging.info(f"Returning file: {file_path} with content type: {content_type}")
         
-        # Set headers for proper file handling
+        # Set headers for proper file handling (ETag, Range and caching are handled by the response)
         headers = {
             "Content-Disposition": f'inline; filename="{file_name}"',
-            "Access-Control-Expose-Headers": "Content-Disposition, X-PDF-Page",
-            "Cache-Control": "public, max-age=3600",  # Cache for 1 hour
-            "ETag": f'"{os.path.getmtime(file_path)}"'  # Use file modification time as ETag
+            "Access-Control-Expose-Headers": "Content-Disposition, X-PDF-Page, ETag, Content-Range, Accept-Ranges"
         }
         
         # For PDF files, if a page number is specified, add it to the response headers
-        if file_extension.lower() == '.pdf' and page is not None:
+        if file_extension == '.pdf' and page is not None:
             headers["X-PDF-Page"] = str(page)
             # Add fragment identifier for direct page navigation
             headers["Content-Disposition"] = f'inline; filename="{file_name}#page={page}"'
         
-        return FileResponse(
+        return DocumentFileResponse(
             path=file_path,
+            content_hash=entry.get("content_hash"),
             media_type=content_type,
             headers=headers,
             filename=file_name
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error retrieving document file for user {getattr(request.state, 'user_id', 'unknown')}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving document file: {str(e)}")
@@ -712,143 +759,217 @@ async def get_highlighted_document(
         user_id = getattr(request.state, "user_id", None)
         logging.info(f"Retrieving highlighted document for user: {user_id}")
         
-        # Get document details with fallbacks
-        document = None
-        
-        # First try with user-specific storage
-        if user_id:
-            document = get_user_storage(request).get_document(document_id)
-        
-        # If document not found, try with default storage
-        if not document:
-            logging.info(f"Document {document_id} not found with user ID {user_id}, trying with default storage")
-            document = QdrantDBStorage().get_document(document_id)
+        entry = await resolve_document_file(request, document_id)
+        file_path = entry["file_path"]
         
-        if not document:
-            logging.warning(f"Document {document_id} not found in any collection")
-            
-        # Get file path from metadata if document was found
-        file_path = None
-        if document:
-            if document.get("metadata", {}).get("file_path"):
-                file_path = document["metadata"]["file_path"]
-                logging.info(f"Found file path in metadata: {file_path}")
-            elif "file_path" in document:
-                file_path = document["file_path"]
-                logging.info(f"Found file path in document: {file_path}")
-            
-            filename = document.get("filename")
+        # Locate the chunk so the client can highlight its exact character span
+        highlight_headers = {}
+        storage = await get_async_user_storage(request)
+        chunk = await storage.get_chunk(chunk_id)
+        if chunk and chunk["metadata"].get("source_document_id") == document_id:
+            highlight_headers = get_highlight_headers(chunk)
         else:
-            filename = None
-            
-        if not file_path or not os.path.exists(file_path):
-            # Try to find the file in the uploads directory
-            uploads_dir = os.path.join(os.getcwd(), "uploads")
-            if not os.path.exists(uploads_dir):
-                # Try relative path if absolute path doesn't exist
-                uploads_dir = os.path.join("docintel", "uploads")
-                if not os.path.exists(uploads_dir):
-                    uploads_dir = "uploads"
-            
-            logging.info(f"Searching for files in uploads directory: {uploads_dir}")
-            
-            # Check email directory specifically from the screenshot first
-            email_dir = os.path.join(uploads_dir, "thockchomkabeer@gmail.com")
-            if os.path.exists(email_dir):
-                logging.info(f"Checking email directory: {email_dir}")
-                # Check for files that might match document ID
-                for current_file in os.listdir(email_dir):
-                    if document_id in current_file:
-                        file_path = os.path.join(email_dir, current_file)
-                        logging.info(f"Found file by ID in email directory: {file_path}")
-                        break
-                    
-                # If file not found by ID but we have a filename, check for that
-                if (not file_path or not os.path.exists(file_path)) and filename:
-                    for current_file in os.listdir(email_dir):
-                        if filename in current_file:
-                            file_path = os.path.join(email_dir, current_file)
-                            logging.info(f"Found file by filename in email directory: {file_path}")
-                            break
-                            
-                # If still not found but the directory has files, use the first one (for testing)
-                if (not file_path or not os.path.exists(file_path)) and os.listdir(email_dir):
-                    first_file = os.path.join(email_dir, os.listdir(email_dir)[0])
-                    logging.info(f"Using first file in email directory: {first_file}")
-                    file_path = first_file
-            
-            # If still not found, check all user directories
-            if not file_path or not os.path.exists(file_path):
-                # Get all user directories
-                user_dirs = [d for d in os.listdir(uploads_dir) 
-                           if os.path.isdir(os.path.join(uploads_dir, d))]
-                
-                for dir_name in user_dirs:
-                    user_dir = os.path.join(uploads_dir, dir_name)
-                    
-                    if filename:
-                        # Check if user directory contains file with matching filename
-                        for file in os.listdir(user_dir):
-                            if filename in file:
-                                file_path = os.path.join(user_dir, file)
-                                log_step("Get Document", f"Found similar file in user directory {dir_name}: {file_path}")
-                                break
-                    
-                    # If file found, stop searching
-                    if file_path and os.path.exists(file_path):
-                        break
-            
-            # If still not found, perform a general search
-            if not file_path and filename:
-                # Search for the file in the uploads directory and its subdirectories
-                for root, dirs, files in os.walk(uploads_dir):
-                    if filename in files:
-                        file_path = os.path.join(root, filename)
-                        log_step("Get Document", f"Found file at {file_path}")
-                        break
-                        
-                # If still not found, search for files with similar names
-                if not file_path:
-                    for root, dirs, files in os.walk(uploads_dir):
-                        for file in files:
-                            if filename in file:
-                                file_path = os.path.join(root, file)
-                                log_step("Get Document", f"Found similar file at {file_path}")
-                                break
-                        if file_path:
-                            break
-            
-            # Last resort: try direct file by ID in all locations
-            if not file_path:
-                for root, dirs, files in os.walk(uploads_dir):
-                    for file in files:
-                        if document_id in file:
-                            file_path = os.path.join(root, file)
-                            log_step("Get Document", f"Found file by ID: {file_path}")
-                            break
-                    if file_path and os.path.exists(file_path):
-                        break
-            
-            if not file_path:
-                log_step("Get Document", f"File path not found for document {document_id} after exhaustive search", level="error")
-                raise HTTPException(status_code=404, detail="Document file not found")
-        
-        # Check if file exists
-        if not os.path.exists(file_path):
-            log_step("Get Document", f"File {file_path} not found on disk", level="error")
-            raise HTTPException(status_code=404, detail="Document file not found on disk")
+            logging.warning(f"Chunk {chunk_id} not found for document {document_id}, returning document without highlight span")
         
         # Return the original document
-        return FileResponse(
+        return DocumentFileResponse(
             path=file_path,
-            filename=document.get("filename", f"document_{document_id}") if document else os.path.basename(file_path),
-            media_type=get_media_type_for_document(document.get("document_type", "")) if document else get_media_type_for_document(os.path.splitext(file_path)[1].lstrip("."))
+            content_hash=entry.get("content_hash"),
+            filename=entry.get("filename") or os.path.basename(file_path),
+            media_type=entry.get("mime_type") or get_media_type_for_document(os.path.splitext(file_path)[1].lstrip(".")),
+            headers=highlight_headers,
+            content_disposition_type="attachment"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         log_step("Get Document", f"Error for user {getattr(request.state, 'user_id', 'unknown')}: {str(e)}", level="error")
         raise HTTPException(status_code=500, detail=f"Error retrieving document: {str(e)}")
 
 
+@router.get("/{document_id}/pages/{page_number}/thumbnail")
+async def get_page_thumbnail(request: Request, document_id: str, page_number: int):
+    """
+    Get a thumbnail of a PDF page.
+    
+    Args:
+        request: Request object with user ID in state
+        document_id: Document ID
+        page_number: 1-based page number
+    
+    Returns:
+        JPEG thumbnail
+    """
+    try:
+        entry = await resolve_pdf_file(request, document_id)
+        image_path = await run_in_threadpool(
+            page_renderer.render_thumbnail, entry["file_path"], get_file_version(entry), page_number
+        )
+        return page_image_response(image_path)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        log_step("Page Rendering", f"Error for user {getattr(request.state, 'user_id', 'unknown')}: {str(e)}", level="error")
+        raise HTTPException(status_code=500, detail=f"Error rendering page: {str(e)}")
+
+
+@router.get("/{document_id}/pages/{page_number}/image")
+async def get_page_image(
+    request: Request,
+    document_id: str,
+    page_number: int,
+    chunk_id: Optional[str] = Query(None, description="Chunk ID to highlight on the page")
+):
+    """
+    Get an image of a PDF page, optionally with a chunk highlighted.
+    
+    Args:
+        request: Request object with user ID in state
+        document_id: Document ID
+        page_number: 1-based page number
+        chunk_id: Chunk ID to highlight
+    
+    Returns:
+        JPEG page image
+    """
+    try:
+        entry = await resolve_pdf_file(request, document_id)
+        
+        chunk = None
+        if chunk_id:
+            storage = await get_async_user_storage(request)
+            chunk = await storage.get_chunk(chunk_id)
+            if not chunk or chunk["metadata"].get("source_document_id") != document_id:
+                raise HTTPException(status_code=404, detail="Chunk not found")
+        
+        image_path = await run_in_threadpool(
+            page_renderer.render_page, entry["file_path"], get_file_version(entry), page_number, chunk
+        )
+        return page_image_response(image_path)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        log_step("Page Rendering", f"Error for user {getattr(request.state, 'user_id', 'unknown')}: {str(e)}", level="error")
+        raise HTTPException(status_code=500, detail=f"Error rendering page: {str(e)}")
+
+
+async def resolve_document_file(request: Request, document_id: str) -> Dict[str, Any]:
+    """
+    Find the stored file of one of the current user's documents.
+    
+    The document's catalog record holds its file, so this is a primary-key
+    lookup rather than a scan of the upload directories.
+    
+    Args:
+        request: Request object with user ID in state
+        document_id: Document ID
+    
+    Returns:
+        File entry with the file path, filename, content hash and media type
+    """
+    storage = await get_async_user_storage(request)
+    document = await storage.get_document(document_id)
+    file_path = None
+    if document:
+        file_path = document.get("file_path") or document.get("metadata", {}).get("file_path")
+    
+    if not file_path or not await run_in_threadpool(os.path.exists, file_path):
+        log_step("Get Document", f"File not found for document {document_id}", level="error")
+        raise HTTPException(status_code=404, detail="Document file not found")
+    
+    filename = document.get("filename") or os.path.basename(file_path)
+    return {
+        "document_id": document_id,
+        "file_path": file_path,
+        "filename": filename,
+        "content_hash": document.get("content_hash") or document.get("metadata", {}).get("content_hash"),
+        "mime_type": get_media_type_for_document(os.path.splitext(filename)[1].lstrip("."))
+    }
+
+
+async def resolve_pdf_file(request: Request, document_id: str) -> Dict[str, Any]:
+    """
+    Find the stored file of one of the current user's PDF documents.
+    
+    Args:
+        request: Request object with user ID in state
+        document_id: Document ID
+    
+    Returns:
+        File entry of the PDF
+    """
+    entry = await resolve_document_file(request, document_id)
+    if not entry["file_path"].lower().endswith(".pdf"):
+        raise HTTPException(status_code=415, detail="Page images are only available for PDF documents")
+    return entry
+
+
+def get_file_version(entry: Dict[str, Any]) -> str:
+    """
+    Identify the content of a stored file for cache keys.
+    
+    Args:
+        entry: File entry of a document
+    
+    Returns:
+        Content hash, or modification time and size for files stored without one
+    """
+    if entry.get("content_hash"):
+        return entry["content_hash"]
+    stat_result = os.stat(entry["file_path"])
+    return f"{stat_result.st_mtime}-{stat_result.st_size}"
+
+
+def page_image_response(image_path: str) -> DocumentFileResponse:
+    """
+    Serve a cached page image.
+    
+    Args:
+        image_path: Path of the cached JPEG (named by its content-derived cache key)
+    
+    Returns:
+        Image response
+    """
+    return DocumentFileResponse(
+        path=image_path,
+        content_hash=os.path.splitext(os.path.basename(image_path))[0],
+        media_type="image/jpeg"
+    )
+
+
+def get_highlight_headers(chunk: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Build response headers describing where a chunk sits in its source page.
+    
+    start_index/end_index are character offsets into the page (or section/sheet)
+    text the chunk was cut from, so the viewer can highlight the exact span.
+    
+    Args:
+        chunk: Chunk with metadata as returned by storage
+        
+    Returns:
+        Dictionary of highlight headers
+    """
+    chunk_metadata = chunk.get("metadata", {})
+    headers = {}
+    
+    page_number = chunk_metadata.get("page_number")
+    if page_number is not None and page_number >= 0:
+        headers["X-Highlight-Page"] = str(page_number)
+    if chunk_metadata.get("start_index") is not None and chunk_metadata.get("end_index") is not None:
+        headers["X-Highlight-Start"] = str(chunk_metadata["start_index"])
+        headers["X-Highlight-End"] = str(chunk_metadata["end_index"])
+    
+    if headers:
+        headers["Access-Control-Expose-Headers"] = ", ".join(headers.keys())
+    
+    return headers
+
+
 def get_media_type_for_document(document_type: str) -> str:
     """
     Get the appropriate media type for a document type.
@@ -884,15 +1005,141 @@ def get_media_type_for_document(document_type: str) -> str:
 
 
 # Helper functions
-async def process_document_parallel(request: Request, file_path: str, filename: str, metadata: Optional[Dict[str, Any]] = None):
+def get_upload_file_path(user_id: Optional[str], filename: str) -> str:
+    """
+    Get a unique path for a new upload in the user's upload directory.
+    
+    Args:
+        user_id: Owner of the upload
+        filename: Original filename
+        
+    Returns:
+        Path for the uploaded file
+    """
+    # Create a user-specific directory
+    user_dir = os.path.join(UPLOADS_DIR, user_id if user_id else "default")
+    os.makedirs(user_dir, exist_ok=True)
+    
+    # Generate a unique filename; files with the same name may be uploaded in the same second
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    unique_filename = f"{timestamp}_{uuid.uuid4().hex[:8]}_{filename}"
+    return os.path.join(user_dir, unique_filename)
+
+
+async def schedule_document_processing(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file_path: str,
+    filename: str,
+    file_size: int,
+    content_hash: str,
+    doc_metadata: Optional[Dict[str, Any]],
+    parallel_processing: bool,
+    force_ocr: bool,
+    replaces_document_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Schedule processing of an uploaded file that is already on disk.
+    
+    Exact duplicates of an existing document are removed instead of processed.
+    The file is stored as a new document unless replaces_document_id names one
+    of the user's documents, which then keeps its ID and is updated to the new version.
+    
+    Args:
+        request: Request object with user ID in state
+        background_tasks: Background tasks
+        file_path: Path of the uploaded file
+        filename: Original filename
+        file_size: File size in bytes
+        content_hash: SHA-256 of the file
+        doc_metadata: Document metadata provided with the upload
+        parallel_processing: Whether to use parallel processing
+        force_ocr: Whether to force OCR processing
+        replaces_document_id: ID of the user's document this file is a new version of
+    
+    Returns:
+        Document processing status
+    """
+    user_id = getattr(request.state, "user_id", None)
+    
+    # If doc_metadata is None, initialize it
+    if doc_metadata is None:
+        doc_metadata = {}
+        
+    # Add user_id to metadata regardless of source
+    doc_metadata["created_by"] = user_id
+    
+    # Add force_ocr flag to metadata
+    doc_metadata["force_ocr"] = force_ocr
+    doc_metadata["content_hash"] = content_hash
+    
+    storage = await get_async_user_storage(request)
+    
+    # Only a document the user owns can be replaced
+    previous_version = None
+    if replaces_document_id:
+        previous_version = await storage.get_document(replaces_document_id)
+        if not previous_version:
+            await run_in_threadpool(os.remove, file_path)
+            raise HTTPException(status_code=404, detail=f"Document {replaces_document_id} not found")
+    
+    document_id = replaces_document_id or str(uuid.uuid4())
+    
+    # Exact duplicate of a document the user already has (or is uploading right now): nothing to process.
+    # The claim is one insert, so of two concurrent identical uploads only one is ingested.
+    duplicate_id = await storage.claim_content(content_hash, document_id)
+    if duplicate_id:
+        await run_in_threadpool(os.remove, file_path)
+        duplicate = await storage.get_document(duplicate_id) or {}
+        log_step("Document Upload", f"Skipping {filename}: identical to document {duplicate_id}")
+        return {
+            "status": "duplicate",
+            "filename": filename,
+            "document_id": duplicate_id,
+            "duplicate_of": duplicate.get("filename")
+        }
+    
+    # Update metadata with file path
+    doc_metadata["file_path"] = file_path
+    
+    # Schedule document processing as background task
+    background_tasks.add_task(
+        process_document_parallel if parallel_processing else process_document,
+        request,
+        file_path,
+        filename,
+        doc_metadata,
+        document_id,
+        replaces_document_id,
+        previous_version.get("file_path") if previous_version else None
+    )
+    
+    response = {"status": "processing", "filename": filename, "document_id": document_id, "file_size": file_size, "parallel_processing": parallel_processing, "force_ocr": force_ocr}
+    if replaces_document_id:
+        response["replaces_previous_version"] = True
+    return response
+
+
+async def process_document_parallel(
+    request: Request,
+    file_path: str,
+    filename: str,
+    metadata: Optional[Dict[str, Any]] = None,
+    document_id: Optional[str] = None,
+    previous_document_id: Optional[str] = None,
+    previous_file_path: Optional[str] = None
+):
     """
-    Process a document in the background with parallel processing.
+    Process a document in the background with pipelined parsing, embedding and storage.
     
     Args:
         request: Request object with user ID in state
         file_path: Path to the document file
         filename: Original filename
         metadata: Additional metadata
+        document_id: ID to store the document under (generated if not provided)
+        previous_document_id: ID of a stored previous version to update incrementally
+        previous_file_path: File of the previous version, removed once the new one is stored
     """
     try:
         # Get user ID from request state (passed through when adding the background task)
@@ -904,43 +1151,57 @@ async def process_document_parallel(request: Request, file_path: str, filename:
             # Get file extension
             file_ext = os.path.splitext(filename)[1].lower().lstrip(".")
             
-            # Parse document based on file type
-            if file_ext == "pdf":
-                parser = PDFParser(chunker)
-                processed_doc = parser.parse(file_path, filename, metadata)
-            elif file_ext == "docx":
-                parser = DocxParser(chunker)
-                processed_doc = parser.parse(file_path, filename, metadata)
-            elif file_ext == "pptx":
-                parser = PPTXParser(chunker)
-                processed_doc = parser.parse(file_path, filename, metadata)
-            elif file_ext in ["xlsx", "xls", "csv"]:
-                parser = ExcelParser(chunker)
-                processed_doc = parser.parse(file_path, filename, metadata)
-            else:
-                raise ValueError(f"Unsupported file type: {file_ext}")
+            # Select parser based on file type (its module is imported on first use)
+            parser = get_parser(file_ext, chunker, document_id=previous_document_id or document_id)
             
-            # Generate embeddings for chunks asynchronously
-            embeddings = await embedder.generate_embeddings_async(processed_doc.chunks)
+            # Creating the storage connects to the backend, so it is done off the event loop
+            storage = await run_in_threadpool(get_user_storage, request)
             
-            # Store document and embeddings in user's Qdrant collection
-            document_id = get_user_storage(request).store_document(processed_doc, embeddings)
+            # Parse, embed and store with the stages overlapping, so chunks are
+            # embedded and upserted while later pages are still being parsed
+            processed_doc = await ingest_document(
+                parser,
+                storage,
+                embedder,
+                file_path,
+                filename,
+                metadata,
+                replace_existing=previous_document_id is not None
+            )
             
-            log_step("Document Processing", f"Completed processing document: {filename} with parallel processing for user: {user_id}")
+            await run_in_threadpool(prewarm_page_images, storage, processed_doc.document_id, file_path, (metadata or {}).get("content_hash"))
+            await run_in_threadpool(remove_previous_version_file, previous_file_path, file_path)
             
+            log_step("Document Processing", f"Completed processing document: {filename} with parallel processing for user: {user_id}")
+    
     except Exception as e:
         log_step("Document Processing", f"Error processing document {filename} with parallel processing for user {getattr(request.state, 'user_id', 'unknown')}: {str(e)}", level="error")
+        await run_in_threadpool(release_content_claim, request, metadata, document_id)
 
 
-def process_document(request: Request, file_path: str, filename: str, metadata: Optional[Dict[str, Any]] = None):
+def process_document(
+    request: Request,
+    file_path: str,
+    filename: str,
+    metadata: Optional[Dict[str, Any]] = None,
+    document_id: Optional[str] = None,
+    previous_document_id: Optional[str] = None,
+    previous_file_path: Optional[str] = None
+):
     """
     Process a document in the background.
     
+    A previous version keeps its document ID but is fully reprocessed; only the
+    pipelined path (process_document_parallel) re-embeds changed chunks alone.
+    
     Args:
         request: Request object with user ID in state
         file_path: Path to the document file
         filename: Original filename
         metadata: Additional metadata
+        document_id: ID to store the document under (generated if not provided)
+        previous_document_id: ID of a stored previous version to replace
+        previous_file_path: File of the previous version, removed once the new one is stored
     """
     try:
         # Get user ID from request state (passed through when adding the background task)
@@ -952,32 +1213,96 @@ def process_document(request: Request, file_path: str, filename: str, metadata:
             # Get file extension
             file_ext = os.path.splitext(filename)[1].lower().lstrip(".")
             
-            # Parse document based on file type
-            if file_ext == "pdf":
-                parser = PDFParser(chunker)
-                processed_doc = parser.parse(file_path, filename, metadata)
-            elif file_ext == "docx":
-                parser = DocxParser(chunker)
-                processed_doc = parser.parse(file_path, filename, metadata)
-            elif file_ext == "pptx":
-                parser = PPTXParser(chunker)
-                processed_doc = parser.parse(file_path, filename, metadata)
-            elif file_ext in ["xlsx", "xls", "csv"]:
-                parser = ExcelParser(chunker)
-                processed_doc = parser.parse(file_path, filename, metadata)
-            else:
-                raise ValueError(f"Unsupported file type: {file_ext}")
+            # Parse document based on file type (its parser module is imported on first use)
+            parser = get_parser(file_ext, chunker, document_id=previous_document_id or document_id)
+            processed_doc = parser.parse(file_path, filename, metadata)
             
             # Generate embeddings for chunks
             embeddings = embedder.generate_embeddings(processed_doc.chunks)
             
             # Store document and embeddings in user's Qdrant collection
-            document_id = get_user_storage(request).store_document(processed_doc, embeddings)
+            storage = get_user_storage(request)
+            previous_chunk_ids = list(storage.get_chunk_locations(previous_document_id)) if previous_document_id else []
+            document_id = storage.store_document(processed_doc, embeddings)
             
-            log_step("Document Processing", f"Completed processing document: {filename} for user: {user_id}")
+            # Replace the previous version's chunks with the new ones
+            storage.delete_chunks(previous_chunk_ids)
+            prewarm_page_images(storage, document_id, file_path, (metadata or {}).get("content_hash"))
+            remove_previous_version_file(previous_file_path, file_path)
             
+            log_step("Document Processing", f"Completed processing document: {filename} for user: {user_id}")
+    
     except Exception as e:
         log_step("Document Processing", f"Error processing document {filename} for user {getattr(request.state, 'user_id', 'unknown')}: {str(e)}", level="error")
+        release_content_claim(request, metadata, document_id)
+
+
+def release_content_claim(request: Request, metadata: Optional[Dict[str, Any]], document_id: Optional[str]):
+    """
+    Release the content hash claimed for a document whose processing failed, so the file can be uploaded again.
+    
+    Args:
+        request: Request object with user ID in state
+        metadata: Document metadata holding the content hash
+        document_id: Document the hash was claimed for
+    """
+    content_hash = (metadata or {}).get("content_hash")
+    if not content_hash or not document_id:
+        return
+    try:
+        get_user_storage(request).release_content(content_hash, document_id)
+    except Exception as e:
+        log_step("Document Processing", f"Could not release content claim of document {document_id}: {str(e)}", level="warning")
+
+
+def prewarm_page_images(storage: Any, document_id: str, file_path: str, content_hash: Optional[str]):
+    """
+    Render page images of a newly stored PDF in the background.
+    
+    Pages most often opened through citations (counted across versions, as a
+    new version keeps its document ID) come first, then the first pages.
+    
+    Args:
+        storage: Storage backend holding the document
+        document_id: Document ID
+        file_path: Path of the stored file
+        content_hash: SHA-256 of the file
+    """
+    if PAGE_PREWARM_COUNT <= 0 or not file_path.lower().endswith(".pdf"):
+        return
+    
+    page_numbers = storage.top_pages(document_id, PAGE_PREWARM_COUNT)
+    for page_number in range(1, PAGE_PREWARM_COUNT + 1):
+        if len(page_numbers) >= PAGE_PREWARM_COUNT:
+            break
+        if page_number not in page_numbers:
+            page_numbers.append(page_number)
+    
+    version = get_file_version({"file_path": file_path, "content_hash": content_hash})
+    
+    def prewarm():
+        try:
+            page_renderer.prewarm(file_path, version, page_numbers)
+        except Exception as e:
+            log_step("Page Rendering", f"Could not pre-render pages of document {document_id}: {str(e)}", level="warning")
+    
+    thread_pool.submit(prewarm)
+
+
+def remove_previous_version_file(previous_file_path: Optional[str], file_path: str):
+    """
+    Remove the stored file of a document's previous version.
+    
+    Args:
+        previous_file_path: File of the previous version (if any)
+        file_path: File of the new version
+    """
+    if previous_file_path and previous_file_path != file_path and os.path.exists(previous_file_path):
+        try:
+            os.remove(previous_file_path)
+            log_step("Document Processing", f"Removed previous version file: {previous_file_path}")
+        except OSError as e:
+            log_step("Document Processing", f"Could not remove previous version file {previous_file_path}: {str(e)}", level="warning")
 
 
 def get_dummy_chunk(text: str) -> Any:
@@ -1029,53 +1354,42 @@ async def get_citation_source(
         
         # First try with user-specific storage
         if user_id:
-            document = get_user_storage(request).get_document(document_id)
+            storage = await get_async_user_storage(request)
+            document = await storage.get_document(document_id)
         
         # If document not found, try with default storage
         if not document:
             logging.info(f"Document {document_id} not found with user ID {user_id}, trying with default storage")
-            document = QdrantDBStorage().get_document(document_id)
-            
+            storage = await create_async_storage()
+            document = await storage.get_document(document_id)
+        
         if not document:
             logging.error(f"Document {document_id} not found in any collection")
             raise HTTPException(status_code=404, detail="Document not found")
         
-        # Get chunk details
-        chunks = []
+        # Get the chunk and the chunks around it (adjacent chunks)
+        storage = await get_async_user_storage(request) if user_id else await create_async_storage()
+        context_chunks = await storage.get_neighbor_chunks(chunk_id, window=CITATION_CONTEXT_WINDOW)
         
-        # First try with user-specific storage
-        if user_id:
-            chunks = get_user_storage(request).get_document_chunks(document_id)
+        # If chunk not found, try with default storage
+        if not context_chunks and user_id:
+            logging.info(f"Chunk {chunk_id} not found with user ID {user_id}, trying with default storage")
+            storage = await create_async_storage()
+            context_chunks = await storage.get_neighbor_chunks(chunk_id, window=CITATION_CONTEXT_WINDOW)
         
-        # If chunks not found, try with default storage
-        if not chunks:
-            logging.info(f"Chunks not found with user ID {user_id}, trying with default storage")
-            chunks = QdrantDBStorage().get_document_chunks(document_id)
-            
-        if not chunks:
-            logging.error(f"No chunks found for document {document_id}")
-            raise HTTPException(status_code=404, detail="Document chunks not found")
-        
-        # Find the specific chunk
-        chunk = next((c for c in chunks if c["chunk_id"] == chunk_id), None)
-        if not chunk:
+        chunk = next((c for c in context_chunks if c["chunk_id"] == chunk_id), None)
+        if not chunk or chunk["metadata"].get("source_document_id") != document_id:
             raise HTTPException(status_code=404, detail="Chunk not found")
         
-        # Get surrounding context (adjacent chunks)
-        context_chunks = []
-        for c in chunks:
-            # Check if chunk is in the same page/section
-            same_page = (
-                c["metadata"].get("page_number") == chunk["metadata"].get("page_number")
-                if "page_number" in chunk["metadata"]
-                else False
-            )
-            
-            if same_page:
-                context_chunks.append(c)
-        
-        # Sort context chunks by position
-        context_chunks.sort(key=lambda c: c["metadata"].get("start_index", 0))
+        # Page images let the client preview the citation without downloading the document
+        page_number = chunk["metadata"].get("page_number")
+        preview = None
+        if document.get("document_type") == "pdf" and page_number is not None and page_number > 0:
+            await storage.record_page_view(document_id, page_number)
+            preview = {
+                "thumbnail_url": str(request.url_for("get_page_thumbnail", document_id=document_id, page_number=page_number)),
+                "page_image_url": f"{request.url_for('get_page_image', document_id=document_id, page_number=page_number)}?chunk_id={chunk_id}"
+            }
         
         # Format source information
         return {
@@ -1083,16 +1397,17 @@ async def get_citation_source(
                 "document_id": document_id,
                 "filename": document.get("filename", "Unknown"),
                 "document_type": document.get("document_type", "Unknown"),
-                "page_number": chunk["metadata"].get("page_number"),
+                "page_number": page_number,
                 "bounding_box": chunk["metadata"].get("bounding_box")
             },
+            "preview": preview,
             "chunk": {
                 "chunk_id": chunk_id,
                 "text": chunk["text"],
                 "metadata": chunk["metadata"]
             },
             "context": {
-                "chunks": context_chunks[:5],  # Limit to 5 chunks for context
+                "chunks": context_chunks,
                 "total_chunks": len(context_chunks)
             }
         }
\ No newline at end of file
@@ -6,27 +6,35 @@ from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Body, Re
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
-from app.drive.google_drive import GoogleDriveClient
-from app.parsers.pdf_parser import PDFParser
-from app.parsers.docx_parser import DocxParser
+from app.parsers import get_parser
 from app.chunking.chunker import DocumentChunker
 from app.embeddings.embedder import AzureOpenAIEmbedder
-from app.storage.qdrant_db import QdrantDBStorage
+from app.storage.factory import get_user_storage
 from app.utils.logging import log_step, Timer
 
 
 router = APIRouter()
 
 # Initialize components
-drive_client = GoogleDriveClient()
 chunker = DocumentChunker()
 embedder = AzureOpenAIEmbedder()
 
-# Helper function to get Qdrant storage for the current user
-def get_storage(request: Request):
-    """Get Qdrant storage for the current user."""
-    user_id = getattr(request.state, "user_id", None)
-    return QdrantDBStorage(user_id=user_id)
+# Google Drive client, created on first use (see get_drive_client)
+_drive_client = None
+
+
+def get_drive_client():
+    """
+    Get the shared Google Drive client, loading the Google API libraries on first use.
+    
+    Returns:
+        Google Drive client
+    """
+    global _drive_client
+    if _drive_client is None:
+        from app.drive.google_drive import GoogleDriveClient
+        _drive_client = GoogleDriveClient()
+    return _drive_client
 
 
 # Models
@@ -64,7 +72,7 @@ async def get_auth_url():
         Authorization URL
     """
     try:
-        auth_url = drive_client.get_auth_url()
+        auth_url = get_drive_client().get_auth_url()
         return {"auth_url": auth_url}
     except Exception as e:
         log_step("Drive Auth", f"Error getting auth URL: {str(e)}", level="error")
@@ -85,6 +93,7 @@ async def authenticate(auth_request: AuthRequest):
     try:
         log_step("Drive Auth", f"Received authentication code: {auth_request.code[:10]}...")
         
+        drive_client = get_drive_client()
         result = drive_client.exchange_code(auth_request.code)
         
         if result:
@@ -132,7 +141,7 @@ async def list_files(folder_id: Optional[str] = None, file_types: Optional[str]
             file_type_list = [ext.strip() for ext in file_types.split(",")]
         
         # List files
-        files = drive_client.list_files(folder_id, file_type_list)
+        files = get_drive_client().list_files(folder_id, file_type_list)
         return {"files": files}
     except Exception as e:
         log_step("Drive Files", f"Error listing files: {str(e)}", level="error")
@@ -152,7 +161,7 @@ async def process_drive_file(request: DriveFileRequest):
     """
     try:
         with Timer("Process Drive File"):
-            result = drive_client.process_file(request.file_id, request.metadata)
+            result = get_drive_client().process_file(request.file_id, request.metadata)
             return result
     except Exception as e:
         log_step("Drive File Processing", f"Error: {str(e)}", level="error")
@@ -172,7 +181,7 @@ async def process_drive_files(request: DriveFilesRequest):
     """
     try:
         with Timer("Process Drive Files"):
-            results = drive_client.process_files(request.file_ids, request.metadata)
+            results = get_drive_client().process_files(request.file_ids, request.metadata)
             return {"results": results}
     except Exception as e:
         log_step("Drive Files Processing", f"Error: {str(e)}", level="error")
@@ -236,7 +245,7 @@ async def import_drive_file(
             log_step("Drive File Processing", f"Processing file: {file_id}")
             
             # Download file from Google Drive
-            file_data = drive_client.download_file(file_id)
+            file_data = get_drive_client().download_file(file_id)
             
             if not file_data:
                 log_step("Drive File Processing", f"Failed to download file: {file_id}", level="error")
@@ -251,10 +260,10 @@ async def import_drive_file(
             
             # Parse document based on file type
             if file_ext == "pdf":
-                parser = PDFParser(chunker)
+                parser = get_parser("pdf", chunker)
                 processed_doc = parser.parse_stream(file_content, filename, metadata)
             elif file_ext == "docx":
-                parser = DocxParser(chunker)
+                parser = get_parser("docx", chunker)
                 processed_doc = parser.parse_stream(file_content, filename, metadata)
             else:
                 log_step("Drive File Processing", f"Unsupported file type: {file_ext}", level="warning")
@@ -264,7 +273,7 @@ async def import_drive_file(
             embeddings = embedder.generate_embeddings(processed_doc.chunks)
             
             # Store document and embeddings
-            document_id = get_storage(request).store_document(processed_doc, embeddings)
+            document_id = get_user_storage(request).store_document(processed_doc, embeddings)
             
             log_step("Drive File Processing", f"Completed processing file: {filename}")
             
@@ -289,7 +298,7 @@ def process_drive_file_task(request: Request, file_id: str, metadata: Optional[D
             log_step("Drive File Processing", f"Processing file: {file_id}")
             
             # Download file from Google Drive
-            file_data = drive_client.download_file(file_id)
+            file_data = get_drive_client().download_file(file_id)
             
             if not file_data:
                 log_step("Drive File Processing", f"Failed to download file: {file_id}", level="error")
@@ -304,10 +313,10 @@ def process_drive_file_task(request: Request, file_id: str, metadata: Optional[D
             
             # Parse document based on file type
             if file_ext == "pdf":
-                parser = PDFParser(chunker)
+                parser = get_parser("pdf", chunker)
                 processed_doc = parser.parse_stream(file_content, filename, metadata)
             elif file_ext == "docx":
-                parser = DocxParser(chunker)
+                parser = get_parser("docx", chunker)
                 processed_doc = parser.parse_stream(file_content, filename, metadata)
             else:
                 log_step("Drive File Processing", f"Unsupported file type: {file_ext}", level="warning")
@@ -317,7 +326,7 @@ def process_drive_file_task(request: Request, file_id: str, metadata: Optional[D
             embeddings = embedder.generate_embeddings(processed_doc.chunks)
             
             # Store document and embeddings
-            document_id = get_storage(request).store_document(processed_doc, embeddings)
+            document_id = get_user_storage(request).store_document(processed_doc, embeddings)
             
             log_step("Drive File Processing", f"Completed processing file: {filename}")
             
@@ -345,7 +354,7 @@ def process_drive_folder_task(
             log_step("Drive Folder Processing", f"Processing folder: {folder_id}")
             
             # List files in folder
-            files = drive_client.list_files(folder_id, file_types)
+            files = get_drive_client().list_files(folder_id, file_types)
             
             if not files:
                 log_step("Drive Folder Processing", f"No files found in folder: {folder_id}", level="warning")
@@ -1,8 +1,17 @@
 # Storage Package
 """
-Vector storage using Qdrant.
+Vector storage with selectable backends (Qdrant, numpy, Chroma).
+
+Use app.storage.factory.create_storage to get the backend configured with
+STORAGE_BACKEND; every backend implements DocumentStorage.
 """
 
-from app.storage.qdrant_db import QdrantDBStorage
-# For backward compatibility, alias QdrantDBStorage as ChromaDBStorage
-ChromaDBStorage = QdrantDBStorage
\ No newline at end of file
+from app.storage.base import DocumentStorage
+
+
+def __getattr__(name: str):
+    # The Qdrant backend (and client) is imported on first use
+    if name == "QdrantDBStorage":
+        from app.storage.qdrant_db import QdrantDBStorage
+        return QdrantDBStorage
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,609 @@
+import time
+import asyncio
+from typing import List, Dict, Any, Optional, Union, Tuple, AsyncIterator
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue, MatchAny, Range, SearchParams, QueryRequest, Condition, IsEmptyCondition, PayloadField
+
+from app.storage.mixins import ChunkPayloadMixin, StorageMixin
+from app.storage.qdrant_db import (
+    QdrantDBStorage,
+    QdrantPointsMixin,
+    COLLECTION_PROFILES,
+    DEFAULT_COLLECTION_PROFILE,
+    DEFAULT_TENANCY,
+    SCROLL_PAGE_SIZE,
+    qdrant_client_options,
+    resolve_collection,
+    cache_collection_profile,
+    cached_collection_profile
+)
+from app.storage.document_catalog import get_document_catalog
+from app.utils.logging import log_step, Timer
+
+
+# One client (and connection pool) shared by every request on the event loop
+_client: Optional[AsyncQdrantClient] = None
+
+# Collections created, indexed and migrated by this process
+_ready_collections = set()
+
+
+def get_async_client() -> AsyncQdrantClient:
+    """
+    Get the shared async Qdrant client.
+    
+    Returns:
+        Async Qdrant client
+    """
+    global _client
+    if _client is None:
+        _client = AsyncQdrantClient(**qdrant_client_options())
+    return _client
+
+
+async def close_async_client():
+    """Close the shared async Qdrant client (on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+class AsyncQdrantDBStorage(QdrantPointsMixin, ChunkPayloadMixin):
+    """
+    Read and delete operations of QdrantDBStorage for async request handlers.
+    
+    Qdrant calls go through the async client, so handlers await them instead
+    of blocking the event loop. Catalog lookups are local SQLite queries and
+    run the shared sync implementations (StorageMixin) in a worker thread.
+    Ingestion keeps using QdrantDBStorage, which runs in background tasks and
+    thread pools.
+    
+    Create instances with `await AsyncQdrantDBStorage.create(...)`, which makes
+    sure the collection exists first.
+    """
+    
+    def __init__(
+        self,
+        collection_name: str = "documents",
+        user_id: Optional[str] = None,
+        profile: Optional[str] = None,
+        tenancy: Optional[str] = None
+    ):
+        """
+        Initialize async Qdrant storage without touching the collection.
+        
+        Args:
+            collection_name: Base name for the collection
+            user_id: Optional user ID for user-specific collections
+            profile: Name of the COLLECTION_PROFILES entry used if the collection has to be created
+                (defaults to QDRANT_COLLECTION_PROFILE)
+            tenancy: "collection" for a collection per user, "shared" for one collection
+                partitioned by tenant (defaults to QDRANT_TENANCY)
+        """
+        self.base_collection_name = collection_name
+        self.user_id = user_id
+        self.new_collection_profile = profile or DEFAULT_COLLECTION_PROFILE
+        if self.new_collection_profile not in COLLECTION_PROFILES:
+            raise ValueError(f"Unknown collection profile: {self.new_collection_profile}")
+        
+        self.tenancy = tenancy or DEFAULT_TENANCY
+        self.collection_name, self.tenant_id = resolve_collection(collection_name, user_id, self.tenancy)
+        
+        self.client = get_async_client()
+        self.catalog = get_document_catalog()
+    
+    @classmethod
+    async def create(
+        cls,
+        collection_name: str = "documents",
+        user_id: Optional[str] = None,
+        profile: Optional[str] = None,
+        tenancy: Optional[str] = None
+    ) -> "AsyncQdrantDBStorage":
+        """
+        Create async storage for a collection, creating the collection if needed.
+        
+        Args:
+            collection_name: Base name for the collection
+            user_id: Optional user ID for user-specific collections
+            profile: Name of the COLLECTION_PROFILES entry used if the collection has to be created
+            tenancy: "collection" or "shared" (defaults to QDRANT_TENANCY)
+        
+        Returns:
+            Async storage
+        """
+        storage = cls(collection_name, user_id, profile, tenancy)
+        await storage.ensure_collection()
+        return storage
+    
+    async def ensure_collection(self):
+        """
+        Create, index and migrate the collection once per process.
+        
+        Reuses the sync storage's setup, run in a worker thread; later storage
+        objects for the same collection skip it.
+        """
+        if self.collection_name in _ready_collections:
+            return
+        
+        await asyncio.to_thread(
+            QdrantDBStorage, self.base_collection_name, self.user_id, self.new_collection_profile, self.tenancy
+        )
+        _ready_collections.add(self.collection_name)
+    
+    async def get_search_params(self) -> SearchParams:
+        """Search parameters for the collection's profile (HNSW ef, quantized rescoring)."""
+        profile_name = cached_collection_profile(self.collection_name)
+        if not profile_name:
+            collection = await self.client.get_collection(self.collection_name)
+            profile_name = cache_collection_profile(self.collection_name, collection.config)
+        return COLLECTION_PROFILES[profile_name]["search"]
+    
+    async def query_similar(
+        self,
+        query_text: str,
+        embedding: List[float],
+        n_results: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Query for chunks similar to a query text.
+        
+        Args:
+            query_text: Query text
+            embedding: Query embedding vector
+            n_results: Number of results to return
+            filter_criteria: Filter criteria for metadata
+            fields: Payload fields to return (all if not provided; SEARCH_PAYLOAD_FIELDS
+                has the ones answer generation needs)
+        
+        Returns:
+            List of similar chunks with metadata
+        """
+        with Timer("Qdrant DB Query"):
+            log_step("Query", f"Querying for: {query_text[:50]}...")
+            
+            search_params = await self.get_search_params()
+            start = time.perf_counter()
+            response = await self.client.query_points(
+                collection_name=self.collection_name,
+                query=embedding,
+                limit=n_results,
+                query_filter=self._criteria_filter(filter_criteria),
+                search_params=search_params,
+                with_payload=self._search_payload_selector(fields)
+            )
+            
+            return self._format_search_results(response.points, start)
+    
+    async def query_similar_batch(
+        self,
+        query_texts: List[str],
+        embeddings: List[List[float]],
+        n_results: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Query for chunks similar to each of several query texts in one request.
+        
+        Args:
+            query_texts: Query texts
+            embeddings: Query embedding vectors, in the same order
+            n_results: Number of results to return per query
+            filter_criteria: Filter criteria for metadata, applied to every query
+            fields: Payload fields to return (all if not provided)
+        
+        Returns:
+            List of similar chunks with metadata for each query
+        """
+        with Timer("Qdrant DB Batch Query"):
+            log_step("Query", f"Querying for {len(query_texts)} queries in one batch")
+            
+            search_params = await self.get_search_params()
+            query_filter = self._criteria_filter(filter_criteria)
+            with_payload = self._search_payload_selector(fields)
+            start = time.perf_counter()
+            responses = await self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    QueryRequest(
+                        query=embedding,
+                        limit=n_results,
+                        filter=query_filter,
+                        params=search_params,
+                        with_payload=with_payload
+                    )
+                    for embedding in embeddings
+                ]
+            )
+            
+            return [self._format_search_results(response.points, start) for response in responses]
+    
+    async def delete_document(self, document_id: str) -> bool:
+        """
+        Delete a document and all its chunks.
+        
+        Args:
+            document_id: Document ID
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            document_condition = FieldCondition(key="source_document_id", match=MatchValue(value=document_id))
+            
+            # Chunks standing for content of other documents move to one of them, the rest are deleted
+            await self._rehome_shared_chunks([document_condition], [document_id])
+            await self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=self._scoped_filter([document_condition])
+            )
+            await asyncio.to_thread(self.catalog.delete_document, self.collection_name, document_id, self.tenant_id)
+            
+            log_step("Storage", f"Deleted document: {document_id}")
+            return True
+        
+        except Exception as e:
+            log_step("Storage", f"Error deleting document: {str(e)}", level="error")
+            return False
+    
+    async def delete_documents(self, document_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Delete many documents and all their chunks.
+        
+        The chunks of all documents are removed with one filter-based delete,
+        and the document records in one catalog transaction.
+        
+        Args:
+            document_ids: Document IDs
+        
+        Returns:
+            Records of the deleted documents (IDs without a record are left out)
+        """
+        if not document_ids:
+            return []
+        
+        with Timer("Delete Documents"):
+            documents_condition = FieldCondition(key="source_document_id", match=MatchAny(any=list(document_ids)))
+            
+            # Chunks standing for content of other documents move to one of them, the rest are deleted
+            await self._rehome_shared_chunks([documents_condition], document_ids)
+            await self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=self._scoped_filter([documents_condition])
+            )
+            records = await asyncio.to_thread(
+                self.catalog.delete_documents, self.collection_name, list(document_ids), self.tenant_id
+            )
+            
+            log_step("Storage", f"Deleted {len(records)} of {len(document_ids)} documents")
+            return records
+    
+    async def _rehome_shared_chunks(self, conditions: List[Condition], removed_document_ids: List[str]) -> int:
+        """
+        Re-home the chunks about to be removed that hold content of other documents.
+        
+        See ChunkPayloadMixin._rehomed_payload; the catalog lookups run in a worker thread.
+        
+        Args:
+            conditions: Conditions selecting the chunks being removed
+            removed_document_ids: Documents being deleted along with the chunks
+        
+        Returns:
+            Number of re-homed chunks
+        """
+        shared_filter = self._scoped_filter(conditions, [IsEmptyCondition(is_empty=PayloadField(key="provenance"))])
+        points = [point async for point in self.iter_scroll(shared_filter)]
+        if not points:
+            return 0
+        
+        operations = await asyncio.to_thread(self._rehome_operations, points, removed_document_ids)
+        if operations:
+            await self.client.batch_update_points(collection_name=self.collection_name, update_operations=operations)
+            log_step("Storage", f"Re-homed {len(operations)} chunks shared with other documents")
+        return len(operations)
+    
+    async def find_document(self, **criteria: Any) -> Optional[Dict[str, Any]]:
+        """
+        Find a document metadata record by exact field values.
+        
+        Args:
+            **criteria: Record fields to match (e.g. content_hash=..., filename=...)
+        
+        Returns:
+            Document metadata, or None if no document matches
+        """
+        return await asyncio.to_thread(lambda: StorageMixin.find_document(self, **criteria))
+    
+    async def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get document metadata.
+        
+        Args:
+            document_id: Document ID
+        
+        Returns:
+            Document metadata, or None if not found
+        """
+        return await asyncio.to_thread(StorageMixin.get_document, self, document_id)
+    
+    async def list_documents(
+        self,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List all of the user's documents.
+        
+        Args:
+            filter_criteria: Filter criteria for documents
+            fields: Metadata fields to return (all if not provided)
+        
+        Returns:
+            List of document metadata
+        """
+        return await asyncio.to_thread(StorageMixin.list_documents, self, filter_criteria, fields)
+    
+    async def list_documents_page(
+        self,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of the user's documents.
+        
+        Args:
+            filter_criteria: Document metadata fields to match (e.g. document_type)
+            limit: Maximum number of documents
+            cursor: Cursor returned for the previous page (None for the first page)
+            fields: Metadata fields to return (all if not provided)
+        
+        Returns:
+            Tuple of (document metadata, cursor for the next page or None after the last page)
+        """
+        return await asyncio.to_thread(StorageMixin.list_documents_page, self, filter_criteria, limit, cursor, fields)
+    
+    async def iter_documents(
+        self,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over all of the user's documents.
+        
+        Args:
+            filter_criteria: Document metadata fields to match (e.g. document_type)
+            fields: Metadata fields to return (all if not provided)
+        
+        Yields:
+            Document metadata
+        """
+        cursor = None
+        while True:
+            documents, cursor = await self.list_documents_page(filter_criteria, SCROLL_PAGE_SIZE, cursor, fields)
+            for document in documents:
+                yield document
+            if cursor is None:
+                return
+    
+    async def skip_documents(self, count: int, filter_criteria: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Get the cursor positioned after the first documents, without fetching their records.
+        
+        Args:
+            count: Number of documents to skip
+            filter_criteria: Document metadata fields to match
+        
+        Returns:
+            Cursor for the document following the skipped ones (None if there is none)
+        """
+        return await asyncio.to_thread(StorageMixin.skip_documents, self, count, filter_criteria)
+    
+    async def count_documents(self, filter_criteria: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Count the user's documents.
+        
+        Args:
+            filter_criteria: Document metadata fields to match
+        
+        Returns:
+            Number of matching documents
+        """
+        return await asyncio.to_thread(StorageMixin.count_documents, self, filter_criteria)
+    
+    async def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get the user's document totals, kept up to date by the document catalog.
+        
+        Returns:
+            Total documents, documents per type, total chunks, OCR chunks and bytes
+        """
+        return await asyncio.to_thread(StorageMixin.get_statistics, self)
+    
+    async def claim_content(self, content_hash: str, document_id: str) -> Optional[str]:
+        """Reserve a file's content hash for a document of this user (see StorageMixin.claim_content)."""
+        return await asyncio.to_thread(StorageMixin.claim_content, self, content_hash, document_id)
+    
+    async def release_content(self, content_hash: str, document_id: str) -> bool:
+        """Release a document's claim on a content hash (see StorageMixin.release_content)."""
+        return await asyncio.to_thread(StorageMixin.release_content, self, content_hash, document_id)
+    
+    async def record_page_view(self, document_id: str, page_number: int):
+        """Count a citation view of a document page (see StorageMixin.record_page_view)."""
+        await asyncio.to_thread(StorageMixin.record_page_view, self, document_id, page_number)
+    
+    async def top_pages(self, document_id: str, limit: int) -> List[int]:
+        """Get a document's most viewed pages (see StorageMixin.top_pages)."""
+        return await asyncio.to_thread(StorageMixin.top_pages, self, document_id, limit)
+    
+    async def scroll_page(
+        self,
+        scroll_filter: Optional[Filter] = None,
+        limit: int = SCROLL_PAGE_SIZE,
+        offset: Optional[Any] = None,
+        with_payload: Union[bool, List[str]] = True
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Get one page of points matching a filter.
+        
+        Args:
+            scroll_filter: Filter for the points
+            limit: Maximum number of points
+            offset: Point ID to start from (None for the first page)
+            with_payload: Whether to return payloads, or the payload fields to return
+        
+        Returns:
+            Tuple of (points, cursor for the next page or None after the last page)
+        """
+        points, next_offset = await self.client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=scroll_filter,
+            limit=limit,
+            offset=offset,
+            with_payload=with_payload,
+            with_vectors=False
+        )
+        return points, str(next_offset) if next_offset is not None else None
+    
+    async def iter_scroll(
+        self,
+        scroll_filter: Optional[Filter] = None,
+        with_payload: Union[bool, List[str]] = True,
+        page_size: int = SCROLL_PAGE_SIZE,
+        offset: Optional[Any] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate over every point matching a filter, one scroll page at a time.
+        
+        Args:
+            scroll_filter: Filter for the points
+            with_payload: Whether to return payloads, or the payload fields to return
+            page_size: Number of points fetched per request
+            offset: Point ID to start from (a cursor returned by scroll_page)
+        
+        Yields:
+            Qdrant points
+        """
+        while True:
+            points, offset = await self.scroll_page(scroll_filter, page_size, offset, with_payload)
+            for point in points:
+                yield point
+            if offset is None:
+                return
+    
+    async def iter_document_chunks(self, document_id: str, fields: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over all chunks of a document.
+        
+        Args:
+            document_id: Document ID
+            fields: Payload fields to return (all if not provided; include "text" to get chunk texts)
+        
+        Yields:
+            Document chunks
+        """
+        chunk_filter = self._scoped_filter([
+            FieldCondition(key="source_document_id", match=MatchValue(value=document_id))
+        ])
+        
+        with_payload = (fields + ["original_chunk_id"]) if fields else True
+        async for point in self.iter_scroll(chunk_filter, with_payload=with_payload):
+            yield self._format_chunk(point)
+    
+    async def get_document_chunks(self, document_id: str, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Get all chunks for a document.
+        
+        Args:
+            document_id: Document ID
+            fields: Payload fields to return (all if not provided; include "text" to get chunk texts)
+        
+        Returns:
+            List of document chunks
+        """
+        with Timer("Get Document Chunks"):
+            try:
+                chunks = [chunk async for chunk in self.iter_document_chunks(document_id, fields)]
+                log_step("Storage", f"Found {len(chunks)} chunks for document {document_id}")
+                return chunks
+            
+            except Exception as e:
+                log_step("Storage", f"Error getting document chunks: {str(e)}", level="error")
+                return []
+    
+    async def get_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a single chunk by ID.
+        
+        Args:
+            chunk_id: Chunk ID
+        
+        Returns:
+            Chunk with metadata, or None if not found
+        """
+        try:
+            points = await self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=[self._chunk_point_id(chunk_id)],
+                with_payload=True,
+                with_vectors=False
+            )
+        except Exception as e:
+            log_step("Storage", f"Error getting chunk {chunk_id}: {str(e)}", level="error")
+            return None
+        
+        # Chunks of other tenants of a shared collection are not visible
+        if not points or (self.tenant_id and points[0].payload.get("tenant_id") != self.tenant_id):
+            return None
+        return self._format_chunk(points[0])
+    
+    async def get_neighbor_chunks(self, chunk_id: str, window: int = 2) -> List[Dict[str, Any]]:
+        """
+        Get a chunk together with the chunks around it in its document.
+        
+        Neighbors are looked up by chunk ordinal. Chunks stored before ordinals
+        were recorded fall back to the other chunks of the same page.
+        
+        Args:
+            chunk_id: Chunk ID
+            window: Number of chunks to include on each side
+        
+        Returns:
+            Chunks in document order, including the chunk itself (empty if not found)
+        """
+        chunk = await self.get_chunk(chunk_id)
+        if not chunk:
+            return []
+        
+        metadata = chunk["metadata"]
+        conditions = [FieldCondition(key="source_document_id", match=MatchValue(value=metadata.get("source_document_id")))]
+        ordinal = metadata.get("chunk_ordinal")
+        
+        if ordinal is not None:
+            conditions.append(FieldCondition(key="chunk_ordinal", range=Range(gte=ordinal - window, lte=ordinal + window)))
+            limit = 2 * window + 1
+        else:
+            conditions.append(FieldCondition(key="page_number", match=MatchValue(value=metadata.get("page_number", -1))))
+            limit = 1000
+        
+        try:
+            points, _ = await self.scroll_page(self._scoped_filter(conditions), limit)
+        except Exception as e:
+            log_step("Storage", f"Error getting neighbors of chunk {chunk_id}: {str(e)}", level="error")
+            return [chunk]
+        
+        chunks = [self._format_chunk(point) for point in points]
+        
+        if ordinal is not None:
+            chunks.sort(key=lambda c: c["metadata"].get("chunk_ordinal", 0))
+            return chunks
+        
+        # Same-page fallback: keep the window around the chunk by position on the page
+        chunks.sort(key=lambda c: c["metadata"].get("start_index", 0))
+        position = next((i for i, c in enumerate(chunks) if c["chunk_id"] == chunk["chunk_id"]), 0)
+        return chunks[max(position - window, 0):position + window + 1]
@@ -0,0 +1,251 @@
+from typing import List, Dict, Any, Optional, Union, Tuple, Iterator, Iterable, AsyncIterator, NamedTuple, Protocol, runtime_checkable
+
+from app.chunking.models import DocumentChunk, ProcessedDocument
+from app.chunking.records import ChunkRecord
+
+
+# Embedding size of the collections
+VECTOR_SIZE = 1536
+
+# Payload fields the answer generator and citation builder read from search hits
+SEARCH_PAYLOAD_FIELDS = [
+    "text",
+    "original_chunk_id",
+    "source_document_id",
+    "source_document_name",
+    "source_document_type",
+    "page_number",
+    "chunk_ordinal",
+    "bounding_box",
+]
+
+
+class ChunkPoint(NamedTuple):
+    """A chunk as written to (or read back from) a storage backend."""
+    id: str
+    vector: Optional[List[float]]
+    payload: Dict[str, Any]
+
+
+class ScoredChunk(NamedTuple):
+    """A search hit: a stored chunk and its similarity to the query."""
+    id: str
+    score: float
+    payload: Dict[str, Any]
+
+
+@runtime_checkable
+class DocumentStorage(Protocol):
+    """
+    Interface every storage backend implements (see app.storage.factory).
+    
+    Chunks are written as ChunkPoints whatever the backend, so payload building,
+    result formatting and the catalog operations are shared (see
+    app.storage.mixins); backends differ in where the vectors live and how
+    they are searched. Document records live in the shared document catalog.
+    """
+    
+    user_id: Optional[str]
+    collection_name: str
+    
+    # Ingestion
+    def store_document(self, document: ProcessedDocument, embeddings: Dict[str, List[float]]) -> str:
+        """Store a processed document with embeddings and return its ID."""
+        ...
+    
+    async def store_document_stream(
+        self,
+        document: ProcessedDocument,
+        chunk_embeddings: AsyncIterator[Tuple[Union[DocumentChunk, ChunkRecord], List[float]]],
+        batch_size: Optional[int] = None,
+        parallelism: Optional[int] = None
+    ) -> str:
+        """Store a processed document from a stream of (chunk, embedding) pairs and return its ID."""
+        ...
+    
+    def store_chunks(
+        self,
+        chunks: List[Union[DocumentChunk, ChunkRecord]],
+        embeddings: Dict[str, List[float]],
+        file_path: Optional[str] = None,
+        wait: bool = True
+    ) -> Tuple[int, int]:
+        """Store a batch of chunks and return (chunks stored, OCR chunks among them)."""
+        ...
+    
+    async def store_chunk_stream(
+        self,
+        chunk_embeddings: AsyncIterator[Tuple[Union[DocumentChunk, ChunkRecord], List[float]]],
+        file_path: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        wait: bool = True
+    ) -> Tuple[int, int]:
+        """Store chunks from a stream and return (chunks stored, OCR chunks among them)."""
+        ...
+    
+    def upsert_points(
+        self,
+        points: Iterable[ChunkPoint],
+        batch_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        wait: bool = True
+    ) -> int:
+        """Upsert points in batches and return how many were upserted."""
+        ...
+    
+    def wait_for_writes(self):
+        """Block until every earlier write has been applied."""
+        ...
+    
+    def store_document_metadata(
+        self,
+        document: ProcessedDocument,
+        chunk_count: int,
+        ocr_chunk_count: int = 0,
+        file_path: Optional[str] = None,
+        extra_metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Record a document in the document catalog."""
+        ...
+    
+    # Deduplication and re-ingestion
+    def find_chunks_by_simhash_bands(
+        self,
+        bands: List[str],
+        exclude_document_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, int]]:
+        """Find stored chunks sharing at least one SimHash LSH band, as (point ID, fingerprint)."""
+        ...
+    
+    def add_chunk_provenance(self, provenance: Dict[str, List[Dict[str, Any]]]):
+        """Record the sources of near-duplicate chunks on the chunk that was kept."""
+        ...
+    
+    def get_chunk_locations(self, document_id: str) -> Dict[str, Dict[str, Any]]:
+        """Get the location of every stored chunk of a document, by point ID."""
+        ...
+    
+    def update_chunk_payloads(self, chunks: List[Union[DocumentChunk, ChunkRecord]], file_path: Optional[str] = None):
+        """Replace the payload of already-stored chunks, keeping their vectors."""
+        ...
+    
+    def set_document_chunk_fields(self, document_id: str, fields: Dict[str, Any]):
+        """Set payload fields on every chunk of a document."""
+        ...
+    
+    def delete_chunks(self, chunk_ids: List[str]):
+        """Delete chunks by ID."""
+        ...
+    
+    # Search
+    def query_similar(
+        self,
+        query_text: str,
+        embedding: List[float],
+        n_results: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Query for chunks similar to a query text."""
+        ...
+    
+    def query_similar_batch(
+        self,
+        query_texts: List[str],
+        embeddings: List[List[float]],
+        n_results: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Query for chunks similar to each of several query texts in one request."""
+        ...
+    
+    # Documents
+    def delete_document(self, document_id: str) -> bool:
+        """Delete a document and all its chunks."""
+        ...
+    
+    def delete_documents(self, document_ids: List[str]) -> List[Dict[str, Any]]:
+        """Delete many documents and their chunks, returning the records of the deleted documents."""
+        ...
+    
+    def find_document(self, **criteria: Any) -> Optional[Dict[str, Any]]:
+        """Find one of the user's documents by metadata fields."""
+        ...
+    
+    def iter_documents(
+        self,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate over all of the user's documents."""
+        ...
+    
+    def list_documents_page(
+        self,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of the user's documents and the cursor for the next page."""
+        ...
+    
+    def skip_documents(self, count: int, filter_criteria: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Get the cursor positioned after the first documents."""
+        ...
+    
+    def count_documents(self, filter_criteria: Optional[Dict[str, Any]] = None) -> int:
+        """Count the user's documents."""
+        ...
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get the user's document totals (documents per type, chunks, OCR chunks, bytes)."""
+        ...
+    
+    def claim_content(self, content_hash: str, document_id: str) -> Optional[str]:
+        """Reserve a file's content hash for a document, returning the holder's ID if already claimed."""
+        ...
+    
+    def release_content(self, content_hash: str, document_id: str) -> bool:
+        """Release a document's claim on a content hash after its ingestion failed."""
+        ...
+    
+    def record_page_view(self, document_id: str, page_number: int):
+        """Count a citation view of a document page."""
+        ...
+    
+    def top_pages(self, document_id: str, limit: int) -> List[int]:
+        """Get a document's most viewed pages."""
+        ...
+    
+    def list_documents(
+        self,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """List all of the user's documents."""
+        ...
+    
+    def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Get document metadata, or None if not found."""
+        ...
+    
+    # Chunks
+    def iter_document_chunks(self, document_id: str, fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over all chunks of a document."""
+        ...
+    
+    def get_document_chunks(self, document_id: str, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get all chunks for a document."""
+        ...
+    
+    def get_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single chunk by ID, or None if not found."""
+        ...
+    
+    def get_neighbor_chunks(self, chunk_id: str, window: int = 2) -> List[Dict[str, Any]]:
+        """Get a chunk together with the chunks around it in its document."""
+        ...
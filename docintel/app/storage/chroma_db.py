@@ -1,221 +1,463 @@
 import os
-from typing import List, Dict, Any, Optional, Union
 import json
+import time
+import threading
+from itertools import islice
+from typing import List, Dict, Any, Optional, Union, Tuple, Iterator, Iterable
+
 import chromadb
-from chromadb.config import Settings
-from app.chunking.models import DocumentChunk, ProcessedDocument
+
+from app.chunking.models import DocumentChunk
+from app.chunking.records import ChunkRecord
+from app.storage.base import ChunkPoint, ScoredChunk
+from app.storage.mixins import StorageMixin, SCROLL_PAGE_SIZE
+from app.storage.document_catalog import get_document_catalog
 from app.utils.logging import log_step, Timer
 
 
-class ChromaDBStorage:
-    """Storage for document chunks and embeddings using Chroma DB."""
+# Directory of the persistent Chroma database
+CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+
+# Records per add request (capped by the client's maximum batch size); Chroma
+# writes each request in one transaction, so larger batches ingest faster
+UPSERT_BATCH_SIZE = int(os.getenv("CHROMA_UPSERT_BATCH_SIZE", "1000"))
+
+# Chroma metadata values must be scalars, so the SimHash band list is stored
+# as one field per band ("<prefix><band>": value), which filters can match
+BAND_FIELD_PREFIX = "simhash_band_"
+
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_chroma_client(path: str) -> Any:
+    """
+    Get the shared persistent Chroma client for a directory.
+    
+    Args:
+        path: Directory of the Chroma database
     
-    def __init__(self, persist_directory: str = "./chroma_db", user_id: Optional[str] = None):
+    Returns:
+        Chroma client
+    """
+    with _clients_lock:
+        if path not in _clients:
+            os.makedirs(path, exist_ok=True)
+            _clients[path] = chromadb.PersistentClient(path=path)
+        return _clients[path]
+
+
+class ChromaDBStorage(StorageMixin):
+    """
+    Storage for document chunks and embeddings using Chroma DB.
+    
+    Implements DocumentStorage on a Chroma collection (HNSW, cosine space) and
+    the shared document catalog; select it with STORAGE_BACKEND=chroma. Chunks
+    are built as ChunkPoints so payloads match the other backends: the chunk
+    text is stored as the Chroma document and the rest of the payload as its
+    metadata.
+    """
+    
+    def __init__(self, collection_name: str = "documents", user_id: Optional[str] = None, persist_directory: Optional[str] = None):
         """
         Initialize ChromaDB storage.
         
         Args:
-            persist_directory: Directory to persist ChromaDB data
+            collection_name: Base name for the collection
             user_id: Optional user ID for user-specific collections
+            persist_directory: Directory to persist ChromaDB data (defaults to CHROMA_PERSIST_DIRECTORY)
         """
-        self.persist_directory = persist_directory
         self.user_id = user_id
+        self.tenancy = "collection"
+        self.tenant_id = None
+        self.collection_name = f"{collection_name}_{user_id}" if user_id else collection_name
+        self.persist_directory = persist_directory or CHROMA_PERSIST_DIRECTORY
         
-        # Create directory if it doesn't exist
-        os.makedirs(persist_directory, exist_ok=True)
-        
-        # Initialize ChromaDB client with proper persistence settings
-        self.client = chromadb.PersistentClient(
-            path=persist_directory
+        self.client = get_chroma_client(self.persist_directory)
+        self.collection = self.client.get_or_create_collection(
+            name=self.collection_name,
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=None  # Embeddings always come from the embedder
         )
+        self.catalog = get_document_catalog()
         
-        # Create collections if they don't exist
-        collection_name = f"documents_{user_id}" if user_id else "documents"
-        self.documents_collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"hnsw:space": "cosine"}
-        )
+        log_step("Storage", f"Using Chroma collection: {self.collection_name}")
+    
+    def _metadata(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a point payload (without its text) to Chroma metadata."""
+        metadata = {}
+        for key, value in payload.items():
+            if key == "text" or value is None:
+                continue
+            if key == "simhash_bands":
+                for band_key in value:
+                    band, band_value = band_key.split(":", 1)
+                    metadata[f"{BAND_FIELD_PREFIX}{band}"] = band_value
+                continue
+            metadata[key] = value
+        return metadata
+    
+    def _payload(
+        self,
+        metadata: Optional[Dict[str, Any]],
+        document: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Convert Chroma metadata and document back to a point payload.
+        
+        Args:
+            metadata: Chroma metadata
+            document: Chroma document (the chunk text), if it was fetched
+            fields: Payload fields to keep (all if not provided)
+        
+        Returns:
+            Payload dictionary
+        """
+        payload = dict(metadata or {})
+        bands = sorted(int(key[len(BAND_FIELD_PREFIX):]) for key in payload if key.startswith(BAND_FIELD_PREFIX))
+        if bands:
+            payload["simhash_bands"] = [f"{band}:{payload.pop(f'{BAND_FIELD_PREFIX}{band}')}" for band in bands]
+        if document is not None:
+            payload["text"] = document
         
-        log_step("Storage", f"Using collection: {collection_name}")
+        if fields:
+            payload = {key: payload[key] for key in fields + ["original_chunk_id"] if key in payload}
+        return payload
     
-    def store_document(
-        self, 
-        document: ProcessedDocument,
-        embeddings: Dict[str, List[float]]
-    ) -> str:
+    def _where(self, criteria: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
-        Store a processed document with embeddings.
+        Build a Chroma where filter matching exact metadata values.
         
         Args:
-            document: Processed document with chunks
-            embeddings: Dictionary mapping chunk IDs to embeddings
-            
+            criteria: Metadata fields that must match
+        
         Returns:
-            Document ID
+            Where filter, or None if there is nothing to filter on
+        """
+        conditions = [{key: {"$eq": value}} for key, value in (criteria or {}).items()]
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+    
+    def _include(self, fields: Optional[List[str]]) -> List[str]:
+        """Result fields to fetch: documents only when the chunk text is wanted."""
+        return ["metadatas", "documents"] if not fields or "text" in fields else ["metadatas"]
+    
+    def _scroll(self, where: Optional[Dict[str, Any]], include: List[str]) -> Iterator[Tuple[str, Dict[str, Any], Optional[str]]]:
+        """
+        Iterate over the records matching a filter, page by page.
+        
+        Args:
+            where: Chroma where filter (None for all records)
+            include: Result fields to fetch
+        
+        Yields:
+            Tuples of (ID, metadata, document or None)
         """
-        with Timer("Chroma DB Storage"):
-            log_step("Storage", f"Storing document: {document.filename}")
+        offset = 0
+        while True:
+            page = self.collection.get(where=where, limit=SCROLL_PAGE_SIZE, offset=offset, include=include)
+            metadatas = page.get("metadatas") or [None] * len(page["ids"])
+            documents = page.get("documents") or [None] * len(page["ids"])
+            yield from zip(page["ids"], metadatas, documents)
+            if len(page["ids"]) < SCROLL_PAGE_SIZE:
+                return
+            offset += SCROLL_PAGE_SIZE
+    
+    def upsert_points(
+        self,
+        points: Iterable[ChunkPoint],
+        batch_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        wait: bool = True
+    ) -> int:
+        """
+        Upsert points in batches (parallelism and wait have no effect: Chroma applies each batch before returning).
+        
+        Args:
+            points: Points to upsert
+            batch_size: Points per add request (defaults to CHROMA_UPSERT_BATCH_SIZE)
+            parallelism: Unused
+            wait: Unused
+        
+        Returns:
+            Number of points upserted
+        """
+        batch_size = min(batch_size or UPSERT_BATCH_SIZE, self.client.get_max_batch_size())
+        points = iter(points)
+        
+        upserted = 0
+        for batch in iter(lambda: list(islice(points, batch_size)), []):
+            self._upsert_batch(batch)
+            upserted += len(batch)
+        
+        log_step("Storage", f"Upserted {upserted} points in batches of {batch_size}")
+        return upserted
+    
+    def _upsert_batch(self, batch: List[ChunkPoint]):
+        """Store one batch of points."""
+        # Chroma rejects repeated IDs within a request; keep the last point for each
+        batch = list({str(point.id): point for point in batch}.values())
+        self.collection.upsert(
+            ids=[str(point.id) for point in batch],
+            embeddings=[point.vector for point in batch],
+            metadatas=[self._metadata(point.payload) for point in batch],
+            documents=[point.payload.get("text", "") for point in batch]
+        )
+    
+    def wait_for_writes(self):
+        """Writes are applied before they return, so there is nothing to wait for."""
+    
+    def _replace_payloads(self, payloads: Dict[str, Dict[str, Any]]):
+        """
+        Replace the payload of stored points, keeping their vectors.
+        
+        Args:
+            payloads: Mapping of point ID to its new payload (including the text)
+        """
+        point_ids = list(payloads)
+        for start in range(0, len(point_ids), UPSERT_BATCH_SIZE):
+            stored = self.collection.get(ids=point_ids[start:start + UPSERT_BATCH_SIZE], include=["metadatas", "embeddings"])
             
-            # Prepare data for storage
-            ids = []
-            embedding_vectors = []
             metadatas = []
-            documents = []
-            
-            # Track document-level statistics
-            ocr_chunk_count = 0
-            
-            # Extract file path from the first chunk's metadata if available
-            file_path = None
-            if document.chunks and hasattr(document.chunks[0], 'metadata'):
-                file_path = document.chunks[0].metadata.get('file_path')
-            
-            # If no file path is found in chunks, check if it's in the document metadata
-            if not file_path and hasattr(document, 'metadata') and document.metadata:
-                file_path = document.metadata.get('file_path')
-            
-            for chunk in document.chunks:
-                # Skip chunks without embeddings
-                if chunk.chunk_id not in embeddings:
-                    log_step("Storage", f"Skipping chunk {chunk.chunk_id} - no embedding", level="warning")
-                    continue
-                
-                # Count OCR chunks
-                if chunk.is_ocr:
-                    ocr_chunk_count += 1
-                
-                # Add chunk data
-                ids.append(chunk.chunk_id)
-                embedding_vectors.append(embeddings[chunk.chunk_id])
-                
-                # Prepare metadata (must be JSON serializable)
-                metadata = {
-                    "source_document_id": chunk.source_document_id,
-                    "source_document_name": chunk.source_document_name,
-                    "source_document_type": chunk.source_document_type,
-                    "page_number": chunk.page_number if chunk.page_number is not None else -1,
-                    "is_ocr": chunk.is_ocr,
-                    "created_at": chunk.created_at.isoformat(),
-                    "is_document_metadata": False,  # Explicitly mark as not metadata
-                    "user_id": self.user_id  # Add user_id to every chunk
-                }
-                
-                # Add optional metadata if available
-                if chunk.heading_path:
-                    metadata["heading_path"] = json.dumps(chunk.heading_path)
-                if chunk.heading_level is not None:
-                    metadata["heading_level"] = chunk.heading_level
-                if chunk.bounding_box:
-                    metadata["bounding_box"] = json.dumps(chunk.bounding_box)
-                
-                # Add any additional metadata from the chunk
-                for key, value in chunk.metadata.items():
-                    if key not in metadata and isinstance(value, (str, int, float, bool)):
-                        metadata[key] = value
-                    elif isinstance(value, list) or isinstance(value, dict):
-                        metadata[key] = json.dumps(value)
-                
-                # Always make sure file_path is in the metadata if available
-                if file_path:
-                    metadata["file_path"] = file_path
-                
+            for point_id, stored_metadata in zip(stored["ids"], stored["metadatas"]):
+                metadata = self._metadata(payloads[point_id])
+                # Chroma merges metadata on update, so fields missing from the new payload are removed explicitly
+                metadata.update({key: None for key in stored_metadata or {} if key not in metadata})
                 metadatas.append(metadata)
-                documents.append(chunk.text)
             
-            # Add data to collection
-            if ids:
-                self.documents_collection.add(
-                    ids=ids,
-                    embeddings=embedding_vectors,
+            if stored["ids"]:
+                # Vectors are passed back unchanged, as Chroma re-embeds documents updated without them
+                self.collection.update(
+                    ids=stored["ids"],
+                    embeddings=stored["embeddings"],
                     metadatas=metadatas,
-                    documents=documents
+                    documents=[payloads[point_id].get("text", "") for point_id in stored["ids"]]
                 )
-                
-                log_step("Storage", f"Stored {len(ids)} chunks for document {document.document_id}")
-                
-            # Store document-level metadata in a separate collection or as a special chunk
-            # This enables us to efficiently query document metadata without retrieving all chunks
-            document_metadata = {
-                "document_id": document.document_id,
-                "filename": document.filename,
-                "document_type": document.file_type,
-                "file_size": document.file_size,
-                "total_pages": document.total_pages,
-                "chunk_count": len(document.chunks),
-                "ocr_chunk_count": ocr_chunk_count,
-                "ocr_used": document.is_complex or ocr_chunk_count > 0,
-                "processing_time": document.processing_time,
-                "created_at": document.created_at.isoformat(),
-                "user_id": self.user_id  # Add user_id to document metadata
-            }
-            
-            # Add file path to document metadata if available
-            if file_path:
-                document_metadata["file_path"] = file_path
-            
-            # Check if file_path exists in any chunk's metadata if not already found
-            if not file_path:
-                for chunk in document.chunks:
-                    if hasattr(chunk, 'metadata') and 'file_path' in chunk.metadata:
-                        document_metadata["file_path"] = chunk.metadata['file_path']
-                        file_path = chunk.metadata['file_path']
-                        break
-            
-            # Add document metadata as a special chunk with a distinct prefix
-            doc_meta_id = f"DOC_META_{document.document_id}"
-            
-            # Create metadata for the document metadata chunk
-            doc_meta_metadata = {
-                "is_document_metadata": True,
-                "source_document_id": document.document_id,
-                "source_document_name": document.filename,
-                "source_document_type": document.file_type,
-                "document_metadata": json.dumps(document_metadata),
-                "user_id": self.user_id  # Add user_id to metadata chunk
-            }
+    
+    def find_chunks_by_simhash_bands(
+        self,
+        bands: List[str],
+        exclude_document_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, int]]:
+        """
+        Find stored chunks sharing at least one SimHash LSH band.
+        
+        Args:
+            bands: Band keys (see app.utils.simhash.band_keys)
+            exclude_document_id: Document whose chunks should be ignored
+            limit: Maximum number of chunks to return
+        
+        Returns:
+            List of (point ID, fingerprint) tuples
+        """
+        if not bands:
+            return []
+        
+        try:
+            band_conditions = []
+            for band_key in bands:
+                band, band_value = band_key.split(":", 1)
+                band_conditions.append({f"{BAND_FIELD_PREFIX}{band}": {"$eq": band_value}})
+            where = band_conditions[0] if len(band_conditions) == 1 else {"$or": band_conditions}
+            if exclude_document_id:
+                where = {"$and": [where, {"source_document_id": {"$ne": exclude_document_id}}]}
             
-            # Add file_path directly to the metadata for easier access
-            if file_path:
-                doc_meta_metadata["file_path"] = file_path
+            results = self.collection.get(where=where, limit=limit, include=["metadatas"])
+            return [
+                (point_id, int(metadata["simhash"], 16))
+                for point_id, metadata in zip(results["ids"], results["metadatas"])
+                if metadata.get("simhash")
+            ]
+        except Exception as e:
+            log_step("Storage", f"Error looking up near-duplicate chunks: {str(e)}", level="warning")
+            return []
+    
+    def add_chunk_provenance(self, provenance: Dict[str, List[Dict[str, Any]]]):
+        """
+        Record the sources of near-duplicate chunks on the chunk that was kept.
+        
+        Args:
+            provenance: Mapping of chunk ID to the sources it stands for
+        """
+        if not provenance:
+            return
+        
+        point_ids = {self._chunk_point_id(chunk_id): sources for chunk_id, sources in provenance.items()}
+        stored = self.collection.get(ids=list(point_ids), include=["metadatas", "documents"])
+        
+        payloads = {}
+        for point_id, metadata, document in zip(stored["ids"], stored["metadatas"], stored["documents"]):
+            payload = self._payload(metadata, document)
+            if payload.get("provenance"):
+                sources = json.loads(payload["provenance"])
+            else:
+                # Start from the chunk's own location
+                sources = [{"source_document_id": payload.get("source_document_id"), "page_number": payload.get("page_number")}]
             
-            self.documents_collection.add(
-                ids=[doc_meta_id],
-                embeddings=[[0.0] * 1536],  # Dummy embedding (never retrieved by similarity)
-                metadatas=[doc_meta_metadata],
-                documents=[f"Document metadata for {document.filename}"]
-            )
+            for source in point_ids[point_id]:
+                if source not in sources:
+                    sources.append(source)
             
-            # Add a direct user to document mapping for easier retrieval
-            # This allows retrieving documents by user ID efficiently
-            if self.user_id:
-                user_doc_id = f"USER_DOC_{self.user_id}_{document.document_id}"
-                user_doc_metadata = {
-                    "user_id": self.user_id,
-                    "document_id": document.document_id,
-                    "filename": document.filename,
-                    "file_path": file_path if file_path else "",
-                    "is_user_document_map": True
-                }
-                
-                try:
-                    self.documents_collection.add(
-                        ids=[user_doc_id],
-                        embeddings=[[0.0] * 1536],  # Dummy embedding
-                        metadatas=[user_doc_metadata],
-                        documents=[f"User {self.user_id} document mapping to {document.document_id}"]
-                    )
-                    log_step("Storage", f"Added user-document mapping for user {self.user_id}, document {document.document_id}")
-                except Exception as e:
-                    log_step("Storage", f"Error adding user-document mapping: {str(e)}", level="warning")
-                
-            return document.document_id
+            payload["provenance"] = json.dumps(sources)
+            payloads[point_id] = payload
+        
+        self._replace_payloads(payloads)
+        log_step("Storage", f"Recorded provenance for {len(payloads)} deduplicated chunks")
+    
+    def get_chunk_locations(self, document_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the location of every stored chunk of a document.
+        
+        Args:
+            document_id: Document ID
+        
+        Returns:
+            Mapping of point ID to {page_number, start_index, end_index, chunk_ordinal}
+        """
+        location_fields = ["page_number", "start_index", "end_index", "chunk_ordinal"]
+        return {
+            point_id: {field: metadata.get(field) for field in location_fields}
+            for point_id, metadata, _ in self._scroll(self._where({"source_document_id": document_id}), ["metadatas"])
+        }
+    
+    def update_chunk_payloads(
+        self,
+        chunks: List[Union[DocumentChunk, ChunkRecord]],
+        file_path: Optional[str] = None
+    ):
+        """
+        Replace the payload of already-stored chunks, keeping their vectors.
+        
+        Args:
+            chunks: Chunks whose points already exist
+            file_path: Path of the source file
+        """
+        payloads = {}
+        for chunk in chunks:
+            payload = self._chunk_payload(chunk, file_path)
+            point_id = self._chunk_point_id(chunk.chunk_id)
+            if point_id != chunk.chunk_id:
+                payload["original_chunk_id"] = chunk.chunk_id
+            payloads[point_id] = payload
+        
+        self._replace_payloads(payloads)
+    
+    def set_document_chunk_fields(self, document_id: str, fields: Dict[str, Any]):
+        """
+        Set payload fields on every chunk of a document.
+        
+        Args:
+            document_id: Document ID
+            fields: Payload fields to set
+        """
+        point_ids = [point_id for point_id, _, _ in self._scroll(self._where({"source_document_id": document_id}), [])]
+        for start in range(0, len(point_ids), UPSERT_BATCH_SIZE):
+            batch = point_ids[start:start + UPSERT_BATCH_SIZE]
+            self.collection.update(ids=batch, metadatas=[fields] * len(batch))
+    
+    def delete_chunks(self, chunk_ids: List[str]):
+        """
+        Delete chunks by ID.
+        
+        Args:
+            chunk_ids: Chunk (or point) IDs to delete
+        """
+        if not chunk_ids:
+            return
+        
+        point_ids = [self._chunk_point_id(chunk_id) for chunk_id in chunk_ids]
+        
+        # Chunks standing for content of other documents move to one of them
+        stored = self.collection.get(ids=point_ids, include=["metadatas"])
+        rehomed = self._rehome_shared_chunks(zip(stored["ids"], stored["metadatas"]), [])
+        point_ids = [point_id for point_id in point_ids if point_id not in rehomed]
+        if not point_ids:
+            return
+        
+        self.collection.delete(ids=point_ids)
+        
+        log_step("Storage", f"Deleted {len(point_ids)} chunks")
+    
+    def _rehome_shared_chunks(self, chunks: Iterable[Tuple[str, Optional[Dict[str, Any]]]], removed_document_ids: List[str]) -> List[str]:
+        """
+        Re-home the chunks about to be removed that hold content of other documents (see ChunkPayloadMixin._rehomed_payload).
+        
+        Args:
+            chunks: (ID, metadata) of the chunks being removed
+            removed_document_ids: Documents being deleted along with the chunks
+        
+        Returns:
+            IDs of the re-homed chunks
+        """
+        payloads = {}
+        for point_id, metadata in chunks:
+            if not (metadata or {}).get("provenance"):
+                continue
+            payload = self._rehomed_payload(self._payload(metadata), removed_document_ids)
+            if payload is not None:
+                payloads[point_id] = payload
+        
+        if not payloads:
+            return []
+        
+        # The stored text is only needed for the chunks that are kept
+        stored = self.collection.get(ids=list(payloads), include=["documents"])
+        for point_id, document in zip(stored["ids"], stored["documents"]):
+            payloads[point_id]["text"] = document
+        
+        self._replace_payloads(payloads)
+        log_step("Storage", f"Re-homed {len(payloads)} chunks shared with other documents")
+        return list(payloads)
+    
+    def _search(
+        self,
+        embeddings: List[List[float]],
+        n_results: int,
+        filter_criteria: Optional[Dict[str, Any]],
+        fields: Optional[List[str]]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run one Chroma query for one or more embeddings and format the hits.
+        
+        Args:
+            embeddings: Query embedding vectors
+            n_results: Number of results to return per query
+            filter_criteria: Filter criteria for metadata
+            fields: Payload fields to return (all if not provided)
+        
+        Returns:
+            List of similar chunks with metadata for each embedding
+        """
+        start = time.perf_counter()
+        results = self.collection.query(
+            query_embeddings=embeddings,
+            n_results=n_results,
+            where=self._where(filter_criteria),
+            include=self._include(fields) + ["distances"]
+        )
+        
+        formatted_results = []
+        for index, point_ids in enumerate(results["ids"]):
+            documents = results["documents"][index] if results.get("documents") else [None] * len(point_ids)
+            points = [
+                # Cosine distance is 1 - similarity, the score the other backends return
+                ScoredChunk(id=point_id, score=1.0 - distance, payload=self._payload(metadata, document, fields))
+                for point_id, metadata, document, distance in zip(point_ids, results["metadatas"][index], documents, results["distances"][index])
+            ]
+            formatted_results.append(self._format_search_results(points, start))
+        return formatted_results
     
     def query_similar(
-        self, 
+        self,
         query_text: str,
         embedding: List[float],
         n_results: int = 5,
-        filter_criteria: Optional[Dict[str, Any]] = None
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Query for chunks similar to a query text.
@@ -225,63 +467,41 @@ class ChromaDBStorage:
             embedding: Query embedding vector
             n_results: Number of results to return
             filter_criteria: Filter criteria for metadata
-            
+            fields: Payload fields to return (all if not provided)
+        
         Returns:
             List of similar chunks with metadata
         """
         with Timer("Chroma DB Query"):
             log_step("Query", f"Querying for: {query_text[:50]}...")
-            
-            # Prepare filter structure
-            if filter_criteria:
-                # If we have additional criteria, use $and
-                where_filter = {
-                    "$and": [
-                        {"is_document_metadata": {"$eq": False}},
-                        # Add additional filter criteria
-                        *[{key: {"$eq": value}} for key, value in filter_criteria.items()]
-                    ]
-                }
-            else:
-                # If we only have the is_document_metadata condition, don't use $and
-                where_filter = {"is_document_metadata": {"$eq": False}}
-            
-            # Query collection
-            results = self.documents_collection.query(
-                query_embeddings=[embedding],
-                n_results=n_results,
-                where=where_filter
-            )
-            
-            # Format results
-            formatted_results = []
-            
-            if results["ids"][0]:
-                for i in range(len(results["ids"][0])):
-                    chunk_id = results["ids"][0][i]
-                    text = results["documents"][0][i]
-                    metadata = results["metadatas"][0][i]
-                    distance = results["distances"][0][i] if "distances" in results else None
-                    
-                    # Process metadata
-                    processed_metadata = metadata.copy()
-                    
-                    # Convert JSON strings back to objects
-                    if "heading_path" in processed_metadata:
-                        processed_metadata["heading_path"] = json.loads(processed_metadata["heading_path"])
-                    if "bounding_box" in processed_metadata:
-                        processed_metadata["bounding_box"] = json.loads(processed_metadata["bounding_box"])
-                    
-                    # Add result
-                    formatted_results.append({
-                        "chunk_id": chunk_id,
-                        "text": text,
-                        "metadata": processed_metadata,
-                        "distance": distance
-                    })
-            
-            log_step("Query", f"Found {len(formatted_results)} results")
-            return formatted_results
+            return self._search([embedding], n_results, filter_criteria, fields)[0]
+    
+    def query_similar_batch(
+        self,
+        query_texts: List[str],
+        embeddings: List[List[float]],
+        n_results: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Query for chunks similar to each of several query texts in one request.
+        
+        Args:
+            query_texts: Query texts
+            embeddings: Query embedding vectors, in the same order
+            n_results: Number of results to return per query
+            filter_criteria: Filter criteria for metadata, applied to every query
+            fields: Payload fields to return (all if not provided)
+        
+        Returns:
+            List of similar chunks with metadata for each query
+        """
+        with Timer("Chroma DB Batch Query"):
+            log_step("Query", f"Querying for {len(query_texts)} queries in one batch")
+            if not embeddings:
+                return []
+            return self._search(embeddings, n_results, filter_criteria, fields)
     
     def delete_document(self, document_id: str) -> bool:
         """
@@ -294,51 +514,12 @@ class ChromaDBStorage:
             True if successful, False otherwise
         """
         try:
-            # Delete all chunks with this document ID
-            self.documents_collection.delete(
-                where={"source_document_id": {"$eq": document_id}}
-            )
-            
-            # Also delete the document metadata entry (which has a special ID format)
-            doc_meta_id = f"DOC_META_{document_id}"
-            self.documents_collection.delete(
-                ids=[doc_meta_id]
-            )
+            where = self._where({"source_document_id": document_id})
             
-            # Delete the user-document mapping if user_id is available
-            if self.user_id:
-                user_doc_id = f"USER_DOC_{self.user_id}_{document_id}"
-                try:
-                    self.documents_collection.delete(
-                        ids=[user_doc_id]
-                    )
-                    log_step("Storage", f"Deleted user-document mapping for user {self.user_id}, document {document_id}")
-                except Exception as e:
-                    log_step("Storage", f"Error deleting user-document mapping: {str(e)}", level="warning")
-            
-            # As a fallback, delete any entries with document metadata that match this document ID
-            self.documents_collection.delete(
-                where={
-                    "$and": [
-                        {"is_document_metadata": {"$eq": True}},
-                        {"source_document_id": {"$eq": document_id}}
-                    ]
-                }
-            )
-            
-            # Also delete any user-document mappings that might exist for this document
-            # This catches mappings for any user, helpful when deleting across user boundaries
-            try:
-                self.documents_collection.delete(
-                    where={
-                        "$and": [
-                            {"is_user_document_map": {"$eq": True}},
-                            {"document_id": {"$eq": document_id}}
-                        ]
-                    }
-                )
-            except Exception as e:
-                log_step("Storage", f"Error deleting additional user-document mappings: {str(e)}", level="warning")
+            # Chunks standing for content of other documents move to one of them, the rest are deleted
+            self._rehome_shared_chunks(((point_id, metadata) for point_id, metadata, _ in self._scroll(where, ["metadatas"])), [document_id])
+            self.collection.delete(where=where)
+            self.catalog.delete_document(self.collection_name, document_id)
             
             log_step("Storage", f"Deleted document: {document_id}")
             return True
@@ -347,307 +528,60 @@ class ChromaDBStorage:
             log_step("Storage", f"Error deleting document: {str(e)}", level="error")
             return False
     
-    def list_documents(
-        self, 
-        filter_criteria: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
+    def delete_documents(self, document_ids: List[str]) -> List[Dict[str, Any]]:
         """
-        List all documents in the system.
+        Delete many documents and all their chunks.
+        
+        The chunks of all documents are removed with one filter-based delete,
+        and the document records in one catalog transaction.
         
         Args:
-            filter_criteria: Filter criteria for documents
-            
+            document_ids: Document IDs
+        
         Returns:
-            List of document metadata
-        """
-        with Timer("List Documents"):
-            try:
-                documents = []
-                
-                # First try to get documents using user-document mappings if we have a user_id
-                if self.user_id:
-                    # Query user-document mappings first
-                    where_filter = {
-                        "$and": [
-                            {"is_user_document_map": {"$eq": True}},
-                            {"user_id": {"$eq": self.user_id}}
-                        ]
-                    }
-                    
-                    mapping_results = self.documents_collection.get(
-                        where=where_filter,
-                        include=["metadatas"]
-                    )
-                    
-                    if mapping_results["ids"] and len(mapping_results["ids"]) > 0:
-                        log_step("Storage", f"Found {len(mapping_results['ids'])} document mappings for user {self.user_id}")
-                        
-                        # Get document IDs from mappings
-                        doc_ids = []
-                        doc_meta_ids = []
-                        
-                        for i, mapping_id in enumerate(mapping_results["ids"]):
-                            metadata = mapping_results["metadatas"][i]
-                            if "document_id" in metadata:
-                                doc_ids.append(metadata["document_id"])
-                                doc_meta_ids.append(f"DOC_META_{metadata['document_id']}")
-                        
-                        if doc_meta_ids:
-                            # Get document metadata by IDs
-                            doc_results = self.documents_collection.get(
-                                ids=doc_meta_ids,
-                                include=["metadatas"]
-                            )
-                            
-                            # Process document metadata
-                            if doc_results["ids"] and len(doc_results["ids"]) > 0:
-                                for i, meta_id in enumerate(doc_results["ids"]):
-                                    metadata = doc_results["metadatas"][i]
-                                    if "document_metadata" in metadata:
-                                        document_metadata = json.loads(metadata["document_metadata"])
-                                        documents.append(document_metadata)
-                
-                # If we didn't find documents via mappings or we don't have a user_id, fall back to the normal method
-                if not documents:
-                    # Prepare filter structure - don't use $and if there's only one condition
-                    if filter_criteria:
-                        # If we have additional criteria, use $and
-                        where_filter = {
-                            "$and": [
-                                {"is_document_metadata": {"$eq": True}},
-                                # Add additional filter criteria
-                                *[{key: {"$eq": value}} for key, value in filter_criteria.items()]
-                            ]
-                        }
-                    else:
-                        # If we only have the is_document_metadata condition, don't use $and
-                        where_filter = {"is_document_metadata": {"$eq": True}}
-                    
-                    # Add user_id to filter if available
-                    if self.user_id and "user_id" not in filter_criteria:
-                        where_filter["$and"].append({"user_id": {"$eq": self.user_id}})
-                    
-                    # Query collection for document metadata entries
-                    results = self.documents_collection.get(
-                        where=where_filter,
-                        include=["metadatas", "documents"]
-                    )
-                    
-                    # Format results
-                    if results["ids"]:
-                        for i in range(len(results["ids"])):
-                            metadata = results["metadatas"][i]
-                            
-                            # Parse document metadata
-                            if "document_metadata" in metadata:
-                                document_metadata = json.loads(metadata["document_metadata"])
-                                documents.append(document_metadata)
-                
-                log_step("Storage", f"Found {len(documents)} documents")
-                return documents
-                
-            except Exception as e:
-                log_step("Storage", f"Error listing documents: {str(e)}", level="error")
-                return []
+            Records of the deleted documents (IDs without a record are left out)
+        """
+        if not document_ids:
+            return []
+        
+        with Timer("Delete Documents"):
+            where = {"source_document_id": {"$in": list(document_ids)}}
+            
+            # Chunks standing for content of other documents move to one of them, the rest are deleted
+            self._rehome_shared_chunks(((point_id, metadata) for point_id, metadata, _ in self._scroll(where, ["metadatas"])), list(document_ids))
+            self.collection.delete(where=where)
+            records = self.catalog.delete_documents(self.collection_name, list(document_ids))
+            
+            log_step("Storage", f"Deleted {len(records)} of {len(document_ids)} documents")
+            return records
     
-    def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+    def iter_document_chunks(self, document_id: str, fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
         """
-        Get document metadata.
+        Iterate over all chunks of a document.
         
         Args:
             document_id: Document ID
-            
-        Returns:
-            Document metadata, or None if not found
-        """
-        with Timer("Get Document"):
-            try:
-                # Try to get document via user-document mapping first (fastest and most reliable method)
-                if self.user_id:
-                    user_doc_id = f"USER_DOC_{self.user_id}_{document_id}"
-                    try:
-                        mapping_results = self.documents_collection.get(
-                            ids=[user_doc_id],
-                            include=["metadatas"]
-                        )
-                        
-                        if mapping_results["ids"] and len(mapping_results["ids"]) > 0:
-                            # We found the mapping, now get the document metadata
-                            metadata = mapping_results["metadatas"][0]
-                            doc_meta_id = f"DOC_META_{document_id}"
-                            
-                            doc_results = self.documents_collection.get(
-                                ids=[doc_meta_id],
-                                include=["metadatas"]
-                            )
-                            
-                            if doc_results["ids"] and len(doc_results["ids"]) > 0:
-                                meta_metadata = doc_results["metadatas"][0]
-                                
-                                if "document_metadata" in meta_metadata:
-                                    document_metadata = json.loads(meta_metadata["document_metadata"])
-                                    
-                                    # Add file_path directly from the metadata if available
-                                    if "file_path" in meta_metadata:
-                                        document_metadata["file_path"] = meta_metadata["file_path"]
-                                    elif "file_path" in metadata and metadata["file_path"]:
-                                        document_metadata["file_path"] = metadata["file_path"]
-                                    
-                                    return document_metadata
-                    except Exception as mapping_error:
-                        log_step("Storage", f"Error getting document via mapping: {str(mapping_error)}", level="warning")
-                
-                # Query using proper filter structure
-                where_filter = {
-                    "$and": [
-                        {"is_document_metadata": {"$eq": True}},
-                        {"source_document_id": {"$eq": document_id}}
-                    ]
-                }
-                
-                # Add user_id to filter if available
-                if self.user_id:
-                    where_filter["$and"].append({"user_id": {"$eq": self.user_id}})
-                
-                # Query collection for document metadata entry
-                results = self.documents_collection.get(
-                    where=where_filter,
-                    include=["metadatas"]
-                )
-                
-                # Return document metadata if found
-                if results["ids"] and len(results["ids"]) > 0:
-                    metadata = results["metadatas"][0]
-                    
-                    # Parse document metadata
-                    if "document_metadata" in metadata:
-                        document_metadata = json.loads(metadata["document_metadata"])
-                        
-                        # Add file_path directly from the metadata if available
-                        if "file_path" in metadata:
-                            document_metadata["file_path"] = metadata["file_path"]
-                            
-                        # Verify file path exists and is valid
-                        if "file_path" in document_metadata:
-                            file_path = document_metadata["file_path"]
-                            if not os.path.exists(file_path):
-                                log_step("Storage", f"Warning: File path {file_path} does not exist", level="warning")
-                        else:
-                            log_step("Storage", f"Warning: No file path found for document {document_id}", level="warning")
-                            
-                        return document_metadata
-                
-                # If not found with user_id filter, try without user_id filter
-                # This allows cross-user document access when needed
-                if self.user_id:
-                    log_step("Storage", f"Document not found for user {self.user_id}, trying without user filter")
-                    general_where_filter = {
-                        "$and": [
-                            {"is_document_metadata": {"$eq": True}},
-                            {"source_document_id": {"$eq": document_id}}
-                        ]
-                    }
-                    
-                    general_results = self.documents_collection.get(
-                        where=general_where_filter,
-                        include=["metadatas"]
-                    )
-                    
-                    if general_results["ids"] and len(general_results["ids"]) > 0:
-                        metadata = general_results["metadatas"][0]
-                        
-                        if "document_metadata" in metadata:
-                            document_metadata = json.loads(metadata["document_metadata"])
-                            
-                            if "file_path" in metadata:
-                                document_metadata["file_path"] = metadata["file_path"]
-                                
-                            log_step("Storage", f"Found document {document_id} in general collection")
-                            return document_metadata
-                
-                # As a last resort, try getting by DOC_META ID directly
-                doc_meta_id = f"DOC_META_{document_id}"
-                try:
-                    last_results = self.documents_collection.get(
-                        ids=[doc_meta_id],
-                        include=["metadatas"]
-                    )
-                    
-                    if last_results["ids"] and len(last_results["ids"]) > 0:
-                        metadata = last_results["metadatas"][0]
-                        
-                        if "document_metadata" in metadata:
-                            document_metadata = json.loads(metadata["document_metadata"])
-                            
-                            if "file_path" in metadata:
-                                document_metadata["file_path"] = metadata["file_path"]
-                                
-                            log_step("Storage", f"Found document {document_id} by direct ID lookup")
-                            return document_metadata
-                except Exception as direct_error:
-                    log_step("Storage", f"Error in direct ID lookup: {str(direct_error)}", level="warning")
-                
-                log_step("Storage", f"Document {document_id} not found")
-                return None
-                
-            except Exception as e:
-                log_step("Storage", f"Error getting document: {str(e)}", level="error")
-                return None
+            fields: Payload fields to return (all if not provided; include "text" to get chunk texts)
+        
+        Yields:
+            Document chunks
+        """
+        where = self._where({"source_document_id": document_id})
+        for point_id, metadata, document in self._scroll(where, self._include(fields)):
+            yield self._format_chunk(ChunkPoint(id=point_id, vector=None, payload=self._payload(metadata, document, fields)))
     
-    def get_document_chunks(self, document_id: str) -> List[Dict[str, Any]]:
+    def get_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
         """
-        Get all chunks for a document.
+        Get a single chunk by ID.
         
         Args:
-            document_id: Document ID
-            
+            chunk_id: Chunk ID
+        
         Returns:
-            List of document chunks
-        """
-        with Timer("Get Document Chunks"):
-            try:
-                # Proper filter structure
-                where_filter = {
-                    "$and": [
-                        {"source_document_id": {"$eq": document_id}},
-                        {"is_document_metadata": {"$eq": False}}
-                    ]
-                }
-                
-                # Query collection for document chunks
-                results = self.documents_collection.get(
-                    where=where_filter,
-                    include=["metadatas", "documents"]
-                )
-                
-                # Format results
-                chunks = []
-                
-                if results["ids"]:
-                    for i in range(len(results["ids"])):
-                        chunk_id = results["ids"][i]
-                        text = results["documents"][i]
-                        metadata = results["metadatas"][i]
-                        
-                        # Process metadata
-                        processed_metadata = metadata.copy()
-                        
-                        # Convert JSON strings back to objects
-                        if "heading_path" in processed_metadata:
-                            processed_metadata["heading_path"] = json.loads(processed_metadata["heading_path"])
-                        if "bounding_box" in processed_metadata:
-                            processed_metadata["bounding_box"] = json.loads(processed_metadata["bounding_box"])
-                        
-                        # Add chunk
-                        chunks.append({
-                            "chunk_id": chunk_id,
-                            "text": text,
-                            "metadata": processed_metadata
-                        })
-                
-                log_step("Storage", f"Found {len(chunks)} chunks for document {document_id}")
-                return chunks
-                
-            except Exception as e:
-                log_step("Storage", f"Error getting document chunks: {str(e)}", level="error")
-                return []
\ No newline at end of file
+            Chunk with metadata, or None if not found
+        """
+        results = self.collection.get(ids=[self._chunk_point_id(chunk_id)], include=["metadatas", "documents"])
+        if not results["ids"]:
+            return None
+        payload = self._payload(results["metadatas"][0], results["documents"][0])
+        return self._format_chunk(ChunkPoint(id=results["ids"][0], vector=None, payload=payload))
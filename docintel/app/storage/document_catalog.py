@@ -0,0 +1,702 @@
+import os
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+from app.utils.logging import log_step
+
+
+# Default location of the catalog database
+DOCUMENT_CATALOG_PATH = os.getenv("DOCUMENT_CATALOG_PATH", os.path.join(os.getcwd(), "uploads", "catalog.db"))
+
+# Record fields kept in their own (indexed) columns; other fields are matched inside the JSON record
+INDEXED_FIELDS = ("document_id", "user_id", "filename", "content_hash", "document_type")
+
+# Document IDs per statement when deleting many records
+DELETE_GROUP_SIZE = 500
+
+# Per-document values summed into the statistics table, as SQL over a documents row
+STATISTICS_COLUMNS = {
+    "document_count": "1",
+    "chunk_count": "COALESCE(json_extract({row}.record, '$.chunk_count'), 0)",
+    "ocr_chunk_count": "COALESCE(json_extract({row}.record, '$.ocr_chunk_count'), 0)",
+    "total_bytes": "COALESCE(json_extract({row}.record, '$.file_size'), 0)"
+}
+
+
+class DocumentCatalog:
+    """
+    Catalog of document metadata records, keyed by collection and document ID.
+    
+    Document records used to be stored as zero-vector points next to the chunks
+    in Qdrant. Keeping them here leaves the vector index with searchable chunks
+    only, and makes document lookups, listing and counting indexed SQL queries.
+    
+    Per-user totals (documents by type, chunks, OCR chunks, bytes) are kept in
+    a statistics table that triggers update in the same transaction as every
+    record write, so reading them does not touch the records.
+    
+    Records also hold each document's stored file (path, size, content hash),
+    so serving a document is a primary-key lookup here, and citation page
+    views are counted next to them and removed with them.
+    """
+    
+    def __init__(self, db_path: str):
+        """
+        Open (and create if needed) the catalog database.
+        
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        
+        # One connection shared by all storage instances and background tasks
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._migrated = set()
+        
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # INSERT OR REPLACE only fires the delete trigger of the replaced record with recursive triggers on
+            self._conn.execute("PRAGMA recursive_triggers=ON")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    collection_name TEXT NOT NULL,
+                    document_id TEXT NOT NULL,
+                    user_id TEXT,
+                    filename TEXT,
+                    content_hash TEXT,
+                    document_type TEXT,
+                    record TEXT NOT NULL,
+                    PRIMARY KEY (collection_name, document_id)
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_user ON documents (collection_name, user_id, document_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_type ON documents (collection_name, document_type, document_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_filename ON documents (collection_name, filename)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_hash ON documents (collection_name, content_hash)")
+            
+            # Collections whose Qdrant document records have been moved here
+            self._conn.execute("CREATE TABLE IF NOT EXISTS migrated_collections (collection_name TEXT PRIMARY KEY)")
+            
+            has_statistics = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'document_stats'"
+            ).fetchone() is not None
+            self._create_statistics_table()
+            self._create_content_claims_table()
+            
+            # How often each page was opened through a citation (drives page image pre-rendering)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS page_views (
+                    collection_name TEXT NOT NULL,
+                    document_id TEXT NOT NULL,
+                    page_number INTEGER NOT NULL,
+                    views INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (collection_name, document_id, page_number)
+                )
+                """
+            )
+        
+        # Catalogs created before the statistics table start from the existing records
+        if not has_statistics:
+            self.reconcile_statistics()
+    
+    def _create_statistics_table(self):
+        """Create the statistics table and the triggers maintaining it (call in a transaction)."""
+        columns = ", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in STATISTICS_COLUMNS)
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS document_stats (
+                collection_name TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                document_type TEXT NOT NULL,
+                {columns},
+                PRIMARY KEY (collection_name, user_id, document_type)
+            )
+            """
+        )
+        
+        names = ", ".join(STATISTICS_COLUMNS)
+        added = ", ".join(expression.format(row="NEW") for expression in STATISTICS_COLUMNS.values())
+        summed = ", ".join(f"{column} = {column} + excluded.{column}" for column in STATISTICS_COLUMNS)
+        self._conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS documents_stats_insert AFTER INSERT ON documents
+            BEGIN
+                INSERT INTO document_stats (collection_name, user_id, document_type, {names})
+                VALUES (NEW.collection_name, COALESCE(NEW.user_id, ''), COALESCE(NEW.document_type, ''), {added})
+                ON CONFLICT (collection_name, user_id, document_type) DO UPDATE SET {summed};
+            END
+            """
+        )
+        
+        subtracted = ", ".join(
+            f"{column} = {column} - {expression.format(row='OLD')}" for column, expression in STATISTICS_COLUMNS.items()
+        )
+        group = "collection_name = OLD.collection_name AND user_id = COALESCE(OLD.user_id, '') AND document_type = COALESCE(OLD.document_type, '')"
+        self._conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS documents_stats_delete AFTER DELETE ON documents
+            BEGIN
+                UPDATE document_stats SET {subtracted} WHERE {group};
+                DELETE FROM document_stats WHERE {group} AND document_count <= 0;
+            END
+            """
+        )
+    
+    def _create_content_claims_table(self):
+        """
+        Create the content claims table and the triggers maintaining it (call in a transaction).
+        
+        A claim reserves a file's content hash for one document of its owner, so
+        that concurrent uploads of the same file cannot both be ingested (see
+        claim_content). Stored records hold a claim on their own hash.
+        """
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS content_claims (
+                collection_name TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                document_id TEXT NOT NULL,
+                PRIMARY KEY (collection_name, user_id, content_hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_claims_document ON content_claims (collection_name, document_id)")
+        
+        self._conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS documents_claims_insert AFTER INSERT ON documents
+            WHEN NEW.content_hash IS NOT NULL
+            BEGIN
+                INSERT OR IGNORE INTO content_claims (collection_name, user_id, content_hash, document_id)
+                VALUES (NEW.collection_name, COALESCE(NEW.user_id, ''), NEW.content_hash, NEW.document_id);
+            END
+            """
+        )
+        # Only the record's own hash is released: a claim on a new version's hash stays while it is ingested
+        self._conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS documents_claims_delete AFTER DELETE ON documents
+            WHEN OLD.content_hash IS NOT NULL
+            BEGIN
+                DELETE FROM content_claims
+                WHERE collection_name = OLD.collection_name AND document_id = OLD.document_id AND content_hash = OLD.content_hash;
+            END
+            """
+        )
+        
+        # Records stored before claims existed hold a claim on their hash
+        self._conn.execute(
+            """
+            INSERT OR IGNORE INTO content_claims (collection_name, user_id, content_hash, document_id)
+            SELECT collection_name, COALESCE(user_id, ''), content_hash, document_id
+            FROM documents WHERE content_hash IS NOT NULL
+            """
+        )
+    
+    def put_documents(self, collection_name: str, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add or replace document records.
+        
+        Args:
+            collection_name: Collection holding the documents' chunks
+            records: Document metadata records (each with a document_id)
+        
+        Returns:
+            Number of records written
+        """
+        rows = [
+            (
+                collection_name,
+                record["document_id"],
+                record.get("user_id"),
+                record.get("filename"),
+                record.get("content_hash"),
+                record.get("document_type"),
+                json.dumps(record)
+            )
+            for record in records
+        ]
+        
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT OR REPLACE INTO documents
+                    (collection_name, document_id, user_id, filename, content_hash, document_type, record)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+        return len(rows)
+    
+    def get_document(
+        self,
+        collection_name: str,
+        document_id: str,
+        user_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a document record.
+        
+        Args:
+            collection_name: Collection holding the document's chunks
+            document_id: Document ID
+            user_id: Owner to match (records of other users are not returned)
+        
+        Returns:
+            Document metadata, or None if not found
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, record FROM documents WHERE collection_name = ? AND document_id = ?",
+                (collection_name, document_id)
+            ).fetchone()
+        
+        if row is None or (user_id is not None and row["user_id"] != user_id):
+            return None
+        return json.loads(row["record"])
+    
+    def find_document(self, collection_name: str, criteria: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Find a document record by exact field values.
+        
+        Args:
+            collection_name: Collection holding the documents' chunks
+            criteria: Record fields to match
+        
+        Returns:
+            Document metadata, or None if no document matches
+        """
+        documents = self.list_documents(collection_name, criteria, limit=1)
+        return documents[0] if documents else None
+    
+    def list_documents(
+        self,
+        collection_name: str,
+        criteria: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List document records in document ID order.
+        
+        Args:
+            collection_name: Collection holding the documents' chunks
+            criteria: Record fields to match
+            limit: Maximum number of records (all if not provided)
+            after: Only return documents whose ID sorts after this one
+            fields: Record fields to return (all if not provided)
+        
+        Returns:
+            Document metadata records
+        """
+        where, params = self._where(collection_name, criteria)
+        if after is not None:
+            where += " AND document_id > ?"
+            params.append(after)
+        
+        query = f"SELECT record FROM documents WHERE {where} ORDER BY document_id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        
+        documents = [json.loads(row["record"]) for row in rows]
+        if fields:
+            documents = [{key: document[key] for key in fields if key in document} for document in documents]
+        return documents
+    
+    def document_id_at(
+        self,
+        collection_name: str,
+        position: int,
+        criteria: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[str], bool]:
+        """
+        Get the ID of the document at a position in document ID order.
+        
+        Args:
+            collection_name: Collection holding the documents' chunks
+            position: 0-based position
+            criteria: Record fields to match
+        
+        Returns:
+            Tuple of (document ID or None past the end, whether more documents follow it)
+        """
+        where, params = self._where(collection_name, criteria)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT document_id FROM documents WHERE {where} ORDER BY document_id LIMIT 2 OFFSET ?",
+                params + [position]
+            ).fetchall()
+        
+        if not rows:
+            return None, False
+        return rows[0]["document_id"], len(rows) > 1
+    
+    def count_documents(self, collection_name: str, criteria: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Count document records.
+        
+        Args:
+            collection_name: Collection holding the documents' chunks
+            criteria: Record fields to match
+        
+        Returns:
+            Number of matching documents
+        """
+        where, params = self._where(collection_name, criteria)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM documents WHERE {where}", params).fetchone()[0]
+    
+    def delete_document(self, collection_name: str, document_id: str, user_id: Optional[str] = None) -> bool:
+        """
+        Remove a document record.
+        
+        Args:
+            collection_name: Collection holding the document's chunks
+            document_id: Document ID
+            user_id: Owner to match (records of other users are kept)
+        
+        Returns:
+            True if a record was removed
+        """
+        where, params = self._where(collection_name, {"document_id": document_id})
+        if user_id is not None:
+            where += " AND user_id = ?"
+            params.append(user_id)
+        
+        with self._lock, self._conn:
+            cursor = self._conn.execute(f"DELETE FROM documents WHERE {where}", params)
+            # Page views outlive replaced versions (same document ID), so they are only removed with the document
+            if cursor.rowcount:
+                self._conn.execute(
+                    "DELETE FROM page_views WHERE collection_name = ? AND document_id = ?",
+                    (collection_name, document_id)
+                )
+        return cursor.rowcount > 0
+    
+    def delete_documents(
+        self,
+        collection_name: str,
+        document_ids: List[str],
+        user_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Remove many document records in one transaction.
+        
+        Args:
+            collection_name: Collection holding the documents' chunks
+            document_ids: Document IDs
+            user_id: Owner to match (records of other users are kept)
+        
+        Returns:
+            The removed records
+        """
+        removed = []
+        with self._lock, self._conn:
+            # Bounded groups keep each statement under SQLite's parameter limit
+            for start in range(0, len(document_ids), DELETE_GROUP_SIZE):
+                where, params = self._where(collection_name, None)
+                group = document_ids[start:start + DELETE_GROUP_SIZE]
+                where += f" AND document_id IN ({', '.join('?' * len(group))})"
+                params.extend(group)
+                if user_id is not None:
+                    where += " AND user_id = ?"
+                    params.append(user_id)
+                
+                rows = self._conn.execute(f"SELECT document_id, record FROM documents WHERE {where}", params).fetchall()
+                self._conn.execute(f"DELETE FROM documents WHERE {where}", params)
+                
+                deleted_ids = [row["document_id"] for row in rows]
+                if deleted_ids:
+                    self._conn.execute(
+                        f"DELETE FROM page_views WHERE collection_name = ? AND document_id IN ({', '.join('?' * len(deleted_ids))})",
+                        [collection_name] + deleted_ids
+                    )
+                removed.extend(json.loads(row["record"]) for row in rows)
+        return removed
+    
+    def move_collection(self, source_collection: str, target_collection: str, user_id: Optional[str] = None) -> int:
+        """
+        Move all document records of a collection to another collection.
+        
+        Args:
+            source_collection: Collection the records belong to
+            target_collection: Collection to move them to
+            user_id: Owner to set on records that have none
+        
+        Returns:
+            Number of records moved
+        """
+        records = self.list_documents(source_collection)
+        for record in records:
+            if user_id and not record.get("user_id"):
+                record["user_id"] = user_id
+        
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documents WHERE collection_name = ?", (source_collection,))
+            self._conn.execute(
+                "UPDATE OR REPLACE page_views SET collection_name = ? WHERE collection_name = ?",
+                (target_collection, source_collection)
+            )
+        self.put_documents(target_collection, records)
+        return len(records)
+    
+    def claim_content(
+        self,
+        collection_name: str,
+        content_hash: str,
+        document_id: str,
+        user_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Reserve a content hash for a document, unless another document already holds it.
+        
+        The claim is a single insert into a table keyed by (collection, owner,
+        content hash), so of two concurrent uploads of the same file exactly one
+        gets it.
+        
+        Args:
+            collection_name: Collection holding the documents' chunks
+            content_hash: SHA-256 of the file
+            document_id: Document the file will be stored as
+            user_id: Owner of the document
+        
+        Returns:
+            None if the claim was made, otherwise the ID of the document holding the hash
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO content_claims (collection_name, user_id, content_hash, document_id) VALUES (?, ?, ?, ?)",
+                (collection_name, user_id or "", content_hash, document_id)
+            )
+            if cursor.rowcount:
+                return None
+            row = self._conn.execute(
+                "SELECT document_id FROM content_claims WHERE collection_name = ? AND user_id = ? AND content_hash = ?",
+                (collection_name, user_id or "", content_hash)
+            ).fetchone()
+        return row["document_id"]
+    
+    def release_content(
+        self,
+        collection_name: str,
+        content_hash: str,
+        document_id: str,
+        user_id: Optional[str] = None
+    ) -> bool:
+        """
+        Release a document's claim on a content hash whose ingestion did not complete.
+        
+        A claim backed by the document's stored record (same hash) is kept.
+        
+        Args:
+            collection_name: Collection holding the documents' chunks
+            content_hash: SHA-256 of the file
+            document_id: Document holding the claim
+            user_id: Owner of the document
+        
+        Returns:
+            True if the claim was released
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """
+                DELETE FROM content_claims
+                WHERE collection_name = ? AND user_id = ? AND content_hash = ? AND document_id = ?
+                AND NOT EXISTS (
+                    SELECT 1 FROM documents WHERE collection_name = ? AND document_id = ? AND content_hash = ?
+                )
+                """,
+                (collection_name, user_id or "", content_hash, document_id, collection_name, document_id, content_hash)
+            )
+        return cursor.rowcount > 0
+    
+    def record_page_view(self, collection_name: str, document_id: str, page_number: int):
+        """
+        Count a view of a document page.
+        
+        Args:
+            collection_name: Collection holding the document's chunks
+            document_id: Document ID
+            page_number: 1-based page number
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO page_views (collection_name, document_id, page_number, views) VALUES (?, ?, ?, 1)
+                ON CONFLICT (collection_name, document_id, page_number) DO UPDATE SET views = views + 1
+                """,
+                (collection_name, document_id, page_number)
+            )
+    
+    def top_pages(self, collection_name: str, document_id: str, limit: int) -> List[int]:
+        """
+        Get a document's most viewed pages.
+        
+        Args:
+            collection_name: Collection holding the document's chunks
+            document_id: Document ID
+            limit: Maximum number of pages
+        
+        Returns:
+            Page numbers, most viewed first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT page_number FROM page_views WHERE collection_name = ? AND document_id = ?
+                ORDER BY views DESC, page_number LIMIT ?
+                """,
+                (collection_name, document_id, limit)
+            ).fetchall()
+        return [row["page_number"] for row in rows]
+    
+    def get_statistics(self, collection_name: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the document totals of a collection from the statistics table.
+        
+        Args:
+            collection_name: Collection holding the documents' chunks
+            user_id: Owner whose documents are counted (all owners if not provided)
+        
+        Returns:
+            Total documents, documents per type, total chunks, OCR chunks and bytes
+        """
+        query = f"SELECT document_type, {', '.join(STATISTICS_COLUMNS)} FROM document_stats WHERE collection_name = ?"
+        params = [collection_name]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        
+        document_types = {}
+        for row in rows:
+            document_types[row["document_type"]] = document_types.get(row["document_type"], 0) + row["document_count"]
+        return {
+            "total_documents": sum(row["document_count"] for row in rows),
+            "document_types": document_types,
+            "total_chunks": sum(row["chunk_count"] for row in rows),
+            "total_ocr_chunks": sum(row["ocr_chunk_count"] for row in rows),
+            "total_bytes": sum(row["total_bytes"] for row in rows)
+        }
+    
+    def reconcile_statistics(self, collection_name: Optional[str] = None) -> int:
+        """
+        Rebuild the statistics table from the document records.
+        
+        The triggers keep the totals exact for writes made through SQLite, so
+        this only repairs drift from records edited or restored by other means
+        (and fills the table for catalogs created before it existed).
+        
+        Args:
+            collection_name: Collection to rebuild (all collections if not provided)
+        
+        Returns:
+            Number of (collection, user, document type) totals that were wrong
+        """
+        names = ", ".join(STATISTICS_COLUMNS)
+        sums = ", ".join(f"SUM({expression.format(row='documents')})" for expression in STATISTICS_COLUMNS.values())
+        where, params = ("WHERE collection_name = ?", [collection_name]) if collection_name is not None else ("", [])
+        
+        with self._lock, self._conn:
+            stored = {
+                tuple(row[:3]): tuple(row[3:])
+                for row in self._conn.execute(f"SELECT collection_name, user_id, document_type, {names} FROM document_stats {where}", params)
+            }
+            computed = {
+                tuple(row[:3]): tuple(row[3:])
+                for row in self._conn.execute(
+                    f"""
+                    SELECT collection_name, COALESCE(user_id, ''), COALESCE(document_type, ''), {sums}
+                    FROM documents {where}
+                    GROUP BY 1, 2, 3
+                    """,
+                    params
+                )
+            }
+            
+            drifted = [group for group in stored.keys() | computed.keys() if stored.get(group) != computed.get(group)]
+            if drifted:
+                self._conn.execute(f"DELETE FROM document_stats {where}", params)
+                self._conn.executemany(
+                    f"INSERT INTO document_stats (collection_name, user_id, document_type, {names}) VALUES ({', '.join('?' * (3 + len(STATISTICS_COLUMNS)))})",
+                    [group + totals for group, totals in computed.items()]
+                )
+        
+        if drifted:
+            log_step("Document Catalog", f"Repaired {len(drifted)} drifted statistics totals", level="warning")
+        return len(drifted)
+    
+    def is_migrated(self, collection_name: str) -> bool:
+        """Check whether a collection's Qdrant document records were moved to the catalog."""
+        if collection_name in self._migrated:
+            return True
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM migrated_collections WHERE collection_name = ?",
+                (collection_name,)
+            ).fetchone()
+        if row:
+            self._migrated.add(collection_name)
+        return row is not None
+    
+    def mark_migrated(self, collection_name: str):
+        """Record that a collection's Qdrant document records were moved to the catalog."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO migrated_collections (collection_name) VALUES (?)", (collection_name,))
+        self._migrated.add(collection_name)
+    
+    def _where(self, collection_name: str, criteria: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        """Build the WHERE clause matching a collection's records against criteria."""
+        clauses = ["collection_name = ?"]
+        params = [collection_name]
+        
+        for key, value in (criteria or {}).items():
+            if key in INDEXED_FIELDS:
+                clauses.append(f"{key} = ?")
+            else:
+                clauses.append("json_extract(record, ?) = ?")
+                params.append(f'$."{key}"')
+            params.append(value)
+        
+        return " AND ".join(clauses), params
+
+
+_catalogs: Dict[str, DocumentCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_document_catalog(db_path: str = DOCUMENT_CATALOG_PATH) -> DocumentCatalog:
+    """
+    Get the shared catalog for a database file.
+    
+    Storage objects are created per request, so they share one catalog (and
+    connection) per database instead of opening their own.
+    
+    Args:
+        db_path: Path of the SQLite database file
+    
+    Returns:
+        Document catalog
+    """
+    with _catalogs_lock:
+        if db_path not in _catalogs:
+            _catalogs[db_path] = DocumentCatalog(db_path)
+            log_step("Document Catalog", f"Opened document catalog at {db_path}")
+        return _catalogs[db_path]
@@ -0,0 +1,136 @@
+import os
+import asyncio
+from typing import Any, Optional
+
+from app.storage.base import DocumentStorage
+from app.utils.logging import log_step
+
+
+# Storage backends selectable with STORAGE_BACKEND:
+#   qdrant - Qdrant server (QDRANT_URL), the default
+#   numpy  - in-process memory-mapped vectors with exact search (NUMPY_STORAGE_DIR)
+#   chroma - persistent Chroma database (CHROMA_PERSIST_DIRECTORY, needs `pip install chromadb`)
+STORAGE_BACKENDS = ("qdrant", "numpy", "chroma")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "qdrant")
+
+
+class ThreadedAsyncStorage:
+    """
+    Async view of a sync storage backend for request handlers.
+    
+    Every method call runs in a worker thread and is awaited, matching the
+    interface of AsyncQdrantDBStorage for backends without an async client.
+    """
+    
+    def __init__(self, storage: Any):
+        """
+        Wrap a storage backend.
+        
+        Args:
+            storage: Sync storage backend
+        """
+        self.storage = storage
+    
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.storage, name)
+        if not callable(attribute):
+            return attribute
+        
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(attribute, *args, **kwargs)
+        return call
+
+
+def create_storage(user_id: Optional[str] = None, collection_name: str = "documents", backend: Optional[str] = None) -> DocumentStorage:
+    """
+    Create the configured storage backend.
+    
+    Args:
+        user_id: Optional user ID for user-specific storage
+        collection_name: Base name for the collection
+        backend: Entry of STORAGE_BACKENDS (defaults to STORAGE_BACKEND)
+    
+    Returns:
+        Storage backend
+    """
+    backend = backend or STORAGE_BACKEND
+    # Backends are imported on first use, so the Qdrant client is not loaded at startup
+    if backend == "qdrant":
+        from app.storage.qdrant_db import QdrantDBStorage
+        return QdrantDBStorage(collection_name=collection_name, user_id=user_id)
+    if backend == "numpy":
+        from app.storage.numpy_db import NumpyDBStorage
+        return NumpyDBStorage(collection_name=collection_name, user_id=user_id)
+    if backend == "chroma":
+        from app.storage.chroma_db import ChromaDBStorage
+        return ChromaDBStorage(collection_name=collection_name, user_id=user_id)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+async def create_async_storage(
+    user_id: Optional[str] = None,
+    collection_name: str = "documents",
+    backend: Optional[str] = None
+) -> Any:
+    """
+    Create the configured storage backend for async request handlers.
+    
+    Args:
+        user_id: Optional user ID for user-specific storage
+        collection_name: Base name for the collection
+        backend: Entry of STORAGE_BACKENDS (defaults to STORAGE_BACKEND)
+    
+    Returns:
+        Storage backend whose methods are awaited
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend == "qdrant":
+        from app.storage.async_qdrant_db import AsyncQdrantDBStorage
+        return await AsyncQdrantDBStorage.create(collection_name=collection_name, user_id=user_id)
+    return ThreadedAsyncStorage(await asyncio.to_thread(create_storage, user_id, collection_name, backend))
+
+
+def get_request_user_id(request: Any = None) -> Optional[str]:
+    """
+    Get the current user's ID from the request state or the X-User-ID header.
+    
+    Args:
+        request: FastAPI request (None outside a request)
+    
+    Returns:
+        User ID, or None for the shared collection
+    """
+    if request is None:
+        return None
+    
+    # Set by the user ID middleware; fall back to the header for requests it did not see
+    user_id = getattr(request.state, "user_id", None) or request.headers.get("X-User-ID")
+    if not user_id:
+        log_step("Storage", "User ID not found in request state or headers", level="warning")
+    return user_id
+
+
+def get_user_storage(request: Any = None) -> DocumentStorage:
+    """
+    Get the configured storage for the current user (for ingestion and background work).
+    
+    Args:
+        request: FastAPI request (None for the shared collection)
+    
+    Returns:
+        Storage backend
+    """
+    return create_storage(user_id=get_request_user_id(request))
+
+
+async def get_async_user_storage(request: Any = None) -> Any:
+    """
+    Get the configured storage for the current user, for async request handlers.
+    
+    Args:
+        request: FastAPI request (None for the shared collection)
+    
+    Returns:
+        Storage backend whose methods are awaited
+    """
+    return await create_async_storage(user_id=get_request_user_id(request))
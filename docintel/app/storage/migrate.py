@@ -0,0 +1,183 @@
+"""
+Maintenance migrations for existing Qdrant collections.
+
+Run from the docintel directory with QDRANT_URL (and QDRANT_API_KEY) set, e.g.:
+    
+    python -m app.storage.migrate indexes --all
+    python -m app.storage.migrate indexes --collection documents_alice@example.com
+    python -m app.storage.migrate catalog --all
+    python -m app.storage.migrate profile scalar --collection documents_alice@example.com --wait
+    python -m app.storage.migrate tenants --all [--delete-source]
+    python -m app.storage.migrate stats --all
+"""
+
+import argparse
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from app.storage.qdrant_db import QdrantDBStorage, COLLECTION_PROFILES, SHARED_COLLECTION_SUFFIX
+from app.storage.document_catalog import get_document_catalog
+from app.utils.logging import log_step
+
+
+def get_collection_names(storage: QdrantDBStorage, prefix: str = "documents") -> List[str]:
+    """
+    List the document collections (the shared one and every per-user one).
+    
+    Args:
+        storage: Any storage instance (used for its client)
+        prefix: Base collection name
+    
+    Returns:
+        Collection names
+    """
+    return sorted(
+        collection.name
+        for collection in storage.client.get_collections().collections
+        if collection.name == prefix or collection.name.startswith(f"{prefix}_")
+    )
+
+
+def migrate_indexes(collection_names: List[str]):
+    """
+    Backfill missing payload indexes.
+    
+    Args:
+        collection_names: Collections to migrate
+    """
+    for name in collection_names:
+        created = QdrantDBStorage(collection_name=name).ensure_payload_indexes()
+        log_step("Migration", f"{name}: {len(created)} payload indexes created")
+
+
+def migrate_catalog(collection_names: List[str]):
+    """
+    Move document records stored as zero-vector points into the document catalog.
+    
+    Args:
+        collection_names: Collections to migrate
+    """
+    for name in collection_names:
+        # Opening the storage migrates a collection the first time; run again to catch later writes
+        storage = QdrantDBStorage(collection_name=name)
+        storage.migrate_document_records()
+        count = storage.catalog.count_documents(name)
+        log_step("Migration", f"{name}: {count} document records in the catalog")
+
+
+def migrate_profile(collection_names: List[str], profile_name: str, wait: bool = False):
+    """
+    Switch collections to another collection profile.
+    
+    Args:
+        collection_names: Collections to migrate
+        profile_name: Name of the COLLECTION_PROFILES entry
+        wait: Whether to wait for each collection to be optimized before the next
+    """
+    for name in collection_names:
+        QdrantDBStorage(collection_name=name).migrate_profile(profile_name, wait=wait)
+        log_step("Migration", f"{name}: switched to the {profile_name} profile")
+
+
+def migrate_tenants(collection_names: List[str], base_name: str = "documents", delete_source: bool = False):
+    """
+    Move per-user collections into the shared, tenant-partitioned collection.
+    
+    Run before switching QDRANT_TENANCY to "shared". Collections that are not
+    per-user collections of base_name are skipped.
+    
+    Args:
+        collection_names: Per-user collections to migrate
+        base_name: Base collection name
+        delete_source: Whether to delete each per-user collection once copied
+    """
+    prefix = f"{base_name}_"
+    shared_name = f"{base_name}_{SHARED_COLLECTION_SUFFIX}"
+    
+    for name in collection_names:
+        if name == shared_name or not name.startswith(prefix):
+            log_step("Migration", f"{name}: not a per-user collection, skipped")
+            continue
+        
+        # Opening the source moves any legacy document records into the catalog first
+        source = QdrantDBStorage(collection_name=name, tenancy="collection")
+        target = QdrantDBStorage(collection_name=base_name, user_id=name[len(prefix):], tenancy="shared")
+        copied = target.import_collection(source.collection_name)
+        
+        if delete_source:
+            source.client.delete_collection(source.collection_name)
+        log_step("Migration", f"{name}: {copied} chunks moved to {shared_name}" + (", source deleted" if delete_source else ""))
+
+
+def reconcile_statistics(collection_names: Optional[List[str]] = None):
+    """
+    Rebuild the per-user document statistics from the catalog records.
+    
+    Args:
+        collection_names: Collections to rebuild (every collection in the catalog if not provided)
+    """
+    catalog = get_document_catalog()
+    for name in collection_names or [None]:
+        drifted = catalog.reconcile_statistics(name)
+        log_step("Migration", f"{name or 'all collections'}: {drifted} statistics totals repaired")
+
+
+def main():
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description="Migrate existing Qdrant collections")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    indexes_parser = subparsers.add_parser("indexes", help="Create missing payload indexes")
+    target = indexes_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--collection", action="append", help="Collection to migrate (repeatable)")
+    target.add_argument("--all", action="store_true", help="Migrate every document collection")
+    
+    catalog_parser = subparsers.add_parser("catalog", help="Move document records into the document catalog")
+    target = catalog_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--collection", action="append", help="Collection to migrate (repeatable)")
+    target.add_argument("--all", action="store_true", help="Migrate every document collection")
+    
+    profile_parser = subparsers.add_parser("profile", help="Switch collections to another collection profile")
+    profile_parser.add_argument("profile", choices=sorted(COLLECTION_PROFILES), help="Profile to switch to")
+    profile_parser.add_argument("--wait", action="store_true", help="Wait for each collection to be optimized")
+    target = profile_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--collection", action="append", help="Collection to migrate (repeatable)")
+    target.add_argument("--all", action="store_true", help="Migrate every document collection")
+    
+    tenants_parser = subparsers.add_parser("tenants", help="Move per-user collections into the shared collection")
+    tenants_parser.add_argument("--delete-source", action="store_true", help="Delete each per-user collection once copied")
+    target = tenants_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--collection", action="append", help="Collection to migrate (repeatable)")
+    target.add_argument("--all", action="store_true", help="Migrate every per-user collection")
+    
+    stats_parser = subparsers.add_parser("stats", help="Rebuild the per-user document statistics from the catalog")
+    target = stats_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--collection", action="append", help="Collection to rebuild (repeatable)")
+    target.add_argument("--all", action="store_true", help="Rebuild every collection in the catalog")
+    
+    args = parser.parse_args()
+    
+    if args.command == "stats":
+        # The catalog is local, so this needs no Qdrant connection
+        reconcile_statistics(None if args.all else args.collection)
+        return
+    
+    if args.all:
+        collection_names = get_collection_names(QdrantDBStorage())
+    else:
+        collection_names = args.collection
+    
+    if args.command == "indexes":
+        migrate_indexes(collection_names)
+    elif args.command == "catalog":
+        migrate_catalog(collection_names)
+    elif args.command == "profile":
+        migrate_profile(collection_names, args.profile, args.wait)
+    elif args.command == "tenants":
+        migrate_tenants(collection_names, delete_source=args.delete_source)
+
+
+if __name__ == "__main__":
+    main()
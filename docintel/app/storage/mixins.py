@@ -0,0 +1,829 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+from typing import List, Dict, Any, Optional, Union, Tuple, Iterator, Iterable, AsyncIterator
+
+from app.chunking.models import DocumentChunk, ProcessedDocument
+from app.chunking.records import ChunkRecord
+from app.storage.base import ChunkPoint
+from app.utils.simhash import band_keys
+from app.utils.logging import log_step, Timer
+
+
+# Number of points fetched per scroll request (and records per catalog page)
+SCROLL_PAGE_SIZE = 1000
+
+# Payload fields locating a chunk within its own document, dropped when the chunk is re-homed to another document
+CHUNK_POSITION_FIELDS = ("start_index", "end_index", "chunk_ordinal", "heading_path", "heading_level", "bounding_box")
+
+# Payload fields stored as JSON strings
+JSON_PAYLOAD_FIELDS = ("heading_path", "bounding_box")
+
+# Points per upsert request when storing chunks (the QDRANT_ prefix predates the other backends)
+UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "256"))
+
+# Upsert requests in flight at once when storing chunks
+UPSERT_PARALLELISM = int(os.getenv("QDRANT_UPSERT_PARALLELISM", "4"))
+
+
+class ChunkPayloadMixin:
+    """
+    Chunk payloads, point IDs and result formatting shared by every storage backend.
+    
+    Expects the backend to set user_id, tenant_id, collection_name and catalog
+    (the shared DocumentCatalog).
+    """
+    
+    def _generate_uuid_from_string(self, input_string: str) -> str:
+        """
+        Generate a deterministic UUID from a string.
+        
+        Args:
+            input_string: String to convert to UUID
+        
+        Returns:
+            UUID as string
+        """
+        # Create a namespace UUID (using a fixed UUID)
+        namespace = uuid.UUID('6ba7b810-9dad-11d1-80b4-00c04fd430c8')  # RFC 4122 namespace
+        # Generate a UUID based on the namespace and the input string
+        return str(uuid.uuid5(namespace, input_string))
+    
+    def _chunk_point_id(self, chunk_id: str) -> str:
+        """
+        Get the point ID for a chunk ID.
+        
+        Args:
+            chunk_id: Chunk ID
+        
+        Returns:
+            The chunk ID if it is a valid UUID, otherwise a UUID derived from it
+        """
+        try:
+            # Try to parse as UUID to validate
+            uuid.UUID(chunk_id)
+            return chunk_id
+        except ValueError:
+            # Not a valid UUID, generate a deterministic one
+            return self._generate_uuid_from_string(chunk_id)
+    
+    def _chunk_payload(self, chunk: Union[DocumentChunk, ChunkRecord], file_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the payload stored with a chunk.
+        
+        Args:
+            chunk: Document chunk or chunk record
+            file_path: Path of the source file
+        
+        Returns:
+            Payload dictionary
+        """
+        payload = {
+            "source_document_id": chunk.source_document_id,
+            "source_document_name": chunk.source_document_name,
+            "source_document_type": chunk.source_document_type,
+            "page_number": chunk.page_number if chunk.page_number is not None else -1,
+            "is_ocr": chunk.is_ocr,
+            "created_at": chunk.created_at.isoformat(),
+            "text": chunk.text,  # Store the text in the payload
+            "user_id": self.user_id  # Add user_id to every chunk
+        }
+        if self.tenant_id:
+            payload["tenant_id"] = self.tenant_id
+        
+        # Add optional metadata if available
+        if chunk.heading_path:
+            payload["heading_path"] = json.dumps(chunk.heading_path)
+        if chunk.heading_level is not None:
+            payload["heading_level"] = chunk.heading_level
+        if chunk.start_index is not None and chunk.end_index is not None:
+            # Character span of the chunk within its page/section text
+            payload["start_index"] = chunk.start_index
+            payload["end_index"] = chunk.end_index
+        if chunk.chunk_ordinal is not None:
+            payload["chunk_ordinal"] = chunk.chunk_ordinal
+        if chunk.bounding_box:
+            payload["bounding_box"] = json.dumps(chunk.bounding_box)
+        
+        # Near-duplicate fingerprint (hex, as it does not fit a signed 64-bit int) and its LSH bands
+        fingerprint = getattr(chunk, "simhash", None)
+        if fingerprint is not None:
+            payload["simhash"] = f"{fingerprint:016x}"
+            payload["simhash_bands"] = band_keys(fingerprint)
+        
+        # Add any additional metadata from the chunk
+        metadata = chunk.all_metadata if isinstance(chunk, ChunkRecord) else chunk.metadata
+        for key, value in metadata.items():
+            if key not in payload and isinstance(value, (str, int, float, bool)):
+                payload[key] = value
+            elif isinstance(value, list) or isinstance(value, dict):
+                payload[key] = json.dumps(value)
+        
+        # Always make sure file_path is in the metadata if available
+        if file_path:
+            payload["file_path"] = file_path
+        
+        return payload
+    
+    def _chunk_point(
+        self,
+        chunk: Union[DocumentChunk, ChunkRecord],
+        vector: List[float],
+        file_path: Optional[str] = None
+    ) -> ChunkPoint:
+        """
+        Build the point stored for a chunk.
+        
+        Args:
+            chunk: Document chunk or chunk record
+            vector: Embedding of the chunk
+            file_path: Path of the source file
+        
+        Returns:
+            Point to upsert
+        """
+        # Prepare metadata (payload in Qdrant terminology)
+        payload = self._chunk_payload(chunk, file_path)
+        
+        # Use the chunk ID as point ID if it is a valid UUID
+        point_id = self._chunk_point_id(chunk.chunk_id)
+        if point_id != chunk.chunk_id:
+            # Store the original ID in the payload
+            payload["original_chunk_id"] = chunk.chunk_id
+        
+        return ChunkPoint(id=point_id, vector=vector, payload=payload)
+    
+    def _rehomed_payload(self, payload: Dict[str, Any], removed_document_ids: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """
+        Move a chunk that stands for near-duplicates in other documents to one of them.
+        
+        Deduplication across the collection stores shared content once, on the
+        chunk kept first, and lists the documents whose copies were dropped in
+        its provenance. When that chunk (or its document) is removed, it becomes
+        a chunk of the first of those documents that still exists instead of
+        being deleted, so the other documents keep the content.
+        
+        Args:
+            payload: Stored payload of the chunk being removed
+            removed_document_ids: Documents being deleted along with the chunk
+        
+        Returns:
+            Payload of the re-homed chunk, or None if the chunk can be deleted
+        """
+        if not payload.get("provenance"):
+            return None
+        
+        removed = set(removed_document_ids)
+        removed.add(payload.get("source_document_id"))
+        sources = [source for source in json.loads(payload["provenance"]) if source.get("source_document_id") not in removed]
+        
+        for source in sources:
+            record = self.catalog.get_document(self.collection_name, source["source_document_id"], self.tenant_id)
+            if record is None:
+                continue
+            
+            rehomed = {field: value for field, value in payload.items() if field not in CHUNK_POSITION_FIELDS}
+            rehomed.update(
+                source_document_id=source["source_document_id"],
+                source_document_name=record.get("filename"),
+                source_document_type=record.get("document_type"),
+                page_number=source.get("page_number") if source.get("page_number") is not None else -1,
+                provenance=json.dumps(sources)
+            )
+            for field in ("file_path", "content_hash"):
+                if record.get(field):
+                    rehomed[field] = record[field]
+            return rehomed
+        
+        return None
+    
+    def _document_criteria(self, filter_criteria: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Catalog criteria matching the user's document records."""
+        criteria = dict(filter_criteria or {})
+        if self.user_id:
+            criteria.setdefault("user_id", self.user_id)
+        return criteria
+    
+    def _format_chunk(self, point: Any) -> Dict[str, Any]:
+        """
+        Convert a stored chunk point to the chunk dictionary returned by the API.
+        
+        Args:
+            point: Stored point with payload (a ChunkPoint or a Qdrant record)
+        
+        Returns:
+            Chunk with chunk_id, text and metadata
+        """
+        payload = point.payload
+        
+        # Process metadata - create a copy to avoid modifying the original
+        processed_metadata = payload.copy()
+        
+        # Remove text from metadata to avoid duplication
+        text = processed_metadata.pop("text", "")
+        
+        # Convert JSON strings back to objects (only the fields that were fetched)
+        for field_name in JSON_PAYLOAD_FIELDS:
+            if field_name in processed_metadata:
+                processed_metadata[field_name] = json.loads(processed_metadata[field_name])
+        
+        # Use original chunk ID if available, otherwise use the point ID
+        return {
+            "chunk_id": payload.get("original_chunk_id", str(point.id)),
+            "text": text,
+            "metadata": processed_metadata
+        }
+    
+    def _format_search_result(self, result: Any) -> Dict[str, Any]:
+        """
+        Convert a scored search hit to the chunk dictionary returned by queries.
+        
+        Args:
+            result: Scored point with payload (a ScoredChunk or a Qdrant scored point)
+        
+        Returns:
+            Chunk with chunk_id, text, metadata and distance
+        """
+        chunk = self._format_chunk(result)
+        chunk["distance"] = 1.0 - result.score  # Convert similarity score to distance
+        return chunk
+    
+    def _format_search_results(self, points: List[Any], start: float) -> List[Dict[str, Any]]:
+        """
+        Format search hits and log how long the search and the payload decoding took.
+        
+        Args:
+            points: Scored points
+            start: perf_counter() value taken before the search request
+        
+        Returns:
+            List of similar chunks with metadata
+        """
+        searched = time.perf_counter()
+        formatted_results = [self._format_search_result(result) for result in points]
+        decoded = time.perf_counter()
+        
+        log_step(
+            "Query",
+            f"Found {len(formatted_results)} results "
+            f"(search {(searched - start) * 1000:.1f}ms, decode {(decoded - searched) * 1000:.2f}ms)"
+        )
+        return formatted_results
+
+
+class StorageMixin(ChunkPayloadMixin):
+    """
+    Ingestion and document catalog operations shared by the sync storage backends.
+    
+    Chunks are built as ChunkPoints and written with the backend's
+    upsert_points, _upsert_batch and wait_for_writes; document records live in
+    the shared document catalog. Backends also provide iter_document_chunks and
+    get_chunk, which the neighbor lookup here uses (backends with a faster
+    ordinal lookup override get_neighbor_chunks).
+    """
+    
+    def store_document(
+        self, 
+        document: ProcessedDocument,
+        embeddings: Dict[str, List[float]]
+    ) -> str:
+        """
+        Store a processed document with embeddings.
+        
+        Args:
+            document: Processed document with chunks
+            embeddings: Dictionary mapping chunk IDs to embeddings
+        
+        Returns:
+            Document ID
+        """
+        with Timer("Document Storage"):
+            log_step("Storage", f"Storing document: {document.filename}")
+            
+            file_path = self._prepare_document_chunks(document)
+            
+            # Store document chunks
+            stored_count, ocr_chunk_count = self.store_chunks(document.chunks, embeddings, file_path)
+            if stored_count:
+                log_step("Storage", f"Stored {stored_count} chunks for document {document.document_id}")
+            
+            self._store_document_record(document, ocr_chunk_count, file_path)
+            return document.document_id
+    
+    async def store_document_stream(
+        self,
+        document: ProcessedDocument,
+        chunk_embeddings: AsyncIterator[Tuple[Union[DocumentChunk, ChunkRecord], List[float]]],
+        batch_size: Optional[int] = None,
+        parallelism: Optional[int] = None
+    ) -> str:
+        """
+        Store a processed document from a stream of (chunk, embedding) pairs.
+        
+        Chunks are upserted batch by batch while the stream is still being
+        produced (e.g. by AzureOpenAIEmbedder.iter_embeddings_async), so storage
+        overlaps with embedding. The document record is written once all chunks
+        have been applied.
+        
+        Args:
+            document: Processed document with chunks
+            chunk_embeddings: Chunks of the document with their embeddings
+            batch_size: Points per upsert request (defaults to QDRANT_UPSERT_BATCH_SIZE)
+            parallelism: Upsert requests in flight at once (defaults to QDRANT_UPSERT_PARALLELISM)
+        
+        Returns:
+            Document ID
+        """
+        with Timer("Document Storage"):
+            log_step("Storage", f"Storing document: {document.filename}")
+            file_path = self._prepare_document_chunks(document)
+            
+            stored_count, ocr_chunk_count = await self.store_chunk_stream(
+                chunk_embeddings, file_path, batch_size, parallelism
+            )
+            if stored_count:
+                log_step("Storage", f"Stored {stored_count} chunks for document {document.document_id}")
+            
+            self._store_document_record(document, ocr_chunk_count, file_path)
+            return document.document_id
+    
+    def _prepare_document_chunks(self, document: ProcessedDocument) -> Optional[str]:
+        """
+        Number a document's chunks and find its source file path.
+        
+        Args:
+            document: Processed document with chunks
+        
+        Returns:
+            Path of the source file, if recorded
+        """
+        # Extract file path from the first chunk's metadata if available
+        file_path = None
+        if document.chunks and hasattr(document.chunks[0], 'metadata'):
+            file_path = document.chunks[0].metadata.get('file_path')
+        
+        # If no file path is found in chunks, check if it's in the document metadata
+        if not file_path and hasattr(document, 'metadata') and document.metadata:
+            file_path = document.metadata.get('file_path')
+        
+        # Check if file_path exists in any chunk's metadata if not already found
+        if not file_path:
+            for chunk in document.chunks:
+                if hasattr(chunk, 'metadata') and 'file_path' in chunk.metadata:
+                    file_path = chunk.metadata['file_path']
+                    break
+        
+        # Number chunks in document order so neighbors can be looked up by position
+        for ordinal, chunk in enumerate(document.chunks):
+            if chunk.chunk_ordinal is None:
+                chunk.chunk_ordinal = ordinal
+        
+        return file_path
+    
+    def _store_document_record(self, document: ProcessedDocument, ocr_chunk_count: int, file_path: Optional[str]):
+        """Store the document record once a document's chunks are stored."""
+        # Carry the upload content hash over to the document record
+        extra_metadata = None
+        if document.chunks and document.chunks[0].metadata.get("content_hash"):
+            extra_metadata = {"content_hash": document.chunks[0].metadata["content_hash"]}
+        
+        # Store document-level metadata
+        self.store_document_metadata(
+            document,
+            chunk_count=len(document.chunks),
+            ocr_chunk_count=ocr_chunk_count,
+            file_path=file_path,
+            extra_metadata=extra_metadata
+        )
+    
+    def store_chunks(
+        self,
+        chunks: List[Union[DocumentChunk, ChunkRecord]],
+        embeddings: Dict[str, List[float]],
+        file_path: Optional[str] = None,
+        wait: bool = True
+    ) -> Tuple[int, int]:
+        """
+        Store a batch of chunks with their embeddings.
+        
+        Used by store_document and by the pipelined ingestion path, which stores
+        chunks batch by batch while the document is still being parsed.
+        
+        Args:
+            chunks: Document chunks or chunk records
+            embeddings: Dictionary mapping chunk IDs to embeddings
+            file_path: Path of the source file, added to every chunk payload
+            wait: Whether to return only once the chunks are applied (otherwise
+                call wait_for_writes before relying on them)
+        
+        Returns:
+            Tuple of (number of chunks stored, number of OCR chunks among them)
+        """
+        ocr_chunk_count = 0
+        
+        def points() -> Iterator[ChunkPoint]:
+            nonlocal ocr_chunk_count
+            for chunk in chunks:
+                # Skip chunks without embeddings
+                if chunk.chunk_id not in embeddings:
+                    log_step("Storage", f"Skipping chunk {chunk.chunk_id} - no embedding", level="warning")
+                    continue
+                
+                # Count OCR chunks
+                if chunk.is_ocr:
+                    ocr_chunk_count += 1
+                
+                yield self._chunk_point(chunk, embeddings[chunk.chunk_id], file_path)
+        
+        stored_count = self.upsert_points(points(), wait=wait)
+        return stored_count, ocr_chunk_count
+    
+    async def store_chunk_stream(
+        self,
+        chunk_embeddings: AsyncIterator[Tuple[Union[DocumentChunk, ChunkRecord], List[float]]],
+        file_path: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        wait: bool = True
+    ) -> Tuple[int, int]:
+        """
+        Store chunks from a stream of (chunk, embedding) pairs.
+        
+        Full batches are upserted in the background (without waiting for them
+        to be applied) while the stream is consumed; at most `parallelism`
+        requests are in flight, so a slow backend pauses the stream.
+        
+        Args:
+            chunk_embeddings: Chunks with their embeddings
+            file_path: Path of the source file, added to every chunk payload
+            batch_size: Points per upsert request (defaults to QDRANT_UPSERT_BATCH_SIZE)
+            parallelism: Upsert requests in flight at once (defaults to QDRANT_UPSERT_PARALLELISM)
+            wait: Whether to wait for all chunks to be applied before returning
+        
+        Returns:
+            Tuple of (number of chunks stored, number of OCR chunks among them)
+        """
+        batch_size = batch_size or UPSERT_BATCH_SIZE
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(parallelism or UPSERT_PARALLELISM)
+        requests: List[asyncio.Task] = []
+        
+        async def send(batch: List[ChunkPoint]):
+            try:
+                await loop.run_in_executor(None, self._upsert_batch, batch)
+            finally:
+                slots.release()
+        
+        async def submit(batch: List[ChunkPoint]):
+            await slots.acquire()
+            # Stop early if an earlier request failed
+            for request in requests:
+                if request.done() and request.exception():
+                    slots.release()
+                    raise request.exception()
+            requests.append(asyncio.create_task(send(batch)))
+        
+        stored_count, ocr_chunk_count = 0, 0
+        batch: List[ChunkPoint] = []
+        try:
+            async for chunk, vector in chunk_embeddings:
+                if chunk.is_ocr:
+                    ocr_chunk_count += 1
+                batch.append(self._chunk_point(chunk, vector, file_path))
+                if len(batch) >= batch_size:
+                    await submit(batch)
+                    stored_count += len(batch)
+                    batch = []
+            if batch:
+                await submit(batch)
+                stored_count += len(batch)
+        finally:
+            # Let in-flight requests finish (or fail) before returning or raising
+            results = await asyncio.gather(*requests, return_exceptions=True)
+        
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        
+        if wait and stored_count:
+            await loop.run_in_executor(None, self.wait_for_writes)
+        return stored_count, ocr_chunk_count
+    
+    def store_document_metadata(
+        self,
+        document: ProcessedDocument,
+        chunk_count: int,
+        ocr_chunk_count: int = 0,
+        file_path: Optional[str] = None,
+        extra_metadata: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Store the document-level metadata record in the document catalog.
+        
+        Args:
+            document: Processed document (its chunk list may be empty)
+            chunk_count: Total number of chunks in the document
+            ocr_chunk_count: Number of OCR chunks in the document
+            file_path: Path of the source file
+            extra_metadata: Additional document-level fields (e.g. deduplication stats)
+        """
+        # Store document-level metadata
+        document_metadata = {
+            "document_id": document.document_id,
+            "filename": document.filename,
+            "document_type": document.file_type,
+            "file_size": document.file_size,
+            "total_pages": document.total_pages,
+            "chunk_count": chunk_count,
+            "ocr_chunk_count": ocr_chunk_count,
+            "ocr_used": document.is_complex or ocr_chunk_count > 0,
+            "processing_time": document.processing_time,
+            "created_at": document.created_at.isoformat(),
+            "user_id": self.user_id  # Add user_id to document metadata
+        }
+        
+        # Add file path to document metadata if available
+        if file_path:
+            document_metadata["file_path"] = file_path
+        
+        if extra_metadata:
+            for key, value in extra_metadata.items():
+                document_metadata.setdefault(key, value)
+        
+        self.catalog.put_documents(self.collection_name, [document_metadata])
+    
+    def find_document(self, **criteria: Any) -> Optional[Dict[str, Any]]:
+        """
+        Find a document metadata record by exact field values.
+        
+        Args:
+            **criteria: Record fields to match (e.g. content_hash=..., filename=...)
+        
+        Returns:
+            Document metadata, or None if no document matches
+        """
+        try:
+            if self.tenant_id:
+                criteria.setdefault("user_id", self.tenant_id)
+            return self.catalog.find_document(self.collection_name, criteria)
+        except Exception as e:
+            log_step("Storage", f"Error finding document: {str(e)}", level="warning")
+            return None
+    
+    def iter_documents(
+        self,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all of the user's documents.
+        
+        Args:
+            filter_criteria: Document metadata fields to match (e.g. document_type)
+            fields: Metadata fields to return (all if not provided)
+        
+        Yields:
+            Document metadata
+        """
+        cursor = None
+        while True:
+            documents, cursor = self.list_documents_page(filter_criteria, SCROLL_PAGE_SIZE, cursor, fields)
+            yield from documents
+            if cursor is None:
+                return
+    
+    def list_documents_page(
+        self,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of the user's documents.
+        
+        Args:
+            filter_criteria: Document metadata fields to match (e.g. document_type)
+            limit: Maximum number of documents
+            cursor: Cursor returned for the previous page (None for the first page)
+            fields: Metadata fields to return (all if not provided)
+        
+        Returns:
+            Tuple of (document metadata, cursor for the next page or None after the last page)
+        """
+        # Fetch one extra record to know whether another page follows
+        page_fields = (fields + ["document_id"]) if fields else None
+        documents = self.catalog.list_documents(
+            self.collection_name, self._document_criteria(filter_criteria), limit + 1, cursor, page_fields
+        )
+        
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = documents[-1]["document_id"]
+        
+        if fields and "document_id" not in fields:
+            for document in documents:
+                del document["document_id"]
+        return documents, next_cursor
+    
+    def skip_documents(self, count: int, filter_criteria: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Get the cursor positioned after the first documents, without fetching their records.
+        
+        Lets offset-based (page number) pagination start mid-way.
+        
+        Args:
+            count: Number of documents to skip
+            filter_criteria: Document metadata fields to match
+        
+        Returns:
+            Cursor for the document following the skipped ones (None if there is none)
+        """
+        if count <= 0:
+            return None
+        
+        document_id, has_more = self.catalog.document_id_at(
+            self.collection_name, count - 1, self._document_criteria(filter_criteria)
+        )
+        return document_id if has_more else None
+    
+    def count_documents(self, filter_criteria: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Count the user's documents.
+        
+        Args:
+            filter_criteria: Document metadata fields to match
+        
+        Returns:
+            Number of matching documents
+        """
+        return self.catalog.count_documents(self.collection_name, self._document_criteria(filter_criteria))
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get the user's document totals, kept up to date by the document catalog.
+        
+        Returns:
+            Total documents, documents per type, total chunks, OCR chunks and bytes
+        """
+        return self.catalog.get_statistics(self.collection_name, self.user_id)
+    
+    def claim_content(self, content_hash: str, document_id: str) -> Optional[str]:
+        """
+        Reserve a file's content hash for a document of this user.
+        
+        Args:
+            content_hash: SHA-256 of the file
+            document_id: Document the file will be stored as
+        
+        Returns:
+            None if the claim was made, otherwise the ID of the user's document holding the hash
+        """
+        return self.catalog.claim_content(self.collection_name, content_hash, document_id, self.user_id)
+    
+    def release_content(self, content_hash: str, document_id: str) -> bool:
+        """
+        Release a document's claim on a content hash after its ingestion failed.
+        
+        Args:
+            content_hash: SHA-256 of the file
+            document_id: Document holding the claim
+        
+        Returns:
+            True if the claim was released
+        """
+        return self.catalog.release_content(self.collection_name, content_hash, document_id, self.user_id)
+    
+    def record_page_view(self, document_id: str, page_number: int):
+        """
+        Count a citation view of a page of one of the user's documents.
+        
+        Args:
+            document_id: Document ID
+            page_number: 1-based page number
+        """
+        self.catalog.record_page_view(self.collection_name, document_id, page_number)
+    
+    def top_pages(self, document_id: str, limit: int) -> List[int]:
+        """
+        Get a document's pages most often opened through citations.
+        
+        Args:
+            document_id: Document ID
+            limit: Maximum number of pages
+        
+        Returns:
+            Page numbers, most viewed first
+        """
+        return self.catalog.top_pages(self.collection_name, document_id, limit)
+    
+    def list_documents(
+        self, 
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List all documents in the system.
+        
+        Args:
+            filter_criteria: Filter criteria for documents
+            fields: Metadata fields to return (all if not provided)
+        
+        Returns:
+            List of document metadata
+        """
+        with Timer("List Documents"):
+            try:
+                documents = self.catalog.list_documents(
+                    self.collection_name, self._document_criteria(filter_criteria), fields=fields
+                )
+                log_step("Storage", f"Found {len(documents)} documents")
+                return documents
+            
+            except Exception as e:
+                log_step("Storage", f"Error listing documents: {str(e)}", level="error")
+                return []
+    
+    def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get document metadata.
+        
+        Args:
+            document_id: Document ID
+        
+        Returns:
+            Document metadata, or None if not found
+        """
+        with Timer("Get Document"):
+            try:
+                document_metadata = self.catalog.get_document(self.collection_name, document_id, self.tenant_id)
+            except Exception as e:
+                log_step("Storage", f"Error getting document: {str(e)}", level="error")
+                return None
+            
+            if document_metadata is None:
+                log_step("Storage", f"Document {document_id} not found")
+                return None
+            
+            # Verify file path exists and is valid
+            file_path = document_metadata.get("file_path")
+            if not file_path:
+                log_step("Storage", f"Warning: No file path found for document {document_id}", level="warning")
+            elif not os.path.exists(file_path):
+                log_step("Storage", f"Warning: File path {file_path} does not exist", level="warning")
+            
+            return document_metadata
+    
+    def get_document_chunks(self, document_id: str, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Get all chunks for a document.
+        
+        Args:
+            document_id: Document ID
+            fields: Payload fields to return (all if not provided; include "text" to get chunk texts)
+        
+        Returns:
+            List of document chunks
+        """
+        with Timer("Get Document Chunks"):
+            try:
+                chunks = list(self.iter_document_chunks(document_id, fields))
+                log_step("Storage", f"Found {len(chunks)} chunks for document {document_id}")
+                return chunks
+            
+            except Exception as e:
+                log_step("Storage", f"Error getting document chunks: {str(e)}", level="error")
+                return []
+    
+    def get_neighbor_chunks(self, chunk_id: str, window: int = 2) -> List[Dict[str, Any]]:
+        """
+        Get a chunk together with the chunks around it in its document.
+        
+        Args:
+            chunk_id: Chunk ID
+            window: Number of chunks to include on each side
+        
+        Returns:
+            Chunks in document order, including the chunk itself (empty if not found)
+        """
+        chunk = self.get_chunk(chunk_id)
+        if not chunk:
+            return []
+        
+        metadata = chunk["metadata"]
+        chunks = list(self.iter_document_chunks(metadata.get("source_document_id")))
+        ordinal = metadata.get("chunk_ordinal")
+        
+        if ordinal is not None:
+            chunks = [c for c in chunks if abs(c["metadata"].get("chunk_ordinal", -window - 1) - ordinal) <= window]
+            chunks.sort(key=lambda c: c["metadata"].get("chunk_ordinal", 0))
+            return chunks
+        
+        # Same-page fallback: keep the window around the chunk by position on the page
+        chunks = [c for c in chunks if c["metadata"].get("page_number") == metadata.get("page_number", -1)]
+        chunks.sort(key=lambda c: c["metadata"].get("start_index", 0))
+        position = next((i for i, c in enumerate(chunks) if c["chunk_id"] == chunk["chunk_id"]), 0)
+        return chunks[max(position - window, 0):position + window + 1]
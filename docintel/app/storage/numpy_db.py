@@ -0,0 +1,685 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Union, Tuple, Iterator, Iterable
+
+import numpy as np
+
+from app.chunking.models import DocumentChunk
+from app.chunking.records import ChunkRecord
+from app.storage.base import ChunkPoint, ScoredChunk, VECTOR_SIZE
+from app.storage.mixins import StorageMixin
+from app.storage.document_catalog import get_document_catalog
+from app.utils.logging import log_step, Timer
+
+
+# Directory holding one subdirectory (vector matrix and chunk table) per collection
+NUMPY_STORAGE_DIR = os.getenv("NUMPY_STORAGE_DIR", os.path.join(os.getcwd(), "uploads", "vectors"))
+
+# Rows allocated when a collection is created; the matrix doubles when full
+INITIAL_CAPACITY = 1024
+
+
+class NumpyCollection:
+    """
+    Chunk vectors in a memory-mapped float32 matrix, with payloads in SQLite.
+    
+    Vectors are normalized when stored, so cosine similarity is one
+    matrix-vector product (BLAS) over the matrix, followed by a partial sort
+    for the top k. Rows of deleted chunks are reused by later chunks.
+    """
+    
+    def __init__(self, path: str, dimension: int = VECTOR_SIZE):
+        """
+        Open (and create if needed) a collection directory.
+        
+        Args:
+            path: Directory of the collection
+            dimension: Embedding size
+        """
+        self.path = path
+        self.dimension = dimension
+        os.makedirs(path, exist_ok=True)
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(path, "chunks.db"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    row INTEGER PRIMARY KEY,
+                    point_id TEXT NOT NULL UNIQUE,
+                    document_id TEXT,
+                    payload TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks (document_id)")
+            rows = [row["row"] for row in self._conn.execute("SELECT row FROM chunks")]
+        
+        # Rows up to the highest used one are scanned; unused ones below it are free
+        self.count = max(rows) + 1 if rows else 0
+        capacity = INITIAL_CAPACITY
+        if os.path.exists(self.vectors_path):
+            capacity = max(capacity, os.path.getsize(self.vectors_path) // (4 * dimension))
+        while capacity < self.count:
+            capacity *= 2
+        self._map(capacity)
+        
+        self.live = np.zeros(capacity, dtype=bool)
+        self.live[rows] = True
+        self._free = sorted(set(range(self.count)) - set(rows), reverse=True)
+    
+    def _map(self, capacity: int):
+        """Map the vector file with room for `capacity` rows, growing the file if needed."""
+        size = capacity * self.dimension * 4
+        if not os.path.exists(self.vectors_path) or os.path.getsize(self.vectors_path) < size:
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(size)
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+    
+    def _allocate_row(self) -> int:
+        """Get a free row, growing the matrix if every row is used."""
+        if self._free:
+            return self._free.pop()
+        
+        if self.count == len(self.vectors):
+            capacity = len(self.vectors) * 2
+            self.vectors.flush()
+            self._map(capacity)
+            self.live = np.concatenate([self.live, np.zeros(capacity - len(self.live), dtype=bool)])
+        
+        self.count += 1
+        return self.count - 1
+    
+    def upsert(self, points: List[ChunkPoint]):
+        """
+        Add or replace points.
+        
+        Args:
+            points: Points with vectors and payloads
+        """
+        # A point given twice keeps its last version
+        points = list({str(point.id): point for point in points}.values())
+        if not points:
+            return
+        
+        vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+        
+        with self._lock, self._conn:
+            rows = []
+            for point in points:
+                existing = self._conn.execute("SELECT row FROM chunks WHERE point_id = ?", (str(point.id),)).fetchone()
+                rows.append(existing["row"] if existing else self._allocate_row())
+            
+            self.vectors[rows] = vectors
+            self.vectors.flush()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (row, point_id, document_id, payload) VALUES (?, ?, ?, ?)",
+                [
+                    (row, str(point.id), point.payload.get("source_document_id"), json.dumps(point.payload))
+                    for row, point in zip(rows, points)
+                ]
+            )
+            self.live[rows] = True
+    
+    def search(self, query: List[float], limit: int, rows: Optional[List[int]] = None) -> List[Tuple[int, float]]:
+        """
+        Find the rows most similar to a query vector (exact cosine similarity).
+        
+        Args:
+            query: Query vector
+            limit: Maximum number of results
+            rows: Candidate rows (all stored rows if not provided)
+        
+        Returns:
+            List of (row, score), best first
+        """
+        query = np.asarray(query, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        
+        # Rows written after this snapshot are not searched; the mapping stays valid if the matrix grows
+        with self._lock:
+            vectors, count, live = self.vectors, self.count, self.live[:self.count].copy()
+        
+        if rows is None:
+            scores = vectors[:count] @ query
+            scores[~live] = -np.inf
+            candidates = np.arange(count)
+        else:
+            candidates = np.asarray(rows, dtype=np.int64)
+            scores = vectors[candidates] @ query if len(candidates) else np.empty(0, dtype=np.float32)
+        
+        limit = min(limit, int(np.isfinite(scores).sum()))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+    
+    def select(
+        self,
+        criteria: Optional[Dict[str, Any]] = None,
+        point_ids: Optional[List[str]] = None,
+        rows: Optional[List[int]] = None,
+        exclude: Optional[Dict[str, Any]] = None,
+        contains: Optional[Dict[str, List[Any]]] = None,
+        fields: Optional[List[str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """
+        Get stored points by payload values, point IDs or rows.
+        
+        Args:
+            criteria: Payload fields to match exactly (a list matches any of its values)
+            point_ids: Point IDs to match
+            rows: Rows to match
+            exclude: Payload fields that must not match
+            contains: List payload fields that must hold at least one of the given values
+            fields: Payload fields to return (all if not provided; only these are decoded)
+            limit: Maximum number of points
+        
+        Returns:
+            List of (row, point ID, payload) in row order
+        """
+        if (point_ids is not None and not point_ids) or (rows is not None and not rows):
+            return []
+        
+        columns, params = "payload", []
+        if fields is not None:
+            # Build the partial payload in SQL so the full payload (with the chunk text) is never decoded
+            columns = f"json_object({', '.join('?, json_extract(payload, ?)' for _ in fields)})"
+            for field in fields:
+                params.extend([field, f'$."{field}"'])
+        
+        where, where_params = self._where(criteria, point_ids, rows, exclude, contains)
+        query = f"SELECT row, point_id, {columns} AS payload FROM chunks WHERE {where} ORDER BY row"
+        params.extend(where_params)
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        with self._lock:
+            results = self._conn.execute(query, params).fetchall()
+        
+        points = [(result["row"], result["point_id"], json.loads(result["payload"])) for result in results]
+        if fields is not None:
+            # Leave out fields the payload does not have
+            points = [(row, point_id, {key: value for key, value in payload.items() if value is not None}) for row, point_id, payload in points]
+        return points
+    
+    def select_rows(
+        self,
+        criteria: Optional[Dict[str, Any]] = None,
+        exclude: Optional[Dict[str, Any]] = None,
+        contains: Optional[Dict[str, List[Any]]] = None
+    ) -> List[int]:
+        """
+        Get the rows of stored points by payload values, without reading their payloads.
+        
+        Args:
+            criteria: Payload fields to match exactly (a list matches any of its values)
+            exclude: Payload fields that must not match
+            contains: List payload fields that must hold at least one of the given values
+        
+        Returns:
+            Matching rows in row order
+        """
+        where, params = self._where(criteria, None, None, exclude, contains)
+        with self._lock:
+            results = self._conn.execute(f"SELECT row FROM chunks WHERE {where} ORDER BY row", params).fetchall()
+        return [result["row"] for result in results]
+    
+    def _where(
+        self,
+        criteria: Optional[Dict[str, Any]],
+        point_ids: Optional[List[str]],
+        rows: Optional[List[int]],
+        exclude: Optional[Dict[str, Any]],
+        contains: Optional[Dict[str, List[Any]]]
+    ) -> Tuple[str, List[Any]]:
+        """Build the SQL condition for select (see its arguments)."""
+        clauses, params = ["1 = 1"], []
+        for key, value in (criteria or {}).items():
+            clause, clause_params = self._field_clause(key, value)
+            clauses.append(clause)
+            params.extend(clause_params)
+        for key, value in (exclude or {}).items():
+            clause, clause_params = self._field_clause(key, value)
+            clauses.append(f"NOT ({clause})")
+            params.extend(clause_params)
+        for key, values in (contains or {}).items():
+            clauses.append(f"EXISTS (SELECT 1 FROM json_each(payload, ?) WHERE value IN ({', '.join('?' * len(values))}))")
+            params.append(f'$."{key}"')
+            params.extend(values)
+        if point_ids is not None:
+            clauses.append(f"point_id IN ({', '.join('?' * len(point_ids))})")
+            params.extend(point_ids)
+        if rows is not None:
+            clauses.append(f"row IN ({', '.join('?' * len(rows))})")
+            params.extend(rows)
+        return " AND ".join(clauses), params
+    
+    def _field_clause(self, key: str, value: Any) -> Tuple[str, List[Any]]:
+        """Build the SQL condition matching a payload field value (or any value of a list)."""
+        if key == "source_document_id":
+            column, params = "document_id", []
+        else:
+            column, params = "json_extract(payload, ?)", [f'$."{key}"']
+        if isinstance(value, list):
+            return f"{column} IN ({', '.join('?' * len(value))})", params + value
+        return f"{column} = ?", params + [value]
+    
+    def update_payloads(self, payloads: Dict[int, Dict[str, Any]]):
+        """
+        Replace the payloads of stored rows.
+        
+        Args:
+            payloads: Mapping of row to its new payload
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE chunks SET payload = ?, document_id = ? WHERE row = ?",
+                [(json.dumps(payload), payload.get("source_document_id"), row) for row, payload in payloads.items()]
+            )
+    
+    def delete(self, rows: List[int]) -> int:
+        """
+        Delete stored rows, freeing them for later chunks.
+        
+        Args:
+            rows: Rows to delete
+        
+        Returns:
+            Number of rows deleted
+        """
+        if not rows:
+            return 0
+        
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row in rows])
+            self.live[rows] = False
+            self._free = sorted(set(self._free) | set(rows), reverse=True)
+        return len(rows)
+
+
+_collections: Dict[str, NumpyCollection] = {}
+_collections_lock = threading.Lock()
+
+
+def get_numpy_collection(path: str) -> NumpyCollection:
+    """
+    Get the shared, open collection stored in a directory.
+    
+    Args:
+        path: Directory of the collection
+    
+    Returns:
+        Collection
+    """
+    with _collections_lock:
+        if path not in _collections:
+            _collections[path] = NumpyCollection(path)
+            log_step("Storage", f"Opened vector matrix at {path} ({_collections[path].count} rows)")
+        return _collections[path]
+
+
+class NumpyDBStorage(StorageMixin):
+    """
+    In-process storage for document chunks and embeddings, without a vector database.
+    
+    Implements DocumentStorage on a NumpyCollection per collection (exact
+    brute-force search) and the shared document catalog. Meant for tests,
+    offline benchmarks and small single-process deployments; select it with
+    STORAGE_BACKEND=numpy.
+    """
+    
+    def __init__(self, collection_name: str = "documents", user_id: Optional[str] = None, storage_dir: Optional[str] = None):
+        """
+        Initialize numpy storage.
+        
+        Args:
+            collection_name: Base name for the collection
+            user_id: Optional user ID for user-specific collections
+            storage_dir: Directory holding the collections (defaults to NUMPY_STORAGE_DIR)
+        """
+        self.user_id = user_id
+        self.tenancy = "collection"
+        self.tenant_id = None
+        self.collection_name = f"{collection_name}_{user_id}" if user_id else collection_name
+        
+        self.collection = get_numpy_collection(os.path.join(storage_dir or NUMPY_STORAGE_DIR, self.collection_name))
+        self.catalog = get_document_catalog()
+        
+        log_step("Storage", f"Using numpy collection: {self.collection_name}")
+    
+    def upsert_points(
+        self,
+        points: Iterable[ChunkPoint],
+        batch_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        wait: bool = True
+    ) -> int:
+        """
+        Store points (batch size, parallelism and wait have no effect: writes are applied immediately).
+        
+        Args:
+            points: Points to upsert
+            batch_size: Unused
+            parallelism: Unused
+            wait: Unused
+        
+        Returns:
+            Number of points upserted
+        """
+        points = list(points)
+        self.collection.upsert(points)
+        return len(points)
+    
+    def _upsert_batch(self, batch: List[ChunkPoint]):
+        """Store one batch of points."""
+        self.collection.upsert(batch)
+    
+    def wait_for_writes(self):
+        """Writes are applied before they return, so there is nothing to wait for."""
+    
+    def find_chunks_by_simhash_bands(
+        self,
+        bands: List[str],
+        exclude_document_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, int]]:
+        """
+        Find stored chunks sharing at least one SimHash LSH band.
+        
+        Args:
+            bands: Band keys (see app.utils.simhash.band_keys)
+            exclude_document_id: Document whose chunks should be ignored
+            limit: Maximum number of chunks to return
+        
+        Returns:
+            List of (point ID, fingerprint) tuples
+        """
+        if not bands:
+            return []
+        
+        # Bands are matched in SQL and only the fingerprint is read back
+        exclude = {"source_document_id": exclude_document_id} if exclude_document_id else None
+        points = self.collection.select(exclude=exclude, contains={"simhash_bands": list(bands)}, fields=["simhash"], limit=limit)
+        return [(point_id, int(payload["simhash"], 16)) for _, point_id, payload in points if payload.get("simhash")]
+    
+    def add_chunk_provenance(self, provenance: Dict[str, List[Dict[str, Any]]]):
+        """
+        Record the sources of near-duplicate chunks on the chunk that was kept.
+        
+        Args:
+            provenance: Mapping of chunk ID to the sources it stands for
+        """
+        if not provenance:
+            return
+        
+        point_ids = {self._chunk_point_id(chunk_id): sources for chunk_id, sources in provenance.items()}
+        
+        updates = {}
+        for row, point_id, payload in self.collection.select(point_ids=list(point_ids)):
+            if payload.get("provenance"):
+                sources = json.loads(payload["provenance"])
+            else:
+                # Start from the chunk's own location
+                sources = [{"source_document_id": payload.get("source_document_id"), "page_number": payload.get("page_number")}]
+            
+            for source in point_ids[point_id]:
+                if source not in sources:
+                    sources.append(source)
+            
+            payload["provenance"] = json.dumps(sources)
+            updates[row] = payload
+        
+        self.collection.update_payloads(updates)
+        log_step("Storage", f"Recorded provenance for {len(updates)} deduplicated chunks")
+    
+    def get_chunk_locations(self, document_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the location of every stored chunk of a document.
+        
+        Args:
+            document_id: Document ID
+        
+        Returns:
+            Mapping of point ID to {page_number, start_index, end_index, chunk_ordinal}
+        """
+        location_fields = ["page_number", "start_index", "end_index", "chunk_ordinal"]
+        return {
+            point_id: {field: payload.get(field) for field in location_fields}
+            for _, point_id, payload in self.collection.select({"source_document_id": document_id})
+        }
+    
+    def update_chunk_payloads(
+        self,
+        chunks: List[Union[DocumentChunk, ChunkRecord]],
+        file_path: Optional[str] = None
+    ):
+        """
+        Replace the payload of already-stored chunks, keeping their vectors.
+        
+        Args:
+            chunks: Chunks whose points already exist
+            file_path: Path of the source file
+        """
+        if not chunks:
+            return
+        
+        payloads = {}
+        for chunk in chunks:
+            payload = self._chunk_payload(chunk, file_path)
+            point_id = self._chunk_point_id(chunk.chunk_id)
+            if point_id != chunk.chunk_id:
+                payload["original_chunk_id"] = chunk.chunk_id
+            payloads[point_id] = payload
+        
+        self.collection.update_payloads({
+            row: payloads[point_id]
+            for row, point_id, _ in self.collection.select(point_ids=list(payloads))
+        })
+    
+    def set_document_chunk_fields(self, document_id: str, fields: Dict[str, Any]):
+        """
+        Set payload fields on every chunk of a document.
+        
+        Args:
+            document_id: Document ID
+            fields: Payload fields to set
+        """
+        self.collection.update_payloads({
+            row: {**payload, **fields}
+            for row, _, payload in self.collection.select({"source_document_id": document_id})
+        })
+    
+    def delete_chunks(self, chunk_ids: List[str]):
+        """
+        Delete chunks by ID.
+        
+        Args:
+            chunk_ids: Chunk (or point) IDs to delete
+        """
+        if not chunk_ids:
+            return
+        
+        point_ids = [self._chunk_point_id(chunk_id) for chunk_id in chunk_ids]
+        deleted = self._remove_chunks(self.collection.select(point_ids=point_ids), [])
+        
+        log_step("Storage", f"Deleted {deleted} chunks")
+    
+    def _remove_chunks(self, selected: Iterable[Tuple[int, str, Dict[str, Any]]], removed_document_ids: List[str]) -> int:
+        """
+        Delete chunks, re-homing those that hold content of other documents (see ChunkPayloadMixin._rehomed_payload).
+        
+        Args:
+            selected: (row, point ID, payload) of the chunks to remove
+            removed_document_ids: Documents being deleted along with the chunks
+        
+        Returns:
+            Number of deleted chunks
+        """
+        rows, rehomed = [], {}
+        for row, _, payload in selected:
+            rehomed_payload = self._rehomed_payload(payload, removed_document_ids)
+            if rehomed_payload is None:
+                rows.append(row)
+            else:
+                rehomed[row] = rehomed_payload
+        
+        if rehomed:
+            self.collection.update_payloads(rehomed)
+            log_step("Storage", f"Re-homed {len(rehomed)} chunks shared with other documents")
+        self.collection.delete(rows)
+        return len(rows)
+    
+    def query_similar(
+        self,
+        query_text: str,
+        embedding: List[float],
+        n_results: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Query for chunks similar to a query text (exact search).
+        
+        Args:
+            query_text: Query text
+            embedding: Query embedding vector
+            n_results: Number of results to return
+            filter_criteria: Filter criteria for metadata
+            fields: Payload fields to return (all if not provided)
+        
+        Returns:
+            List of similar chunks with metadata
+        """
+        with Timer("Numpy DB Query"):
+            log_step("Query", f"Querying for: {query_text[:50]}...")
+            
+            start = time.perf_counter()
+            candidates = None
+            if filter_criteria:
+                candidates = self.collection.select_rows(filter_criteria)
+            hits = self.collection.search(embedding, n_results, candidates)
+            
+            stored = {row: (point_id, payload) for row, point_id, payload in self.collection.select(rows=[row for row, _ in hits])}
+            points = []
+            for row, score in hits:
+                if row not in stored:
+                    # Deleted since the search
+                    continue
+                point_id, payload = stored[row]
+                if fields:
+                    payload = {key: payload[key] for key in fields + ["original_chunk_id"] if key in payload}
+                points.append(ScoredChunk(id=point_id, score=score, payload=payload))
+            
+            return self._format_search_results(points, start)
+    
+    def query_similar_batch(
+        self,
+        query_texts: List[str],
+        embeddings: List[List[float]],
+        n_results: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Query for chunks similar to each of several query texts (exact search).
+        
+        Args:
+            query_texts: Query texts
+            embeddings: Query embedding vectors, in the same order
+            n_results: Number of results to return per query
+            filter_criteria: Filter criteria for metadata, applied to every query
+            fields: Payload fields to return (all if not provided)
+        
+        Returns:
+            List of similar chunks with metadata for each query
+        """
+        return [
+            self.query_similar(query_text, embedding, n_results, filter_criteria, fields)
+            for query_text, embedding in zip(query_texts, embeddings)
+        ]
+    
+    def delete_document(self, document_id: str) -> bool:
+        """
+        Delete a document and all its chunks.
+        
+        Args:
+            document_id: Document ID
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            self._remove_chunks(self.collection.select({"source_document_id": document_id}), [document_id])
+            self.catalog.delete_document(self.collection_name, document_id)
+            
+            log_step("Storage", f"Deleted document: {document_id}")
+            return True
+        
+        except Exception as e:
+            log_step("Storage", f"Error deleting document: {str(e)}", level="error")
+            return False
+    
+    def delete_documents(self, document_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Delete many documents and all their chunks.
+        
+        Args:
+            document_ids: Document IDs
+        
+        Returns:
+            Records of the deleted documents (IDs without a record are left out)
+        """
+        if not document_ids:
+            return []
+        
+        self._remove_chunks(self.collection.select({"source_document_id": list(document_ids)}), list(document_ids))
+        records = self.catalog.delete_documents(self.collection_name, list(document_ids))
+        
+        log_step("Storage", f"Deleted {len(records)} of {len(document_ids)} documents")
+        return records
+    
+    def iter_document_chunks(self, document_id: str, fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all chunks of a document.
+        
+        Args:
+            document_id: Document ID
+            fields: Payload fields to return (all if not provided; include "text" to get chunk texts)
+        
+        Yields:
+            Document chunks
+        """
+        for _, point_id, payload in self.collection.select({"source_document_id": document_id}):
+            if fields:
+                payload = {key: payload[key] for key in fields + ["original_chunk_id"] if key in payload}
+            yield self._format_chunk(ChunkPoint(id=point_id, vector=None, payload=payload))
+    
+    def get_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a single chunk by ID.
+        
+        Args:
+            chunk_id: Chunk ID
+        
+        Returns:
+            Chunk with metadata, or None if not found
+        """
+        points = self.collection.select(point_ids=[self._chunk_point_id(chunk_id)])
+        if not points:
+            return None
+        _, point_id, payload = points[0]
+        return self._format_chunk(ChunkPoint(id=point_id, vector=None, payload=payload))
+
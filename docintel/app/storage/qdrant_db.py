@@ -1,264 +1,789 @@
 import os
-from typing import List, Dict, Any, Optional, Union
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as wait_futures
+from itertools import chain, islice
+from typing import List, Dict, Any, Optional, Union, Tuple, Iterator, Iterable
 import json
-import uuid
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, Condition
-from app.chunking.models import DocumentChunk, ProcessedDocument
+from qdrant_client.http.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, MatchAny, Range, Condition, OverwritePayloadOperation, SetPayloadOperation, SetPayload, PayloadSchemaType, HasIdCondition
+from qdrant_client.http.models import (
+    HnswConfigDiff, SearchParams, QuantizationSearchParams, ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig, VectorParamsDiff, Disabled, CollectionStatus,
+    KeywordIndexParams, KeywordIndexType, QueryRequest, IsEmptyCondition, PayloadField
+)
+from app.chunking.models import DocumentChunk
+from app.chunking.records import ChunkRecord
+from app.storage.base import ChunkPoint, VECTOR_SIZE
+from app.storage.mixins import (
+    StorageMixin,
+    SCROLL_PAGE_SIZE,
+    UPSERT_BATCH_SIZE,
+    UPSERT_PARALLELISM
+)
+from app.storage.document_catalog import get_document_catalog
 from app.utils.logging import log_step, Timer
 
 
-class QdrantDBStorage:
+# Talk to Qdrant over gRPC instead of REST (binary payloads, cheaper to decode than JSON)
+PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+
+# Payload fields used in filters, indexed so filtered search and scroll avoid full scans
+PAYLOAD_INDEXES = {
+    # Tenant partitioning of shared collections (Qdrant co-locates each tenant's points)
+    "tenant_id": KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True),
+    "source_document_id": PayloadSchemaType.KEYWORD,
+    "source_document_type": PayloadSchemaType.KEYWORD,
+    "page_number": PayloadSchemaType.INTEGER,
+    "chunk_ordinal": PayloadSchemaType.INTEGER,
+    "is_ocr": PayloadSchemaType.BOOL,
+    "simhash_bands": PayloadSchemaType.KEYWORD,
+}
+
+# Point ID no chunk uses; the write barrier deletes it
+BARRIER_POINT_ID = "00000000-0000-0000-0000-000000000000"
+
+# Collection configurations trading memory for recall and latency:
+#   memory  - float32 vectors and HNSW graph in RAM (fastest, ~6KB per chunk)
+#   scalar  - int8 quantized vectors in RAM (4x smaller), originals on disk for rescoring
+#   binary  - 1-bit quantized vectors in RAM (32x smaller), originals on disk, oversampled rescoring
+#   on_disk - float32 vectors and HNSW graph on disk (least RAM, relies on the page cache)
+COLLECTION_PROFILES = {
+    "memory": {
+        "on_disk": False,
+        "quantization": None,
+        "hnsw": HnswConfigDiff(m=16, ef_construct=100, on_disk=False),
+        "search": SearchParams(hnsw_ef=128)
+    },
+    "scalar": {
+        "on_disk": True,
+        "quantization": ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        ),
+        "hnsw": HnswConfigDiff(m=16, ef_construct=100, on_disk=False),
+        "search": SearchParams(hnsw_ef=128, quantization=QuantizationSearchParams(rescore=True, oversampling=1.5))
+    },
+    "binary": {
+        "on_disk": True,
+        "quantization": BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True)),
+        "hnsw": HnswConfigDiff(m=16, ef_construct=200, on_disk=False),
+        "search": SearchParams(hnsw_ef=128, quantization=QuantizationSearchParams(rescore=True, oversampling=3.0))
+    },
+    "on_disk": {
+        "on_disk": True,
+        "quantization": None,
+        "hnsw": HnswConfigDiff(m=16, ef_construct=100, on_disk=True),
+        "search": SearchParams(hnsw_ef=128)
+    },
+}
+
+# Tenancy modes:
+#   collection - one collection per user ("documents_{user_id}")
+#   shared     - one collection for all users, partitioned by the tenant_id payload
+TENANCY_MODES = ("collection", "shared")
+DEFAULT_TENANCY = os.getenv("QDRANT_TENANCY", "collection")
+
+# Suffix of the shared collection's name ("documents_shared")
+SHARED_COLLECTION_SUFFIX = "shared"
+
+# Profile used for new collections
+DEFAULT_COLLECTION_PROFILE = os.getenv("QDRANT_COLLECTION_PROFILE", "memory")
+
+# How long a collection's detected profile is reused before checking it again
+PROFILE_CACHE_SECONDS = 60
+
+# Collection name -> (profile name, time detected), shared by the per-request storage instances
+_collection_profiles: Dict[str, Tuple[str, float]] = {}
+
+
+def qdrant_client_options() -> Dict[str, Any]:
+    """
+    Get the connection settings for Qdrant clients from the environment.
+    
+    Returns:
+        Keyword arguments for QdrantClient / AsyncQdrantClient
+    """
+    qdrant_url = os.environ.get("QDRANT_URL")
+    if not qdrant_url:
+        raise ValueError("QDRANT_URL environment variable is not set")
+    
+    return {
+        "url": qdrant_url,
+        "api_key": os.environ.get("QDRANT_API_KEY"),
+        "prefer_grpc": PREFER_GRPC,
+        "grpc_port": GRPC_PORT
+    }
+
+
+def resolve_collection(collection_name: str, user_id: Optional[str], tenancy: str) -> Tuple[str, Optional[str]]:
+    """
+    Get the collection holding a user's chunks.
+    
+    Args:
+        collection_name: Base name for the collection
+        user_id: Optional user ID
+        tenancy: Entry of TENANCY_MODES
+    
+    Returns:
+        Tuple of (collection name, tenant ID partitioning the collection or None)
+    """
+    if tenancy not in TENANCY_MODES:
+        raise ValueError(f"Unknown tenancy mode: {tenancy}")
+    
+    # Form collection name with optional user_id; in shared tenancy users are partitioned by tenant_id
+    tenant_id = user_id if tenancy == "shared" else None
+    if tenant_id:
+        return f"{collection_name}_{SHARED_COLLECTION_SUFFIX}", tenant_id
+    return (f"{collection_name}_{user_id}" if user_id else collection_name), None
+
+
+def cache_collection_profile(collection_name: str, config: Any) -> str:
+    """
+    Detect the profile of a collection from its configuration and cache it.
+    
+    Args:
+        collection_name: Collection name
+        config: Collection configuration (as returned by get_collection)
+    
+    Returns:
+        Name of the matching COLLECTION_PROFILES entry
+    """
+    if isinstance(config.quantization_config, ScalarQuantization):
+        profile_name = "scalar"
+    elif isinstance(config.quantization_config, BinaryQuantization):
+        profile_name = "binary"
+    elif config.params.vectors.on_disk:
+        profile_name = "on_disk"
+    else:
+        profile_name = "memory"
+    
+    _collection_profiles[collection_name] = (profile_name, time.monotonic())
+    return profile_name
+
+
+def cached_collection_profile(collection_name: str) -> Optional[str]:
+    """Get the cached profile of a collection, or None if it has to be detected again."""
+    cached = _collection_profiles.get(collection_name)
+    if cached and time.monotonic() - cached[1] < PROFILE_CACHE_SECONDS:
+        return cached[0]
+    return None
+
+
+class QdrantPointsMixin:
+    """Filters and payload operations shared by the sync and async Qdrant storages."""
+    
+    def _scoped_filter(
+        self,
+        conditions: Optional[List[Condition]] = None,
+        must_not: Optional[List[Condition]] = None
+    ) -> Optional[Filter]:
+        """
+        Build a chunk filter, restricted to the storage's tenant in a shared collection.
+        
+        Args:
+            conditions: Conditions that must match
+            must_not: Conditions that must not match
+        
+        Returns:
+            Filter, or None if there is nothing to filter on
+        """
+        must = list(conditions or [])
+        if self.tenant_id:
+            must.append(FieldCondition(key="tenant_id", match=MatchValue(value=self.tenant_id)))
+        if not must and not must_not:
+            return None
+        return Filter(must=must, must_not=must_not)
+    
+    def _criteria_filter(self, filter_criteria: Optional[Dict[str, Any]] = None) -> Optional[Filter]:
+        """
+        Build a chunk filter matching exact payload values.
+        
+        Only chunks are stored in the collection, so this filters only on the
+        given criteria (and the tenant).
+        
+        Args:
+            filter_criteria: Payload fields to match
+        
+        Returns:
+            Filter, or None if there is nothing to filter on
+        """
+        return self._scoped_filter([
+            FieldCondition(
+                key=key,
+                match=MatchValue(value=value)
+            )
+            for key, value in (filter_criteria or {}).items()
+        ])
+    
+    def _search_payload_selector(self, fields: Optional[List[str]]) -> Union[bool, List[str]]:
+        """Payload selector for search hits returning the given fields (all if not provided)."""
+        return (list(fields) + ["original_chunk_id"]) if fields else True
+    
+    def _rehome_operations(self, points: Iterable[Any], removed_document_ids: Iterable[str]) -> List[OverwritePayloadOperation]:
+        """
+        Build the payload updates re-homing removed chunks that hold other documents' content.
+        
+        Args:
+            points: Points being removed, with their full payload
+            removed_document_ids: Documents being deleted along with the points
+        
+        Returns:
+            One payload overwrite per re-homed point
+        """
+        removed_document_ids = list(removed_document_ids)
+        operations = []
+        for point in points:
+            payload = self._rehomed_payload(point.payload or {}, removed_document_ids)
+            if payload is not None:
+                operations.append(OverwritePayloadOperation(overwrite_payload=SetPayload(payload=payload, points=[point.id])))
+        return operations
+
+
+class QdrantDBStorage(QdrantPointsMixin, StorageMixin):
     """Storage for document chunks and embeddings using Qdrant."""
     
-    def __init__(self, collection_name: str = "documents", user_id: Optional[str] = None):
+    def __init__(
+        self,
+        collection_name: str = "documents",
+        user_id: Optional[str] = None,
+        profile: Optional[str] = None,
+        tenancy: Optional[str] = None
+    ):
         """
         Initialize Qdrant storage.
         
         Args:
             collection_name: Base name for the collection
             user_id: Optional user ID for user-specific collections
+            profile: Name of the COLLECTION_PROFILES entry used if the collection has to be created
+                (defaults to QDRANT_COLLECTION_PROFILE)
+            tenancy: "collection" for a collection per user, "shared" for one collection
+                partitioned by tenant (defaults to QDRANT_TENANCY)
         """
         self.user_id = user_id
+        self.new_collection_profile = profile or DEFAULT_COLLECTION_PROFILE
+        if self.new_collection_profile not in COLLECTION_PROFILES:
+            raise ValueError(f"Unknown collection profile: {self.new_collection_profile}")
         
-        # Form collection name with optional user_id
-        self.collection_name = f"{collection_name}_{user_id}" if user_id else collection_name
-        
-        # Get Qdrant configuration from environment
-        qdrant_url = os.environ.get("QDRANT_URL")
-        qdrant_api_key = os.environ.get("QDRANT_API_KEY")
+        self.tenancy = tenancy or DEFAULT_TENANCY
+        self.collection_name, self.tenant_id = resolve_collection(collection_name, user_id, self.tenancy)
         
-        if not qdrant_url:
-            raise ValueError("QDRANT_URL environment variable is not set")
-        
-        # Initialize Qdrant client
-        self.client = QdrantClient(
-            url=qdrant_url,
-            api_key=qdrant_api_key
-        )
+        # Initialize Qdrant client (REST, or gRPC with QDRANT_PREFER_GRPC)
+        self.client = QdrantClient(**qdrant_client_options())
         
         # Create collection if it doesn't exist
         self._create_collection_if_not_exists()
         
+        # Document records live in the catalog; move any left in the collection by older versions
+        self.catalog = get_document_catalog()
+        if not self.catalog.is_migrated(self.collection_name):
+            self.migrate_document_records()
+        
         log_step("Storage", f"Using Qdrant collection: {self.collection_name}")
     
     def _create_collection_if_not_exists(self):
         """Create the collection if it doesn't already exist."""
         try:
             if not self.client.collection_exists(self.collection_name):
+                profile = COLLECTION_PROFILES[self.new_collection_profile]
+                hnsw_config = profile["hnsw"]
+                if self.tenant_id:
+                    # Searches never cross tenants, so build the HNSW graph per tenant instead of globally
+                    hnsw_config = hnsw_config.model_copy(update={"m": 0, "payload_m": hnsw_config.m})
                 self.client.create_collection(
                     collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=1536, distance=Distance.COSINE),  # Assuming 1536-dim embeddings (adjust as needed)
+                    vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE, on_disk=profile["on_disk"]),
+                    hnsw_config=hnsw_config,
+                    quantization_config=profile["quantization"]
                 )
-                log_step("Storage", f"Created Qdrant collection: {self.collection_name}")
+                _collection_profiles[self.collection_name] = (self.new_collection_profile, time.monotonic())
+                self.ensure_payload_indexes()
+                log_step("Storage", f"Created Qdrant collection: {self.collection_name} ({self.new_collection_profile} profile)")
             else:
                 log_step("Storage", f"Using existing Qdrant collection: {self.collection_name}")
         except Exception as e:
             log_step("Storage", f"Error creating/checking collection: {str(e)}", level="error")
             raise
     
-    def _generate_uuid_from_string(self, input_string: str) -> str:
+    def ensure_payload_indexes(self) -> List[str]:
         """
-        Generate a deterministic UUID from a string.
+        Create any payload indexes in PAYLOAD_INDEXES the collection is missing.
         
-        Args:
-            input_string: String to convert to UUID
-            
         Returns:
-            UUID as string
+            Names of the fields that were indexed
         """
-        # Create a namespace UUID (using a fixed UUID)
-        namespace = uuid.UUID('6ba7b810-9dad-11d1-80b4-00c04fd430c8')  # RFC 4122 namespace
-        # Generate a UUID based on the namespace and the input string
-        return str(uuid.uuid5(namespace, input_string))
+        existing = self.client.get_collection(self.collection_name).payload_schema or {}
+        created = []
+        
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            if field_name in existing:
+                continue
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+                wait=True
+            )
+            created.append(field_name)
+        
+        if created:
+            log_step("Storage", f"Created payload indexes on {self.collection_name}: {', '.join(created)}")
+        return created
     
-    def store_document(
-        self, 
-        document: ProcessedDocument,
-        embeddings: Dict[str, List[float]]
-    ) -> str:
+    @property
+    def profile(self) -> str:
+        """Name of the collection profile matching the collection's current configuration."""
+        cached = cached_collection_profile(self.collection_name)
+        if cached:
+            return cached
+        
+        return cache_collection_profile(self.collection_name, self.client.get_collection(self.collection_name).config)
+    
+    @property
+    def search_params(self) -> SearchParams:
+        """Search parameters for the collection's profile (HNSW ef, quantized rescoring)."""
+        return COLLECTION_PROFILES[self.profile]["search"]
+    
+    def migrate_profile(self, profile_name: str, wait: bool = False, timeout: float = 3600):
         """
-        Store a processed document with embeddings.
+        Reconfigure the collection to another profile in place.
+        
+        Qdrant rebuilds the vector storage, quantized vectors and HNSW graph in
+        the background; the collection stays searchable meanwhile.
         
         Args:
-            document: Processed document with chunks
-            embeddings: Dictionary mapping chunk IDs to embeddings
-            
+            profile_name: Name of the COLLECTION_PROFILES entry to switch to
+            wait: Whether to block until the collection is optimized again
+            timeout: Maximum number of seconds to wait
+        """
+        if profile_name not in COLLECTION_PROFILES:
+            raise ValueError(f"Unknown collection profile: {profile_name}")
+        
+        profile = COLLECTION_PROFILES[profile_name]
+        hnsw_config = profile["hnsw"]
+        if self.client.get_collection(self.collection_name).config.hnsw_config.m == 0:
+            # Keep the per-tenant graph of a shared collection
+            hnsw_config = hnsw_config.model_copy(update={"m": 0, "payload_m": hnsw_config.m})
+        previous = self.profile
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            vectors_config={"": VectorParamsDiff(on_disk=profile["on_disk"])},
+            hnsw_config=hnsw_config,
+            quantization_config=profile["quantization"] or Disabled.DISABLED
+        )
+        _collection_profiles[self.collection_name] = (profile_name, time.monotonic())
+        log_step("Storage", f"Migrating {self.collection_name} from the {previous} to the {profile_name} profile")
+        
+        if wait:
+            self.wait_until_optimized(timeout)
+    
+    def wait_until_optimized(self, timeout: float = 3600, poll_interval: float = 1.0):
+        """
+        Block until the collection has finished indexing and optimizing.
+        
+        Args:
+            timeout: Maximum number of seconds to wait
+            poll_interval: Seconds between status checks
+        """
+        deadline = time.monotonic() + timeout
+        while self.client.get_collection(self.collection_name).status != CollectionStatus.GREEN:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Collection {self.collection_name} not optimized after {timeout}s")
+            time.sleep(poll_interval)
+    
+    def upsert_points(
+        self,
+        points: Iterable[ChunkPoint],
+        batch_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        wait: bool = True
+    ) -> int:
+        """
+        Upsert points in batches sent in parallel.
+        
+        Batches are sent without waiting for them to be applied; with wait, a
+        single write barrier at the end makes them all visible before returning.
+        The points are consumed lazily, so at most `parallelism` batches are in
+        memory at once.
+        
+        Args:
+            points: Points to upsert (ChunkPoints, or Qdrant PointStructs)
+            batch_size: Points per upsert request (defaults to QDRANT_UPSERT_BATCH_SIZE)
+            parallelism: Upsert requests in flight at once (defaults to QDRANT_UPSERT_PARALLELISM)
+            wait: Whether to wait for all points to be applied before returning
+        
         Returns:
-            Document ID
+            Number of points upserted
         """
-        with Timer("Qdrant DB Storage"):
-            log_step("Storage", f"Storing document: {document.filename}")
-            
-            # Prepare points for storage
-            points = []
-            
-            # Track document-level statistics
-            ocr_chunk_count = 0
-            
-            # Extract file path from the first chunk's metadata if available
-            file_path = None
-            if document.chunks and hasattr(document.chunks[0], 'metadata'):
-                file_path = document.chunks[0].metadata.get('file_path')
+        batch_size = batch_size or UPSERT_BATCH_SIZE
+        parallelism = parallelism or UPSERT_PARALLELISM
+        points = iter(points)
+        
+        first_batch = list(islice(points, batch_size))
+        next_batch = list(islice(points, batch_size))
+        if not next_batch:
+            # A single request needs neither threads nor a barrier
+            if first_batch:
+                self.client.upsert(collection_name=self.collection_name, points=self._qdrant_points(first_batch), wait=wait)
+            return len(first_batch)
+        
+        batches = chain([first_batch, next_batch], iter(lambda: list(islice(points, batch_size)), []))
+        upserted = 0
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            in_flight = set()
+            for batch in batches:
+                if len(in_flight) >= parallelism:
+                    done, in_flight = wait_futures(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                in_flight.add(executor.submit(self._upsert_batch, batch))
+                upserted += len(batch)
             
-            # If no file path is found in chunks, check if it's in the document metadata
-            if not file_path and hasattr(document, 'metadata') and document.metadata:
-                file_path = document.metadata.get('file_path')
+            for future in in_flight:
+                future.result()
+        
+        if wait:
+            self.wait_for_writes()
+        log_step("Storage", f"Upserted {upserted} points in batches of {batch_size}")
+        return upserted
+    
+    def _upsert_batch(self, batch: List[ChunkPoint]):
+        """Send one batch of points without waiting for it to be applied."""
+        self.client.upsert(collection_name=self.collection_name, points=self._qdrant_points(batch), wait=False)
+    
+    def _qdrant_points(self, points: List[Any]) -> List[PointStruct]:
+        """Convert chunk points (or points read from another collection) to Qdrant points."""
+        return [PointStruct(id=point.id, vector=point.vector, payload=point.payload) for point in points]
+    
+    def wait_for_writes(self):
+        """
+        Block until every earlier write to the collection has been applied.
+        
+        Qdrant applies updates in order on each shard, so a write that reaches
+        every shard (a delete by filter) and waits completes only after them.
+        """
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=Filter(must=[HasIdCondition(has_id=[BARRIER_POINT_ID])]),
+            wait=True
+        )
+    
+    def migrate_document_records(self) -> int:
+        """
+        Move document records stored as zero-vector points into the document catalog.
+        
+        Older versions stored each document's metadata (DOC_META) and its
+        user-document mapping (USER_DOC) as points next to the chunks. The
+        records are copied to the catalog, with the owner and file path filled
+        in from the mapping where the record lacks them, and the points are
+        deleted so the collection only holds searchable chunks.
+        
+        Returns:
+            Number of document records migrated
+        """
+        record_filter = Filter(
+            should=[
+                FieldCondition(key="is_document_metadata", match=MatchValue(value=True)),
+                FieldCondition(key="is_user_document_map", match=MatchValue(value=True))
+            ]
+        )
+        
+        try:
+            records, mappings = {}, {}
+            for point in self.iter_scroll(record_filter):
+                payload = point.payload or {}
+                document_id = payload.get("document_id")
+                if not document_id:
+                    continue
+                if payload.get("is_document_metadata"):
+                    for key in ("text", "is_document_metadata", "metadata_type", "original_id"):
+                        payload.pop(key, None)
+                    records[document_id] = payload
+                else:
+                    mappings[document_id] = payload
             
-            for chunk in document.chunks:
-                # Skip chunks without embeddings
-                if chunk.chunk_id not in embeddings:
-                    log_step("Storage", f"Skipping chunk {chunk.chunk_id} - no embedding", level="warning")
+            for document_id, mapping in mappings.items():
+                record = records.get(document_id)
+                if record is None:
                     continue
-                
-                # Count OCR chunks
-                if chunk.is_ocr:
-                    ocr_chunk_count += 1
-                
-                # Prepare metadata (payload in Qdrant terminology)
-                payload = {
-                    "source_document_id": chunk.source_document_id,
-                    "source_document_name": chunk.source_document_name,
-                    "source_document_type": chunk.source_document_type,
-                    "page_number": chunk.page_number if chunk.page_number is not None else -1,
-                    "is_ocr": chunk.is_ocr,
-                    "created_at": chunk.created_at.isoformat(),
-                    "is_document_metadata": False,  # Explicitly mark as not metadata
-                    "text": chunk.text,  # Store the text in the payload
-                    "user_id": self.user_id  # Add user_id to every chunk
-                }
-                
-                # Add optional metadata if available
-                if chunk.heading_path:
-                    payload["heading_path"] = json.dumps(chunk.heading_path)
-                if chunk.heading_level is not None:
-                    payload["heading_level"] = chunk.heading_level
-                if chunk.bounding_box:
-                    payload["bounding_box"] = json.dumps(chunk.bounding_box)
-                
-                # Add any additional metadata from the chunk
-                for key, value in chunk.metadata.items():
-                    if key not in payload and isinstance(value, (str, int, float, bool)):
-                        payload[key] = value
-                    elif isinstance(value, list) or isinstance(value, dict):
-                        payload[key] = json.dumps(value)
-                
-                # Always make sure file_path is in the metadata if available
-                if file_path:
-                    payload["file_path"] = file_path
-                
-                # Check if chunk_id is already a valid UUID - if not, try to parse it
-                try:
-                    # Try to parse as UUID to validate
-                    uuid.UUID(chunk.chunk_id)
-                    point_id = chunk.chunk_id
-                except ValueError:
-                    # Not a valid UUID, generate a new one
-                    point_id = self._generate_uuid_from_string(chunk.chunk_id)
-                    # Store the original ID in the payload
-                    payload["original_chunk_id"] = chunk.chunk_id
-                
-                # Create a point
-                points.append(PointStruct(
-                    id=point_id,
-                    vector=embeddings[chunk.chunk_id],
-                    payload=payload
-                ))
+                if not record.get("user_id"):
+                    record["user_id"] = mapping.get("user_id")
+                if not record.get("file_path") and mapping.get("file_path"):
+                    record["file_path"] = mapping["file_path"]
             
-            # Store document chunks
+            self.catalog.put_documents(self.collection_name, records.values())
+            if records or mappings:
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=record_filter,
+                    wait=True
+                )
+            self.catalog.mark_migrated(self.collection_name)
+        except Exception as e:
+            # Not marked as migrated, so the next storage instance retries
+            log_step("Storage", f"Error migrating document records of {self.collection_name}: {str(e)}", level="error")
+            return 0
+        
+        if records or mappings:
+            log_step(
+                "Storage",
+                f"Moved {len(records)} document records and {len(mappings)} user-document mappings "
+                f"of {self.collection_name} to the document catalog"
+            )
+        return len(records)
+    
+    def import_collection(self, source_collection: str, batch_size: int = 256) -> int:
+        """
+        Copy a per-user collection into this storage's tenant partition of the shared collection.
+        
+        Chunks keep their point IDs, vectors and payloads (plus tenant_id), and
+        the collection's document records are moved to the shared collection in
+        the document catalog. The source collection is left in place.
+        
+        Args:
+            source_collection: Per-user collection to copy
+            batch_size: Number of points copied per request
+        
+        Returns:
+            Number of chunks copied
+        """
+        if not self.tenant_id:
+            raise ValueError("Collections can only be imported into a tenant of a shared collection")
+        
+        copied = 0
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=source_collection,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
             if points:
                 self.client.upsert(
                     collection_name=self.collection_name,
-                    points=points
+                    points=[
+                        PointStruct(id=point.id, vector=point.vector, payload={**(point.payload or {}), "tenant_id": self.tenant_id})
+                        for point in points
+                    ],
+                    wait=True
                 )
-                
-                log_step("Storage", f"Stored {len(points)} chunks for document {document.document_id}")
+                copied += len(points)
+            if offset is None:
+                break
+        
+        moved = self.catalog.move_collection(source_collection, self.collection_name, self.tenant_id)
+        log_step("Storage", f"Imported {copied} chunks and {moved} documents from {source_collection} as tenant {self.tenant_id}")
+        return copied
+    
+    def find_chunks_by_simhash_bands(
+        self,
+        bands: List[str],
+        exclude_document_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Tuple[str, int]]:
+        """
+        Find stored chunks sharing at least one SimHash LSH band.
+        
+        Args:
+            bands: Band keys (see app.utils.simhash.band_keys)
+            exclude_document_id: Document whose chunks should be ignored
+            limit: Maximum number of chunks to return
             
-            # Store document-level metadata
-            document_metadata = {
-                "document_id": document.document_id,
-                "filename": document.filename,
-                "document_type": document.file_type,
-                "file_size": document.file_size,
-                "total_pages": document.total_pages,
-                "chunk_count": len(document.chunks),
-                "ocr_chunk_count": ocr_chunk_count,
-                "ocr_used": document.is_complex or ocr_chunk_count > 0,
-                "processing_time": document.processing_time,
-                "created_at": document.created_at.isoformat(),
-                "user_id": self.user_id,  # Add user_id to document metadata
-                "is_document_metadata": True,
-                "text": f"Document metadata for {document.filename}",  # Add text field for consistency
-                "metadata_type": "DOC_META"  # Add a field to identify this as metadata
-            }
+        Returns:
+            List of (point ID, fingerprint) tuples
+        """
+        if not bands:
+            return []
+        
+        try:
+            must_not = []
+            if exclude_document_id:
+                must_not.append(FieldCondition(key="source_document_id", match=MatchValue(value=exclude_document_id)))
             
-            # Add file path to document metadata if available
-            if file_path:
-                document_metadata["file_path"] = file_path
+            points, _ = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._scoped_filter(
+                    [FieldCondition(key="simhash_bands", match=MatchAny(any=bands))],
+                    must_not
+                ),
+                limit=limit,
+                with_payload=["simhash"],
+                with_vectors=False
+            )
             
-            # Check if file_path exists in any chunk's metadata if not already found
-            if not file_path:
-                for chunk in document.chunks:
-                    if hasattr(chunk, 'metadata') and 'file_path' in chunk.metadata:
-                        document_metadata["file_path"] = chunk.metadata['file_path']
-                        file_path = chunk.metadata['file_path']
-                        break
+            return [
+                (str(point.id), int(point.payload["simhash"], 16))
+                for point in points
+                if point.payload.get("simhash")
+            ]
+        except Exception as e:
+            log_step("Storage", f"Error looking up near-duplicate chunks: {str(e)}", level="warning")
+            return []
+    
+    def add_chunk_provenance(self, provenance: Dict[str, List[Dict[str, Any]]]):
+        """
+        Record the sources of near-duplicate chunks on the chunk that was kept.
+        
+        Provenance is stored as a JSON list of {source_document_id, page_number}
+        in the "provenance" payload field, merged with any existing provenance.
+        
+        Args:
+            provenance: Mapping of chunk ID to the sources it stands for
+        """
+        if not provenance:
+            return
+        
+        point_ids = {self._chunk_point_id(chunk_id): sources for chunk_id, sources in provenance.items()}
+        
+        existing = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=list(point_ids),
+            with_payload=["provenance", "source_document_id", "page_number"],
+            with_vectors=False
+        )
+        
+        operations = []
+        for point in existing:
+            payload = point.payload or {}
+            if payload.get("provenance"):
+                sources = json.loads(payload["provenance"])
+            else:
+                # Start from the chunk's own location
+                sources = [{"source_document_id": payload.get("source_document_id"), "page_number": payload.get("page_number")}]
             
-            # Generate a valid UUID for document metadata
-            # Use deterministic UUID generation to ensure we can find it again
-            metadata_id = self._generate_uuid_from_string(f"DOC_META_{document.document_id}")
-            document_metadata["original_id"] = f"DOC_META_{document.document_id}"
+            for source in point_ids[str(point.id)]:
+                if source not in sources:
+                    sources.append(source)
             
-            # Create a zero vector for metadata (since we won't search for it by similarity)
-            zero_vector = [0.0] * 1536  # Adjust size as needed
+            operations.append(SetPayloadOperation(set_payload=SetPayload(payload={"provenance": json.dumps(sources)}, points=[point.id])))
+        
+        # One request for all chunks
+        if operations:
+            self.client.batch_update_points(collection_name=self.collection_name, update_operations=operations)
+        
+        log_step("Storage", f"Recorded provenance for {len(existing)} deduplicated chunks")
+    
+    def _rehome_shared_chunks(self, conditions: List[Condition], removed_document_ids: Iterable[str]) -> List[str]:
+        """
+        Re-home the chunks about to be removed that hold content of other documents.
+        
+        Args:
+            conditions: Conditions selecting the chunks being removed
+            removed_document_ids: Documents being deleted along with the chunks
+        
+        Returns:
+            IDs of the re-homed points
+        """
+        points = self.iter_scroll(self._scoped_filter(conditions, [IsEmptyCondition(is_empty=PayloadField(key="provenance"))]))
+        operations = self._rehome_operations(points, removed_document_ids)
+        if not operations:
+            return []
+        
+        self.client.batch_update_points(collection_name=self.collection_name, update_operations=operations)
+        log_step("Storage", f"Re-homed {len(operations)} chunks shared with other documents")
+        return [str(operation.overwrite_payload.points[0]) for operation in operations]
+    
+    def get_chunk_locations(self, document_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the location of every stored chunk of a document.
+        
+        Args:
+            document_id: Document ID
             
-            # Store document metadata
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=[PointStruct(
-                    id=metadata_id,
-                    vector=zero_vector,
-                    payload=document_metadata
-                )]
+        Returns:
+            Mapping of point ID to {page_number, start_index, end_index, chunk_ordinal}
+        """
+        location_fields = ["page_number", "start_index", "end_index", "chunk_ordinal"]
+        points = self.iter_scroll(
+            self._scoped_filter([FieldCondition(key="source_document_id", match=MatchValue(value=document_id))]),
+            with_payload=location_fields
+        )
+        return {
+            str(point.id): {field: (point.payload or {}).get(field) for field in location_fields}
+            for point in points
+        }
+    
+    def update_chunk_payloads(
+        self,
+        chunks: List[Union[DocumentChunk, ChunkRecord]],
+        file_path: Optional[str] = None
+    ):
+        """
+        Replace the payload of already-stored chunks, keeping their vectors.
+        
+        Used when re-ingesting a document for chunks whose text is unchanged but
+        whose location moved.
+        
+        Args:
+            chunks: Chunks whose points already exist
+            file_path: Path of the source file
+        """
+        if not chunks:
+            return
+        
+        operations = [
+            OverwritePayloadOperation(
+                overwrite_payload=SetPayload(
+                    payload=self._chunk_payload(chunk, file_path),
+                    points=[self._chunk_point_id(chunk.chunk_id)]
+                )
             )
-            
-            # Add a direct user to document mapping for easier retrieval
-            if self.user_id:
-                user_doc_original_id = f"USER_DOC_{self.user_id}_{document.document_id}"
-                user_doc_id = self._generate_uuid_from_string(user_doc_original_id)
-                
-                user_doc_metadata = {
-                    "user_id": self.user_id,
-                    "document_id": document.document_id,
-                    "filename": document.filename,
-                    "file_path": file_path if file_path else "",
-                    "is_user_document_map": True,
-                    "text": f"User {self.user_id} document mapping to {document.document_id}",
-                    "original_id": user_doc_original_id,
-                    "mapping_type": "USER_DOC"
-                }
-                
-                try:
-                    self.client.upsert(
-                        collection_name=self.collection_name,
-                        points=[PointStruct(
-                            id=user_doc_id,
-                            vector=zero_vector,
-                            payload=user_doc_metadata
-                        )]
-                    )
-                    log_step("Storage", f"Added user-document mapping for user {self.user_id}, document {document.document_id}")
-                except Exception as e:
-                    log_step("Storage", f"Error adding user-document mapping: {str(e)}", level="warning")
-            
-            return document.document_id
+            for chunk in chunks
+        ]
+        
+        self.client.batch_update_points(
+            collection_name=self.collection_name,
+            update_operations=operations
+        )
+    
+    def set_document_chunk_fields(self, document_id: str, fields: Dict[str, Any]):
+        """
+        Set payload fields on every chunk of a document.
+        
+        Args:
+            document_id: Document ID
+            fields: Payload fields to set
+        """
+        self.client.set_payload(
+            collection_name=self.collection_name,
+            payload=fields,
+            points=self._scoped_filter([FieldCondition(key="source_document_id", match=MatchValue(value=document_id))])
+        )
+    
+    def delete_chunks(self, chunk_ids: List[str]):
+        """
+        Delete chunks by ID.
+        
+        Args:
+            chunk_ids: Chunk (or point) IDs to delete
+        """
+        if not chunk_ids:
+            return
+        
+        point_ids = [self._chunk_point_id(chunk_id) for chunk_id in chunk_ids]
+        
+        # Chunks standing for content of other documents move to one of them
+        rehomed = set(self._rehome_shared_chunks([HasIdCondition(has_id=point_ids)], []))
+        point_ids = [point_id for point_id in point_ids if point_id not in rehomed]
+        if not point_ids:
+            return
+        
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=self._scoped_filter([HasIdCondition(has_id=point_ids)]) if self.tenant_id else point_ids
+        )
+        
+        log_step("Storage", f"Deleted {len(point_ids)} chunks")
     
     def query_similar(
         self, 
         query_text: str,
         embedding: List[float],
         n_results: int = 5,
-        filter_criteria: Optional[Dict[str, Any]] = None
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Query for chunks similar to a query text.
@@ -268,81 +793,70 @@ class QdrantDBStorage:
             embedding: Query embedding vector
             n_results: Number of results to return
             filter_criteria: Filter criteria for metadata
-            
+            fields: Payload fields to return (all if not provided; SEARCH_PAYLOAD_FIELDS
+                has the ones answer generation needs)
+        
         Returns:
             List of similar chunks with metadata
         """
         with Timer("Qdrant DB Query"):
             log_step("Query", f"Querying for: {query_text[:50]}...")
             
-            # Prepare filter - exclude document metadata
-            must_conditions = [
-                FieldCondition(
-                    key="is_document_metadata",
-                    match=MatchValue(value=False)
-                )
-            ]
-            
-            # Add additional filter criteria if provided
-            if filter_criteria:
-                for key, value in filter_criteria.items():
-                    must_conditions.append(
-                        FieldCondition(
-                            key=key,
-                            match=MatchValue(value=value)
-                        )
-                    )
-            
-            # Create the filter
-            query_filter = Filter(must=must_conditions)
-            
             # Perform search
-            search_results = self.client.search(
+            start = time.perf_counter()
+            response = self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=embedding,
+                query=embedding,
                 limit=n_results,
-                query_filter=query_filter,
-                with_payload=True
+                query_filter=self._criteria_filter(filter_criteria),
+                search_params=self.search_params,
+                with_payload=self._search_payload_selector(fields)
             )
             
-            # Format results
-            formatted_results = []
+            return self._format_search_results(response.points, start)
+    
+    def query_similar_batch(
+        self,
+        query_texts: List[str],
+        embeddings: List[List[float]],
+        n_results: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Query for chunks similar to each of several query texts in one request.
+        
+        Args:
+            query_texts: Query texts
+            embeddings: Query embedding vectors, in the same order
+            n_results: Number of results to return per query
+            filter_criteria: Filter criteria for metadata, applied to every query
+            fields: Payload fields to return (all if not provided)
+        
+        Returns:
+            List of similar chunks with metadata for each query
+        """
+        with Timer("Qdrant DB Batch Query"):
+            log_step("Query", f"Querying for {len(query_texts)} queries in one batch")
             
-            for result in search_results:
-                # Get data from result
-                point_id = result.id
-                score = result.score
-                payload = result.payload
-                
-                # Extract text from payload
-                text = payload.get("text", "")
-                
-                # Process metadata - create a copy to avoid modifying the original
-                processed_metadata = payload.copy()
-                
-                # Remove text from metadata to avoid duplication
-                if "text" in processed_metadata:
-                    del processed_metadata["text"]
-                
-                # Convert JSON strings back to objects
-                if "heading_path" in processed_metadata:
-                    processed_metadata["heading_path"] = json.loads(processed_metadata["heading_path"])
-                if "bounding_box" in processed_metadata:
-                    processed_metadata["bounding_box"] = json.loads(processed_metadata["bounding_box"])
-                
-                # Use original chunk ID if available, otherwise use the point ID
-                chunk_id = payload.get("original_chunk_id", point_id)
-                
-                # Add result
-                formatted_results.append({
-                    "chunk_id": chunk_id,
-                    "text": text,
-                    "metadata": processed_metadata,
-                    "distance": 1.0 - score  # Convert similarity score to distance
-                })
+            query_filter = self._criteria_filter(filter_criteria)
+            with_payload = self._search_payload_selector(fields)
+            start = time.perf_counter()
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    QueryRequest(
+                        query=embedding,
+                        limit=n_results,
+                        filter=query_filter,
+                        params=self.search_params,
+                        with_payload=with_payload
+                    )
+                    for embedding in embeddings
+                ]
+            )
             
-            log_step("Query", f"Found {len(formatted_results)} results")
-            return formatted_results
+            return [self._format_search_results(response.points, start) for response in responses]
     
     def delete_document(self, document_id: str) -> bool:
         """
@@ -355,82 +869,17 @@ class QdrantDBStorage:
             True if successful, False otherwise
         """
         try:
-            # Delete all chunks with this document ID
+            document_condition = FieldCondition(key="source_document_id", match=MatchValue(value=document_id))
+            
+            # Chunks standing for content of other documents move to one of them, the rest are deleted
+            self._rehome_shared_chunks([document_condition], [document_id])
             self.client.delete(
                 collection_name=self.collection_name,
-                points_selector=Filter(
-                    must=[
-                        FieldCondition(
-                            key="source_document_id",
-                            match=MatchValue(value=document_id)
-                        )
-                    ]
-                )
+                points_selector=self._scoped_filter([document_condition])
             )
             
-            # Generate a deterministic ID for the metadata record
-            metadata_id = self._generate_uuid_from_string(f"DOC_META_{document_id}")
-            
-            # Delete the document metadata entry
-            try:
-                self.client.delete(
-                    collection_name=self.collection_name,
-                    points_selector=[metadata_id]
-                )
-            except Exception as e:
-                log_step("Storage", f"Error deleting document metadata: {str(e)}", level="warning")
-            
-            # Delete the user-document mapping if user_id is available
-            if self.user_id:
-                user_doc_id = self._generate_uuid_from_string(f"USER_DOC_{self.user_id}_{document_id}")
-                try:
-                    self.client.delete(
-                        collection_name=self.collection_name,
-                        points_selector=[user_doc_id]
-                    )
-                    log_step("Storage", f"Deleted user-document mapping for user {self.user_id}, document {document_id}")
-                except Exception as e:
-                    log_step("Storage", f"Error deleting user-document mapping: {str(e)}", level="warning")
-            
-            # Also delete any entries with document metadata that match this document ID
-            try:
-                self.client.delete(
-                    collection_name=self.collection_name,
-                    points_selector=Filter(
-                        must=[
-                            FieldCondition(
-                                key="is_document_metadata",
-                                match=MatchValue(value=True)
-                            ),
-                            FieldCondition(
-                                key="document_id",
-                                match=MatchValue(value=document_id)
-                            )
-                        ]
-                    )
-                )
-            except Exception as e:
-                log_step("Storage", f"Error deleting document metadata entries: {str(e)}", level="warning")
-            
-            # Also delete any user-document mappings that might exist for this document
-            try:
-                self.client.delete(
-                    collection_name=self.collection_name,
-                    points_selector=Filter(
-                        must=[
-                            FieldCondition(
-                                key="is_user_document_map",
-                                match=MatchValue(value=True)
-                            ),
-                            FieldCondition(
-                                key="document_id",
-                                match=MatchValue(value=document_id)
-                            )
-                        ]
-                    )
-                )
-            except Exception as e:
-                log_step("Storage", f"Error deleting additional user-document mappings: {str(e)}", level="warning")
+            # Delete the document record
+            self.catalog.delete_document(self.collection_name, document_id, self.tenant_id)
             
             log_step("Storage", f"Deleted document: {document_id}")
             return True
@@ -439,394 +888,187 @@ class QdrantDBStorage:
             log_step("Storage", f"Error deleting document: {str(e)}", level="error")
             return False
     
-    def list_documents(
-        self, 
-        filter_criteria: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
+    def delete_documents(self, document_ids: List[str]) -> List[Dict[str, Any]]:
         """
-        List all documents in the system.
+        Delete many documents and all their chunks.
+        
+        The chunks of all documents are removed with one filter-based delete,
+        and the document records in one catalog transaction.
         
         Args:
-            filter_criteria: Filter criteria for documents
+            document_ids: Document IDs
+        
+        Returns:
+            Records of the deleted documents (IDs without a record are left out)
+        """
+        if not document_ids:
+            return []
+        
+        with Timer("Delete Documents"):
+            documents_condition = FieldCondition(key="source_document_id", match=MatchAny(any=list(document_ids)))
             
+            # Chunks standing for content of other documents move to one of them, the rest are deleted
+            self._rehome_shared_chunks([documents_condition], document_ids)
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=self._scoped_filter([documents_condition])
+            )
+            records = self.catalog.delete_documents(self.collection_name, list(document_ids), self.tenant_id)
+            
+            log_step("Storage", f"Deleted {len(records)} of {len(document_ids)} documents")
+            return records
+    
+    def iter_scroll(
+        self,
+        scroll_filter: Optional[Filter] = None,
+        with_payload: Union[bool, List[str]] = True,
+        page_size: int = SCROLL_PAGE_SIZE,
+        offset: Optional[Any] = None
+    ) -> Iterator[Any]:
+        """
+        Iterate over every point matching a filter, one scroll page at a time.
+        
+        Args:
+            scroll_filter: Filter for the points
+            with_payload: Whether to return payloads, or the payload fields to return
+            page_size: Number of points fetched per request
+            offset: Point ID to start from (a cursor returned by scroll_page)
+        
+        Yields:
+            Qdrant points
+        """
+        while True:
+            points, offset = self.scroll_page(scroll_filter, page_size, offset, with_payload)
+            yield from points
+            if offset is None:
+                return
+    
+    def scroll_page(
+        self,
+        scroll_filter: Optional[Filter] = None,
+        limit: int = SCROLL_PAGE_SIZE,
+        offset: Optional[Any] = None,
+        with_payload: Union[bool, List[str]] = True
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Get one page of points matching a filter.
+        
+        Args:
+            scroll_filter: Filter for the points
+            limit: Maximum number of points
+            offset: Point ID to start from (None for the first page)
+            with_payload: Whether to return payloads, or the payload fields to return
+        
         Returns:
-            List of document metadata
-        """
-        with Timer("List Documents"):
-            try:
-                documents = []
-                
-                # First try to get documents using user-document mappings if we have a user_id
-                if self.user_id:
-                    # Query user-document mappings first
-                    user_filter = Filter(
-                        must=[
-                            FieldCondition(
-                                key="is_user_document_map",
-                                match=MatchValue(value=True)
-                            ),
-                            FieldCondition(
-                                key="user_id",
-                                match=MatchValue(value=self.user_id)
-                            )
-                        ]
-                    )
-                    
-                    mapping_results = self.client.scroll(
-                        collection_name=self.collection_name,
-                        scroll_filter=user_filter,
-                        limit=1000,  # Reasonable limit for most use cases
-                        with_payload=True
-                    )
-                    
-                    if mapping_results[0]:  # Check if points are returned
-                        log_step("Storage", f"Found {len(mapping_results[0])} document mappings for user {self.user_id}")
-                        
-                        # Get document IDs from mappings
-                        doc_meta_ids = []
-                        doc_ids = []
-                        
-                        for point in mapping_results[0]:
-                            payload = point.payload
-                            if "document_id" in payload:
-                                doc_id = payload["document_id"]
-                                doc_ids.append(doc_id)
-                                meta_id = self._generate_uuid_from_string(f"DOC_META_{doc_id}")
-                                doc_meta_ids.append(meta_id)
-                        
-                        if doc_meta_ids:
-                            # Get document metadata by IDs
-                            doc_results = self.client.retrieve(
-                                collection_name=self.collection_name,
-                                ids=doc_meta_ids,
-                                with_payload=True
-                            )
-                            
-                            # Process document metadata
-                            for point in doc_results:
-                                payload = point.payload
-                                if payload.get("is_document_metadata", False):
-                                    # Remove unnecessary fields
-                                    if "text" in payload:
-                                        del payload["text"]
-                                    if "is_document_metadata" in payload:
-                                        del payload["is_document_metadata"]
-                                    if "metadata_type" in payload:
-                                        del payload["metadata_type"]
-                                    if "original_id" in payload:
-                                        del payload["original_id"]
-                                    
-                                    documents.append(payload)
-                
-                # If we didn't find documents via mappings or we don't have a user_id, fall back to the normal method
-                if not documents:
-                    # Prepare filter for document metadata
-                    must_conditions = [
-                        FieldCondition(
-                            key="is_document_metadata",
-                            match=MatchValue(value=True)
-                        )
-                    ]
-                    
-                    # Add user_id to filter if available and not in filter_criteria
-                    if self.user_id and (not filter_criteria or "user_id" not in filter_criteria):
-                        must_conditions.append(
-                            FieldCondition(
-                                key="user_id",
-                                match=MatchValue(value=self.user_id)
-                            )
-                        )
-                    
-                    # Add additional filter criteria if provided
-                    if filter_criteria:
-                        for key, value in filter_criteria.items():
-                            must_conditions.append(
-                                FieldCondition(
-                                    key=key,
-                                    match=MatchValue(value=value)
-                                )
-                            )
-                    
-                    metadata_filter = Filter(must=must_conditions)
-                    
-                    # Get document metadata entries
-                    results = self.client.scroll(
-                        collection_name=self.collection_name,
-                        scroll_filter=metadata_filter,
-                        limit=1000,  # Reasonable limit for most use cases
-                        with_payload=True
-                    )
-                    
-                    if results[0]:  # Check if points are returned
-                        for point in results[0]:
-                            payload = point.payload
-                            # Remove unnecessary fields
-                            if "text" in payload:
-                                del payload["text"]
-                            if "is_document_metadata" in payload:
-                                del payload["is_document_metadata"]
-                            if "metadata_type" in payload:
-                                del payload["metadata_type"]
-                            if "original_id" in payload:
-                                del payload["original_id"]
-                            
-                            documents.append(payload)
-                
-                log_step("Storage", f"Found {len(documents)} documents")
-                return documents
-                
-            except Exception as e:
-                log_step("Storage", f"Error listing documents: {str(e)}", level="error")
-                return []
-    
-    def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
-        """
-        Get document metadata.
+            Tuple of (points, cursor for the next page or None after the last page)
+        """
+        points, next_offset = self.client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=scroll_filter,
+            limit=limit,
+            offset=offset,
+            with_payload=with_payload,
+            with_vectors=False
+        )
+        return points, str(next_offset) if next_offset is not None else None
+    
+    def iter_document_chunks(self, document_id: str, fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all chunks of a document.
         
         Args:
             document_id: Document ID
+            fields: Payload fields to return (all if not provided; include "text" to get chunk texts)
+        
+        Yields:
+            Document chunks
+        """
+        # Create filter for document chunks
+        chunk_filter = self._scoped_filter([
+            FieldCondition(
+                key="source_document_id",
+                match=MatchValue(value=document_id)
+            )
+        ])
+        
+        with_payload = (fields + ["original_chunk_id"]) if fields else True
+        for point in self.iter_scroll(chunk_filter, with_payload=with_payload):
+            yield self._format_chunk(point)
+    
+    def get_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a single chunk by ID.
+        
+        Args:
+            chunk_id: Chunk ID
             
         Returns:
-            Document metadata, or None if not found
-        """
-        with Timer("Get Document"):
-            try:
-                # Try to get document via user-document mapping first (fastest and most reliable method)
-                if self.user_id:
-                    user_doc_id = self._generate_uuid_from_string(f"USER_DOC_{self.user_id}_{document_id}")
-                    try:
-                        mapping_results = self.client.retrieve(
-                            collection_name=self.collection_name,
-                            ids=[user_doc_id],
-                            with_payload=True
-                        )
-                        
-                        if mapping_results:
-                            # We found the mapping, now get the document metadata
-                            doc_meta_id = self._generate_uuid_from_string(f"DOC_META_{document_id}")
-                            
-                            doc_results = self.client.retrieve(
-                                collection_name=self.collection_name,
-                                ids=[doc_meta_id],
-                                with_payload=True
-                            )
-                            
-                            if doc_results:
-                                document_metadata = doc_results[0].payload
-                                
-                                # Remove unnecessary fields
-                                if "text" in document_metadata:
-                                    del document_metadata["text"]
-                                if "is_document_metadata" in document_metadata:
-                                    del document_metadata["is_document_metadata"]
-                                if "metadata_type" in document_metadata:
-                                    del document_metadata["metadata_type"]
-                                if "original_id" in document_metadata:
-                                    del document_metadata["original_id"]
-                                
-                                return document_metadata
-                    except Exception as mapping_error:
-                        log_step("Storage", f"Error getting document via mapping: {str(mapping_error)}", level="warning")
-                
-                # Try to query using metadata filters
-                doc_filter = Filter(
-                    must=[
-                        FieldCondition(
-                            key="is_document_metadata",
-                            match=MatchValue(value=True)
-                        ),
-                        FieldCondition(
-                            key="document_id",
-                            match=MatchValue(value=document_id)
-                        )
-                    ]
-                )
-                
-                # Add user_id to filter if available
-                if self.user_id:
-                    doc_filter.must.append(
-                        FieldCondition(
-                            key="user_id",
-                            match=MatchValue(value=self.user_id)
-                        )
-                    )
-                
-                # Query for document metadata entry
-                results = self.client.scroll(
-                    collection_name=self.collection_name,
-                    scroll_filter=doc_filter,
-                    limit=1,
-                    with_payload=True
-                )
-                
-                # Return document metadata if found
-                if results[0]:
-                    document_metadata = results[0][0].payload
-                    
-                    # Remove unnecessary fields
-                    if "text" in document_metadata:
-                        del document_metadata["text"]
-                    if "is_document_metadata" in document_metadata:
-                        del document_metadata["is_document_metadata"]
-                    if "metadata_type" in document_metadata:
-                        del document_metadata["metadata_type"]
-                    if "original_id" in document_metadata:
-                        del document_metadata["original_id"]
-                    
-                    # Verify file path exists and is valid
-                    if "file_path" in document_metadata:
-                        file_path = document_metadata["file_path"]
-                        if not os.path.exists(file_path):
-                            log_step("Storage", f"Warning: File path {file_path} does not exist", level="warning")
-                    else:
-                        log_step("Storage", f"Warning: No file path found for document {document_id}", level="warning")
-                    
-                    return document_metadata
-                
-                # If not found with user_id filter, try without user_id filter
-                if self.user_id:
-                    log_step("Storage", f"Document not found for user {self.user_id}, trying without user filter")
-                    general_filter = Filter(
-                        must=[
-                            FieldCondition(
-                                key="is_document_metadata",
-                                match=MatchValue(value=True)
-                            ),
-                            FieldCondition(
-                                key="document_id",
-                                match=MatchValue(value=document_id)
-                            )
-                        ]
-                    )
-                    
-                    general_results = self.client.scroll(
-                        collection_name=self.collection_name,
-                        scroll_filter=general_filter,
-                        limit=1,
-                        with_payload=True
-                    )
-                    
-                    if general_results[0]:
-                        document_metadata = general_results[0][0].payload
-                        
-                        # Remove unnecessary fields
-                        if "text" in document_metadata:
-                            del document_metadata["text"]
-                        if "is_document_metadata" in document_metadata:
-                            del document_metadata["is_document_metadata"]
-                        if "metadata_type" in document_metadata:
-                            del document_metadata["metadata_type"]
-                        if "original_id" in document_metadata:
-                            del document_metadata["original_id"]
-                        
-                        log_step("Storage", f"Found document {document_id} in general collection")
-                        return document_metadata
-                
-                # As a last resort, try getting by DOC_META ID directly
-                doc_meta_id = self._generate_uuid_from_string(f"DOC_META_{document_id}")
-                try:
-                    results = self.client.retrieve(
-                        collection_name=self.collection_name,
-                        ids=[doc_meta_id],
-                        with_payload=True
-                    )
-                    
-                    if results:
-                        document_metadata = results[0].payload
-                        
-                        # Remove unnecessary fields
-                        if "text" in document_metadata:
-                            del document_metadata["text"]
-                        if "is_document_metadata" in document_metadata:
-                            del document_metadata["is_document_metadata"]
-                        if "metadata_type" in document_metadata:
-                            del document_metadata["metadata_type"]
-                        if "original_id" in document_metadata:
-                            del document_metadata["original_id"]
-                        
-                        log_step("Storage", f"Found document {document_id} by direct ID lookup")
-                        return document_metadata
-                except Exception as direct_error:
-                    log_step("Storage", f"Error in direct ID lookup: {str(direct_error)}", level="warning")
-                
-                log_step("Storage", f"Document {document_id} not found")
-                return None
-                
-            except Exception as e:
-                log_step("Storage", f"Error getting document: {str(e)}", level="error")
-                return None
-    
-    def get_document_chunks(self, document_id: str) -> List[Dict[str, Any]]:
-        """
-        Get all chunks for a document.
+            Chunk with metadata, or None if not found
+        """
+        try:
+            points = self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=[self._chunk_point_id(chunk_id)],
+                with_payload=True,
+                with_vectors=False
+            )
+        except Exception as e:
+            log_step("Storage", f"Error getting chunk {chunk_id}: {str(e)}", level="error")
+            return None
+        
+        # Chunks of other tenants of a shared collection are not visible
+        if not points or (self.tenant_id and points[0].payload.get("tenant_id") != self.tenant_id):
+            return None
+        return self._format_chunk(points[0])
+    
+    def get_neighbor_chunks(self, chunk_id: str, window: int = 2) -> List[Dict[str, Any]]:
+        """
+        Get a chunk together with the chunks around it in its document.
+        
+        Neighbors are looked up by chunk ordinal. Chunks stored before ordinals
+        were recorded fall back to the other chunks of the same page.
         
         Args:
-            document_id: Document ID
+            chunk_id: Chunk ID
+            window: Number of chunks to include on each side
             
         Returns:
-            List of document chunks
-        """
-        with Timer("Get Document Chunks"):
-            try:
-                # Create filter for document chunks
-                chunk_filter = Filter(
-                    must=[
-                        FieldCondition(
-                            key="source_document_id",
-                            match=MatchValue(value=document_id)
-                        ),
-                        FieldCondition(
-                            key="is_document_metadata",
-                            match=MatchValue(value=False)
-                        )
-                    ]
-                )
-                
-                # Get all chunks for this document
-                results = self.client.scroll(
-                    collection_name=self.collection_name,
-                    scroll_filter=chunk_filter,
-                    limit=1000,  # Reasonable limit for most use cases
-                    with_payload=True
-                )
-                
-                # Format results
-                chunks = []
-                
-                if results[0]:
-                    for point in results[0]:
-                        point_id = point.id
-                        payload = point.payload
-                        
-                        # Extract text from payload
-                        text = payload.get("text", "")
-                        
-                        # Process metadata - create a copy to avoid modifying the original
-                        processed_metadata = payload.copy()
-                        
-                        # Remove text from metadata to avoid duplication
-                        if "text" in processed_metadata:
-                            del processed_metadata["text"]
-                        
-                        # Convert JSON strings back to objects
-                        if "heading_path" in processed_metadata:
-                            processed_metadata["heading_path"] = json.loads(processed_metadata["heading_path"])
-                        if "bounding_box" in processed_metadata:
-                            processed_metadata["bounding_box"] = json.loads(processed_metadata["bounding_box"])
-                        
-                        # Use original chunk ID if available, otherwise use the point ID
-                        chunk_id = payload.get("original_chunk_id", point_id)
-                        
-                        # Add chunk
-                        chunks.append({
-                            "chunk_id": chunk_id,
-                            "text": text,
-                            "metadata": processed_metadata
-                        })
-                
-                log_step("Storage", f"Found {len(chunks)} chunks for document {document_id}")
-                return chunks
-                
-            except Exception as e:
-                log_step("Storage", f"Error getting document chunks: {str(e)}", level="error")
-                return [] 
\ No newline at end of file
+            Chunks in document order, including the chunk itself (empty if not found)
+        """
+        chunk = self.get_chunk(chunk_id)
+        if not chunk:
+            return []
+        
+        metadata = chunk["metadata"]
+        conditions = [FieldCondition(key="source_document_id", match=MatchValue(value=metadata.get("source_document_id")))]
+        ordinal = metadata.get("chunk_ordinal")
+        
+        if ordinal is not None:
+            conditions.append(FieldCondition(key="chunk_ordinal", range=Range(gte=ordinal - window, lte=ordinal + window)))
+            limit = 2 * window + 1
+        else:
+            conditions.append(FieldCondition(key="page_number", match=MatchValue(value=metadata.get("page_number", -1))))
+            limit = 1000
+        
+        try:
+            points, _ = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._scoped_filter(conditions),
+                limit=limit,
+                with_payload=True,
+                with_vectors=False
+            )
+        except Exception as e:
+            log_step("Storage", f"Error getting neighbors of chunk {chunk_id}: {str(e)}", level="error")
+            return [chunk]
+        
+        chunks = [self._format_chunk(point) for point in points]
+        
+        if ordinal is not None:
+            chunks.sort(key=lambda c: c["metadata"].get("chunk_ordinal", 0))
+            return chunks
+        
+        # Same-page fallback: keep the window around the chunk by position on the page
+        chunks.sort(key=lambda c: c["metadata"].get("start_index", 0))
+        position = next((i for i, c in enumerate(chunks) if c["chunk_id"] == chunk["chunk_id"]), 0)
+        return chunks[max(position - window, 0):position + window + 1]
@@ -0,0 +1,189 @@
+import os
+import queue
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from app.utils.logging import log_step
+
+
+# Finished cleanup jobs kept for status queries (oldest are forgotten first)
+REAPER_JOB_HISTORY = int(os.getenv("REAPER_JOB_HISTORY", "1000"))
+
+
+class FileReaper:
+    """
+    Background remover of deleted documents' files and folders.
+    
+    Deletion requests return as soon as the chunks and records are gone and
+    hand the files to the reaper, whose worker thread removes them one job at a
+    time. Each submission is a job whose progress can be polled. Jobs live in
+    memory: paths still queued when the process stops are left on disk.
+    """
+    
+    def __init__(self, history: int = REAPER_JOB_HISTORY):
+        """
+        Initialize the reaper (the worker thread starts with the first job).
+        
+        Args:
+            history: Number of finished jobs kept for status queries
+        """
+        self.history = history
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self.removed_paths = 0
+        self.failed_paths = 0
+        self._user_totals: Dict[Optional[str], Dict[str, int]] = {}
+    
+    def submit(self, paths: List[str], user_id: Optional[str] = None) -> Optional[str]:
+        """
+        Queue files and folders for removal.
+        
+        Args:
+            paths: File or folder paths (missing ones are counted as missing, not as errors)
+            user_id: Owner of the job, for status queries
+        
+        Returns:
+            Job ID, or None if there was nothing to remove
+        """
+        paths = list(dict.fromkeys(path for path in paths if path))
+        if not paths:
+            return None
+        
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "user_id": user_id,
+                "status": "queued",
+                "paths": paths,
+                "total": len(paths),
+                "removed": 0,
+                "missing": 0,
+                "errors": [],
+                "created_at": datetime.now().isoformat(),
+                "finished_at": None
+            }
+            self._forget_finished()
+            
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="file-reaper", daemon=True)
+                self._worker.start()
+        
+        self._queue.put(job_id)
+        log_step("File Reaper", f"Queued {len(paths)} paths for removal (job {job_id})")
+        return job_id
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the progress of a job.
+        
+        Args:
+            job_id: Job ID
+        
+        Returns:
+            Job status (without its path list), or None if unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: value for key, value in job.items() if key != "paths"}
+    
+    def status(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the reaper's status for one user's jobs.
+        
+        Args:
+            user_id: Owner whose jobs are counted
+        
+        Returns:
+            Queued and running job counts, paths still to remove and totals since startup
+        """
+        with self._lock:
+            active = [
+                job for job in self._jobs.values()
+                if job["status"] in ("queued", "running") and job["user_id"] == user_id
+            ]
+            totals = self._user_totals.get(user_id, {"removed_paths": 0, "failed_paths": 0})
+            return {
+                "worker_alive": self._worker is not None and self._worker.is_alive(),
+                "queued_jobs": sum(1 for job in active if job["status"] == "queued"),
+                "running_jobs": sum(1 for job in active if job["status"] == "running"),
+                "pending_paths": sum(job["total"] - job["removed"] - job["missing"] - len(job["errors"]) for job in active),
+                **totals
+            }
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued job has finished.
+        
+        Args:
+            timeout: Maximum time to wait in seconds (no limit if not provided)
+        
+        Returns:
+            True if the queue was drained
+        """
+        # Queue.join() with a timeout: task_done() notifies all_tasks_done when the count reaches zero
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+    
+    def _run(self):
+        """Worker loop: remove the paths of each queued job."""
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._reap(job_id)
+            finally:
+                self._queue.task_done()
+    
+    def _reap(self, job_id: str):
+        """Remove the paths of one job, recording progress as it goes."""
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            totals = self._user_totals.setdefault(job["user_id"], {"removed_paths": 0, "failed_paths": 0})
+        
+        for path in job["paths"]:
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+                else:
+                    with self._lock:
+                        job["missing"] += 1
+                    continue
+                
+                with self._lock:
+                    job["removed"] += 1
+                    self.removed_paths += 1
+                    totals["removed_paths"] += 1
+            except OSError as e:
+                log_step("File Reaper", f"Could not remove {path}: {str(e)}", level="warning")
+                with self._lock:
+                    job["errors"].append({"path": path, "error": str(e)})
+                    self.failed_paths += 1
+                    totals["failed_paths"] += 1
+        
+        with self._lock:
+            job["status"] = "failed" if job["errors"] else "completed"
+            job["finished_at"] = datetime.now().isoformat()
+            self._forget_finished()
+        
+        log_step("File Reaper", f"Job {job_id} {job['status']}: removed {job['removed']} of {job['total']} paths")
+    
+    def _forget_finished(self):
+        """Drop the oldest finished jobs beyond the history size (call with the lock held)."""
+        finished = [job_id for job_id, job in self._jobs.items() if job["finished_at"]]
+        for job_id in finished[:max(len(finished) - self.history, 0)]:
+            del self._jobs[job_id]
+
+
+# Shared reaper for all request handlers
+file_reaper = FileReaper()
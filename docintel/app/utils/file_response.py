@@ -0,0 +1,187 @@
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+
+# Read size when the server cannot send the file itself
+FILE_CHUNK_SIZE = 1024 * 1024
+
+# Documents keep their ID across versions, so caches must revalidate (cheap with the ETag)
+DOCUMENT_CACHE_CONTROL = "private, no-cache"
+
+# ASGI extension letting the server sendfile() from an open file descriptor
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+# "bytes=start-end", "bytes=start-" or "bytes=-suffix_length"
+SINGLE_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def content_etag(content_hash: Optional[str]) -> Optional[str]:
+    """
+    Build a strong ETag from a file's content hash.
+    
+    Args:
+        content_hash: SHA-256 of the file (if known)
+    
+    Returns:
+        Quoted ETag, or None without a hash
+    """
+    return f'"{content_hash}"' if content_hash else None
+
+
+def parse_single_range(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header naming a single satisfiable byte range.
+    
+    Args:
+        range_header: Range request header
+        file_size: Size of the file in bytes
+    
+    Returns:
+        Tuple of (start, end) with end exclusive, or None if the header is not a
+        single satisfiable range
+    """
+    match = SINGLE_RANGE_PATTERN.match(range_header.strip())
+    if not match or not any(match.groups()):
+        return None
+    
+    first, last = match.groups()
+    if not first:
+        start, end = max(file_size - int(last), 0), file_size
+    else:
+        start = int(first)
+        end = min(int(last) + 1, file_size) if last else file_size
+    
+    if start >= end:
+        return None
+    return start, end
+
+
+class DocumentFileResponse(FileResponse):
+    """
+    File response for stored documents.
+    
+    Adds a strong ETag from the content hash and answers conditional requests
+    with 304 Not Modified. Range requests get 206 Partial Content. The file is
+    handed to the server when it supports the zero-copy send (sendfile) or path
+    send ASGI extensions, so its bytes are not copied through Python; other
+    servers fall back to reading the file in large chunks.
+    """
+    
+    chunk_size = FILE_CHUNK_SIZE
+    
+    def __init__(
+        self,
+        path: str,
+        content_hash: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        content_disposition_type: str = "inline"
+    ):
+        """
+        Initialize the response.
+        
+        Args:
+            path: Path of the file to send
+            content_hash: SHA-256 of the file, used as the ETag (defaults to one derived from mtime and size)
+            headers: Extra response headers
+            media_type: Media type of the file
+            filename: Filename for the Content-Disposition header
+            content_disposition_type: "inline" or "attachment"
+        """
+        headers = dict(headers or {})
+        headers.setdefault("Cache-Control", DOCUMENT_CACHE_CONTROL)
+        etag = content_etag(content_hash)
+        if etag:
+            headers["ETag"] = etag
+        
+        super().__init__(
+            path,
+            headers=headers,
+            media_type=media_type,
+            filename=filename,
+            stat_result=os.stat(path),
+            content_disposition_type=content_disposition_type
+        )
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        request_headers = Headers(scope=scope)
+        
+        if self._is_not_modified(request_headers):
+            response = Response(status_code=304, headers=self._validator_headers())
+            await response(scope, receive, send)
+            return
+        
+        if ZEROCOPY_EXTENSION in scope.get("extensions", {}) and scope["method"].upper() == "GET":
+            file_size = self.stat_result.st_size
+            byte_range = (0, file_size)
+            status_code = 200
+            
+            http_range = request_headers.get("range")
+            if http_range is not None and self._range_applies(request_headers):
+                byte_range = parse_single_range(http_range, file_size)
+                status_code = 206
+            
+            # Multiple or unsatisfiable ranges are answered by FileResponse
+            if byte_range is not None:
+                await self._send_zerocopy(send, status_code, byte_range, file_size)
+                return
+        
+        await super().__call__(scope, receive, send)
+    
+    def _validator_headers(self) -> Dict[str, str]:
+        """Headers repeated on a 304 response."""
+        return {
+            key: self.headers[key]
+            for key in ("etag", "last-modified", "cache-control")
+            if key in self.headers
+        }
+    
+    def _is_not_modified(self, request_headers: Headers) -> bool:
+        """Check the request's conditional headers against this file."""
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            etag = self.headers["etag"].removeprefix("W/")
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return etag in tags or "*" in tags
+        
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.stat_result.st_mtime) <= since
+        
+        return False
+    
+    def _range_applies(self, request_headers: Headers) -> bool:
+        """Honor a Range request only if its If-Range validator (if any) still matches."""
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        return if_range in (self.headers["etag"], formatdate(self.stat_result.st_mtime, usegmt=True))
+    
+    async def _send_zerocopy(self, send: Send, status_code: int, byte_range: Tuple[int, int], file_size: int):
+        """Send the file (or one range of it) with the zero-copy send extension."""
+        start, end = byte_range
+        headers = self.headers.mutablecopy()
+        headers["content-length"] = str(end - start)
+        if status_code == 206:
+            headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+        
+        await send({"type": "http.response.start", "status": status_code, "headers": headers.raw})
+        with open(self.path, "rb") as file:
+            await send({
+                "type": ZEROCOPY_EXTENSION,
+                "file": file,
+                "offset": start,
+                "count": end - start,
+                "more_body": False
+            })
@@ -1,19 +1,48 @@
 import os
-from openai import AzureOpenAI
-import httpx
+import threading
+from typing import Any, Dict, Optional, Tuple
 
-def create_azure_openai_client():
+# Shared clients by (API version, endpoint), created on first use
+_clients: Dict[Tuple[str, str], Any] = {}
+_clients_lock = threading.Lock()
+
+def create_azure_openai_client(api_version: Optional[str] = None, azure_endpoint: Optional[str] = None):
     """
     Create an AzureOpenAI client with proper configuration.
     This centralizes the client creation and avoids issues with proxy settings.
+    
+    Args:
+        api_version: API version (defaults to AZURE_API_VERSION)
+        azure_endpoint: Endpoint URL (defaults to AZURE_ENDPOINT)
     """
+    # Imported here so that importing modules which use a client does not load the OpenAI SDK
+    import httpx
+    from openai import AzureOpenAI
+    
     # Create a custom httpx client without proxy settings
     # This avoids the 'proxies' parameter error in newer OpenAI versions
     http_client = httpx.Client()
     
     return AzureOpenAI(
         api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version=os.getenv("AZURE_API_VERSION", "2024-02-15-preview"),
-        azure_endpoint=os.getenv("AZURE_ENDPOINT", "https://eyvoicecentralus.openai.azure.com/"),
+        api_version=api_version or os.getenv("AZURE_API_VERSION", "2024-02-15-preview"),
+        azure_endpoint=azure_endpoint or os.getenv("AZURE_ENDPOINT", "https://eyvoicecentralus.openai.azure.com/"),
         http_client=http_client
-    ) 
\ No newline at end of file
+    ) 
+
+def get_azure_openai_client(api_version: Optional[str] = None, azure_endpoint: Optional[str] = None):
+    """
+    Get the shared AzureOpenAI client for an API version and endpoint, creating it on first use.
+    
+    Args:
+        api_version: API version (defaults to AZURE_API_VERSION)
+        azure_endpoint: Endpoint URL (defaults to AZURE_ENDPOINT)
+    
+    Returns:
+        AzureOpenAI client
+    """
+    key = (api_version or "", azure_endpoint or "")
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = create_azure_openai_client(api_version, azure_endpoint)
+        return _clients[key]
@@ -0,0 +1,235 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+
+from app.utils.logging import log_step
+
+
+# Total size of rendered page images kept on disk (default 512MB)
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Number of pages per document rendered ahead of time at ingest (0 disables pre-warming)
+PAGE_PREWARM_COUNT = int(os.getenv("PAGE_PREWARM_COUNT", "3"))
+
+# Rendered sizes and quality
+THUMBNAIL_WIDTH = 200
+PAGE_IMAGE_WIDTH = 1000
+JPEG_QUALITY = 80
+
+# Lines of chunk text searched on the page when the chunk has no bounding box
+MAX_HIGHLIGHT_LINES = 40
+
+
+class PageImageCache:
+    """
+    Size-bounded LRU cache of rendered page images on disk.
+    
+    Entries are files named by their key. The LRU order is rebuilt from file
+    modification times on startup and kept in memory afterwards; hits touch the
+    file so the order survives restarts.
+    """
+    
+    def __init__(self, cache_dir: str, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir: Directory holding the cached images
+            max_bytes: Maximum total size of the cached images
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        existing = []
+        for entry in os.scandir(cache_dir):
+            if entry.is_file() and entry.name.endswith(".jpg"):
+                stat_result = entry.stat()
+                existing.append((stat_result.st_mtime, entry.name[:-4], stat_result.st_size))
+        for _, key, size in sorted(existing):
+            self._entries[key] = size
+            self.total_bytes += size
+    
+    def path_for(self, key: str) -> str:
+        """Path of the cached image for a key."""
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached image and mark it as recently used.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Path of the cached image, or None on a miss
+        """
+        path = self.path_for(key)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.total_bytes -= self._entries.pop(key, 0)
+            return None
+        return path
+    
+    def put(self, key: str, data: bytes) -> str:
+        """
+        Store an image, evicting the least recently used ones over the size limit.
+        
+        Args:
+            key: Cache key
+            data: Encoded image
+        
+        Returns:
+            Path of the cached image
+        """
+        path = self.path_for(key)
+        temp_path = f"{path}.{threading.get_ident()}.part"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            evicted = []
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, size = self._entries.popitem(last=False)
+                self.total_bytes -= size
+                evicted.append(old_key)
+        
+        for old_key in evicted:
+            try:
+                os.remove(self.path_for(old_key))
+            except FileNotFoundError:
+                pass
+        
+        return path
+
+
+class PageRenderer:
+    """Renders PDF page thumbnails and highlighted page images through a PageImageCache."""
+    
+    def __init__(self, cache: PageImageCache):
+        """
+        Initialize the renderer.
+        
+        Args:
+            cache: Cache for rendered images
+        """
+        self.cache = cache
+    
+    def render_thumbnail(self, file_path: str, version: str, page_number: int) -> str:
+        """
+        Get a thumbnail of a PDF page.
+        
+        Args:
+            file_path: Path of the PDF
+            version: Identifier of the file's content (e.g. its SHA-256)
+            page_number: 1-based page number
+        
+        Returns:
+            Path of the cached JPEG
+        """
+        key = self._key(version, page_number, "thumb", THUMBNAIL_WIDTH)
+        return self.cache.get(key) or self.cache.put(key, self._render(file_path, page_number, THUMBNAIL_WIDTH))
+    
+    def render_page(
+        self,
+        file_path: str,
+        version: str,
+        page_number: int,
+        chunk: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Get an image of a PDF page, optionally with a chunk highlighted.
+        
+        Args:
+            file_path: Path of the PDF
+            version: Identifier of the file's content (e.g. its SHA-256)
+            page_number: 1-based page number
+            chunk: Chunk to highlight, as returned by storage
+        
+        Returns:
+            Path of the cached JPEG
+        """
+        variant = f"chunk-{chunk['chunk_id']}" if chunk else "page"
+        key = self._key(version, page_number, variant, PAGE_IMAGE_WIDTH)
+        cached = self.cache.get(key)
+        if cached:
+            return cached
+        return self.cache.put(key, self._render(file_path, page_number, PAGE_IMAGE_WIDTH, chunk))
+    
+    def prewarm(self, file_path: str, version: str, page_numbers: List[int]) -> int:
+        """
+        Render thumbnails and page images ahead of time.
+        
+        Args:
+            file_path: Path of the PDF
+            version: Identifier of the file's content
+            page_numbers: 1-based page numbers to render
+        
+        Returns:
+            Number of pages rendered
+        """
+        rendered = 0
+        for page_number in page_numbers:
+            try:
+                self.render_thumbnail(file_path, version, page_number)
+                self.render_page(file_path, version, page_number)
+                rendered += 1
+            except ValueError:
+                continue
+        
+        log_step("Page Rendering", f"Pre-rendered {rendered} pages of {os.path.basename(file_path)}")
+        return rendered
+    
+    def _key(self, version: str, page_number: int, variant: str, width: int) -> str:
+        """Cache key for one rendering of a page."""
+        return hashlib.sha256(f"{version}:{page_number}:{variant}:{width}".encode("utf-8")).hexdigest()
+    
+    def _render(self, file_path: str, page_number: int, width: int, chunk: Optional[Dict[str, Any]] = None) -> bytes:
+        """Render a page to JPEG at the given width, highlighting the chunk if provided."""
+        import fitz  # PyMuPDF, loaded with the first rendered page
+        
+        pdf = fitz.open(file_path)
+        try:
+            if not 1 <= page_number <= len(pdf):
+                raise ValueError(f"Page {page_number} out of range (document has {len(pdf)} pages)")
+            
+            page = pdf[page_number - 1]
+            if chunk:
+                rects = self._highlight_rects(page, chunk)
+                if rects:
+                    page.add_highlight_annot(rects)
+            
+            zoom = width / page.rect.width
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return pix.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+        finally:
+            pdf.close()
+    
+    def _highlight_rects(self, page: Any, chunk: Dict[str, Any]) -> List[Any]:
+        """Find the areas of the page covered by a chunk."""
+        bounding_box = chunk.get("metadata", {}).get("bounding_box")
+        if bounding_box:
+            import fitz  # PyMuPDF
+            return [fitz.Rect(bounding_box["x1"], bounding_box["y1"], bounding_box["x2"], bounding_box["y2"])]
+        
+        # Chunk text is cut from the page text, so its lines can be found on the page
+        rects = []
+        lines = [line.strip() for line in chunk.get("text", "").splitlines() if line.strip()]
+        for line in lines[:MAX_HIGHLIGHT_LINES]:
+            rects.extend(page.search_for(line))
+        return rects
@@ -0,0 +1,73 @@
+import re
+from hashlib import blake2b
+from typing import List, Optional
+
+import numpy as np
+
+
+# Words used to build shingles for fingerprinting
+_WORD = re.compile(r"\w+")
+
+# Number of consecutive words per shingle
+SHINGLE_SIZE = 3
+
+# Number of LSH bands; must exceed max_distance so near-duplicates always share a band
+DEFAULT_BANDS = 4
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> Optional[int]:
+    """
+    Compute a 64-bit SimHash fingerprint of a text.
+    
+    Texts that differ only slightly (a page number, a changed word, token-window
+    overlap) get fingerprints that differ in only a few bits.
+    
+    Args:
+        text: Text to fingerprint
+        shingle_size: Number of consecutive words per feature
+    
+    Returns:
+        Fingerprint as an unsigned 64-bit integer, or None if the text is too short
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) < shingle_size:
+        return None
+    
+    # Hash every word shingle to 64 bits
+    shingle_count = len(words) - shingle_size + 1
+    hashes = np.fromiter(
+        (
+            int.from_bytes(blake2b(" ".join(words[i:i + shingle_size]).encode(), digest_size=8).digest(), "little")
+            for i in range(shingle_count)
+        ),
+        dtype="<u8",
+        count=shingle_count
+    )
+    
+    # Each shingle votes on every bit; a bit is set if most shingles have it set
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    majority = bits.sum(axis=0) * 2 > shingle_count
+    return int(np.packbits(majority, bitorder="little").view("<u8")[0])
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+def band_keys(fingerprint: int, bands: int = DEFAULT_BANDS) -> List[str]:
+    """
+    Split a fingerprint into LSH band keys.
+    
+    Two fingerprints differing in fewer than `bands` bits share at least one key.
+    
+    Args:
+        fingerprint: 64-bit fingerprint
+        bands: Number of bands
+    
+    Returns:
+        One "band:value" key per band
+    """
+    width = 64 // bands
+    mask = (1 << width) - 1
+    return [f"{band}:{(fingerprint >> (band * width)) & mask:x}" for band in range(bands)]
@@ -0,0 +1,560 @@
+import os
+import re
+import json
+import uuid
+import shutil
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # python-multipart before 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from app.utils.logging import log_step
+
+
+# Maximum accepted upload size (default 500MB)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(500 * 1024 * 1024)))
+
+# Allowance for multipart framing and form fields on top of the file itself
+MAX_FORM_OVERHEAD_BYTES = 1024 * 1024
+
+# Size of each read when hashing a file, and of the leading block of a text upload that is checked
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Leading bytes of each supported file type
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+FILE_SIGNATURES = {
+    "pdf": (b"%PDF-",),
+    "docx": (ZIP_MAGIC,),
+    "pptx": (ZIP_MAGIC,),
+    "xlsx": (ZIP_MAGIC,),
+    "xls": (OLE_MAGIC, ZIP_MAGIC),  # Legacy Excel, or xlsx saved with an .xls name
+    "csv": (),  # Text; checked separately
+}
+
+SUPPORTED_EXTENSIONS = set(FILE_SIGNATURES)
+
+# Values accepted for boolean form fields (as FastAPI's Form(bool) does)
+TRUE_FORM_VALUES = {"true", "1", "yes", "on"}
+FALSE_FORM_VALUES = {"false", "0", "no", "off"}
+
+# "bytes start-end/total" (total may be "*")
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+def get_upload_extension(filename: Optional[str]) -> str:
+    """
+    Get the extension of an uploaded file, rejecting unsupported types.
+    
+    Args:
+        filename: Uploaded filename
+    
+    Returns:
+        Lower-case extension without the dot
+    """
+    file_ext = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if file_ext not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {file_ext}")
+    return file_ext
+
+
+def check_content_length(content_length: Optional[str], max_bytes: int = MAX_UPLOAD_BYTES):
+    """
+    Reject a request whose declared body size is over the upload limit.
+    
+    Args:
+        content_length: Content-Length header value (if any)
+        max_bytes: Maximum file size
+    """
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + MAX_FORM_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds the maximum size of {max_bytes} bytes")
+
+
+def matches_file_type(head: bytes, file_ext: str) -> bool:
+    """
+    Check that the first bytes of a file match its extension.
+    
+    Args:
+        head: First bytes of the file
+        file_ext: File extension
+    
+    Returns:
+        True if the content looks like the declared type
+    """
+    if file_ext == "csv":
+        # Text files never contain NUL bytes
+        return b"\x00" not in head
+    
+    return any(head.startswith(signature) for signature in FILE_SIGNATURES.get(file_ext, ()))
+
+
+def parse_form_flag(value: Optional[str], default: bool) -> bool:
+    """
+    Parse a boolean form field.
+    
+    Args:
+        value: Field value (None if the field was not sent)
+        default: Value when the field is missing or empty
+    
+    Returns:
+        Parsed value
+    """
+    if not value:
+        return default
+    if value.lower() in TRUE_FORM_VALUES:
+        return True
+    if value.lower() in FALSE_FORM_VALUES:
+        return False
+    raise HTTPException(status_code=400, detail=f"Invalid boolean form value: {value}")
+
+
+class MultipartUploadReader:
+    """
+    Reads a multipart/form-data upload straight from the request stream.
+    
+    The file part is written to disk as it arrives and hashed on the way. Its
+    extension is checked as soon as its headers are parsed, its first bytes
+    against the declared type before anything is written, and its size on
+    every block, so a bad upload is rejected while the client is still sending
+    it, whatever the Content-Length says (or if there is none, as with chunked
+    transfer encoding). The other parts are read as small form fields.
+    """
+    
+    def __init__(
+        self,
+        file_path_for: Callable[[str], str],
+        file_field: str = "file",
+        max_bytes: int = MAX_UPLOAD_BYTES
+    ):
+        """
+        Initialize the reader.
+        
+        Args:
+            file_path_for: Returns the destination path for the uploaded filename
+            file_field: Name of the form field holding the file
+            max_bytes: Maximum file size
+        """
+        self.file_path_for = file_path_for
+        self.file_field = file_field
+        self.max_bytes = max_bytes
+        
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.file_path: Optional[str] = None
+        self.file_ext: Optional[str] = None
+        self.size = 0
+        self.field_bytes = 0
+        
+        # Parser state of the current part
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._field_name: Optional[str] = None
+        self._field_data = bytearray()
+        self._in_file = False
+        
+        # First bytes of the file, held back until its type is confirmed
+        self._head = bytearray()
+        self._sniff_bytes = UPLOAD_CHUNK_SIZE
+        self._type_checked = False
+        
+        # File data parsed from the current block, written after the parser returns
+        self._file_blocks: List[bytes] = []
+    
+    def _on_part_begin(self):
+        self._disposition = b""
+        self._field_name = None
+        self._field_data = bytearray()
+        self._in_file = False
+    
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+    
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+    
+    def _on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+    
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise HTTPException(status_code=400, detail="Multipart part without a field name")
+        self._field_name = options[b"name"].decode("utf-8", errors="replace")
+        
+        if b"filename" not in options:
+            return
+        if self._field_name != self.file_field or self.filename is not None:
+            raise HTTPException(status_code=400, detail=f"Expected a single file in the \"{self.file_field}\" field")
+        
+        # Unsupported types are rejected before any file data is read
+        self.filename = os.path.basename(options[b"filename"].decode("utf-8", errors="replace"))
+        self.file_ext = get_upload_extension(self.filename)
+        if FILE_SIGNATURES[self.file_ext]:
+            # Binary types are known from their signature; text is scanned over a whole block
+            self._sniff_bytes = max(len(signature) for signature in FILE_SIGNATURES[self.file_ext])
+        self.file_path = self.file_path_for(self.filename)
+        self._in_file = True
+    
+    def _check_file_type(self):
+        """Check the first bytes of the file against its extension and release them for writing."""
+        if not matches_file_type(bytes(self._head), self.file_ext):
+            raise HTTPException(status_code=400, detail=f"File content does not match type: {self.file_ext}")
+        self._type_checked = True
+        self._file_blocks.append(bytes(self._head))
+        self._head = bytearray()
+    
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            if self._type_checked:
+                self._file_blocks.append(data[start:end])
+            else:
+                self._head.extend(data[start:end])
+                if len(self._head) >= self._sniff_bytes:
+                    self._check_file_type()
+            
+            self.size += end - start
+            if self.size > self.max_bytes:
+                raise HTTPException(status_code=413, detail=f"Upload exceeds the maximum size of {self.max_bytes} bytes")
+            return
+        
+        self.field_bytes += end - start
+        if self.field_bytes > MAX_FORM_OVERHEAD_BYTES:
+            raise HTTPException(status_code=413, detail="Form fields are too large")
+        self._field_data.extend(data[start:end])
+    
+    def _on_part_end(self):
+        if self._in_file:
+            # Files shorter than the sniffed block are checked once complete
+            if not self._type_checked:
+                self._check_file_type()
+            self._in_file = False
+        elif self._field_name is not None:
+            self.fields[self._field_name] = self._field_data.decode("utf-8", errors="replace")
+    
+    async def read(self, request: Request) -> Dict[str, Any]:
+        """
+        Receive the upload.
+        
+        Args:
+            request: Request with a multipart/form-data body
+        
+        Returns:
+            Dictionary with the form "fields" and the file's "filename", "file_path", "size" and "content_hash"
+        """
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise HTTPException(status_code=400, detail="Expected a multipart/form-data body")
+        check_content_length(request.headers.get("content-length"), self.max_bytes)
+        
+        parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished
+        })
+        
+        digest = hashlib.sha256()
+        part_path = None
+        f = None
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if not self._file_blocks:
+                    continue
+                
+                # Data is written to a ".part" file that is renamed into place only when complete
+                if f is None:
+                    part_path = f"{self.file_path}.part"
+                    f = open(part_path, "wb")
+                
+                data = b"".join(self._file_blocks)
+                self._file_blocks.clear()
+                digest.update(data)
+                await run_in_threadpool(f.write, data)
+            parser.finalize()
+            
+            if f is None:
+                raise HTTPException(status_code=400, detail=f"No file in the \"{self.file_field}\" field")
+            
+            f.close()
+            os.replace(part_path, self.file_path)
+        except BaseException:
+            # Don't leave partial files behind
+            if f is not None:
+                f.close()
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+            raise
+        
+        log_step("Document Upload", f"Saved {self.size} bytes to {self.file_path}")
+        return {
+            "fields": self.fields,
+            "filename": self.filename,
+            "file_path": self.file_path,
+            "size": self.size,
+            "content_hash": digest.hexdigest()
+        }
+
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, Optional[int]]:
+    """
+    Parse a "bytes start-end/total" Content-Range header.
+    
+    Args:
+        header: Content-Range header value
+    
+    Returns:
+        Tuple of (first byte, last byte inclusive, total size or None if "*")
+    """
+    match = _CONTENT_RANGE.match(header or "")
+    if not match:
+        raise HTTPException(status_code=400, detail="Missing or invalid Content-Range header")
+    
+    start, end = int(match.group(1)), int(match.group(2))
+    total = None if match.group(3) == "*" else int(match.group(3))
+    if end < start or (total is not None and end >= total):
+        raise HTTPException(status_code=416, detail="Invalid byte range")
+    return start, end, total
+
+
+class UploadSessionStore:
+    """
+    Resumable upload sessions kept on local disk.
+    
+    Each session is a directory holding session.json (filename, declared size,
+    processing options) and data.part, to which byte ranges are appended in
+    order. The number of bytes received is the size of data.part, so sessions
+    survive restarts. On finalize data.part is renamed to its destination,
+    so the assembled file is never copied.
+    """
+    
+    def __init__(self, root_dir: str):
+        """
+        Initialize the session store.
+        
+        Args:
+            root_dir: Directory under which per-user session directories are created
+        """
+        self.root_dir = root_dir
+        
+        # Running SHA-256 per session, valid while its offset matches the data file
+        self._hashers: Dict[str, Tuple[int, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    def _session_dir(self, user_id: Optional[str], upload_id: str) -> str:
+        """Directory of a session (upload IDs are validated to prevent path traversal)."""
+        try:
+            uuid.UUID(upload_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return os.path.join(self.root_dir, user_id or "default", ".sessions", upload_id)
+    
+    def create(self, user_id: Optional[str], filename: str, size: int, options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create an upload session.
+        
+        Args:
+            user_id: Owner of the upload
+            filename: Original filename
+            size: Total file size in bytes
+            options: Processing options to apply on finalize (metadata, force_ocr, ...)
+        
+        Returns:
+            Session record
+        """
+        file_ext = get_upload_extension(filename)
+        if size <= 0 or size > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Upload size must be between 1 and {MAX_UPLOAD_BYTES} bytes")
+        
+        upload_id = str(uuid.uuid4())
+        session_dir = self._session_dir(user_id, upload_id)
+        os.makedirs(session_dir)
+        
+        session = {
+            "upload_id": upload_id,
+            "user_id": user_id,
+            "filename": filename,
+            "file_ext": file_ext,
+            "size": size,
+            "options": options,
+            "created_at": datetime.now().isoformat()
+        }
+        with open(os.path.join(session_dir, "session.json"), "w") as f:
+            json.dump(session, f)
+        open(os.path.join(session_dir, "data.part"), "wb").close()
+        
+        self._hashers[upload_id] = (0, hashlib.sha256())
+        log_step("Document Upload", f"Created upload session {upload_id} for {filename} ({size} bytes)")
+        return {**session, "offset": 0}
+    
+    def get(self, user_id: Optional[str], upload_id: str) -> Dict[str, Any]:
+        """
+        Get a session with the number of bytes received so far.
+        
+        Args:
+            user_id: Owner of the upload
+            upload_id: Session ID
+        
+        Returns:
+            Session record including "offset"
+        """
+        session_dir = self._session_dir(user_id, upload_id)
+        try:
+            with open(os.path.join(session_dir, "session.json")) as f:
+                session = json.load(f)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        
+        session["offset"] = os.path.getsize(os.path.join(session_dir, "data.part"))
+        return session
+    
+    async def append(
+        self,
+        user_id: Optional[str],
+        upload_id: str,
+        start: int,
+        end: int,
+        body: AsyncIterator[bytes]
+    ) -> int:
+        """
+        Append a byte range, streamed from a request body, to a session.
+        
+        Ranges must arrive in order: `start` has to equal the bytes received so far.
+        The first range is checked against the declared file type.
+        
+        Args:
+            user_id: Owner of the upload
+            upload_id: Session ID
+            start: First byte of the range
+            end: Last byte of the range (inclusive)
+            body: Request body stream
+        
+        Returns:
+            Bytes received after the append
+        """
+        lock = self._locks.setdefault(upload_id, asyncio.Lock())
+        async with lock:
+            session = self.get(user_id, upload_id)
+            offset = session["offset"]
+            if start != offset:
+                raise HTTPException(status_code=409, detail=f"Expected range starting at byte {offset}")
+            if end >= session["size"]:
+                raise HTTPException(status_code=416, detail="Range extends past the declared upload size")
+            
+            hashed_offset, hasher = self._hashers.get(upload_id, (None, None))
+            if hashed_offset != offset:
+                # Hash state lost (restart) or out of step; recomputed on finalize
+                hasher = None
+            
+            data_path = os.path.join(self._session_dir(user_id, upload_id), "data.part")
+            expected = end - start + 1
+            received = 0
+            checked = start > 0
+            
+            with open(data_path, "ab") as f:
+                try:
+                    async for block in body:
+                        if not block:
+                            continue
+                        if not checked:
+                            if not matches_file_type(block, session["file_ext"]):
+                                raise HTTPException(status_code=400, detail=f"File content does not match type: {session['file_ext']}")
+                            checked = True
+                        
+                        received += len(block)
+                        if received > expected:
+                            raise HTTPException(status_code=400, detail="Body is longer than the Content-Range")
+                        
+                        await run_in_threadpool(f.write, block)
+                        if hasher:
+                            hasher.update(block)
+                    
+                    if received != expected:
+                        raise HTTPException(status_code=400, detail="Body is shorter than the Content-Range")
+                except BaseException:
+                    # Roll back to the last complete range so the client can retry it
+                    f.truncate(offset)
+                    self._hashers.pop(upload_id, None)
+                    raise
+            
+            if hasher:
+                self._hashers[upload_id] = (offset + received, hasher)
+            return offset + received
+    
+    def finalize(self, user_id: Optional[str], upload_id: str, file_path: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Move a complete upload to its destination and remove the session.
+        
+        Args:
+            user_id: Owner of the upload
+            upload_id: Session ID
+            file_path: Destination path (same filesystem, so this is a rename)
+        
+        Returns:
+            Tuple of (session record, SHA-256 hex digest of the file)
+        """
+        session = self.get(user_id, upload_id)
+        if session["offset"] != session["size"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete: received {session['offset']} of {session['size']} bytes"
+            )
+        
+        session_dir = self._session_dir(user_id, upload_id)
+        data_path = os.path.join(session_dir, "data.part")
+        
+        hashed_offset, hasher = self._hashers.pop(upload_id, (None, None))
+        if hashed_offset == session["size"]:
+            content_hash = hasher.hexdigest()
+        else:
+            content_hash = file_sha256(data_path)
+        
+        os.replace(data_path, file_path)
+        self.abort(user_id, upload_id)
+        
+        log_step("Document Upload", f"Finalized upload session {upload_id} to {file_path}")
+        return session, content_hash
+    
+    def abort(self, user_id: Optional[str], upload_id: str):
+        """
+        Delete a session and any data received.
+        
+        Args:
+            user_id: Owner of the upload
+            upload_id: Session ID
+        """
+        shutil.rmtree(self._session_dir(user_id, upload_id), ignore_errors=True)
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Compute the SHA-256 of a file's contents.
+    
+    Args:
+        file_path: Path to the file
+    
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
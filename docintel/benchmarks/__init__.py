@@ -0,0 +1,5 @@
+# Benchmarks Package
+"""
+Standalone performance benchmarks. Run from the docintel directory, e.g.
+``python -m benchmarks.bench_chunker``.
+"""
@@ -0,0 +1,191 @@
+"""
+Ingest throughput and query latency of each storage backend on the same corpus.
+
+Builds one synthetic corpus (chunks shaped like parsed PDF chunks, with random
+embeddings) and, for each backend, stores it with store_chunks into a scratch
+collection and runs the same queries through query_similar one at a time and
+through query_similar_batch. Reports chunks stored per second and p50/p99
+single-query latency, plus the per-query time of the batched queries. Scratch
+collections and directories are removed afterwards.
+
+The qdrant backend needs QDRANT_URL; chroma needs chromadb installed. Backends
+that cannot be opened are reported and skipped.
+
+Usage:
+    python -m benchmarks.bench_backends [--backends qdrant numpy chroma] [--chunks 20000] [--queries 200] [--k 20] [--batch 8]
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.chunking.models import DocumentChunk
+from app.storage.base import DocumentStorage
+from app.storage.factory import STORAGE_BACKENDS
+from app.storage.base import SEARCH_PAYLOAD_FIELDS, VECTOR_SIZE
+
+
+def build_corpus(chunk_count: int, seed: int = 0) -> Tuple[List[DocumentChunk], Dict[str, List[float]]]:
+    """
+    Build chunks shaped like parsed PDF chunks, with random embeddings.
+    
+    Args:
+        chunk_count: Number of chunks
+        seed: Random seed so every backend gets the same corpus
+    
+    Returns:
+        Tuple of (chunks, chunk ID to embedding)
+    """
+    rng = np.random.default_rng(seed)
+    words = [f"word{i}" for i in range(2000)]
+    
+    chunks = []
+    for i in range(chunk_count):
+        chunks.append(DocumentChunk(
+            text=" ".join(rng.choice(words, 180)),
+            source_document_id=f"bench-doc-{i // 200}",
+            source_document_name=f"bench-doc-{i // 200}.pdf",
+            source_document_type="pdf",
+            page_number=i % 200 // 4 + 1,
+            chunk_ordinal=i % 200,
+            heading_path=["Report", f"Section {i % 200 // 20}", f"Subsection {i % 20}"],
+            heading_level=3,
+            start_index=0,
+            end_index=1200,
+            bounding_box={"x0": 72.0, "y0": 100.0 + i % 4 * 150, "x1": 540.0, "y1": 240.0 + i % 4 * 150},
+            metadata={"author": "Benchmark", "title": "Synthetic report", "producer": "bench"}
+        ))
+    
+    vectors = rng.standard_normal((chunk_count, VECTOR_SIZE)).astype(np.float32)
+    return chunks, {chunk.chunk_id: vector.tolist() for chunk, vector in zip(chunks, vectors)}
+
+
+def open_backend(backend: str, scratch_dir: str) -> DocumentStorage:
+    """
+    Open a scratch collection on a backend.
+    
+    Args:
+        backend: Entry of STORAGE_BACKENDS
+        scratch_dir: Directory for backends that store data locally
+    
+    Returns:
+        Storage for the scratch collection
+    """
+    user_id = uuid.uuid4().hex[:8]
+    if backend == "qdrant":
+        from app.storage.qdrant_db import QdrantDBStorage
+        return QdrantDBStorage(collection_name="bench_backends", user_id=user_id)
+    if backend == "numpy":
+        from app.storage.numpy_db import NumpyDBStorage
+        return NumpyDBStorage(collection_name="bench_backends", user_id=user_id, storage_dir=scratch_dir)
+    if backend == "chroma":
+        from app.storage.chroma_db import ChromaDBStorage
+        return ChromaDBStorage(collection_name="bench_backends", user_id=user_id, persist_directory=scratch_dir)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def drop_backend(backend: str, storage: DocumentStorage):
+    """Delete the scratch collection of a backend (local directories are removed by the caller)."""
+    if backend in ("qdrant", "chroma"):
+        storage.client.delete_collection(storage.collection_name)
+
+
+def bench_backend(
+    storage: DocumentStorage,
+    chunks: List[DocumentChunk],
+    embeddings: Dict[str, List[float]],
+    queries: np.ndarray,
+    k: int,
+    batch: int
+) -> Dict[str, float]:
+    """
+    Time ingesting the corpus and querying it on one backend.
+    
+    Args:
+        storage: Storage for the scratch collection
+        chunks: Corpus chunks
+        embeddings: Chunk ID to embedding
+        queries: Query vectors
+        k: Number of results per query
+        batch: Queries per query_similar_batch call
+    
+    Returns:
+        Ingest throughput, p50/p99 query latency and batched per-query time
+    """
+    start = time.perf_counter()
+    storage.store_chunks(chunks, embeddings, wait=True)
+    ingest_seconds = time.perf_counter() - start
+    if hasattr(storage, "wait_until_optimized"):
+        storage.wait_until_optimized()
+    
+    # Warm up before timing
+    for query in queries[:10]:
+        storage.query_similar("bench", query.tolist(), k, fields=SEARCH_PAYLOAD_FIELDS)
+    
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        storage.query_similar("bench", query.tolist(), k, fields=SEARCH_PAYLOAD_FIELDS)
+        latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    for offset in range(0, len(queries), batch):
+        group = queries[offset:offset + batch]
+        storage.query_similar_batch(["bench"] * len(group), [query.tolist() for query in group], k, fields=SEARCH_PAYLOAD_FIELDS)
+    batched_seconds = time.perf_counter() - start
+    
+    return {
+        "ingest_per_s": len(chunks) / ingest_seconds,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "batched_ms": batched_seconds / len(queries) * 1000
+    }
+
+
+def main():
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description="Ingest throughput and query latency per storage backend")
+    parser.add_argument("--backends", nargs="+", choices=STORAGE_BACKENDS, default=list(STORAGE_BACKENDS), help="Backends to compare")
+    parser.add_argument("--chunks", type=int, default=20000, help="Number of chunks")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=20, help="Results per query")
+    parser.add_argument("--batch", type=int, default=8, help="Queries per batched request")
+    args = parser.parse_args()
+    
+    chunks, embeddings = build_corpus(args.chunks)
+    queries = np.random.default_rng(1).standard_normal((args.queries, VECTOR_SIZE)).astype(np.float32)
+    print(f"Corpus: {args.chunks} chunks, {args.queries} queries, k={args.k}, batches of {args.batch}")
+    
+    results = []
+    for backend in args.backends:
+        scratch_dir = tempfile.mkdtemp(prefix=f"bench_{backend}_")
+        try:
+            storage = open_backend(backend, scratch_dir)
+        except Exception as e:
+            print(f"{backend}: skipped ({type(e).__name__}: {e})")
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+            continue
+        
+        try:
+            results.append((backend, bench_backend(storage, chunks, embeddings, queries, args.k, args.batch)))
+        finally:
+            drop_backend(backend, storage)
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+    
+    print(f"{'backend':<8}  {'ingest':>13}  {'p50':>9}  {'p99':>9}  {'batched':>9}")
+    for backend, result in results:
+        print(
+            f"{backend:<8}  {result['ingest_per_s']:7.0f} chunk/s  {result['p50_ms']:7.2f}ms  "
+            f"{result['p99_ms']:7.2f}ms  {result['batched_ms']:7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
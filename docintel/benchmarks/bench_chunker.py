@@ -0,0 +1,152 @@
+"""
+Microbenchmarks for DocumentChunker heading detection and section sizing.
+
+Compares the previous per-line scan (four uncompiled ``re.search`` calls per
+line, one ``tokenizer.encode`` per section) against the single-pass scanner
+and document-level token offsets, on ~10MB synthetic inputs.
+
+Usage:
+    python -m benchmarks.bench_chunker [--size-mb 10] [--repeat 3]
+"""
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, Dict, List
+
+from app.chunking.chunker import DocumentChunker
+
+
+# Patterns exactly as they were used before the single-pass scanner
+LEGACY_HEADING_PATTERNS = [
+    r"^#{1,6}\s+(.+)$",
+    r"<h[1-6][^>]*>(.+?)</h[1-6]>",
+    r"^(?:\d+\.)+\d*\s+(.+)$",
+    r"^(.+)\n[=\-]{3,}$"
+]
+
+WORDS = (
+    "the quarterly revenue increased compared with previous period while operating "
+    "costs remained stable across all regions and the board approved new investment "
+    "in research development infrastructure compliance reporting"
+).split()
+
+
+def build_document(size_bytes: int, seed: int = 0) -> str:
+    """
+    Build a synthetic document with a mix of heading styles.
+    
+    Args:
+        size_bytes: Approximate size of the document in bytes
+        seed: Random seed so runs are comparable
+        
+    Returns:
+        Document text
+    """
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    section = 0
+    
+    while size < size_bytes:
+        section += 1
+        style = section % 4
+        if style == 0:
+            heading = f"{'#' * rng.randint(1, 3)} Section {section}"
+        elif style == 1:
+            heading = f"<h2>Section {section}</h2>"
+        elif style == 2:
+            heading = f"{section}.{rng.randint(1, 9)} Section {section}"
+        else:
+            heading = f"Section {section}\n{'=' * 12}"
+        
+        paragraphs = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120)))
+            for _ in range(rng.randint(2, 12))
+        ]
+        block = heading + "\n" + "\n".join(paragraphs) + "\n"
+        parts.append(block)
+        size += len(block)
+    
+    return "".join(parts)
+
+
+def legacy_scan(text: str) -> List[Dict]:
+    """Previous heading scan: every pattern, uncompiled, on every line."""
+    headings = []
+    for i, line in enumerate(text.split("\n")):
+        for pattern in LEGACY_HEADING_PATTERNS:
+            match = re.search(pattern, line)
+            if match:
+                headings.append({"text": match.group(1).strip(), "line": i, "level": 1})
+                break
+    return headings
+
+
+def legacy_section_tokens(chunker: DocumentChunker, text: str, headings: List[Dict]) -> List[int]:
+    """Previous section sizing: re-encode every section."""
+    lines = text.split("\n")
+    counts = []
+    for i, heading in enumerate(headings):
+        end = headings[i + 1]["line"] if i + 1 < len(headings) else len(lines)
+        counts.append(len(chunker.tokenizer.encode("\n".join(lines[heading["line"]:end]))))
+    return counts
+
+
+def document_section_tokens(chunker: DocumentChunker, text: str, headings: List[Dict]) -> List[int]:
+    """Current section sizing: encode once, look sections up in the token offsets."""
+    from bisect import bisect_left
+    from itertools import accumulate
+    
+    lines = text.split("\n")
+    line_offsets = [0, *accumulate(len(line) + 1 for line in lines)]
+    token_offsets = chunker._token_char_offsets(text, chunker.tokenizer.encode_ordinary(text))
+    counts = []
+    for i, heading in enumerate(headings):
+        end_line = headings[i + 1]["line"] if i + 1 < len(headings) else len(lines)
+        start = line_offsets[heading["line"]]
+        end = line_offsets[end_line] - 1
+        counts.append(bisect_left(token_offsets, end) - bisect_left(token_offsets, start))
+    return counts
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    """Return the best wall-clock time of several runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DocumentChunker microbenchmarks")
+    parser.add_argument("--size-mb", type=float, default=10.0, help="Input size in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (best is reported)")
+    args = parser.parse_args()
+    
+    chunker = DocumentChunker()
+    text = build_document(int(args.size_mb * 1024 * 1024))
+    lines = text.split("\n")
+    headings = chunker._scan_headings(lines)
+    
+    print(f"Input: {len(text) / 1e6:.1f} MB, {len(lines)} lines, {len(headings)} headings")
+    
+    results = [
+        ("heading scan (legacy, 4x re.search/line)", best_of(lambda: legacy_scan(text), args.repeat)),
+        ("heading scan (single pass, compiled)", best_of(lambda: chunker._scan_headings(text.split("\n")), args.repeat)),
+        ("section sizing (encode per section)", best_of(lambda: legacy_section_tokens(chunker, text, headings), args.repeat)),
+        ("section sizing (encode once + offsets)", best_of(lambda: document_section_tokens(chunker, text, headings), args.repeat)),
+        ("heading-based chunking end to end", best_of(lambda: list(chunker.iter_chunks(text, {})), args.repeat)),
+        ("heading-based chunking, records only", best_of(lambda: list(chunker.iter_records(text, {})), args.repeat)),
+    ]
+    
+    width = max(len(name) for name, _ in results)
+    for name, seconds in results:
+        print(f"{name:<{width}}  {seconds * 1000:10.1f} ms  {len(text) / seconds / 1e6:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmarks for filter-heavy Qdrant workloads with and without payload indexes.
+
+Fills a scratch collection with synthetic chunks, times the filtered chunk
+lookups the API performs with the payload indexes dropped, then again after
+QdrantDBStorage.ensure_payload_indexes(). The collection is deleted
+afterwards. (Document records are kept in the SQLite document catalog.)
+
+Needs a Qdrant server (payload indexes have no effect in local mode):
+
+Usage:
+    QDRANT_URL=http://localhost:6333 python -m benchmarks.bench_filters [--chunks 20000] [--documents 200] [--repeat 20]
+"""
+
+import argparse
+import random
+import time
+import uuid
+from typing import Callable, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from qdrant_client.http.models import PointStruct
+
+from app.storage.qdrant_db import QdrantDBStorage, PAYLOAD_INDEXES
+
+
+VECTOR_SIZE = 1536
+
+
+def populate(storage: QdrantDBStorage, chunk_count: int, document_count: int, seed: int = 0) -> List[str]:
+    """
+    Fill the collection with chunk points.
+    
+    Args:
+        storage: Storage for the scratch collection
+        chunk_count: Number of chunk points
+        document_count: Number of documents the chunks are spread over
+        seed: Random seed so runs are comparable
+    
+    Returns:
+        Document IDs
+    """
+    rng = np.random.default_rng(seed)
+    document_ids = [f"bench-doc-{i}" for i in range(document_count)]
+    
+    batch = []
+    for i in range(chunk_count):
+        document_id = document_ids[i % document_count]
+        batch.append(PointStruct(
+            id=str(uuid.uuid4()),
+            vector=rng.standard_normal(VECTOR_SIZE).astype(np.float32).tolist(),
+            payload={
+                "source_document_id": document_id,
+                "source_document_type": "pdf",
+                "page_number": i // document_count // 4 + 1,
+                "chunk_ordinal": i // document_count,
+                "is_ocr": False,
+                "user_id": storage.user_id,
+                "text": f"chunk {i}"
+            }
+        ))
+        if len(batch) == 500:
+            storage.client.upsert(collection_name=storage.collection_name, points=batch)
+            batch = []
+    
+    if batch:
+        storage.client.upsert(collection_name=storage.collection_name, points=batch)
+    
+    return document_ids
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    """Return the best wall-clock time of several runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_workloads(storage: QdrantDBStorage, document_ids: List[str], repeat: int) -> List[Tuple[str, float]]:
+    """Time the filtered lookups used by the API."""
+    rng = random.Random(1)
+    query_vector = np.random.default_rng(1).standard_normal(VECTOR_SIZE).astype(np.float32).tolist()
+    
+    def sample() -> str:
+        return rng.choice(document_ids)
+    
+    return [
+        ("get_document_chunks(document_id)", best_of(lambda: storage.get_document_chunks(sample(), fields=["chunk_ordinal"]), repeat)),
+        ("query_similar(source_document_id=...)", best_of(
+            lambda: storage.query_similar("bench", query_vector, 5, {"source_document_id": sample()}), repeat
+        )),
+    ]
+
+
+def main():
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description="Qdrant filter benchmarks with and without payload indexes")
+    parser.add_argument("--chunks", type=int, default=20000, help="Number of chunk points")
+    parser.add_argument("--documents", type=int, default=200, help="Number of documents")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per workload (best is reported)")
+    args = parser.parse_args()
+    
+    storage = QdrantDBStorage(collection_name="bench_filters", user_id=uuid.uuid4().hex[:8])
+    try:
+        document_ids = populate(storage, args.chunks, args.documents)
+        print(f"Collection {storage.collection_name}: {args.chunks} chunks, {args.documents} documents")
+        
+        for field_name in PAYLOAD_INDEXES:
+            storage.client.delete_payload_index(storage.collection_name, field_name, wait=True)
+        before = run_workloads(storage, document_ids, args.repeat)
+        
+        storage.ensure_payload_indexes()
+        after = run_workloads(storage, document_ids, args.repeat)
+        
+        width = max(len(name) for name, _ in before)
+        print(f"{'workload':<{width}}  {'no index':>10}  {'indexed':>10}  speedup")
+        for (name, unindexed), (_, indexed) in zip(before, after):
+            print(f"{name:<{width}}  {unindexed * 1000:8.2f}ms  {indexed * 1000:8.2f}ms  {unindexed / indexed:6.1f}x")
+    finally:
+        storage.client.delete_collection(storage.collection_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Recall and latency of the Qdrant collection profiles on a fixed query set.
+
+Indexes the same vectors into one scratch collection per profile (see
+COLLECTION_PROFILES), runs the same queries through QdrantDBStorage.query_similar
+and compares the results against exact (brute-force) nearest neighbors. The
+vectors are synthetic clustered embeddings by default, or are copied from an
+existing collection with --source-collection. Scratch collections are deleted
+afterwards.
+
+Needs a Qdrant server (quantization and on-disk storage have no effect in local mode):
+
+Usage:
+    QDRANT_URL=http://localhost:6333 python -m benchmarks.bench_profiles [--vectors 20000] [--queries 200] [--k 10]
+        [--profiles memory,scalar,binary,on_disk] [--source-collection documents_alice@example.com]
+"""
+
+import argparse
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from qdrant_client.http.models import PointStruct
+
+from app.storage.qdrant_db import QdrantDBStorage, COLLECTION_PROFILES, VECTOR_SIZE
+
+
+def synthetic_vectors(count: int, seed: int = 0, clusters: int = 64) -> np.ndarray:
+    """
+    Generate unit vectors grouped around random topics, like chunk embeddings.
+    
+    Args:
+        count: Number of vectors
+        seed: Random seed so runs are comparable
+        clusters: Number of topics
+    
+    Returns:
+        Array of shape (count, VECTOR_SIZE)
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, VECTOR_SIZE)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, VECTOR_SIZE)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def collection_vectors(collection_name: str, count: int) -> np.ndarray:
+    """
+    Copy stored chunk embeddings from an existing collection.
+    
+    Args:
+        collection_name: Collection to read
+        count: Maximum number of vectors
+    
+    Returns:
+        Array of unit vectors
+    """
+    storage = QdrantDBStorage(collection_name=collection_name)
+    vectors = []
+    offset = None
+    while len(vectors) < count:
+        points, offset = storage.client.scroll(
+            collection_name=collection_name,
+            limit=min(1000, count - len(vectors)),
+            offset=offset,
+            with_payload=False,
+            with_vectors=True
+        )
+        vectors.extend(point.vector for point in points)
+        if offset is None:
+            break
+    
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_neighbors(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    """Brute-force top-k cosine neighbors (indices into vectors) of each query."""
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return [set(row.tolist()) for row in top]
+
+
+def bench_profile(
+    profile_name: str,
+    run_id: str,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    truth: List[set],
+    k: int
+) -> Dict[str, float]:
+    """
+    Index the vectors with one profile and time the queries.
+    
+    Args:
+        profile_name: Name of the COLLECTION_PROFILES entry
+        run_id: Suffix making the scratch collection name unique
+        vectors: Vectors to index
+        queries: Query vectors
+        truth: Exact neighbors of each query
+        k: Number of results per query
+    
+    Returns:
+        Recall@k, latency percentiles and indexing time
+    """
+    storage = QdrantDBStorage(collection_name=f"bench_profiles_{profile_name}", user_id=run_id, profile=profile_name)
+    try:
+        start = time.perf_counter()
+        for batch_start in range(0, len(vectors), 500):
+            storage.client.upsert(
+                collection_name=storage.collection_name,
+                points=[
+                    PointStruct(id=str(uuid.UUID(int=i)), vector=vectors[i].tolist(), payload={"text": ""})
+                    for i in range(batch_start, min(batch_start + 500, len(vectors)))
+                ]
+            )
+        storage.wait_until_optimized()
+        index_seconds = time.perf_counter() - start
+        
+        # Warm up caches and connections before timing
+        for query in queries[:10]:
+            storage.query_similar("bench", query.tolist(), k)
+        
+        latencies, recalls = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            results = storage.query_similar("bench", query.tolist(), k)
+            latencies.append(time.perf_counter() - start)
+            found = {uuid.UUID(str(result["chunk_id"])).int for result in results}
+            recalls.append(len(found & expected) / k)
+        
+        return {
+            "recall": float(np.mean(recalls)),
+            "p50_ms": float(np.percentile(latencies, 50) * 1000),
+            "p95_ms": float(np.percentile(latencies, 95) * 1000),
+            "index_s": index_seconds
+        }
+    finally:
+        storage.client.delete_collection(storage.collection_name)
+
+
+def main():
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description="Recall/latency comparison of Qdrant collection profiles")
+    parser.add_argument("--vectors", type=int, default=20000, help="Number of indexed vectors")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries (held out from the vectors)")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--profiles", default=",".join(COLLECTION_PROFILES), help="Comma-separated profiles to compare")
+    parser.add_argument("--source-collection", help="Use the embeddings of this collection instead of synthetic ones")
+    args = parser.parse_args()
+    
+    profile_names = args.profiles.split(",")
+    unknown = [name for name in profile_names if name not in COLLECTION_PROFILES]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)}")
+    
+    total = args.vectors + args.queries
+    if args.source_collection:
+        data = collection_vectors(args.source_collection, total)
+    else:
+        data = synthetic_vectors(total)
+    queries, vectors = data[:args.queries], data[args.queries:]
+    truth = exact_neighbors(vectors, queries, args.k)
+    print(f"{len(vectors)} vectors, {len(queries)} queries, k={args.k}")
+    
+    run_id = uuid.uuid4().hex[:8]
+    results: List[Tuple[str, Dict[str, float]]] = []
+    for profile_name in profile_names:
+        results.append((profile_name, bench_profile(profile_name, run_id, vectors, queries, truth, args.k)))
+    
+    print(f"{'profile':<10}  {'recall@k':>8}  {'p50':>9}  {'p95':>9}  {'indexing':>9}")
+    for profile_name, result in results:
+        print(
+            f"{profile_name:<10}  {result['recall']:8.3f}  {result['p50_ms']:7.2f}ms  "
+            f"{result['p95_ms']:7.2f}ms  {result['index_s']:8.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Search latency over REST and gRPC, with full and projected payloads.
+
+Fills a scratch collection with synthetic chunks carrying realistic payloads
+(text, heading paths, bounding boxes, copied parser metadata), then times the
+searches QdrantDBStorage.query_similar makes over each transport, returning
+either the whole payload or only SEARCH_PAYLOAD_FIELDS. Search time covers the request and the
+client's response parsing; decode time is the conversion of the hits to chunk
+dictionaries. The collection is deleted afterwards.
+
+Needs a Qdrant server with the gRPC port open:
+
+Usage:
+    QDRANT_URL=http://localhost:6333 python -m benchmarks.bench_search [--chunks 20000] [--queries 200] [--k 20]
+"""
+
+import argparse
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from qdrant_client import QdrantClient
+
+from app.chunking.models import DocumentChunk
+from app.storage.base import SEARCH_PAYLOAD_FIELDS, VECTOR_SIZE
+from app.storage.qdrant_db import QdrantDBStorage, qdrant_client_options
+
+
+def populate(storage: QdrantDBStorage, chunk_count: int, seed: int = 0):
+    """
+    Fill the collection with chunks shaped like parsed PDF chunks.
+    
+    Args:
+        storage: Storage for the scratch collection
+        chunk_count: Number of chunks
+        seed: Random seed so runs are comparable
+    """
+    rng = np.random.default_rng(seed)
+    words = [f"word{i}" for i in range(2000)]
+    
+    chunks = []
+    for i in range(chunk_count):
+        chunks.append(DocumentChunk(
+            text=" ".join(rng.choice(words, 180)),
+            source_document_id=f"bench-doc-{i // 200}",
+            source_document_name=f"bench-doc-{i // 200}.pdf",
+            source_document_type="pdf",
+            page_number=i % 200 // 4 + 1,
+            chunk_ordinal=i % 200,
+            heading_path=["Report", f"Section {i % 200 // 20}", f"Subsection {i % 20}"],
+            heading_level=3,
+            start_index=0,
+            end_index=1200,
+            bounding_box={"x0": 72.0, "y0": 100.0 + i % 4 * 150, "x1": 540.0, "y1": 240.0 + i % 4 * 150},
+            metadata={"author": "Benchmark", "title": "Synthetic report", "keywords": ["a", "b", "c"], "producer": "bench"}
+        ))
+    
+    vectors = rng.standard_normal((chunk_count, VECTOR_SIZE)).astype(np.float32)
+    storage.store_chunks(chunks, {chunk.chunk_id: vector.tolist() for chunk, vector in zip(chunks, vectors)})
+
+
+def bench_queries(storage: QdrantDBStorage, queries: np.ndarray, k: int, fields: Optional[List[str]]) -> Dict[str, float]:
+    """
+    Time the queries with one payload selection.
+    
+    Args:
+        storage: Storage whose client is used
+        queries: Query vectors
+        k: Number of results per query
+        fields: Payload fields to return (None for the whole payload)
+    
+    Returns:
+        Median search and decode times in milliseconds
+    """
+    selector = storage._search_payload_selector(fields)
+    
+    # Warm up connections before timing
+    for query in queries[:10]:
+        storage.query_similar("bench", query.tolist(), k, fields=fields)
+    
+    search_times, decode_times = [], []
+    for query in queries:
+        start = time.perf_counter()
+        response = storage.client.query_points(
+            collection_name=storage.collection_name,
+            query=query.tolist(),
+            limit=k,
+            search_params=storage.search_params,
+            with_payload=selector
+        )
+        searched = time.perf_counter()
+        [storage._format_search_result(point) for point in response.points]
+        search_times.append(searched - start)
+        decode_times.append(time.perf_counter() - searched)
+    
+    return {
+        "search_ms": float(np.median(search_times) * 1000),
+        "decode_ms": float(np.median(decode_times) * 1000)
+    }
+
+
+def main():
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description="Qdrant search latency by transport and payload selection")
+    parser.add_argument("--chunks", type=int, default=20000, help="Number of chunks")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=20, help="Results per query")
+    args = parser.parse_args()
+    
+    storage = QdrantDBStorage(collection_name="bench_search", user_id=uuid.uuid4().hex[:8])
+    try:
+        populate(storage, args.chunks)
+        storage.wait_until_optimized()
+        queries = np.random.default_rng(1).standard_normal((args.queries, VECTOR_SIZE)).astype(np.float32)
+        print(f"Collection {storage.collection_name}: {args.chunks} chunks, {args.queries} queries, k={args.k}")
+        
+        results: List[tuple] = []
+        for transport, prefer_grpc in (("rest", False), ("grpc", True)):
+            storage.client = QdrantClient(**{**qdrant_client_options(), "prefer_grpc": prefer_grpc})
+            for selection, fields in (("full", None), ("projected", SEARCH_PAYLOAD_FIELDS)):
+                results.append((transport, selection, bench_queries(storage, queries, args.k, fields)))
+        
+        print(f"{'transport':<9}  {'payload':<9}  {'search':>9}  {'decode':>9}")
+        for transport, selection, result in results:
+            print(f"{transport:<9}  {selection:<9}  {result['search_ms']:7.2f}ms  {result['decode_ms']:7.3f}ms")
+    finally:
+        storage.client.delete_collection(storage.collection_name)
+
+
+if __name__ == "__main__":
+    main()
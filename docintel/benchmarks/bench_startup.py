@@ -0,0 +1,115 @@
+"""
+Cold-start import time of the API, with a regression check.
+
+Imports app.main in fresh interpreters with ``python -X importtime`` (the
+same work a scaled-to-zero machine does before serving its first request)
+and reports the median import time plus the slowest individual imports.
+
+Exits with status 1 if the median exceeds the budget, or if any library that
+is meant to load on first use (parsers, model SDKs, the Qdrant and Google
+clients) was imported at startup. The second check does not depend on the
+speed of the machine, so it catches regressions reliably in CI.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 1200] [--top 15]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+
+# Libraries loaded on first use; importing any of them at startup is a regression
+LAZY_MODULES = (
+    "fitz",
+    "pymupdf",
+    "pandas",
+    "openpyxl",
+    "pptx",
+    "docx",
+    "PIL",
+    "tiktoken",
+    "openai",
+    "groq",
+    "qdrant_client",
+    "chromadb",
+    "googleapiclient",
+    "google_auth_oauthlib"
+)
+
+# Directory containing the app package
+DOCINTEL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module: str = "app.main") -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """
+    Import a module in a fresh interpreter and parse its import times.
+    
+    Args:
+        module: Module to import
+    
+    Returns:
+        Tuple of (cumulative import time of the module in ms, module name to (self, cumulative) microseconds)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=DOCINTEL_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports[name.strip()] = (int(self_us), int(cumulative_us))
+    
+    return imports[module][1] / 1000, imports
+
+
+def eager_lazy_modules(imported: Set[str]) -> List[str]:
+    """Get the first-use libraries that were imported (top-level package names)."""
+    return sorted({name.split(".")[0] for name in imported} & set(LAZY_MODULES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time of app.main")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time (median is reported)")
+    parser.add_argument("--budget-ms", type=float, default=1200.0, help="Maximum median import time")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args()
+    
+    timings, imported = [], {}
+    for _ in range(args.runs):
+        total_ms, imports = measure_import()
+        timings.append(total_ms)
+        imported = imports
+    
+    median_ms = statistics.median(timings)
+    print(f"import app.main: median {median_ms:.0f}ms over {args.runs} runs (min {min(timings):.0f}ms, max {max(timings):.0f}ms)")
+    
+    print("\nSlowest imports of the last run (self time):")
+    for name, (self_us, cumulative_us) in sorted(imported.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {self_us / 1000:8.1f}ms  {cumulative_us / 1000:8.1f}ms cumulative  {name}")
+    
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.0f}ms exceeds the {args.budget_ms:.0f}ms budget")
+    eager = eager_lazy_modules(set(imported))
+    if eager:
+        failures.append(f"imported at startup instead of on first use: {', '.join(eager)}")
+    
+    if failures:
+        print("\nFAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import pytest
+
+from app.chunking.records import ChunkRecord, DocumentContext
+from app.ingestion.dedup import ChunkDeduplicator, NearDuplicateIndex
+
+
+FOOTER = (
+    "This report is confidential and intended only for the recipients named above. "
+    "Do not forward, copy or distribute it without written approval from the finance team."
+)
+BODY = (
+    "Quarterly revenue grew by twelve percent compared with the same period last year, "
+    "driven by subscription renewals in the northern region and new enterprise contracts."
+)
+
+
+def make_record(text, page_number, context):
+    return ChunkRecord(text=text, metadata={"page_number": page_number}, context=context, page_number=page_number)
+
+
+@pytest.fixture
+def context():
+    return DocumentContext(document_id="doc-1", document_name="report.pdf", document_type="pdf")
+
+
+class FakeStorage:
+    """Storage returning fixed stored fingerprints for any band lookup."""
+    
+    def __init__(self, stored):
+        self.stored = stored
+        self.excluded = []
+    
+    def find_chunks_by_simhash_bands(self, bands, exclude_document_id=None):
+        self.excluded.append(exclude_document_id)
+        return list(self.stored.items())
+
+
+def test_index_finds_fingerprints_within_max_distance():
+    index = NearDuplicateIndex(max_distance=3)
+    index.add("a", 0b1011 << 40)
+    
+    assert index.find((0b1011 << 40) ^ 0b111) == "a"
+    assert index.find((0b1011 << 40) ^ 0b1111) is None
+
+
+def test_index_rejects_max_distance_not_below_bands():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(max_distance=4, bands=4)
+
+
+def test_filter_keeps_first_occurrence_and_records_provenance(context):
+    records = [make_record(FOOTER, 1, context), make_record(BODY, 1, context), make_record(FOOTER, 2, context)]
+    deduplicator = ChunkDeduplicator()
+    
+    unique = deduplicator.filter(records)
+    
+    assert unique == records[:2]
+    assert deduplicator.duplicate_count == 1
+    assert deduplicator.dedup_ratio == pytest.approx(1 / 3)
+    assert deduplicator.provenance_updates() == {
+        records[0].chunk_id: [
+            {"source_document_id": "doc-1", "page_number": 1},
+            {"source_document_id": "doc-1", "page_number": 2}
+        ]
+    }
+
+
+def test_filter_always_keeps_short_texts(context):
+    records = [make_record("Page 1", 1, context), make_record("Page 1", 2, context)]
+    deduplicator = ChunkDeduplicator()
+    
+    assert deduplicator.filter(records) == records
+    assert deduplicator.duplicate_count == 0
+
+
+def test_filter_drops_chunks_stored_for_other_documents(context):
+    stored_record = make_record(FOOTER, 5, context)
+    ChunkDeduplicator().filter([stored_record])
+    storage = FakeStorage({"stored-point": stored_record.simhash})
+    deduplicator = ChunkDeduplicator(storage=storage, document_id="doc-1")
+    
+    unique = deduplicator.filter([make_record(FOOTER, 1, context), make_record(BODY, 1, context)])
+    
+    assert [record.text for record in unique] == [BODY]
+    assert storage.excluded == ["doc-1"]
+    assert deduplicator.provenance_updates() == {
+        "stored-point": [{"source_document_id": "doc-1", "page_number": 1}]
+    }
@@ -0,0 +1,97 @@
+import pytest
+
+from app.storage.document_catalog import DocumentCatalog
+
+
+COLLECTION = "documents_alice"
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return DocumentCatalog(str(tmp_path / "catalog.db"))
+
+
+def make_record(document_id, content_hash, chunk_count=10, file_size=1000, document_type="pdf", user_id="alice"):
+    return {
+        "document_id": document_id,
+        "user_id": user_id,
+        "filename": f"{document_id}.{document_type}",
+        "content_hash": content_hash,
+        "document_type": document_type,
+        "chunk_count": chunk_count,
+        "ocr_chunk_count": 2,
+        "file_size": file_size
+    }
+
+
+def test_statistics_follow_inserts_and_deletes(catalog):
+    catalog.put_documents(COLLECTION, [make_record("doc-1", "hash-1"), make_record("doc-2", "hash-2", document_type="docx")])
+    
+    stats = catalog.get_statistics(COLLECTION, "alice")
+    assert stats["total_documents"] == 2
+    assert stats["document_types"] == {"pdf": 1, "docx": 1}
+    assert stats["total_chunks"] == 20
+    assert stats["total_ocr_chunks"] == 4
+    assert stats["total_bytes"] == 2000
+    
+    catalog.delete_document(COLLECTION, "doc-1", "alice")
+    
+    stats = catalog.get_statistics(COLLECTION, "alice")
+    assert stats["total_documents"] == 1
+    assert stats["document_types"] == {"docx": 1}
+    assert stats["total_chunks"] == 10
+
+
+def test_replaced_record_adjusts_statistics_once(catalog):
+    catalog.put_documents(COLLECTION, [make_record("doc-1", "hash-1", chunk_count=10, file_size=1000)])
+    catalog.put_documents(COLLECTION, [make_record("doc-1", "hash-2", chunk_count=25, file_size=3000)])
+    
+    stats = catalog.get_statistics(COLLECTION, "alice")
+    assert stats["total_documents"] == 1
+    assert stats["total_chunks"] == 25
+    assert stats["total_bytes"] == 3000
+    assert catalog.reconcile_statistics(COLLECTION) == 0
+
+
+def test_statistics_are_kept_per_user(catalog):
+    catalog.put_documents(COLLECTION, [make_record("doc-1", "hash-1"), make_record("doc-2", "hash-2", user_id="bob")])
+    
+    assert catalog.get_statistics(COLLECTION, "alice")["total_documents"] == 1
+    assert catalog.get_statistics(COLLECTION, "bob")["total_documents"] == 1
+    assert catalog.get_statistics(COLLECTION)["total_documents"] == 2
+
+
+def test_only_one_document_can_claim_a_hash(catalog):
+    assert catalog.claim_content(COLLECTION, "hash-1", "doc-1", "alice") is None
+    assert catalog.claim_content(COLLECTION, "hash-1", "doc-2", "alice") == "doc-1"
+    assert catalog.claim_content(COLLECTION, "hash-1", "doc-3", "bob") is None
+
+
+def test_claim_moves_to_new_hash_on_reingest(catalog):
+    catalog.put_documents(COLLECTION, [make_record("doc-1", "hash-1")])
+    assert catalog.claim_content(COLLECTION, "hash-1", "doc-2", "alice") == "doc-1"
+    
+    # New version of doc-1: claim its hash while ingesting, then store the record
+    assert catalog.claim_content(COLLECTION, "hash-2", "doc-1", "alice") is None
+    assert catalog.claim_content(COLLECTION, "hash-1", "doc-2", "alice") == "doc-1"
+    catalog.put_documents(COLLECTION, [make_record("doc-1", "hash-2")])
+    
+    assert catalog.claim_content(COLLECTION, "hash-2", "doc-2", "alice") == "doc-1"
+    assert catalog.claim_content(COLLECTION, "hash-1", "doc-2", "alice") is None
+
+
+def test_release_keeps_claim_backed_by_stored_record(catalog):
+    catalog.put_documents(COLLECTION, [make_record("doc-1", "hash-1")])
+    catalog.claim_content(COLLECTION, "hash-2", "doc-1", "alice")
+    
+    assert not catalog.release_content(COLLECTION, "hash-1", "doc-1", "alice")
+    assert catalog.release_content(COLLECTION, "hash-2", "doc-1", "alice")
+    assert catalog.claim_content(COLLECTION, "hash-2", "doc-2", "alice") is None
+
+
+def test_deleting_a_document_releases_its_claim(catalog):
+    catalog.put_documents(COLLECTION, [make_record("doc-1", "hash-1")])
+    
+    catalog.delete_document(COLLECTION, "doc-1", "alice")
+    
+    assert catalog.claim_content(COLLECTION, "hash-1", "doc-2", "alice") is None
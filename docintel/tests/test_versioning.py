@@ -0,0 +1,83 @@
+from app.chunking.records import ChunkRecord, DocumentContext
+from app.ingestion.versioning import ChunkVersioner
+
+
+CONTEXT = DocumentContext(document_id="doc-1", document_name="notes.docx", document_type="docx")
+
+
+def make_records(texts):
+    """Records laid out one after another on page 1, as the chunker numbers them."""
+    records = []
+    start = 0
+    for ordinal, text in enumerate(texts):
+        records.append(ChunkRecord(
+            text=text,
+            metadata={"page_number": 1},
+            context=CONTEXT,
+            page_number=1,
+            start_index=start,
+            end_index=start + len(text),
+            chunk_ordinal=ordinal
+        ))
+        start += len(text)
+    return records
+
+
+def stored_locations(records):
+    """Locations as returned by get_chunk_locations for stored records."""
+    return {
+        record.chunk_id: {
+            "page_number": record.page_number,
+            "start_index": record.start_index,
+            "end_index": record.end_index,
+            "chunk_ordinal": record.chunk_ordinal
+        }
+        for record in records
+    }
+
+
+def ingest(texts, stored=None):
+    versioner = ChunkVersioner("doc-1", stored)
+    records = make_records(texts)
+    versioner.assign_ids(records)
+    new_records, moved_records = versioner.split(records)
+    return versioner, records, new_records, moved_records
+
+
+def test_chunk_ids_depend_on_text_and_occurrence():
+    _, records, _, _ = ingest(["alpha", "beta", "alpha"])
+    _, again, _, _ = ingest(["alpha", "beta", "alpha"])
+    
+    assert [record.chunk_id for record in records] == [record.chunk_id for record in again]
+    assert records[0].chunk_id != records[2].chunk_id
+
+
+def test_unchanged_document_needs_no_work():
+    _, previous, _, _ = ingest(["alpha", "beta", "gamma"])
+    
+    versioner, _, new_records, moved_records = ingest(["alpha", "beta", "gamma"], stored_locations(previous))
+    
+    assert new_records == [] and moved_records == []
+    assert versioner.unchanged_count == 3
+    assert versioner.removed_ids() == []
+
+
+def test_chunk_inserted_at_start_moves_the_rest():
+    _, previous, _, _ = ingest(["alpha", "beta", "gamma"])
+    
+    versioner, records, new_records, moved_records = ingest(["intro", "alpha", "beta", "gamma"], stored_locations(previous))
+    
+    assert [record.text for record in new_records] == ["intro"]
+    assert [record.text for record in moved_records] == ["alpha", "beta", "gamma"]
+    assert [record.chunk_id for record in moved_records] == [record.chunk_id for record in previous]
+    assert versioner.removed_ids() == []
+
+
+def test_chunks_missing_from_new_version_are_removed():
+    _, previous, _, _ = ingest(["alpha", "beta", "gamma"])
+    
+    versioner, _, new_records, moved_records = ingest(["alpha", "zeta", "gamma"], stored_locations(previous))
+    
+    assert [record.text for record in new_records] == ["zeta"]
+    assert moved_records == []
+    assert versioner.removed_ids() == [previous[1].chunk_id]